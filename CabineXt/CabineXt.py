@@ -1,5 +1,47 @@
+"""
+CabineXt: lays out the cabinets of many walls from the command line.
+
+Reads wall specifications as CSV or JSON Lines from a file or stdin, lays the walls out across a
+pool of worker processes and writes one JSON line per wall, in input order, as results come in.
+Only a bounded number of batches is in flight at once, so inputs of any size run in constant memory.
+
+Each wall has a width (inches) and optionally an id, a height (inches, default 96) and an
+orientation ("left", "top" or "right", default "top") that picks its generation methods, or explicit
+"base" (b1, b2 or b3) and "upper" (u1, u2 or u3) generation methods.
+
+The walls are filled with the sizes of the backend's built-in catalog line (backend/object/standard.py)
+unless --catalog gives a catalog file (the JSON or CSV files the backend's load_catalog command reads),
+in which case only the widths of its line are used and the corner space follows its corner cabinets.
+Like the backend, the fills measure in whole quanta (sixteenths of an inch, see
+backend/object/geometry.py): widths are rounded to the nearest quantum and never drift.
+
+Typical usage example:
+
+    python CabineXt.py walls.csv --workers 8 --output layouts.jsonl
+    cat walls.jsonl | python CabineXt.py --format jsonl > layouts.jsonl
+    python CabineXt.py walls.csv --catalog shaker.json --line Shaker
+"""
+
+import argparse
+import collections
+import csv
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+# The backend's geometry and standard sizes don't need Django, so the CLI measures and fills walls
+# the same way as the backend's built-in catalog line
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "backend"))
+from object import geometry, standard  # noqa: E402
+
+
 class Cabinet:
-    VALID_SIZES = [36, 33, 30, 27, 24, 21, 18, 15, 12, 9]  # Standard cabinet sizes
+    VALID_SIZES = standard.CABINET_SIZES  # Standard cabinet sizes
 
     def __init__(self, width, height, depth, name):
         self._validate_width(width)
@@ -24,8 +66,8 @@ class Base(Cabinet):
 
 class BaseCorner(Base):
     def __init__(self, width):
-        if width not in [33, 36]:
-            raise ValueError("Width must be either 33 or 36 inches.")
+        if width not in standard.BASE_CORNER_SIZES:
+            raise ValueError(f"Width must be one of {standard.BASE_CORNER_SIZES} inches.")
         super().__init__(width)
         self.name = f"BC{width}"
 
@@ -38,11 +80,11 @@ class Upper(Cabinet):
 
 
 class UpperCorner(Upper):
-    WIDTH = 24
+    WIDTH = standard.UPPER_CORNER_WIDTH
 
     def __init__(self, height):
         super().__init__(UpperCorner.WIDTH, height)
-        self.name = "UC24"
+        self.name = f"UC{UpperCorner.WIDTH}"
 
 
 class Filler(Cabinet):
@@ -50,82 +92,124 @@ class Filler(Cabinet):
         super().__init__(width, None, None, name="F")
 
 
+def widest_first(widths):
+    """Converts widths (in inches) to quanta, widest first."""
+    return sorted(geometry.units_of(tuple(widths)), reverse=True)
+
+
+# Widths (in quanta, widest first) of each kind of cabinet, by name prefix: the sizes of the backend's
+# built-in line, unless --catalog replaces them
+SIZES = {
+    "B": widest_first(standard.CABINET_SIZES),
+    "U": widest_first(standard.CABINET_SIZES),
+    "BC": widest_first(standard.BASE_CORNER_SIZES),
+    "UC": widest_first([standard.UPPER_CORNER_WIDTH]),
+}
+
+FIXED_PATTERN = geometry.units_of(tuple(standard.FIXED_PATTERN))  # Sizes tried (in order) by fixed_pattern_fill
+ROTATING_PATTERN = geometry.units_of(tuple(standard.ROTATING_PATTERN))  # Default sizes rotated through by rotating1_fill
+SHRINK = geometry.units_of(tuple(standard.SHRINK))  # Leftover range in which the last cabinet is taken down, and by how much
+
+
+def corner_width(prefix):
+    """Returns the width (in quanta) of the widest corner cabinet of a prefix ("BC" or "UC"), or 0 if there is none."""
+    return SIZES[prefix][0] if SIZES[prefix] else 0
+
+
+def cabinet_name(prefix, units):
+    """Returns the name of a cabinet or filler from its prefix and width in quanta (e.g. "B36" or "F0.3125")."""
+    return f"{prefix}{geometry.to_inches(units)}"
+
+
+def finish(cabinet_prefix, sizes, filler):
+    """Returns the names of the cabinets placed by a fill, followed by its filler (if any)."""
+    names = [cabinet_name(cabinet_prefix, size) for size in sizes]
+    if filler:
+        names.append(cabinet_name("F", filler))
+    return names
+
+
 class Wall:
+    """
+    A wall to fill. Every length is a whole number of quanta (see backend/object/geometry.py), so the
+    widths placed add up exactly and a 100.3 in wall never leaves a drifting filler.
+    """
+
     def __init__(self, width, height):
-        self.width = width
+        self.width = width  # In quanta
         self.height = height
         self.bases = []
         self.uppers = []
 
-    def greedy_fill(self, remaining_width, cabinet_prefix):
-        """Fills cabinets greedily and uses filler if needed."""
-        cabinets = []
+    def greedy_fill(self, remaining, cabinet_prefix):
+        """Fills cabinets greedily and uses filler if needed (lengths in quanta)."""
+        sizes = SIZES[cabinet_prefix]
+        shrink_low, shrink_high, shrink = SHRINK
+        placed_sizes = []
+        filler = 0
 
-        while remaining_width > 0:
+        while remaining > 0:
             placed = False
-            for size in Cabinet.VALID_SIZES:
-                if size <= remaining_width:
-                    cabinets.append(f"{cabinet_prefix}{size}")
-                    remaining_width -= size
+            for size in sizes:
+                if size <= remaining:
+                    placed_sizes.append(size)
+                    remaining -= size
                     placed = True
                     break
 
-            if 3 < remaining_width < 9 and len(cabinets) > 0:
-                last_cabinet = cabinets.pop()
-                last_size = int(last_cabinet[1:])
-                if last_size - 6 in Cabinet.VALID_SIZES:
-                    new_size = last_size - 6
-                    cabinets.append(f"{cabinet_prefix}{new_size}")
-                    remaining_width += 6
-                else:
-                    cabinets.append(last_cabinet)
+            if shrink_low < remaining < shrink_high and placed_sizes:
+                if placed_sizes[-1] - shrink in sizes:
+                    placed_sizes[-1] -= shrink
+                    remaining += shrink
 
             if not placed:
-                cabinets.append(f"F{remaining_width}")
-                remaining_width = 0
+                filler = remaining
+                remaining = 0
 
-        return cabinets
+        return finish(cabinet_prefix, placed_sizes, filler)
 
-    def fixed_pattern_fill(self, remaining_width, cabinet_prefix):
-        """Fills cabinets using a fixed pattern and includes filler as needed."""
-        pattern = [33, 27, 24, 21, 18, 12, 9]
-        cabinets = []
+    def fixed_pattern_fill(self, remaining, cabinet_prefix):
+        """Fills cabinets using a fixed pattern and includes filler as needed (lengths in quanta)."""
+        sizes = SIZES[cabinet_prefix]
+        pattern = [size for size in FIXED_PATTERN if size in sizes]
+        shrink_low, shrink_high, shrink = SHRINK
+        placed_sizes = []
+        filler = 0
 
-        while remaining_width > 0:
+        while remaining > 0:
             placed = False
             for size in pattern:
-                if size <= remaining_width:
-                    cabinets.append(f"{cabinet_prefix}{size}")
-                    remaining_width -= size
+                if size <= remaining:
+                    placed_sizes.append(size)
+                    remaining -= size
                     placed = True
                     break
 
-            if 3 < remaining_width < 9 and len(cabinets) > 0:
-                last_cabinet = cabinets.pop()
-                last_size = int(last_cabinet[1:])
-                if last_size - 6 in Cabinet.VALID_SIZES:
-                    new_size = last_size - 6
-                    cabinets.append(f"{cabinet_prefix}{new_size}")
-                    remaining_width += 6
-                else:
-                    cabinets.append(last_cabinet)
+            if shrink_low < remaining < shrink_high and placed_sizes:
+                if placed_sizes[-1] - shrink in sizes:
+                    placed_sizes[-1] -= shrink
+                    remaining += shrink
 
             if not placed:
-                cabinets.append(f"F{remaining_width}")
-                remaining_width = 0
+                filler = remaining
+                remaining = 0
 
-        return cabinets
+        return finish(cabinet_prefix, placed_sizes, filler)
 
-    def rotating1_fill(self, remaining_width, cabinet_prefix, pattern=None):
-        """Fills cabinets by rotating through a list without repeating the same size."""
+    def rotating1_fill(self, remaining, cabinet_prefix, pattern=None):
+        """Fills cabinets by rotating through a list without repeating the same size (lengths in quanta)."""
+        sizes = SIZES[cabinet_prefix]
         if pattern is None:
-            pattern = [18, 36, 30, 21, 18, 15, 12, 9]
+            pattern = ROTATING_PATTERN
+        pattern = [size for size in pattern if size in sizes]
+        shrink_low, shrink_high, shrink = SHRINK
 
-        cabinets = []
+        placed_sizes = []
+        filler = 0
         pattern_index = 0
         pattern_len = len(pattern)
 
-        while remaining_width > 0:
+        while remaining > 0:
             attempted = 0
             placed = False
 
@@ -134,76 +218,337 @@ class Wall:
                 pattern_index += 1
                 attempted += 1
 
-                if size <= remaining_width:
-                    cabinets.append(f"{cabinet_prefix}{size}")
-                    remaining_width -= size
+                if size <= remaining:
+                    placed_sizes.append(size)
+                    remaining -= size
                     placed = True
                     break
 
-            if 3 < remaining_width < 9 and len(cabinets) > 0:
-                last_cabinet = cabinets.pop()
-                last_size = int(last_cabinet[1:])
-                if last_size - 6 in Cabinet.VALID_SIZES:
-                    new_size = last_size - 6
-                    cabinets.append(f"{cabinet_prefix}{new_size}")
-                    remaining_width += 6
-                else:
-                    cabinets.append(last_cabinet)
+            if shrink_low < remaining < shrink_high and placed_sizes:
+                if placed_sizes[-1] - shrink in sizes:
+                    placed_sizes[-1] -= shrink
+                    remaining += shrink
 
             if not placed:
-                cabinets.append(f"F{remaining_width}")
-                remaining_width = 0
+                filler = remaining
+                remaining = 0
 
-        return cabinets
+        return finish(cabinet_prefix, placed_sizes, filler)
 
     def generation_b1(self):
-        remaining_width = self.width - 36
-        self.bases = self.rotating1_fill(remaining_width, "B")
-        self.bases.append("BC36")
+        corner = corner_width("BC")
+        self.bases = self.rotating1_fill(self.width - corner, "B")
+        if corner:
+            self.bases.append(cabinet_name("BC", corner))
 
     def generation_b2(self):
-        remaining_width = self.width - 72
+        remaining_width = self.width - 2 * corner_width("BC")
         self.bases = self.greedy_fill(remaining_width, "B")
 
     def generation_b3(self):
-        remaining_width = self.width - 36
-        self.bases = self.fixed_pattern_fill(remaining_width, "B")
-        self.bases.insert(0, "BC36")
+        corner = corner_width("BC")
+        self.bases = self.fixed_pattern_fill(self.width - corner, "B")
+        if corner:
+            self.bases.insert(0, cabinet_name("BC", corner))
 
     def generation_u1(self):
-        remaining_width = self.width - 24
-        self.uppers = self.greedy_fill(remaining_width, "U")
-        self.uppers.append("UC24")
+        corner = corner_width("UC")
+        self.uppers = self.greedy_fill(self.width - corner, "U")
+        if corner:
+            self.uppers.append(cabinet_name("UC", corner))
 
     def generation_u2(self):
-        remaining_width = self.width - 48
+        remaining_width = self.width - 2 * corner_width("UC")
         self.uppers = self.greedy_fill(remaining_width, "U")
 
     def generation_u3(self):
-        remaining_width = self.width - 24
-        self.uppers = self.greedy_fill(remaining_width, "U")
-        self.uppers.insert(0, "UC24")
-
-
-def main():
-    wall1 = Wall(180, 96)
-    wall2 = Wall(120, 96)
-    wall3 = Wall(150, 96)
-
-    wall1.generation_b1()
-    wall2.generation_b2()
-    wall3.generation_b3()
-
-    wall1.generation_u1()
-    wall2.generation_u2()
-    wall3.generation_u3()
-
-    for i, wall in enumerate([wall1, wall2, wall3], start=1):
-        print(f"\nWall {i} Base Cabinets:")
-        print(wall.bases)
-        print(f"Wall {i} Upper Cabinets:")
-        print(wall.uppers)
+        corner = corner_width("UC")
+        self.uppers = self.greedy_fill(self.width - corner, "U")
+        if corner:
+            self.uppers.insert(0, cabinet_name("UC", corner))
+
+
+# Generation methods used for each wall orientation, as (base method, upper method)
+ORIENTATION_GENERATIONS = {
+    "left": ("b1", "u1"),
+    "top": ("b2", "u2"),
+    "right": ("b1", "u1"),
+}
+
+BASE_GENERATIONS = ("b1", "b2", "b3")
+UPPER_GENERATIONS = ("u1", "u2", "u3")
+
+DEFAULT_HEIGHT = 96  # inches
+
+
+def parse_number(value, name="length"):
+    """
+    Parses a width or height, keeping whole numbers as ints so names read "F4" rather than "F4.0".
+
+    Args:
+        value (str | float): The value to parse.
+        name (str): What the value is, for the error message.
+
+    Returns:
+        int | float: The number.
+
+    Raises:
+        ValueError: If the value is not a number, is not finite (an infinite width would never
+            finish filling) or is negative.
+    """
+    number = float(value)
+    if not math.isfinite(number) or number < 0:
+        raise ValueError(f"Invalid {name}: {value!r}. Must be a finite number of inches, 0 or more.")
+    return int(number) if number.is_integer() else number
+
+
+def read_catalog(path, line=None):
+    """
+    Reads the widths of one line of a catalog file (in the formats of the backend's load_catalog).
+
+    Args:
+        path (str): The JSON or CSV catalog file.
+        line (str): The name of the line, which may be left out if the file only has one.
+
+    Returns:
+        dict: The widths (in quanta) of each prefix, widest first (see SIZES).
+
+    Raises:
+        ValueError: If the file has no such line (or several lines and none was named) or a SKU is not valid.
+    """
+    lines = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                lines.setdefault(row.get("line"), []).append(row.get("sku") or "")
+        else:
+            data = json.load(f)
+            if isinstance(data, dict):
+                data = data.get("lines", [data])
+            for entry in data:
+                lines.setdefault(entry.get("name"), []).extend(str(item.get("sku") or "") for item in entry.get("items", []))
+    if line is None and len(lines) == 1:
+        line = next(iter(lines))
+    if line not in lines:
+        raise ValueError(f"Pick one of the lines {sorted(map(str, lines))} with --line")
+
+    sizes = {prefix: set() for prefix in SIZES}
+    for sku in lines[line]:
+        prefix = sku.rstrip("0123456789.")
+        if prefix == "F":
+            continue  # Fillers are cut to fit
+        if prefix not in sizes or prefix == sku:
+            raise ValueError(f"Invalid SKU {sku!r} in line {line}")
+        sizes[prefix].add(geometry.to_units(parse_number(sku[len(prefix):])))
+    return {prefix: sorted(widths, reverse=True) for prefix, widths in sizes.items()}
+
+
+def use_sizes(sizes):
+    """Makes the fills use a catalog's widths (also runs in each worker process)."""
+    SIZES.update(sizes)
+
+
+def layout_wall(spec):
+    """
+    Lays out one wall specification.
+
+    Args:
+        spec (dict): The wall's width and its optional id, height, orientation, base and upper.
+
+    Returns:
+        dict: The wall's id (if given), width (to the nearest quantum), generation methods, bases and uppers.
+
+    Raises:
+        KeyError: If the width is missing.
+        ValueError: If a value is not valid.
+    """
+    width = parse_number(spec["width"], "width")
+    height = parse_number(spec.get("height") or DEFAULT_HEIGHT, "height")
+    orientation = spec.get("orientation") or "top"
+    if orientation not in ORIENTATION_GENERATIONS:
+        raise ValueError(f"{orientation} is not a valid orientation. Must be one of {list(ORIENTATION_GENERATIONS)}.")
+    base, upper = ORIENTATION_GENERATIONS[orientation]
+    base = spec.get("base") or base
+    upper = spec.get("upper") or upper
+    if base not in BASE_GENERATIONS or upper not in UPPER_GENERATIONS:
+        raise ValueError(f"Invalid generation methods {base}/{upper}")
+
+    units = geometry.to_units(width)
+    wall = Wall(units, height)
+    getattr(wall, f"generation_{base}")()
+    getattr(wall, f"generation_{upper}")()
+
+    result = {"width": geometry.to_inches(units), "base": base, "upper": upper, "bases": wall.bases, "uppers": wall.uppers}
+    if spec.get("id") not in (None, ""):
+        result = {"id": spec["id"], **result}
+    return result
+
+
+def layout_batch(batch):
+    """
+    Lays out a batch of walls (runs in the worker processes).
+
+    Args:
+        batch (list): (line number, wall specification or parse error) pairs.
+
+    Returns:
+        list: One (JSON line, cabinet count, filler inches, whether it failed) tuple per wall.
+    """
+    results = []
+    for line, spec in batch:
+        try:
+            if isinstance(spec, Exception):
+                raise spec
+            result = layout_wall(spec)
+        except (KeyError, TypeError, ValueError) as e:
+            message = f"Missing {e}" if isinstance(e, KeyError) else str(e)
+            results.append((json.dumps({"line": line, "error": message}), 0, 0, True))
+            continue
+        names = result["bases"] + result["uppers"]
+        filler = sum(float(name[1:]) for name in names if name.startswith("F"))
+        cabinets = sum(1 for name in names if not name.startswith("F"))
+        results.append((json.dumps({"line": line, **result}), cabinets, filler, False))
+    return results
+
+
+def read_specs(stream, fmt):
+    """
+    Reads wall specifications one at a time.
+
+    Args:
+        stream (file): The open input.
+        fmt (str): "csv" (with a header row) or "jsonl".
+
+    Yields:
+        tuple: The line number and the specification (a dict), or the error if the line can't be parsed.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            spec = json.loads(text)
+            if not isinstance(spec, dict):
+                raise ValueError("Each line must be a JSON object")
+        except ValueError as e:
+            spec = ValueError(f"Invalid JSON: {e}")
+        yield line, spec
+
+
+def batched(iterable, size):
+    """Splits an iterable into lists of up to *size* items, lazily."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def run_pipeline(batches, workers, window):
+    """
+    Lays out batches of walls on a process pool and yields the results in input order.
+
+    At most *window* batches are submitted and not yet written at any time, so memory stays
+    bounded however long the input is.
+
+    Args:
+        batches (iterable): The batches (see layout_batch).
+        workers (int): The number of worker processes (0 lays the walls out in this process).
+        window (int): The number of batches that may be in flight.
+
+    Yields:
+        list: The results of each batch (see layout_batch).
+    """
+    if workers == 0:
+        for batch in batches:
+            yield layout_batch(batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=use_sizes, initargs=(dict(SIZES),)) as pool:
+        in_flight = collections.deque()
+        for batch in batches:
+            in_flight.append(pool.submit(layout_batch, batch))
+            if len(in_flight) >= window:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def parse_args(argv=None):
+    """Parses the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Lays out the cabinets of walls read from CSV or JSON Lines.")
+    parser.add_argument("input", nargs="?", default="-", help="Input file (default: stdin)")
+    parser.add_argument("--format", choices=("csv", "jsonl"),
+                        help="Input format (default: from the file extension, or jsonl for stdin)")
+    parser.add_argument("--output", default="-", help="Output JSONL file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (0 runs everything in this process)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Walls sent to a worker at a time")
+    parser.add_argument("--window", type=int, default=None,
+                        help="Batches in flight at once (default: 4 per worker)")
+    parser.add_argument("--catalog", default=None,
+                        help="JSON or CSV catalog file whose widths to use (default: the built-in line's sizes)")
+    parser.add_argument("--line", default=None, help="Catalog line to use (needed if the file has several)")
+    args = parser.parse_args(argv)
+    if args.workers < 0 or args.batch_size <= 0 or (args.window is not None and args.window <= 0):
+        parser.error("--workers must not be negative, and --batch-size and --window must be positive")
+    if args.format is None:
+        args.format = "csv" if args.input.lower().endswith(".csv") else "jsonl"
+    if args.window is None:
+        args.window = max(1, args.workers) * 4
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.catalog:
+        try:
+            use_sizes(read_catalog(args.catalog, args.line))
+        except (OSError, ValueError) as e:
+            print(f"{args.catalog}: {e}", file=sys.stderr)
+            return 2
+    source = sys.stdin if args.input == "-" else open(args.input, newline="")
+    target = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    walls = errors = cabinets = 0
+    filler = 0.0
+    start = time.perf_counter()
+    try:
+        batches = batched(read_specs(source, args.format), args.batch_size)
+        for results in run_pipeline(batches, args.workers, args.window):
+            for line, count, inches, failed in results:
+                target.write(line + "\n")
+                walls += 1
+                errors += failed
+                cabinets += count
+                filler += inches
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+        else:
+            target.flush()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "walls": walls,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "walls_per_second": round(walls / elapsed, 1) if elapsed else 0.0,
+        "cabinets": cabinets,
+        "filler_inches": filler,
+        "workers": args.workers,
+    }
+    print(json.dumps(stats), file=sys.stderr)
+    return 1 if errors else 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import json
+import logging
+
+# Attributes every LogRecord has, so anything else on a record came from the extra argument
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats log records as one JSON object per line.
+
+    The object has the time, level, logger and message of the record, every field passed through
+    the extra argument of the logging call, and the traceback when there is one.
+
+    Typical usage example:
+
+        logger.debug("generate_wall request", extra={"width": 120, "orientation": "top"})
+        # {"time": "...", "level": "DEBUG", "logger": "object.views", "message": "generate_wall request",
+        #  "width": 120, "orientation": "top"}
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
@@ -0,0 +1,208 @@
+"""
+In-process request metrics, exposed in the Prometheus text format at /metrics.
+
+MetricsMiddleware (backend/middleware.py) records the latency, request size and response size of
+every request by view. While a request is running, timed() adds up the time spent in each section
+of the work ("layout" for the layout engines, "pricing" for the quote engine, "orm" for database
+queries and "serialization" for building and rendering the response), and the totals are recorded by view when the request ends.
+
+Every metric lives in the memory of the process that served the request, so each worker (or each
+runserver/uvicorn process) reports its own numbers, the same as the layout cache.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds (in bytes) of the request and response size histogram buckets
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Section times of the request being served in this context, or None outside of a request
+_sections = ContextVar("metrics_sections", default=None)
+
+
+class Histogram:
+    """
+    A Prometheus histogram with labels, safe to observe from many threads.
+
+    Typical usage example:
+
+        latency = Histogram("request_seconds", "Request latency.", ("view",), LATENCY_BUCKETS)
+        latency.observe(0.012, view="generate_wall")
+    """
+
+    def __init__(self, name, help_text, label_names, buckets):
+        """
+        Initializes the histogram.
+
+        Args:
+            name (str): The metric name.
+            help_text (str): The HELP line of the metric.
+            label_names (tuple): The names of the labels every observation has.
+            buckets (tuple): The upper bounds of the buckets, in increasing order (+Inf is added).
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # Label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Records one observation for the given label values."""
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        """Removes every observation."""
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """
+        Formats the histogram in the Prometheus text format.
+
+        Returns:
+            list: The lines of the metric (HELP, TYPE, then the buckets, sum and count of each series).
+        """
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in series:
+            labels = ",".join(f'{name}="{escape(value)}"' for name, value in zip(self.label_names, key))
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+def escape(value):
+    """Escapes a label value for the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REQUEST_LATENCY = Histogram(
+    "cabinet_http_request_duration_seconds",
+    "Time to serve a request, by view, method and status code.",
+    ("view", "method", "status"),
+    LATENCY_BUCKETS,
+)
+REQUEST_SIZE = Histogram(
+    "cabinet_http_request_size_bytes",
+    "Size of the request body, by view.",
+    ("view",),
+    SIZE_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "cabinet_http_response_size_bytes",
+    "Size of the response body (streamed responses not included), by view.",
+    ("view",),
+    SIZE_BUCKETS,
+)
+SECTION_TIME = Histogram(
+    "cabinet_request_section_seconds",
+    "Time a request spent in the layout engines, pricing, the ORM and serialization, by view and section.",
+    ("view", "section"),
+    LATENCY_BUCKETS,
+)
+
+HISTOGRAMS = (REQUEST_LATENCY, REQUEST_SIZE, RESPONSE_SIZE, SECTION_TIME)
+
+
+def begin_request():
+    """
+    Starts collecting section times for the request served in the current context.
+
+    Returns:
+        tuple: The section times (a dictionary filled in by timed()) and a token for end_request.
+    """
+    sections = {}
+    return sections, _sections.set(sections)
+
+
+def end_request(token):
+    """Stops collecting section times for the current context (see begin_request)."""
+    _sections.reset(token)
+
+
+def add_section_time(section, seconds):
+    """
+    Adds time spent in a section to the request being served.
+
+    Outside of a request (in a management command, for example) the time is recorded right away
+    under the view "-".
+    """
+    sections = _sections.get()
+    if sections is None:
+        SECTION_TIME.observe(seconds, view="-", section=section)
+    else:
+        sections[section] = sections.get(section, 0.0) + seconds
+
+
+@contextmanager
+def timed(section):
+    """
+    Times the code in a with block as part of a section of the current request.
+
+    Typical usage example:
+
+        with timed("layout"):
+            bases, uppers = layout_wall(width, orientation)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_section_time(section, time.perf_counter() - start)
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper that adds the time of every query to the "orm" section."""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        add_section_time("orm", time.perf_counter() - start)
+
+
+def install_query_timer(connection, **kwargs):
+    """
+    Adds time_query to a database connection's execute wrappers (once).
+
+    Connected to the connection_created signal, so the connections of every thread are timed.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def render():
+    """Formats every metric in the Prometheus text format."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+def clear():
+    """Removes every observation of every metric."""
+    for histogram in HISTOGRAMS:
+        histogram.clear()
@@ -0,0 +1,92 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, request size, response size and section times of every request.
+
+    The metrics are labelled with the name of the view that handled the request (from its URL
+    pattern), or "unmatched" when no pattern matched, and are served by the metrics view. Works
+    under both WSGI and ASGI. Should be the first entry of MIDDLEWARE so the latency includes
+    every other middleware.
+
+    With the backend logger at DEBUG, one structured log record is also written per request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+        # Time the queries of every database connection, including those opened before now
+        connection_created.connect(metrics.install_query_timer, dispatch_uid="metrics_query_timer")
+        for connection in connections.all(initialized_only=True):
+            metrics.install_query_timer(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        sections, token = metrics.begin_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self.record(request, response, start, sections)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        sections, token = metrics.begin_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self.record(request, response, start, sections)
+        return response
+
+    def process_template_response(self, request, response):
+        """Times the rendering of DRF responses (they are rendered after the view returns)."""
+        start = time.perf_counter()
+
+        def rendered(response):
+            metrics.add_section_time("serialization", time.perf_counter() - start)
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, response, start, sections):
+        """Records the metrics of a finished request."""
+        elapsed = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match is not None and match.view_name else "unmatched"
+
+        metrics.REQUEST_LATENCY.observe(elapsed, view=view, method=request.method, status=response.status_code)
+        metrics.REQUEST_SIZE.observe(int(request.META.get("CONTENT_LENGTH") or 0), view=view)
+        if not response.streaming:
+            metrics.RESPONSE_SIZE.observe(len(response.content), view=view)
+        for section, seconds in sections.items():
+            metrics.SECTION_TIME.observe(seconds, view=view, section=section)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("request finished", extra={
+                "view": view,
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "duration_ms": round(elapsed * 1000, 3),
+                "sections_ms": {section: round(seconds * 1000, 3) for section, seconds in sections.items()},
+            })
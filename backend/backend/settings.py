@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.middleware.MetricsMiddleware',  # First, so its latency includes the other middleware
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -85,6 +87,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Seconds to wait for a lock, since the job workers write to the same file as the server
+        'OPTIONS': {'timeout': 20},
     }
 }
 
@@ -129,4 +133,77 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = True
+
+# Quanta per inch the layout engines measure in (object/geometry.py): every width is rounded to the
+# nearest 1/GEOMETRY_QUANTUM inch at the API edge. Rebuild the layout table after changing it.
+GEOMETRY_QUANTUM = 16
+
+# Cabinet catalog line used when a request doesn't name one (object/catalog.py). Lines are loaded
+# with `python manage.py load_catalog` and read once at startup; None uses the built-in catalog.
+CATALOG_LINE = None
+
+# Quotes (object/pricing.py): the install labor cost per hour, the install hours per piece and the
+# price per inch of width used for cabinets (and filler) the catalog line doesn't price, by SKU prefix
+PRICING_LABOR_RATE = 75.0
+PRICING_LABOR_HOURS = {"B": 1.0, "U": 0.75, "F": 0.25, "BC": 1.5, "UC": 1.0}
+PRICING_PRICE_PER_INCH = {"B": 9.0, "U": 7.0, "F": 2.5, "BC": 11.0, "UC": 8.5}
+
+# Precomputed generate_wall layouts (built with `python manage.py build_layout_table`).
+# Widths outside of the table's range fall back to running the layout algorithms.
+LAYOUT_TABLE_PATH = BASE_DIR / 'layout_table.bin'
+LAYOUT_TABLE_MIN_WIDTH = 24  # inches
+LAYOUT_TABLE_MAX_WIDTH = 400  # inches
+LAYOUT_TABLE_STEP = 1  # inches between two widths in the table
+
+# Number of generate_wall responses kept in each process's LRU cache (0 disables the cache)
+LAYOUT_CACHE_SIZE = 1024
+
+# Threads that run layout work for the async views in object/async_views.py
+LAYOUT_EXECUTOR_WORKERS = 4
+
+# Multi-objective layout search (object/search.py): worker processes (None uses every CPU)
+# and the most seconds a search_wall request may spend searching
+LAYOUT_SEARCH_WORKERS = None
+LAYOUT_SEARCH_TIME_BUDGET = 2.0
+
+# The most ranked layouts a kbest_wall request may ask for (object/kbest.py)
+KBEST_MAX_LAYOUTS = 500
+
+# Background jobs (object/jobs.py, run by `python manage.py run_jobs`): seconds an idle worker waits
+# between checks of the queue, at most how often a job's progress is written, how long a running job
+# may go without reporting before its worker is presumed dead and the job is queued again, how many
+# times a job is started before it fails, and the most seconds a search_wall job may search
+JOB_POLL_INTERVAL = 1.0
+JOB_PROGRESS_INTERVAL = 0.5
+JOB_STALE_AFTER = 300
+JOB_MAX_ATTEMPTS = 3
+JOB_SEARCH_TIME_BUDGET = 30.0
+
+# Worker processes that draw the pages of parallel project drawings (None uses every CPU)
+RENDER_WORKERS = None
+
+# Spatial index of placed cabinets (object/spatial.py): the side of a grid cell in inches, and how
+# many seconds a room's footprints are kept in memory before they are read from the database again
+SPATIAL_INDEX_CELL_SIZE = 24
+SPATIAL_INDEX_MAX_AGE = 300
+
+# Clients allowed to read the request metrics at /metrics (see backend/metrics.py)
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Structured (one JSON object per line) logging. Set LOG_LEVEL=DEBUG to log every request
+# and the payloads of the object API; at the default INFO those calls cost nothing.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'backend.log_format.JsonFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'json'},
+    },
+    'loggers': {
+        'backend': {'handlers': ['console'], 'level': os.environ.get('LOG_LEVEL', 'INFO'), 'propagate': False},
+        'object': {'handlers': ['console'], 'level': os.environ.get('LOG_LEVEL', 'INFO'), 'propagate': False},
+    },
+}
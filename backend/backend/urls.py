@@ -16,10 +16,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from .views import home
+from .views import home, metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('object.urls')),
+    path('metrics', metrics, name='metrics'), # Prometheus scrape endpoint
     path('', home, name='home') # Root API to prevent 404 errors
 ]
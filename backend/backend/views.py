@@ -1,4 +1,17 @@
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+from . import metrics as request_metrics
 
 def home(request):
-    return JsonResponse({'message': 'Welcome to the backend API!'})
\ No newline at end of file
+    return JsonResponse({'message': 'Welcome to the backend API!'})
+
+def metrics(request):
+    """
+    Serves the request metrics of this process in the Prometheus text format.
+
+    Only clients whose address is in METRICS_ALLOWED_IPS may read them (everyone else gets a 403).
+    """
+    if request.META.get('REMOTE_ADDR') not in getattr(settings, 'METRICS_ALLOWED_IPS', ()):
+        return HttpResponse(status=403)
+    return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CabinetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'object'
+
+    def ready(self):
+        # Read the catalog lines into memory once per process (every layout reads its sizes from them)
+        from . import catalog
+        catalog.load(getattr(settings, 'CATALOG_LINE', None))
+
+        # Memory-map the precomputed layout table (if one has been built) once per process
+        from . import layout_table
+        layout_table.load(getattr(settings, 'LAYOUT_TABLE_PATH', None))
+
+        # Keep saved project snapshots in step with the tables
+        from . import signals  # noqa: F401
@@ -0,0 +1,246 @@
+"""
+Native async versions of the object API, for serving under the ASGI entry point (backend/asgi.py).
+
+These views take the same JSON payloads and return the same responses as their DRF counterparts in
+views.py, but run on the event loop: the CPU-bound layout work goes to a bounded thread pool
+(LAYOUT_EXECUTOR_WORKERS threads), so one uvicorn worker can keep many slow clients waiting without
+tying up a thread for each.
+
+Database writes don't use the async ORM. The overlap check and the insert of a placement have to be
+atomic under the spatial index lock (see views.save_cabinet and views.save_cabinets), so the views
+run those sync helpers with sync_to_async, on the one thread Django keeps for sync code. That hop
+only covers the check and the write, and the event loop stays free while they run.
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from backend.metrics import timed
+from . import obstacles
+from .catalog import get_catalog
+from .views import (
+    OVERLAP_MODES, build_cabinet, build_cabinets, build_obstacles, cabinet_details, obstacle_wall_payload,
+    overlap_details, placement_labels, room_payload, save_cabinet, save_cabinets, solved_room_payload,
+    validate_room, wall_payload
+)
+
+# Runs the layout engines off the event loop. Bounded so a burst of requests queues here instead of
+# starting a thread per request (database writes go through sync_to_async, not this pool).
+layout_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "LAYOUT_EXECUTOR_WORKERS", 4),
+    thread_name_prefix="layout",
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_json(request):
+    """
+    Parses the JSON body of a request.
+
+    Args:
+        request (HttpRequest): The incoming request.
+
+    Returns:
+        dict: The parsed body, or None if it isn't a JSON object.
+    """
+    try:
+        data = json.loads(request.body or b"{}")
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def run_layout(function, *args):
+    """Runs a layout helper from views.py on the layout executor and returns its result."""
+    loop = asyncio.get_running_loop()
+    # Carry the request's context over so the helper's timings are recorded for this request
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(layout_executor, functools.partial(context.run, function, *args))
+
+
+@csrf_exempt
+@require_POST
+async def generate_wall(request):
+    """
+    Async version of views.generate_wall (same payload: width, orientation and optional strategy,
+    obstacles and line). With obstacles, the response also has the "segments" of each layer.
+    """
+    data = parse_json(request)
+    if data is None:
+        return JsonResponse({"error": "Request body must be a JSON object"}, status=400)
+
+    width = data.get("width")
+    # Ensure that the width is provided
+    if width is None:
+        return JsonResponse({"error": "Width is required"}, status=400)
+    try:
+        line = get_catalog(data.get("line"))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    if data.get("obstacles"):
+        try:
+            wall_obstacles = build_obstacles(data["obstacles"])
+            obstacles.validate_obstacles(float(width), wall_obstacles)
+            index = obstacles.ObstacleIndex(wall_obstacles)
+            payload = await run_layout(
+                obstacle_wall_payload, float(width), data.get("orientation"), index, data.get("strategy"), line
+            )
+        except (TypeError, ValueError) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        with timed("serialization"):
+            return JsonResponse(payload)
+
+    try:
+        payload = await run_layout(wall_payload, width, data.get("orientation"), data.get("strategy"), line)
+        with timed("serialization"):
+            return JsonResponse(payload)
+    except Exception as e:
+        # Handle any exceptions and return the error in the response
+        logger.exception("generate_wall failed", extra={"width": width, "orientation": data.get("orientation")})
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@csrf_exempt
+@require_POST
+async def generate_room(request):
+    """
+    Async version of views.generate_room (same payload: walls and optional strategy, solver, corners
+    and line). The corner solver runs on the layout executor like the wall-by-wall layout.
+    """
+    data = parse_json(request)
+    if data is None:
+        return JsonResponse({"error": "Request body must be a JSON object"}, status=400)
+
+    walls = data.get("walls")
+    # Ensure that a list of walls with widths has been provided
+    error = validate_room(walls)
+    if error:
+        return JsonResponse({"error": error}, status=400)
+    solver = data.get("solver")
+    if solver not in (None, "corners"):
+        return JsonResponse({"error": "solver must be \"corners\" if given"}, status=400)
+    try:
+        line = get_catalog(data.get("line"))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    try:
+        if solver == "corners":
+            try:
+                payload = await run_layout(solved_room_payload, walls, data.get("corners"), data.get("strategy"), line)
+            except (TypeError, ValueError) as e:
+                # Invalid widths, corners or strategy, or corners that don't fit their walls
+                return JsonResponse({"error": str(e)}, status=400)
+        else:
+            payload = await run_layout(room_payload, walls, data.get("strategy"), line)
+        with timed("serialization"):
+            return JsonResponse(payload)
+    except Exception as e:
+        # Handle any exceptions and return the error in the response
+        logger.exception("generate_room failed", extra={"walls": len(walls)})
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@csrf_exempt
+@require_POST
+async def place_cabinet(request):
+    """
+    Async version of views.place_cabinet (same payload: cabinet, x, y and optional on_overlap).
+
+    The response also includes the cabinet's id. The overlap check and the save run together on the
+    thread Django keeps for sync code (see views.save_cabinet), so they don't hold up the event loop
+    and, as in the sync view, no other request can claim the same space in between.
+    """
+    data = parse_json(request)
+    if data is None:
+        return JsonResponse({"error": "Request body must be a JSON object"}, status=400)
+    on_overlap = data.get("on_overlap", "reject")
+    if on_overlap not in OVERLAP_MODES:
+        return JsonResponse({"error": f"on_overlap must be one of {list(OVERLAP_MODES)}"}, status=400)
+
+    try:
+        cabinet = build_cabinet(data)
+    except KeyError as e:
+        # Return an error if any key is missing in the cabinet data
+        return JsonResponse({"error": f"Missing key in cabinet data: {str(e)}"}, status=400)
+    except (TypeError, ValueError) as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    try:
+        overlapping, saved = await sync_to_async(save_cabinet)(cabinet, on_overlap)
+        if not saved:
+            return JsonResponse({
+                "error": "The cabinet overlaps placed cabinets",
+                "overlaps": overlap_details(overlapping)
+            }, status=409)
+    except Exception as e:
+        # Return a general error for any exceptions that occur
+        logger.exception("place_cabinet failed")
+        return JsonResponse({"error": str(e)}, status=500)
+
+    return JsonResponse({"placed_cabinet": cabinet_details(cabinet), "overlaps": overlap_details(overlapping)})
+
+
+@csrf_exempt
+@require_POST
+async def place_cabinets(request):
+    """
+    Async version of views.place_cabinets (same payload: cabinets and optional partial and on_overlap).
+
+    The valid cabinets are checked and written with a single INSERT in one transaction, on the thread
+    Django keeps for sync code (see views.save_cabinets), so the overlap check and the insert stay
+    atomic under the spatial index lock.
+    """
+    data = parse_json(request)
+    if data is None:
+        return JsonResponse({"error": "Request body must be a JSON object"}, status=400)
+
+    placements = data.get("cabinets")
+    partial = data.get("partial", False)
+    on_overlap = data.get("on_overlap", "reject")
+
+    # Ensure that a list of placements has been provided
+    if not isinstance(placements, list) or not placements:
+        return JsonResponse({"error": "cabinets must be a non-empty list"}, status=400)
+    if on_overlap not in OVERLAP_MODES:
+        return JsonResponse({"error": f"on_overlap must be one of {list(OVERLAP_MODES)}"}, status=400)
+    if not isinstance(partial, bool):
+        return JsonResponse({"error": "partial must be true or false"}, status=400)
+
+    # Validate every placement before touching the database
+    cabinets, errors = build_cabinets(placements)
+    if errors and not partial:
+        return JsonResponse({"placed_cabinets": [], "errors": errors}, status=400)
+
+    try:
+        created, overlap_errors, reported = await sync_to_async(save_cabinets)(
+            cabinets, placement_labels(placements, errors), on_overlap, partial
+        )
+        if overlap_errors:
+            errors = sorted(errors + overlap_errors, key=lambda error: error["index"])
+            if created is None:
+                return JsonResponse({"placed_cabinets": [], "errors": errors}, status=400)
+    except Exception as e:
+        # Return a general error for any exceptions that occur
+        logger.exception("place_cabinets failed", extra={"count": len(cabinets)})
+        return JsonResponse({"error": str(e)}, status=500)
+
+    response = {
+        "placed_cabinets": [cabinet_details(cabinet) for cabinet in created],
+        "errors": errors
+    }
+    if on_overlap == "report":
+        response["overlaps"] = reported
+    return JsonResponse(response)
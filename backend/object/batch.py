@@ -0,0 +1,200 @@
+import numpy as np
+
+from . import geometry
+from .catalog import get_catalog
+from .models.wall import Wall
+from .tokens import CabinetToken
+
+# Fill strategies that can be vectorized. The sizes each one tries (in order) come from the catalog
+# line, exactly as for the scalar Wall methods (see Catalog.pattern).
+STRATEGIES = ("greedy", "fixed_pattern")
+
+# Generation methods that can be run in batch (their corners and fill strategies come from the
+# catalog line, see Catalog.generations)
+GENERATIONS = ("b2", "b3", "u1", "u2", "u3")
+
+# One row per wall width: the width, how many cabinets were placed (fillers not included),
+# the total filler width, and the total cabinet width (all in inches, rounded to the quantum)
+LAYOUT_DTYPE = np.dtype([
+    ("width", "f8"),
+    ("cabinets", "i4"),
+    ("filler", "f8"),
+    ("cabinet_width", "f8"),
+])
+
+# One cabinet code: a CabinetToken kind and width
+CODE_DTYPE = np.dtype([
+    ("kind", "u1"),
+    ("width", "f8"),
+])
+
+
+def batch_fill(widths, strategy="greedy", cabinet_kind=CabinetToken.BASE, return_codes=False, catalog=None):
+    """
+    Runs greedy_fill or fixed_pattern_fill for many remaining widths at once.
+
+    Every width advances one cabinet per step, so the number of NumPy passes depends on the widest
+    wall rather than the number of walls. The results are exactly those of calling the scalar method
+    on a Wall for each width (including the "take the last cabinet down 6 inches" patch). Like the
+    scalar methods, the widths are rounded to the quantum and the passes run on integer quanta (see
+    object/geometry.py).
+
+    Args:
+        widths (array_like): The remaining widths to fill (in inches).
+        strategy (str): "greedy" or "fixed_pattern".
+        cabinet_kind (int): The CabinetToken kind to fill with, like CabinetToken.BASE.
+        return_codes (bool): Whether to also return the cabinets of every layout.
+        catalog (Catalog): The line to fill from (defaults to the active line).
+
+    Returns:
+        numpy.ndarray: A LAYOUT_DTYPE row per width.
+        If return_codes is true, a tuple of that array, a flat CODE_DTYPE array with every layout's
+        cabinets (in the same order as the scalar lists, fillers included) and an offsets array, so
+        the cabinets of width i are codes[offsets[i]:offsets[i + 1]].
+
+    Raises:
+        ValueError: If the strategy cannot be run in batch.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"{strategy} is not a batch fill strategy. Must be one of {list(STRATEGIES)}.")
+
+    catalog = catalog or get_catalog()
+    widths = to_units(widths)
+    sizes = np.asarray(catalog.pattern(strategy, cabinet_kind), dtype=np.int64)
+    valid_sizes = np.asarray(catalog.pattern("greedy", cabinet_kind), dtype=np.int64)
+    shrink_low, shrink_high, shrink_by = geometry.units_of(Wall.SHRINK)
+    n = widths.size
+    rows = np.arange(n)
+
+    remaining = widths.copy()
+    count = np.zeros(n, dtype=np.int64)  # Cabinets placed so far in each layout
+    last = np.zeros(n, dtype=np.int64)  # Size of the last cabinet placed in each layout
+    filler = np.zeros(n, dtype=np.int64)
+    has_filler = np.zeros(n, dtype=bool)
+    placed_sizes = np.zeros((n, 8), dtype=np.int64)  # Cabinet sizes placed, one column per cabinet (grows as needed)
+
+    active = remaining > 0
+    while active.any():
+        # Place the first size of the pattern that fits, like the scalar for loop
+        fits = sizes[None, :] <= remaining[:, None]
+        placed = active & fits.any(axis=1)
+        size = sizes[fits.argmax(axis=1)] if sizes.size else np.zeros(n, dtype=np.int64)
+
+        if count.max() >= placed_sizes.shape[1]:
+            placed_sizes = np.hstack([placed_sizes, np.zeros_like(placed_sizes)])
+        placed_sizes[rows[placed], count[placed]] = size[placed]
+        remaining = np.where(placed, remaining - size, remaining)
+        last = np.where(placed, size, last)
+        count += placed
+
+        # Take the last cabinet down 6 inches if that leaves between 3 and 9 inches
+        shrink = (
+            active & (remaining > shrink_low) & (remaining < shrink_high) & (count > 0)
+            & np.isin(last - shrink_by, valid_sizes)
+        )
+        last = np.where(shrink, last - shrink_by, last)
+        placed_sizes[rows[shrink], count[shrink] - 1] = last[shrink]
+        remaining = np.where(shrink, remaining + shrink_by, remaining)
+
+        # Nothing fit, so the rest of the width becomes filler
+        not_placed = active & ~placed
+        filler = np.where(not_placed, remaining, filler)
+        has_filler |= not_placed
+        remaining = np.where(not_placed, 0, remaining)
+
+        active = remaining > 0
+
+    layouts = np.zeros(n, dtype=LAYOUT_DTYPE)
+    layouts["width"] = widths / geometry.QUANTUM
+    layouts["cabinets"] = count
+    layouts["filler"] = filler / geometry.QUANTUM
+    layouts["cabinet_width"] = placed_sizes.sum(axis=1) / geometry.QUANTUM
+
+    if not return_codes:
+        return layouts
+
+    lengths = count + has_filler
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    codes = np.zeros(offsets[-1], dtype=CODE_DTYPE)
+    codes["kind"] = cabinet_kind
+    in_layout = np.arange(placed_sizes.shape[1])[None, :] < count[:, None]
+    positions = offsets[:-1, None] + np.arange(placed_sizes.shape[1])[None, :]
+    codes["width"][positions[in_layout]] = placed_sizes[in_layout] / geometry.QUANTUM
+    filler_positions = offsets[1:][has_filler] - 1
+    codes["kind"][filler_positions] = CabinetToken.FILLER
+    codes["width"][filler_positions] = filler[has_filler] / geometry.QUANTUM
+
+    return layouts, codes, offsets
+
+
+def batch_generation(widths, generation, return_codes=False, catalog=None):
+    """
+    Runs one of the greedy or fixed-pattern generation methods (b2, b3, u1, u2, u3) for many walls at once.
+
+    Args:
+        widths (array_like): The wall widths (in inches).
+        generation (str): The generation method, one of GENERATIONS (e.g. "u1").
+        return_codes (bool): Whether to also return the cabinets of every layout.
+        catalog (Catalog): The line to lay the walls out from (defaults to the active line).
+
+    Returns:
+        The same as batch_fill, with the widths being the wall widths and the corner cabinets
+        included in the counts, cabinet widths and codes.
+
+    Raises:
+        ValueError: If the generation method cannot be run in batch.
+    """
+    if generation not in GENERATIONS:
+        raise ValueError(f"{generation} is not a batch generation method. Must be one of {list(GENERATIONS)}.")
+    catalog = catalog or get_catalog()
+    strategy, reserved, cabinet_kind, corner, corner_first = catalog.generations[generation]
+
+    widths = to_units(widths)
+    result = batch_fill(
+        (widths - geometry.to_units(reserved)) / geometry.QUANTUM, strategy, cabinet_kind, return_codes, catalog
+    )
+    layouts = result[0] if return_codes else result
+    layouts["width"] = widths / geometry.QUANTUM
+
+    if corner is not None:
+        layouts["cabinets"] += 1
+        layouts["cabinet_width"] += corner.width
+
+    if not return_codes:
+        return layouts
+
+    _, codes, offsets = result
+    if corner is not None:
+        corner_code = np.array((corner.kind, corner.width), dtype=CODE_DTYPE)
+        codes = np.insert(codes, offsets[:-1] if corner_first else offsets[1:], corner_code)
+        offsets = offsets + np.arange(offsets.size)
+
+    return layouts, codes, offsets
+
+
+def to_tokens(codes, offsets, index):
+    """
+    Converts the codes of one layout back into the CabinetTokens the scalar methods return.
+
+    Args:
+        codes (numpy.ndarray): The CODE_DTYPE array returned by batch_fill or batch_generation.
+        offsets (numpy.ndarray): The offsets array returned with it.
+        index (int): The position of the width in the batch.
+
+    Returns:
+        list: The CabinetTokens of that layout.
+    """
+    tokens = []
+    for kind, width in codes[offsets[index]:offsets[index + 1]].tolist():
+        tokens.append(CabinetToken(kind, width))
+    return tokens
+
+
+def to_units(widths):
+    """Converts an array of widths (in inches) to an int64 array of quanta (see geometry.to_units)."""
+    widths = np.asarray(widths, dtype=np.float64).ravel()
+    if not np.isfinite(widths).all():
+        raise ValueError("Every width must be a finite number")
+    return np.rint(widths * geometry.QUANTUM).astype(np.int64)
@@ -0,0 +1,330 @@
+"""
+Bills of materials: how many cabinets of each SKU (kind and width) a layout, a room, a project or every
+project needs, with the linear feet they take up (for filler, the length of stock to cut).
+
+Saved cabinets are counted by the database with GROUP BY queries, either over the cabinet table or,
+by default, over the BomSummary table, which holds one row per wall run, kind and width and is kept up
+to date as cabinets change. The signal handlers in signals.py update it for saves and deletes; bulk
+writes have to call record_cabinets themselves (as they call projects.invalidate_snapshots), and
+rebuild_summary recomputes it from the cabinet table if it ever drifts.
+
+Typical usage example:
+
+    lines = bom_lines(group="project")  # One line per project and SKU, read lazily
+    for chunk in stream_csv(lines, bom_columns("project")):
+        ...
+"""
+
+import csv
+import io
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models.bom import BomSummary
+from .models.cabinet import Cabinet
+from .tokens import CabinetToken
+
+# The columns each grouping adds in front of the SKU columns, with the field each one is read from
+# (BomSummary and Cabinet both reach the project through their wall_run)
+GROUPS = {
+    "total": {},
+    "project": {
+        "project": "wall_run__room__project_id",
+        "project_name": "wall_run__room__project__name",
+    },
+    "room": {
+        "project": "wall_run__room__project_id",
+        "room": "wall_run__room_id",
+        "room_name": "wall_run__room__name",
+    },
+    "wall": {
+        "project": "wall_run__room__project_id",
+        "room": "wall_run__room_id",
+        "wall": "wall_run_id",
+        "orientation": "wall_run__orientation",
+    },
+}
+
+# The columns of every line after the grouping columns
+LINE_COLUMNS = ["sku", "kind", "width", "quantity", "linear_feet"]
+
+# Where saved cabinets are counted from
+SOURCES = ("summary", "cabinets")
+
+KIND_NAMES = dict(Cabinet.KIND_CHOICES)
+
+# Keys per UPDATE when applying count changes (keeps the query under the database's parameter limit)
+UPDATE_BATCH = 300
+
+
+def bom_columns(group="total"):
+    """Returns the column names of the lines for a grouping (see GROUPS)."""
+    return list(GROUPS[group]) + LINE_COLUMNS
+
+
+def make_line(kind, width, quantity, total_width, **group_values):
+    """
+    Formats one line of a bill of materials.
+
+    Args:
+        kind (int): The CabinetToken kind code.
+        width (float): The width of the cabinets (in inches).
+        quantity (int): The number of cabinets.
+        total_width (float): The summed width of the cabinets (in inches).
+        group_values: The values of the grouping columns.
+
+    Returns:
+        dict: The line, with the columns of bom_columns.
+    """
+    return {
+        **group_values,
+        "sku": CabinetToken(kind, width).name,
+        "kind": KIND_NAMES[kind],
+        "width": width,
+        "quantity": quantity,
+        "linear_feet": round(total_width / 12, 4),
+    }
+
+
+def bom_lines(group="total", project_id=None, room_id=None, source="summary"):
+    """
+    Counts saved cabinets by SKU with one GROUP BY query.
+
+    Args:
+        group (str): What each line is per besides the SKU, one of GROUPS.
+        project_id (int): Only count the cabinets of this project (optional).
+        room_id (int): Only count the cabinets of this room (optional).
+        source (str): "summary" to read the BomSummary table, or "cabinets" to count the cabinet
+            table itself.
+
+    Returns:
+        generator: The lines (see make_line), ordered by the grouping columns, kind and width. The
+        rows are fetched from the database in chunks as the generator is consumed.
+
+    Raises:
+        ValueError: If the grouping or source is not valid.
+    """
+    if group not in GROUPS:
+        raise ValueError(f"{group} is not a valid grouping. Must be one of {list(GROUPS)}.")
+    if source not in SOURCES:
+        raise ValueError(f"{source} is not a valid source. Must be one of {list(SOURCES)}.")
+
+    if source == "summary":
+        queryset = BomSummary.objects.all()
+        totals = {"total_quantity": Sum("quantity"), "total_width": Sum(F("quantity") * F("width"))}
+    else:
+        queryset = Cabinet.objects.filter(wall_run__isnull=False, kind__isnull=False)
+        totals = {"total_quantity": Count("id"), "total_width": Sum("width")}
+    if project_id is not None:
+        queryset = queryset.filter(wall_run__room__project_id=project_id)
+    if room_id is not None:
+        queryset = queryset.filter(wall_run__room_id=room_id)
+
+    columns = GROUPS[group]
+    rows = (
+        queryset
+        .values(**{column: F(field) for column, field in columns.items()}, line_kind=F("kind"), line_width=F("width"))
+        .annotate(**totals)
+        .order_by(*columns, "line_kind", "line_width")
+    )
+    return _lines(rows.iterator(chunk_size=2000), columns)
+
+
+def _lines(rows, columns):
+    """Turns the rows of bom_lines' query into lines."""
+    for row in rows:
+        if not row["total_quantity"]:
+            continue
+        yield make_line(
+            row["line_kind"], row["line_width"], row["total_quantity"], row["total_width"],
+            **{column: row[column] for column in columns},
+        )
+
+
+def layout_lines(layouts):
+    """
+    Counts the cabinets of generated layouts by SKU.
+
+    Args:
+        layouts (iterable): Lists of CabinetTokens (e.g. the bases and uppers of every wall).
+
+    Returns:
+        list: The lines (see make_line), ordered by kind and width.
+    """
+    counts = Counter(token for tokens in layouts for token in tokens)
+    return [
+        make_line(token.kind, token.width, quantity, token.width * quantity)
+        for token, quantity in sorted(counts.items(), key=lambda item: (item[0].kind, item[0].width))
+    ]
+
+
+def bom_totals(lines):
+    """
+    Adds up the lines of a bill of materials.
+
+    Args:
+        lines (iterable): The lines (see make_line).
+
+    Returns:
+        dict: The number of cabinets (not counting filler), the number of filler pieces and the linear
+        feet of cabinets and of filler.
+    """
+    totals = {"cabinets": 0, "cabinet_linear_feet": 0.0, "filler_pieces": 0, "filler_linear_feet": 0.0}
+    filler = KIND_NAMES[CabinetToken.FILLER]
+    for line in lines:
+        if line["kind"] == filler:
+            totals["filler_pieces"] += line["quantity"]
+            totals["filler_linear_feet"] += line["linear_feet"]
+        else:
+            totals["cabinets"] += line["quantity"]
+            totals["cabinet_linear_feet"] += line["linear_feet"]
+    totals["cabinet_linear_feet"] = round(totals["cabinet_linear_feet"], 4)
+    totals["filler_linear_feet"] = round(totals["filler_linear_feet"], 4)
+    return totals
+
+
+def stream_csv(lines, columns, rows_per_chunk=500):
+    """
+    Writes the lines of a bill of materials as CSV, a chunk of rows at a time.
+
+    Args:
+        lines (iterable): The lines (see make_line).
+        columns (list): The columns to write (see bom_columns).
+        rows_per_chunk (int): The number of rows in each chunk.
+
+    Yields:
+        str: The header, then the rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for count, line in enumerate(lines, start=1):
+        writer.writerow(line)
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def summary_key(cabinet):
+    """Returns the BomSummary line a cabinet counts towards, as (wall run id, kind, width), or None."""
+    if cabinet.wall_run_id is None or cabinet.kind is None:
+        return None
+    return cabinet.wall_run_id, cabinet.kind, cabinet.width
+
+
+def stored_key(cabinet, read_row=True):
+    """
+    Returns the BomSummary line a cabinet's saved row counts towards (see summary_key).
+
+    Uses what the cabinet was last loaded or saved with when that is known.
+
+    Args:
+        cabinet (Cabinet): The cabinet.
+        read_row (bool): Whether to read the row when it isn't known (otherwise the cabinet's current
+            values are used).
+
+    Returns:
+        tuple: The (wall run id, kind, width) key, or None.
+    """
+    if cabinet._state.adding or cabinet.pk is None:
+        return None
+    if hasattr(cabinet, "_summary_key"):
+        return cabinet._summary_key
+    loaded = getattr(cabinet, "_loaded_values", {})
+    if all(field in loaded for field in ("wall_run_id", "kind", "width")):
+        values = (loaded["wall_run_id"], loaded["kind"], loaded["width"])
+    elif read_row:
+        values = Cabinet.objects.filter(pk=cabinet.pk).values_list("wall_run_id", "kind", "width").first()
+    else:
+        return summary_key(cabinet)
+    if values is None or values[0] is None or values[1] is None:
+        return None
+    return values
+
+
+def apply_counts(counts):
+    """
+    Changes the quantities of BomSummary lines.
+
+    Missing lines are inserted first (with one INSERT that ignores existing lines), then the
+    quantities are changed with one UPDATE per distinct change, so concurrent writers can't lose
+    counts. Lines that drop to zero are deleted.
+
+    Args:
+        counts (dict): The change of each line, by (wall run id, kind, width).
+    """
+    counts = {key: change for key, change in counts.items() if key is not None and change}
+    if not counts:
+        return
+
+    by_change = {}
+    for key, change in counts.items():
+        by_change.setdefault(change, []).append(key)
+
+    with transaction.atomic():
+        BomSummary.objects.bulk_create(
+            [BomSummary(wall_run_id=wall_run_id, kind=kind, width=width)
+             for (wall_run_id, kind, width), change in counts.items() if change > 0],
+            ignore_conflicts=True,
+        )
+        for change, keys in by_change.items():
+            for start in range(0, len(keys), UPDATE_BATCH):
+                match = _match_keys(keys[start:start + UPDATE_BATCH])
+                BomSummary.objects.filter(match).update(quantity=F("quantity") + change)
+        if any(change < 0 for change in by_change):
+            removed = [key for key, change in counts.items() if change < 0]
+            BomSummary.objects.filter(_match_keys(removed), quantity__lte=0).delete()
+
+
+def _match_keys(keys):
+    """Returns a filter matching the BomSummary lines of some (wall run id, kind, width) keys."""
+    return reduce(or_, (Q(wall_run_id=wall_run_id, kind=kind, width=width) for wall_run_id, kind, width in keys))
+
+
+def record_cabinets(cabinets, change=1):
+    """
+    Counts cabinets written in bulk (which sends no signals) in the BomSummary table.
+
+    Args:
+        cabinets (iterable): The cabinets that were created (or deleted).
+        change (int): 1 if they were created, -1 if they were deleted.
+    """
+    counts = Counter()
+    for cabinet in cabinets:
+        key = summary_key(cabinet)
+        counts[key] += 1
+        if change > 0:
+            cabinet._summary_key = key  # So a later save of the same object moves it from this line
+    apply_counts({key: count * change for key, count in counts.items()})
+
+
+def rebuild_summary(wall_run_ids=None):
+    """
+    Recomputes BomSummary lines from the cabinet table with one GROUP BY query.
+
+    Args:
+        wall_run_ids (iterable): Only recompute the lines of these wall runs (default: every line).
+
+    Returns:
+        int: The number of lines written.
+    """
+    cabinets = Cabinet.objects.filter(wall_run__isnull=False, kind__isnull=False)
+    lines = BomSummary.objects.all()
+    if wall_run_ids is not None:
+        wall_run_ids = list(wall_run_ids)
+        cabinets = cabinets.filter(wall_run_id__in=wall_run_ids)
+        lines = lines.filter(wall_run_id__in=wall_run_ids)
+
+    rows = cabinets.values("wall_run_id", "kind", "width").annotate(quantity=Count("id")).order_by()
+    with transaction.atomic():
+        lines.delete()
+        created = BomSummary.objects.bulk_create(
+            (BomSummary(**row) for row in rows.iterator(chunk_size=2000)), batch_size=1000
+        )
+    return len(created)
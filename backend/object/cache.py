@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+
+
+class LayoutCache:
+    """
+    A bounded, thread-safe least-recently-used cache for generate_wall response payloads.
+
+    Keys are (width in quanta, generation methods, strategy, algorithm version, catalog key) tuples,
+    so left and right walls (which use the same generation methods) and lines with the same sizes share
+    entries, and bumping Wall.ALGORITHM_VERSION makes every old entry unreachable (they age out
+    through eviction).
+
+    Typical usage example:
+
+        payload = layout_cache.get(key)
+        if payload is None:
+            payload = build_payload()
+            layout_cache.put(key, payload)
+    """
+
+    def __init__(self, max_size):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_size (int): The most payloads kept at once (0 disables caching).
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Returns the payload stored for a key and marks it as most recently used.
+
+        Args:
+            key (tuple): The cache key.
+
+        Returns:
+            dict: The cached payload, or None on a miss.
+        """
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        """
+        Stores a payload, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key (tuple): The cache key.
+            payload (dict): The finished response payload (it must not be modified afterwards).
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Removes every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: The hits, misses, evictions, current size, max size and hit rate of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# The cache shared by every request handled by this process
+layout_cache = LayoutCache(getattr(settings, "LAYOUT_CACHE_SIZE", 1024))
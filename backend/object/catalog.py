@@ -0,0 +1,434 @@
+"""
+The cabinet catalog: which SKUs each manufacturer line sells.
+
+A line lists, for every kind of cabinet (see CabinetToken), the widths it comes in and the height,
+depth and price of each, plus its filler strips. Lines are stored in the CatalogLine and CatalogItem
+tables (filled from JSON or CSV files by the load_catalog management command) and are read once per
+process, when the object app is ready, into immutable Catalog objects indexed by kind and width.
+
+Wall's fill and generation methods, the incremental and batch layouts, the obstacle planner, the room
+solver and extract_cabinet_details all take their sizes from a Catalog, so picking another line for a
+request is a dictionary lookup. A line may sell any subset of the sizes: the fill patterns keep only the
+sizes the line has, and the corner space follows the line's corner cabinets. Without any saved lines
+(or before the tables exist) the built-in catalog, made from the sizes in models/cabinet.py, is used.
+
+File formats (both may hold several lines):
+    JSON: {"lines": [{"name": "Shaker", "manufacturer": "Acme", "items": [
+              {"sku": "B36", "height": 34.5, "depth": 24, "price": 310}, ...]}]}
+    CSV:  a header row with line, manufacturer, sku, height, depth and price columns, then one row
+          per SKU
+
+Typical usage example:
+
+    catalog = get_catalog("Shaker")  # Or get_catalog() for the active line
+    catalog.widths(CabinetToken.BASE)  # (36, 30, 24, ...), largest first
+    catalog.item(CabinetToken.BASE_CORNER, 36).depth
+"""
+
+import csv
+import json
+import logging
+import os
+import warnings
+import zlib
+from collections import namedtuple
+from decimal import Decimal
+from types import MappingProxyType
+
+from django.db import connection, transaction
+
+from . import geometry
+from .models.cabinet import BaseCorner, Cabinet, UpperCorner
+from .models.catalog import CatalogItem, CatalogLine
+from .models.wall import Wall
+from .tokens import CabinetToken
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_LINE = "builtin"  # Name of the built-in catalog (can't be used by a saved line)
+
+FORMATS = ("json", "csv")
+CSV_COLUMNS = ("line", "manufacturer", "sku", "height", "depth", "price")
+
+# The kinds the fill strategies lay out, and the patterns (see Wall) each strategy draws its sizes from
+LAYER_KINDS = (CabinetToken.BASE, CabinetToken.UPPER)
+STRATEGY_PATTERNS = {
+    "fixed_pattern": Wall.FIXED_PATTERN,
+    "rotating1": Wall.ROTATING_PATTERN,
+}
+
+
+class CatalogEntry(namedtuple("CatalogEntry", ("kind", "units", "height", "depth", "price"))):
+    """
+    One SKU of a catalog: a CabinetToken kind, a width in quanta (see object/geometry.py), the height
+    and depth (in inches) and the price (of one cabinet, or of one inch of filler; None if not known).
+    """
+
+    __slots__ = ()
+
+    @property
+    def width(self):
+        """The width of the SKU in inches."""
+        return geometry.to_inches(self.units)
+
+    @property
+    def sku(self):
+        """The SKU's name (e.g. "B36")."""
+        return CabinetToken.from_units(self.kind, self.units).name
+
+
+class Catalog:
+    """
+    The SKUs of one line, indexed for the layout engines. Catalogs are built once and never changed.
+
+    Attributes:
+        name (str): The name of the line.
+        manufacturer (str): Who makes the line.
+        entries (tuple): The CatalogEntries, by kind and then widest first.
+        generations (mapping): For each of Wall's generation methods, (default fill strategy, inches
+            reserved for corners, cabinet kind, corner token or None, whether the corner goes at the
+            start of the layout), following the line's corner cabinets.
+        key (int): A checksum of the sizes and dimensions of the SKUs (not the prices), which tells
+            cached layouts of different lines apart.
+    """
+
+    __slots__ = ("name", "manufacturer", "entries", "generations", "key", "_items", "_widths", "_patterns", "_standard")
+
+    def __init__(self, name, entries, manufacturer=""):
+        """
+        Indexes the SKUs of a line.
+
+        Args:
+            name (str): The name of the line.
+            entries (iterable): The line's CatalogEntries.
+            manufacturer (str): Who makes the line.
+
+        Raises:
+            ValueError: If the line lists a SKU twice.
+        """
+        self.name = name
+        self.manufacturer = manufacturer
+        self.entries = tuple(sorted(entries, key=lambda entry: (entry.kind, -entry.units)))
+        self._items = MappingProxyType({(entry.kind, entry.units): entry for entry in self.entries})
+        if len(self._items) != len(self.entries):
+            raise ValueError(f"The {name} line lists the same SKU more than once")
+
+        # Widths (in quanta, widest first) by kind, and the sizes each fill strategy places
+        self._widths = MappingProxyType({
+            kind: tuple(entry.units for entry in self.entries if entry.kind == kind)
+            for kind in range(len(CabinetToken.PREFIXES))
+        })
+        patterns = {}
+        for kind in LAYER_KINDS:
+            sold = set(self._widths[kind])
+            patterns["greedy", kind] = patterns["optimal", kind] = self._widths[kind]
+            for strategy, pattern in STRATEGY_PATTERNS.items():
+                patterns[strategy, kind] = tuple(size for size in geometry.units_of(tuple(pattern)) if size in sold)
+        self._patterns = MappingProxyType(patterns)
+
+        # Height and depth of the widest cabinet of each layer, used for fillers and unlisted widths
+        standard = {
+            CabinetToken.BASE: (Cabinet.STANDARD_HEIGHT, Cabinet.STANDARD_BASE_DEPTH),
+            CabinetToken.UPPER: (Cabinet.STANDARD_HEIGHT, Cabinet.STANDARD_UPPER_DEPTH),
+        }
+        for kind in LAYER_KINDS:
+            if self._widths[kind]:
+                widest = self._items[kind, self._widths[kind][0]]
+                standard[kind] = (widest.height, widest.depth)
+        self._standard = MappingProxyType(standard)
+
+        self.generations = MappingProxyType(self._generations())
+        self.key = zlib.crc32(repr([entry[:4] for entry in self.entries]).encode())
+
+    @classmethod
+    def from_line(cls, line):
+        """Builds the catalog of a saved CatalogLine (with its items prefetched)."""
+        return cls(line.name, (
+            CatalogEntry(
+                item.kind, geometry.to_units(item.width), geometry.snap(item.height), geometry.snap(item.depth),
+                None if item.price is None else float(item.price)
+            )
+            for item in line.items.all()
+        ), line.manufacturer)
+
+    def _generations(self):
+        """Works out the generation methods' corner space from the line's widest corner cabinets."""
+        base, upper = self.corner(CabinetToken.BASE_CORNER), self.corner(CabinetToken.UPPER_CORNER)
+
+        def reserved(corner, count):
+            return geometry.to_inches(count * corner.units) if corner is not None else 0
+
+        return {
+            "b1": ("rotating1", reserved(base, 1), CabinetToken.BASE, base, False),
+            "b2": ("greedy", reserved(base, 2), CabinetToken.BASE, None, False),
+            "b3": ("fixed_pattern", reserved(base, 1), CabinetToken.BASE, base, True),
+            "u1": ("greedy", reserved(upper, 1), CabinetToken.UPPER, upper, False),
+            "u2": ("greedy", reserved(upper, 2), CabinetToken.UPPER, None, False),
+            "u3": ("greedy", reserved(upper, 1), CabinetToken.UPPER, upper, True),
+        }
+
+    def widths(self, kind):
+        """Returns the widths (in inches, widest first) the line sells a kind of cabinet in."""
+        return tuple(geometry.to_inches(units) for units in self._widths[kind])
+
+    def units(self, kind):
+        """Returns the widths (in quanta, widest first) the line sells a kind of cabinet in."""
+        return self._widths[kind]
+
+    def pattern(self, strategy, kind):
+        """
+        Returns the sizes a fill strategy places, limited to the widths the line sells.
+
+        Args:
+            strategy (str): One of Wall.FILL_STRATEGIES.
+            kind (int): The CabinetToken kind being filled (BASE or UPPER).
+
+        Returns:
+            tuple: The sizes (in quanta), in the order the strategy tries them. Empty if the line
+            sells none of them.
+        """
+        return self._patterns.get((strategy, kind), ())
+
+    def item(self, kind, width):
+        """Returns the CatalogEntry of a kind and width (in inches), or None if the line doesn't sell it."""
+        return self._items.get((kind, geometry.to_units(width)))
+
+    def corner(self, kind):
+        """Returns a CabinetToken for the widest corner cabinet of a kind, or None if the line has none."""
+        widths = self._widths[kind]
+        return CabinetToken.from_units(kind, widths[0]) if widths else None
+
+    def standard(self, kind):
+        """Returns the height and depth (in inches) of the widest cabinet of a layer (BASE or UPPER)."""
+        return self._standard[kind]
+
+    def accepts(self, width):
+        """Returns whether the line sells any cabinet (filler aside) in a width (in inches)."""
+        units = geometry.to_units(width)
+        return any(
+            (kind, units) in self._items
+            for kind in range(len(CabinetToken.PREFIXES)) if kind != CabinetToken.FILLER
+        )
+
+    def dimensions(self, token, is_base=True):
+        """
+        Returns the height and depth of a cabinet in a layout.
+
+        Listed SKUs use their own dimensions. Fillers (and widths the line doesn't list) use those of
+        the layer's standard cabinet, except that corner cabinets are square (bases) or cubes (uppers).
+
+        Args:
+            token (CabinetToken): The cabinet.
+            is_base (bool): Whether the cabinet is in the bases (rather than the uppers).
+
+        Returns:
+            tuple: The height and depth (in inches).
+        """
+        if token.kind != CabinetToken.FILLER:
+            entry = self._items.get((token.kind, token.units))
+            if entry is not None:
+                return entry.height, entry.depth
+        height, depth = self.standard(CabinetToken.BASE if is_base else CabinetToken.UPPER)
+        if token.kind == CabinetToken.BASE_CORNER:
+            return height, token.width
+        if token.kind == CabinetToken.UPPER_CORNER:
+            return token.width, token.width
+        return height, depth
+
+    def to_dict(self):
+        """Returns the line and its SKUs as a dictionary (for the catalog endpoint)."""
+        return {
+            "name": self.name,
+            "manufacturer": self.manufacturer,
+            "items": [
+                {
+                    "sku": entry.sku,
+                    "kind": entry.kind,
+                    "width": entry.width,
+                    "height": entry.height,
+                    "depth": entry.depth,
+                    "price": entry.price,
+                }
+                for entry in self.entries
+            ],
+        }
+
+
+def builtin_entries():
+    """Returns the SKUs of the built-in catalog, from the sizes in models/cabinet.py (no prices)."""
+    entries = []
+    for width in Cabinet.VALID_SIZES:
+        units = geometry.to_units(width)
+        entries.append(CatalogEntry(CabinetToken.BASE, units, Cabinet.STANDARD_HEIGHT, Cabinet.STANDARD_BASE_DEPTH, None))
+        entries.append(CatalogEntry(CabinetToken.UPPER, units, Cabinet.STANDARD_HEIGHT, Cabinet.STANDARD_UPPER_DEPTH, None))
+    for width in BaseCorner.SIZES:  # Square
+        entries.append(CatalogEntry(CabinetToken.BASE_CORNER, geometry.to_units(width), Cabinet.STANDARD_HEIGHT, width, None))
+    width = UpperCorner.WIDTH  # A cube
+    entries.append(CatalogEntry(CabinetToken.UPPER_CORNER, geometry.to_units(width), width, width, None))
+    return entries
+
+
+BUILTIN = Catalog(BUILTIN_LINE, builtin_entries())
+
+_lines = MappingProxyType({BUILTIN_LINE: BUILTIN})  # Every line loaded by load(), by name
+_active = BUILTIN  # The line used when a request doesn't name one
+
+
+def load(line=None):
+    """
+    Reads every saved line into memory for this process, replacing the lines read before.
+
+    Args:
+        line (str): The name of the line to make active (the CATALOG_LINE setting). The built-in
+            catalog is used if it is None or no line has that name.
+
+    Returns:
+        Catalog: The active line.
+
+    Raises:
+        DatabaseError: If the database can't be read (e.g. it is locked or unreachable). Only the
+            case where the catalog tables don't exist yet falls back to the built-in catalog.
+    """
+    global _lines, _active
+    lines = {BUILTIN_LINE: BUILTIN}
+    with warnings.catch_warnings():
+        # Called from AppConfig.ready on purpose: the lines are read once, not per request
+        warnings.filterwarnings("ignore", "Accessing the database during app initialization", RuntimeWarning)
+        tables = connection.introspection.table_names()
+        # The tables don't exist until the first migrate, so only the built-in catalog is there
+        if CatalogLine._meta.db_table in tables and CatalogItem._meta.db_table in tables:
+            for record in CatalogLine.objects.prefetch_related("items"):
+                lines[record.name] = Catalog.from_line(record)
+
+    if line is not None and line not in lines:
+        logger.warning("Catalog line %s not found, using the built-in catalog", line)
+        line = None
+    _lines = MappingProxyType(lines)
+    _active = lines[line or BUILTIN_LINE]
+    return _active
+
+
+def get_catalog(line=None):
+    """
+    Returns a loaded line.
+
+    Args:
+        line (str): The name of the line, or None for the active line.
+
+    Returns:
+        Catalog: The line.
+
+    Raises:
+        ValueError: If no line has that name.
+    """
+    if line is None:
+        return _active
+    try:
+        return _lines[line]
+    except KeyError:
+        raise ValueError(f"{line} is not a catalog line. Must be one of {list(_lines)}.") from None
+
+
+def get_lines():
+    """Returns every loaded line (the built-in catalog included), as a read-only mapping by name."""
+    return _lines
+
+
+def parse_entry(row):
+    """
+    Reads one SKU of a catalog file.
+
+    Args:
+        row (dict): The SKU, with its "sku" (e.g. "B36"), "height", "depth" and optional "price".
+
+    Returns:
+        CatalogEntry: The SKU.
+
+    Raises:
+        ValueError: If a value is missing or not valid.
+    """
+    try:
+        token = CabinetToken.from_name(str(row["sku"]).strip())
+        height, depth = geometry.snap(float(row["height"])), geometry.snap(float(row["depth"]))
+        price = row.get("price")
+        price = None if price in (None, "") else float(price)
+    except KeyError as e:
+        raise ValueError(f"Every SKU needs a {e.args[0]}") from None
+    except TypeError:
+        raise ValueError(f"Invalid SKU {row}") from None
+    if token.units <= 0 or height <= 0 or depth <= 0:
+        raise ValueError(f"{token.name} needs a positive width, height and depth")
+    if price is not None and not price >= 0:
+        raise ValueError(f"{token.name} has an invalid price {price}")
+    return CatalogEntry(token.kind, token.units, height, depth, price)
+
+
+def read_catalogs(path, fmt=None):
+    """
+    Reads the lines in a JSON or CSV catalog file (see the module docstring for the formats).
+
+    Args:
+        path (str): The path of the file.
+        fmt (str): "json" or "csv", or None to go by the file's extension.
+
+    Returns:
+        list: A Catalog per line, in the order of the file.
+
+    Raises:
+        ValueError: If the format is not known or the file is not a valid catalog.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"{fmt} is not a catalog format. Must be one of {list(FORMATS)}.")
+
+    lines = {}  # Name: (manufacturer, SKU rows)
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "json":
+            data = json.load(f)
+            if isinstance(data, dict):
+                data = data.get("lines", [data])
+            for line in data:
+                if not isinstance(line, dict) or not line.get("name") or not isinstance(line.get("items"), list):
+                    raise ValueError("Every line needs a name and a list of items")
+                lines.setdefault(str(line["name"]), (str(line.get("manufacturer", "")), []))[1].extend(line["items"])
+        else:
+            reader = csv.DictReader(f)
+            missing = set(CSV_COLUMNS) - {"manufacturer", "price"} - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f"The CSV file is missing the {sorted(missing)} columns")
+            for row in reader:
+                lines.setdefault(row["line"], (row.get("manufacturer") or "", []))[1].append(row)
+
+    return [
+        Catalog(name, [parse_entry(row) for row in rows], manufacturer)
+        for name, (manufacturer, rows) in lines.items()
+    ]
+
+
+def save_catalogs(catalogs):
+    """
+    Saves lines to the catalog tables, replacing the SKUs of lines that are already saved.
+
+    Running processes keep the lines they loaded until they restart (or call load again).
+
+    Args:
+        catalogs (list): The Catalogs to save.
+
+    Raises:
+        ValueError: If a line uses the name of the built-in catalog.
+    """
+    with transaction.atomic():
+        for catalog in catalogs:
+            if catalog.name == BUILTIN_LINE:
+                raise ValueError(f"{BUILTIN_LINE} is the name of the built-in catalog")
+            line, _ = CatalogLine.objects.update_or_create(
+                name=catalog.name, defaults={"manufacturer": catalog.manufacturer}
+            )
+            line.items.all().delete()
+            CatalogItem.objects.bulk_create([
+                CatalogItem(
+                    line=line, kind=entry.kind, width=entry.width, height=entry.height, depth=entry.depth,
+                    price=None if entry.price is None else Decimal(str(entry.price))
+                )
+                for entry in catalog.entries
+            ])
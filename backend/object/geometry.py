@@ -0,0 +1,92 @@
+"""
+Fixed-point geometry for the layout engines.
+
+Lengths coming in through the API are floats in inches, and subtracting floats over and over (as the
+fill loops do) drifts: a 147.3 in wall used to leave a "F0.30000000000001137" filler. So every length
+is converted once, at the edge, to a whole number of quanta (QUANTUM per inch, sixteenths by
+default), the layout engines add and subtract those integers exactly, and lengths are turned back
+into inches only on the way out. A length that falls between two quanta is rounded to the nearest.
+
+Because a length in quanta is an exact integer, it also makes an exact key for caches and lookup
+tables, where two floats that print the same can still differ.
+
+Typical usage example:
+
+    units = to_units(147.3)  # 2357 (147 5/16 in, the nearest sixteenth)
+    to_inches(units - to_units(144))  # 3.3125
+"""
+
+import functools
+import math
+
+try:
+    from django.conf import settings
+    from django.core.exceptions import ImproperlyConfigured
+except ImportError:  # Used without Django installed (by the CabineXt command-line tool)
+    settings = None
+
+DEFAULT_QUANTUM = 16
+
+if settings is None:
+    QUANTUM = DEFAULT_QUANTUM
+else:
+    try:
+        QUANTUM = getattr(settings, "GEOMETRY_QUANTUM", DEFAULT_QUANTUM)  # Quanta per inch
+    except ImproperlyConfigured:  # Imported outside of Django (e.g. in a bare worker process or CabineXt)
+        QUANTUM = DEFAULT_QUANTUM
+
+
+def to_units(inches):
+    """
+    Converts a length to quanta.
+
+    Args:
+        inches (float): The length (in inches).
+
+    Returns:
+        int: The nearest whole number of quanta.
+
+    Raises:
+        TypeError: If the length is not a number.
+        ValueError: If the length is not finite.
+    """
+    if isinstance(inches, int):
+        return inches * QUANTUM
+    inches = float(inches)
+    if not math.isfinite(inches):
+        raise ValueError(f"{inches} is not a valid length")
+    return round(inches * QUANTUM)
+
+
+def to_inches(units):
+    """
+    Converts a length in quanta back to inches.
+
+    Args:
+        units (int): The length (in quanta).
+
+    Returns:
+        int | float: The length in inches, as an int when it is a whole number of inches (so names
+        read "B36" rather than "B36.0").
+    """
+    whole, rest = divmod(units, QUANTUM)
+    return whole if not rest else units / QUANTUM
+
+
+def snap(inches):
+    """Rounds a length (in inches) to the nearest quantum, returning inches (see to_inches)."""
+    return to_inches(to_units(inches))
+
+
+@functools.lru_cache(maxsize=64)
+def units_of(lengths):
+    """
+    Converts a tuple of lengths (e.g. a pattern of cabinet sizes) to quanta.
+
+    Args:
+        lengths (tuple): The lengths (in inches).
+
+    Returns:
+        tuple: The lengths in quanta, in the same order.
+    """
+    return tuple(to_units(length) for length in lengths)
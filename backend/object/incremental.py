@@ -0,0 +1,258 @@
+"""
+Incremental re-layout of a wall whose width changed.
+
+greedy_fill, fixed_pattern_fill and rotating1_fill all start a wall the same way: while the remaining
+width is at least the next size of their pattern plus 9 inches, that size fits and leaves enough room
+that the "take the last cabinet down 6 inches" patch can't touch it. Those leading cabinets (the
+settled prefix) are the same for every wall width and can be counted with arithmetic, so only the
+short tail after them (and the corner cabinet) depends on the exact width. A layout is therefore kept
+as its settled count plus its tail, and resizing a wall only recomputes the tail, however long the run.
+
+optimal_fill has no settled prefix (its dynamic program looks at the whole width), so with the
+"optimal" strategy the whole fill is the tail and is recomputed.
+
+Typical usage example:
+
+    layout, diff = relayout("b2", 240, 246)
+    # diff == {"start": 4, "delete": 1, "insert": [CabinetToken(B30)]}
+    tokens = apply_diff(previous_tokens, diff)  # or layout.tokens()
+"""
+
+from . import geometry
+from .catalog import BUILTIN, get_catalog
+from .models.wall import Wall
+from .tokens import CabinetToken
+
+# The generation methods of Wall with the built-in catalog, as (default fill strategy, inches reserved
+# for corners, cabinet kind, corner token or None, whether the corner goes at the start of the layout).
+# Other lines reserve the space of their own corner cabinets (see Catalog.generations).
+GENERATIONS = BUILTIN.generations
+
+# The smallest width a cabinet may leave behind and still be settled: the top of the range in which
+# the fills take the last cabinet down (see Wall.SHRINK)
+SETTLED_MARGIN = Wall.SHRINK[1]
+
+
+def settled_cycle(strategy, kind=CabinetToken.BASE, catalog=None):
+    """
+    Returns the sizes a fill strategy places over and over at the start of a wide wall.
+
+    Args:
+        strategy (str): One of Wall.FILL_STRATEGIES.
+        kind (int): The CabinetToken kind being filled.
+        catalog (Catalog): The line the wall is filled from (defaults to the active line).
+
+    Returns:
+        list: The repeating sizes (in inches), or None if the strategy has no settled prefix.
+    """
+    if strategy not in ("greedy", "fixed_pattern", "rotating1"):
+        return None
+    pattern = (catalog or get_catalog()).pattern(strategy, kind)
+    if not pattern:
+        return None  # The line sells none of the sizes, so every fill is just filler
+    if strategy == "rotating1":
+        return [geometry.to_inches(size) for size in pattern]  # Steps through the pattern one size per cabinet
+    return [geometry.to_inches(pattern[0])]  # Always tries the first size first
+
+
+def settle(remaining, cycle):
+    """
+    Counts the settled cabinets at the start of a fill.
+
+    A whole turn of the cycle is settled if the remaining width before it is at least the sum of
+    the cycle plus SETTLED_MARGIN, so whole turns are counted with one division and at most one
+    partial turn is stepped through.
+
+    Args:
+        remaining (int): The width the fill starts with (in quanta, see object/geometry.py).
+        cycle (list): The repeating sizes (see settled_cycle, in inches).
+
+    Returns:
+        tuple: The number of settled cabinets and the remaining width after them (in quanta).
+    """
+    cycle = geometry.units_of(tuple(cycle))
+    margin = geometry.to_units(SETTLED_MARGIN)
+    total = sum(cycle)
+    turns = max(0, (remaining - margin) // total)
+    count = turns * len(cycle)
+    remaining -= turns * total
+
+    for size in cycle:
+        if remaining < size + margin:
+            break
+        remaining -= size
+        count += 1
+    return count, remaining
+
+
+class IncrementalLayout:
+    """
+    The layout of one generation method for one wall width, kept as a settled prefix and a tail.
+
+    The cabinets are only created when asked for with tokens(), so a layout can be planned and
+    compared with another in time that doesn't depend on how many settled cabinets it has.
+
+    Attributes:
+        kind (int): The CabinetToken kind of the settled cabinets.
+        cycle (list): The repeating sizes of the settled prefix (None if there is none).
+        settled (int): The number of settled cabinets.
+        tail (list): The CabinetTokens of the fill after the settled cabinets.
+        corner (CabinetToken): The corner cabinet, or None.
+        corner_first (bool): Whether the corner cabinet comes before the fill.
+    """
+
+    __slots__ = ("kind", "cycle", "settled", "tail", "corner", "corner_first")
+
+    def __init__(self, kind, cycle, settled, tail, corner, corner_first):
+        self.kind = kind
+        self.cycle = cycle
+        self.settled = settled
+        self.tail = tail
+        self.corner = corner
+        self.corner_first = corner_first
+
+    def __len__(self):
+        return self.settled + len(self.tail) + (self.corner is not None)
+
+    @property
+    def prefix_length(self):
+        """The number of leading tokens that only depend on the settled count (corner included)."""
+        return self.settled + (self.corner is not None and self.corner_first)
+
+    def tokens(self, start=0):
+        """
+        Creates the CabinetTokens of the layout.
+
+        Args:
+            start (int): The position of the first token to create.
+
+        Returns:
+            list: The tokens from *start* to the end of the layout.
+        """
+        tokens = []
+        if self.corner is not None and self.corner_first:
+            if start == 0:
+                tokens.append(self.corner)
+            else:
+                start -= 1
+        for position in range(start, self.settled):
+            tokens.append(CabinetToken(self.kind, self.cycle[position % len(self.cycle)]))
+        tokens.extend(self.tail[max(0, start - self.settled):])
+        if self.corner is not None and not self.corner_first:
+            tokens.append(self.corner)
+        return tokens
+
+
+def plan_layout(generation, width, strategy=None, catalog=None):
+    """
+    Plans the layout a Wall generation method produces for a wall width.
+
+    Args:
+        generation (str): The generation method, one of GENERATIONS (e.g. "b1").
+        width (float): The width of the wall (in inches).
+        strategy (str): An optional fill strategy (see Wall.FILL_STRATEGIES) replacing the default.
+        catalog (Catalog): The line to lay the wall out from (defaults to the active line).
+
+    Returns:
+        IncrementalLayout: The layout, equal to the one the generation method builds.
+
+    Raises:
+        ValueError: If the generation method or strategy is not valid.
+    """
+    if generation not in GENERATIONS:
+        raise ValueError(f"{generation} is not a valid generation method. Must be one of {list(GENERATIONS)}.")
+    catalog = catalog or get_catalog()
+    default_strategy, reserved, kind, corner, corner_first = catalog.generations[generation]
+    strategy = strategy or default_strategy
+
+    wall = Wall(width=width, catalog=catalog)
+    fill = wall.get_fill(strategy)
+    remaining = geometry.to_units(wall.width) - geometry.to_units(reserved)
+
+    cycle = settled_cycle(strategy, kind, catalog)
+    settled = 0
+    if cycle is not None:
+        settled, remaining = settle(remaining, cycle)
+    remaining_width = geometry.to_inches(remaining)
+    if strategy == "rotating1" and settled:
+        # Carry on from where the settled cabinets left the rotation
+        offset = settled % len(cycle)
+        tail = wall.rotating1_fill(remaining_width, kind, pattern=cycle[offset:] + cycle[:offset])
+    else:
+        tail = fill(remaining_width, kind)
+
+    return IncrementalLayout(kind, cycle, settled, tail, corner, corner_first)
+
+
+def layout_diff(old, new):
+    """
+    Finds the smallest single splice that turns one layout into the other.
+
+    Only the tokens after the shorter settled prefix are created and compared, so the cost depends on
+    how much the width changed rather than on the length of the wall.
+
+    Args:
+        old (IncrementalLayout): The previous layout.
+        new (IncrementalLayout): The new layout, planned for the same generation method and strategy.
+
+    Returns:
+        dict: The splice, as the position of the first changed token ("start"), how many of the old
+        tokens to remove from there ("delete") and the CabinetTokens to put in their place ("insert").
+    """
+    start = min(old.prefix_length, new.prefix_length)
+    old_tokens = old.tokens(start)
+    new_tokens = new.tokens(start)
+
+    # Skip the tokens that still match at the start and at the end
+    same = 0
+    while same < min(len(old_tokens), len(new_tokens)) and old_tokens[same] == new_tokens[same]:
+        same += 1
+    old_tokens, new_tokens = old_tokens[same:], new_tokens[same:]
+    suffix = 0
+    while suffix < min(len(old_tokens), len(new_tokens)) and old_tokens[-1 - suffix] == new_tokens[-1 - suffix]:
+        suffix += 1
+
+    return {
+        "start": start + same,
+        "delete": len(old_tokens) - suffix,
+        "insert": new_tokens[:len(new_tokens) - suffix],
+    }
+
+
+def relayout(generation, previous_width, width, strategy=None, catalog=None):
+    """
+    Re-lays out a wall after its width changed.
+
+    Args:
+        generation (str): The generation method the wall was laid out with (e.g. "b1").
+        previous_width (float): The width the previous layout was made for (in inches).
+        width (float): The new width of the wall (in inches).
+        strategy (str): The optional fill strategy the wall was laid out with.
+        catalog (Catalog): The line the wall is laid out from (defaults to the active line).
+
+    Returns:
+        tuple: The new IncrementalLayout and the splice that turns the previous layout into it
+        (see layout_diff). Call tokens() on the layout for the full list of cabinets, or apply_diff
+        to the previous list of cabinets.
+
+    Raises:
+        ValueError: If the generation method or strategy is not valid.
+    """
+    old = plan_layout(generation, previous_width, strategy, catalog)
+    new = plan_layout(generation, width, strategy, catalog)
+    return new, layout_diff(old, new)
+
+
+def apply_diff(previous, diff):
+    """
+    Applies a splice from layout_diff to a list (of CabinetTokens, or anything else per cabinet).
+
+    Args:
+        previous (list): The previous layout.
+        diff (dict): The splice.
+
+    Returns:
+        list: A new list with the unchanged items of *previous* and the inserted items.
+    """
+    end = diff["start"] + diff["delete"]
+    return previous[:diff["start"]] + list(diff["insert"]) + previous[end:]
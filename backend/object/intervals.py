@@ -0,0 +1,131 @@
+"""
+A static interval tree over half-open [start, end) intervals.
+
+The intervals are sorted by start and the sorted array is read as an implicit balanced binary search
+tree (the middle of every range is the root of that range), with the largest end of each subtree kept
+alongside. A query walks down from the root and skips every subtree that starts too late or ends too
+early, so finding the k intervals that overlap a range takes O(log n + k) time. The union of the
+intervals is also kept sorted, so the free gaps in a range are found with a binary search.
+
+Typical usage example:
+
+    tree = IntervalTree([(30, 66, "window"), (96, 120, "dishwasher")])
+    tree.overlapping(60, 96)  # ["window"]
+    tree.gaps(0, 144)  # [(0, 30), (66, 96), (120, 144)]
+"""
+
+import bisect
+
+
+class IntervalTree:
+    """
+    An interval tree that is built once and queried many times.
+
+    Intervals are half-open, so [30, 66) and [66, 96) don't overlap (an obstacle can end exactly
+    where the next one starts). Empty intervals are ignored.
+
+    Attributes:
+        starts (list): The starts of the intervals, sorted.
+        ends (list): The end of each interval, in the same order.
+        items (list): The item stored with each interval, in the same order.
+        max_ends (list): For each position, the largest end in the subtree rooted there.
+        merged (list): The union of the intervals as sorted, disjoint (start, end) pairs.
+    """
+
+    __slots__ = ("starts", "ends", "items", "max_ends", "merged", "_merged_starts")
+
+    def __init__(self, intervals=()):
+        """
+        Builds the tree.
+
+        Args:
+            intervals (iterable): (start, end, item) triples.
+        """
+        # Sorted on the bounds only, since the items needn't be comparable
+        entries = sorted(
+            ((start, end, item) for start, end, item in intervals if end > start),
+            key=lambda entry: (entry[0], entry[1]),
+        )
+        self.starts = [start for start, _, _ in entries]
+        self.ends = [end for _, end, _ in entries]
+        self.items = [item for _, _, item in entries]
+        self.max_ends = [0] * len(entries)
+        self._build(0, len(entries))
+
+        self.merged = []
+        for start, end in zip(self.starts, self.ends):
+            if self.merged and start <= self.merged[-1][1]:
+                if end > self.merged[-1][1]:
+                    self.merged[-1] = (self.merged[-1][0], end)
+            else:
+                self.merged.append((start, end))
+        self._merged_starts = [start for start, _ in self.merged]
+
+    def _build(self, low, high):
+        """Fills max_ends for the subtree over positions [low, high) and returns its largest end."""
+        if low >= high:
+            return float("-inf")
+        middle = (low + high) // 2
+        largest = max(self.ends[middle], self._build(low, middle), self._build(middle + 1, high))
+        self.max_ends[middle] = largest
+        return largest
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlapping(self, start, end):
+        """
+        Finds the intervals that overlap [start, end).
+
+        Args:
+            start (float): The start of the range.
+            end (float): The end of the range.
+
+        Returns:
+            list: The items of the overlapping intervals, ordered by their start.
+        """
+        found = []
+        self._collect(0, len(self.starts), start, end, found)
+        return found
+
+    def _collect(self, low, high, start, end, found):
+        """Appends the items of the subtree over positions [low, high) that overlap [start, end), in order."""
+        while low < high:
+            middle = (low + high) // 2
+            if self.max_ends[middle] <= start:
+                return  # Nothing in this subtree reaches the range
+            self._collect(low, middle, start, end, found)
+            if self.starts[middle] >= end:
+                return  # This interval and everything after it starts after the range
+            if self.ends[middle] > start:
+                found.append(self.items[middle])
+            low = middle + 1
+
+    def covers(self, point):
+        """Returns whether any interval contains *point*."""
+        index = bisect.bisect_right(self._merged_starts, point) - 1
+        return index >= 0 and point < self.merged[index][1]
+
+    def gaps(self, start, end):
+        """
+        Finds the parts of [start, end) that no interval covers.
+
+        Args:
+            start (float): The start of the range.
+            end (float): The end of the range.
+
+        Returns:
+            list: The free (start, end) pairs, in order.
+        """
+        gaps = []
+        position = start
+        index = max(0, bisect.bisect_right(self._merged_starts, start) - 1)
+        while index < len(self.merged) and self.merged[index][0] < end:
+            blocked_start, blocked_end = self.merged[index]
+            if blocked_start > position:
+                gaps.append((position, blocked_start))
+            position = max(position, blocked_end)
+            index += 1
+        if position < end:
+            gaps.append((position, end))
+        return gaps
@@ -0,0 +1,538 @@
+"""
+Background jobs: long-running requests run by worker processes, with the database as the queue.
+
+A request that can take seconds (a whole-project layout, an exhaustive search, a bulk quote) is
+submitted as a Job row and answered at once with the job's id. Workers started with
+`python manage.py run_jobs` claim the oldest queued job, run the handler registered for its kind
+and store the result on the row, where the status and result endpoints read it. There is no broker
+besides the existing database, so queued jobs survive restarts.
+
+Each kind registers a validator with its handler, and submit runs it, so a job whose parameters can't
+work is refused when it is submitted rather than failing on a worker later.
+
+Claiming is a conditional UPDATE (status queued -> running), so two workers can't both take a job,
+whatever the database. Handlers report progress through their JobContext, which also bumps the job's
+heartbeat and stops the job if it was cancelled. A running job whose heartbeat is older than
+JOB_STALE_AFTER seconds (its worker died) is queued again, up to JOB_MAX_ATTEMPTS starts.
+
+Typical usage example:
+
+    job = submit("project_layout", {"project": 3})
+    ...
+    work("worker-1", once=True)  # Runs every queued job, then returns
+"""
+
+import logging
+import math
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from . import pricing, room_solver, search
+from .catalog import get_catalog
+from .models.job import Job
+from .models.project import Project, WallRun
+from .models.wall import Wall
+from .obstacles import ObstacleIndex
+
+logger = logging.getLogger(__name__)
+
+# Handlers by job kind, filled in by the job_kind decorator. Each is called with the job's params
+# and its JobContext and returns the (JSON-serializable) result.
+JOB_KINDS = {}
+
+# Validators by job kind, registered with the handlers. Each is called with the params of a job being
+# submitted and raises ValueError if the job can't run with them.
+JOB_VALIDATORS = {}
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled."""
+
+
+def job_kind(name, validator=None):
+    """
+    Registers the decorated function as the handler of a kind of job.
+
+    Args:
+        name (str): The kind of job.
+        validator (callable): Optionally called with the params of every job of the kind when it is
+            submitted (see submit); it raises ValueError if they are not valid.
+    """
+    def register(handler):
+        JOB_KINDS[name] = handler
+        if validator is not None:
+            JOB_VALIDATORS[name] = validator
+        return handler
+    return register
+
+
+class JobContext:
+    """
+    What a running handler uses to report on its job.
+
+    Progress is written to the job's row at most every JOB_PROGRESS_INTERVAL seconds (and each write
+    bumps the heartbeat and checks whether the job was cancelled), so handlers can report after
+    every small step.
+    """
+
+    def __init__(self, job):
+        """
+        Initializes the context of a claimed job.
+
+        Args:
+            job (Job): The job being run.
+        """
+        self.job = job
+        self.interval = getattr(settings, "JOB_PROGRESS_INTERVAL", 0.5)
+        self._written = 0.0  # time.monotonic() of the last write
+
+    def progress(self, done, total, message=""):
+        """
+        Reports how much of the job is done.
+
+        Args:
+            done (int | float): The steps done so far.
+            total (int | float): The number of steps.
+            message (str): What the job is doing (e.g. "3 of 12 wall runs").
+
+        Raises:
+            JobCancelled: If the job has been cancelled.
+        """
+        now = time.monotonic()
+        if now - self._written < self.interval and done < total:
+            return
+        self._written = now
+        fraction = min(max(done / total, 0.0), 1.0) if total else 1.0
+        Job.objects.filter(pk=self.job.pk).update(
+            progress=fraction, message=message[:200], heartbeat_at=timezone.now()
+        )
+        self.check()
+
+    def check(self):
+        """
+        Stops the job if it has been cancelled.
+
+        Raises:
+            JobCancelled: If the job has been cancelled.
+        """
+        if Job.objects.filter(pk=self.job.pk, cancel_requested=True).exists():
+            raise JobCancelled()
+
+
+def submit(kind, params=None):
+    """
+    Queues a job.
+
+    Args:
+        kind (str): The kind of job (one of JOB_KINDS).
+        params (dict): The job's parameters (see the handler of the kind).
+
+    Returns:
+        Job: The queued job.
+
+    Raises:
+        ValueError: If the kind is not known, or the parameters are not a dictionary or are not valid
+            for the kind (see job_kind).
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"{kind} is not a job kind. Must be one of {sorted(JOB_KINDS)}.")
+    params = {} if params is None else params
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object")
+    validator = JOB_VALIDATORS.get(kind)
+    if validator is not None:
+        validator(params)
+    return Job.objects.create(kind=kind, params=params)
+
+
+def cancel(job_id):
+    """
+    Cancels a job. A queued job is cancelled at once; a running one stops at its next progress update.
+
+    Args:
+        job_id (int): The id of the job.
+
+    Returns:
+        Job: The job as it is after the request.
+
+    Raises:
+        Job.DoesNotExist: If there is no such job.
+        ValueError: If the job has already finished.
+    """
+    if Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+        status=Job.CANCELLED, cancel_requested=True, finished_at=timezone.now()
+    ):
+        return Job.objects.get(pk=job_id)
+    Job.objects.filter(pk=job_id, status=Job.RUNNING).update(cancel_requested=True)
+    job = Job.objects.get(pk=job_id)
+    if job.status in (Job.DONE, Job.FAILED):
+        raise ValueError(f"Job {job_id} has already finished ({job.status})")
+    return job
+
+
+def claim(worker):
+    """
+    Takes the oldest queued job off the queue.
+
+    Args:
+        worker (str): The name of the worker taking the job.
+
+    Returns:
+        Job: The claimed job (now running), or None if the queue is empty.
+    """
+    while True:
+        job_id = Job.objects.filter(status=Job.QUEUED).order_by("id").values_list("id", flat=True).first()
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, attempts=F("attempts") + 1, started_at=now, heartbeat_at=now,
+            progress=0, message=""
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+        # Another worker took it first, so try the next one
+
+
+def requeue_stale():
+    """
+    Queues the running jobs whose workers stopped reporting (see JOB_STALE_AFTER) again, or fails
+    them once they have been started JOB_MAX_ATTEMPTS times.
+
+    Returns:
+        int: How many jobs were queued again or failed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, "JOB_STALE_AFTER", 300))
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=cutoff)
+    max_attempts = getattr(settings, "JOB_MAX_ATTEMPTS", 3)
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=Job.FAILED, error="The worker running the job stopped responding", finished_at=timezone.now()
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(status=Job.QUEUED, worker="")
+    return failed + requeued
+
+
+def run_job(job):
+    """
+    Runs a claimed job and records how it ended.
+
+    Args:
+        job (Job): The job, as returned by claim.
+
+    Returns:
+        str: The status the job ended with.
+    """
+    context = JobContext(job)
+    running = Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker)
+    try:
+        handler = JOB_KINDS.get(job.kind)
+        if handler is None:
+            raise ValueError(f"{job.kind} is not a job kind")
+        context.check()
+        result = handler(job.params, context)
+        context.check()  # Cancelled after its last progress update
+    except JobCancelled:
+        status, changes = Job.CANCELLED, {}
+    except Exception as e:
+        logger.exception("job failed", extra={"job": job.pk, "kind": job.kind})
+        status, changes = Job.FAILED, {"error": str(e)}
+    else:
+        status, changes = Job.DONE, {"result": result, "progress": 1, "message": ""}
+
+    # Only a worker that still owns the job records the outcome (a stale job may have been taken over)
+    running.update(status=status, finished_at=timezone.now(), **changes)
+    logger.info("job finished", extra={"job": job.pk, "kind": job.kind, "status": status})
+    return status
+
+
+def worker_name():
+    """Returns a name for this worker process (host and process id)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def work(worker=None, once=False, poll=None, max_jobs=None):
+    """
+    Runs queued jobs until stopped.
+
+    Args:
+        worker (str): The name of the worker (defaults to worker_name()).
+        once (bool): Whether to return as soon as the queue is empty instead of waiting for more jobs.
+        poll (float): Seconds to wait between checks of an empty queue (defaults to JOB_POLL_INTERVAL).
+        max_jobs (int): Return after running this many jobs (optional).
+
+    Returns:
+        int: How many jobs were run.
+    """
+    worker = worker or worker_name()
+    poll = poll if poll is not None else getattr(settings, "JOB_POLL_INTERVAL", 1.0)
+    count = 0
+    while max_jobs is None or count < max_jobs:
+        requeue_stale()
+        job = claim(worker)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll)
+            continue
+        run_job(job)
+        count += 1
+    return count
+
+
+def job_details(job, include_result=False):
+    """
+    Converts a job to a dictionary for the API.
+
+    Args:
+        job (Job): The job.
+        include_result (bool): Whether to add the result.
+
+    Returns:
+        dict: The id, kind, status, progress, message, error and times of the job (and its result).
+    """
+    details = {
+        "id": job.pk,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "message": job.message,
+        "error": job.error or None,
+        "cancel_requested": job.cancel_requested,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if include_result:
+        details["result"] = job.result
+    return details
+
+
+# Checks shared by the validators of the job kinds
+
+def check_number(value, name, required=False):
+    """
+    Checks that a parameter, if given, is a finite non-negative number.
+
+    Args:
+        value: The value of the parameter (None if it wasn't given).
+        name (str): The name of the parameter, for the error message.
+        required (bool): Whether the parameter must be given.
+
+    Raises:
+        ValueError: If the parameter is missing but required, or is not a finite non-negative number.
+    """
+    if value is None:
+        if required:
+            raise ValueError(f"{name} is required")
+        return
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = None
+    if isinstance(value, bool) or number is None or not math.isfinite(number) or number < 0:
+        raise ValueError(f"{name} must be a non-negative number")
+
+
+def check_strategy(strategy):
+    """
+    Checks a fill strategy name.
+
+    Args:
+        strategy (str): One of the keys of Wall.FILL_STRATEGIES, or None for the default fills.
+
+    Raises:
+        ValueError: If the strategy is not a known fill strategy.
+    """
+    if strategy is not None and (not isinstance(strategy, str) or strategy not in Wall.FILL_STRATEGIES):
+        raise ValueError(f"{strategy} is not a valid fill strategy. Must be one of {list(Wall.FILL_STRATEGIES)}.")
+
+
+def check_project_layout(params):
+    """Checks the params of a project_layout job (see project_layout)."""
+    project = params.get("project")
+    if isinstance(project, bool) or not isinstance(project, int):
+        raise ValueError("project must be the id of a project")
+    if not Project.objects.filter(pk=project).exists():
+        raise ValueError(f"Project {project} does not exist")
+    check_strategy(params.get("strategy"))
+    get_catalog(params.get("line"))
+
+
+def check_generate_room(params):
+    """Checks the params of a generate_room job (see generate_room)."""
+    from .views import validate_room
+
+    walls = params.get("walls")
+    error = validate_room(walls)
+    if error:
+        raise ValueError(error)
+    for wall in walls:
+        check_number(wall.get("width"), "width", required=True)
+    solver, corners = params.get("solver"), params.get("corners")
+    if solver not in (None, "corners"):
+        raise ValueError("solver must be \"corners\" if given")
+    if solver == "corners" and corners is not None:
+        if not isinstance(corners, list) or not all(isinstance(corner, list) for corner in corners):
+            raise ValueError("corners must be a list of [wall, next wall] pairs")
+        room_solver.validate_corners(len(walls), corners)
+    check_strategy(params.get("strategy"))
+    get_catalog(params.get("line"))
+
+
+def check_search_wall(params):
+    """Checks the params of a search_wall job (see search_wall)."""
+    check_number(params.get("width"), "width", required=True)
+    check_number(params.get("time_budget"), "time_budget")
+    orientation = params.get("orientation")
+    if orientation not in search.ORIENTATION_GENERATIONS:
+        raise ValueError(f"{orientation} is not a valid entry for orientation type")
+    search.check_weights(params.get("weights"))
+    get_catalog(params.get("line"))
+
+
+def check_quote_walls(params):
+    """Checks the params of a quote_walls job (see quote_walls)."""
+    from .views import ORIENTATION_GENERATIONS
+
+    orientation = params.get("orientation", "top")
+    if orientation not in ORIENTATION_GENERATIONS:
+        raise ValueError(f"{orientation} is not a valid entry for orientation type")
+    widths = params.get("widths")
+    if not isinstance(widths, list) or not widths:
+        raise ValueError("widths must be a non-empty list")
+    for width in widths:
+        check_number(width, "Every width", required=True)
+    strategies = params.get("strategies", [None])
+    if not isinstance(strategies, list) or not strategies:
+        raise ValueError("strategies must be a non-empty list")
+    for strategy in strategies:
+        check_strategy(strategy)
+    get_catalog(params.get("line"))
+
+
+# Job kinds. The views' payload helpers are imported inside the handlers, since views imports this module.
+
+@job_kind("project_layout", check_project_layout)
+def project_layout(params, context):
+    """
+    Lays out every wall run of a saved project around its obstacles.
+
+    Params:
+        project (int): The id of the project.
+        strategy (str): An optional fill strategy (see Wall.FILL_STRATEGIES).
+        line (str): The catalog line to lay the walls out from (optional).
+
+    Returns:
+        dict: The project id and, for each wall run, its id, room, width, orientation and the
+        "cabinets" and "segments" wall_run_layout returns.
+    """
+    from .views import obstacle_wall_payload
+
+    project = Project.objects.filter(pk=params.get("project")).first()
+    if project is None:
+        raise ValueError(f"Project {params.get('project')} does not exist")
+    catalog = get_catalog(params.get("line"))
+    wall_runs = list(WallRun.objects.filter(room__project=project).order_by("room__position", "room_id", "position", "id"))
+    results = []
+    for done, wall_run in enumerate(wall_runs):
+        context.progress(done, len(wall_runs), f"{done} of {len(wall_runs)} wall runs")
+        payload = obstacle_wall_payload(
+            wall_run.width, wall_run.orientation, ObstacleIndex.for_wall_run(wall_run.pk), params.get("strategy"), catalog
+        )
+        results.append({
+            "id": wall_run.pk,
+            "room": wall_run.room_id,
+            "width": wall_run.width,
+            "orientation": wall_run.orientation,
+            **payload,
+        })
+    return {"project": project.pk, "wall_runs": results}
+
+
+@job_kind("generate_room", check_generate_room)
+def generate_room(params, context):
+    """
+    Lays out a room, as the generate_room endpoint does.
+
+    Params:
+        The same as the generate_room endpoint (walls, strategy, solver, corners, line).
+
+    Returns:
+        dict: The generate_room response.
+    """
+    from .views import room_payload, solved_room_payload, validate_room
+
+    walls = params.get("walls")
+    error = validate_room(walls)
+    if error:
+        raise ValueError(error)
+    catalog = get_catalog(params.get("line"))
+    if params.get("solver") == "corners":
+        context.progress(0, 1, "Solving the room")
+        return solved_room_payload(walls, params.get("corners"), params.get("strategy"), catalog)
+    if params.get("solver") is not None:
+        raise ValueError("solver must be \"corners\" if given")
+    return room_payload(
+        walls, params.get("strategy"), catalog,
+        lambda done, total: context.progress(done, total, f"{done} of {total} walls")
+    )
+
+
+@job_kind("search_wall", check_search_wall)
+def search_wall(params, context):
+    """
+    Searches every candidate layout of a wall, as the search_wall endpoint does, with a longer time budget.
+
+    Params:
+        width / orientation / weights / line: As for the search_wall endpoint.
+        time_budget (float): Seconds to search for, capped at JOB_SEARCH_TIME_BUDGET (the default).
+
+    Returns:
+        dict: The search_wall response.
+    """
+    from .views import search_payload
+
+    max_budget = getattr(settings, "JOB_SEARCH_TIME_BUDGET", 30.0)
+    time_budget = min(float(params.get("time_budget", max_budget)), max_budget)
+    return search_payload(
+        float(params["width"]), params.get("orientation"), params.get("weights"), time_budget,
+        lambda done, total: context.progress(done, total, ("Searched the bases", "Searched the uppers")[done - 1]),
+        get_catalog(params.get("line"))
+    )
+
+
+@job_kind("quote_walls", check_quote_walls)
+def quote_walls(params, context):
+    """
+    Prices many walls with several fill strategies, for what-if analysis (see pricing.quote_walls).
+
+    Params:
+        widths (list): The wall widths (in inches).
+        orientation (str): The orientation of every wall (default "top").
+        strategies (list): The fill strategies to compare (null being the default; defaults to
+            the default and every fill strategy).
+        line (str): The catalog line to lay the walls out from and price from (optional).
+
+    Returns:
+        dict: The widths, and for each strategy (null under "default") a quote per width.
+    """
+    from .views import ORIENTATION_GENERATIONS
+
+    orientation = params.get("orientation", "top")
+    widths = params["widths"]
+    strategies = params.get("strategies", [None, *Wall.FILL_STRATEGIES])
+    catalog = get_catalog(params.get("line"))
+
+    quotes = {}
+    for done, strategy in enumerate(strategies):
+        context.progress(done, len(strategies), f"{done} of {len(strategies)} strategies")
+        rows = pricing.quote_walls(widths, ORIENTATION_GENERATIONS[orientation], (strategy,), catalog)[strategy]
+        quotes[strategy or "default"] = [pricing.quote_details(row) for row in rows]
+    return {"widths": widths, "quotes": quotes}
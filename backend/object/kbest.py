@@ -0,0 +1,215 @@
+"""
+Top-K layout enumeration: the best layouts of a wall in score order, generated lazily.
+
+A fill of one layer (the bases or the uppers) is a path through a DAG whose nodes are the widths
+filled so far: every edge places one cabinet size, and a path ends by covering what is left with a
+filler. Sizes are placed in non-increasing order, so every multiset of cabinets is a single path and
+two layouts that are only reorderings of each other are never both listed.
+
+Layouts are scored with the additive objectives of search.score_layout (filler inches, cabinet
+count and small boxes; symmetry depends on the order of the cabinets, which is fixed here). A
+dynamic program first computes the exact best score reachable from every node, and an A* search
+guided by it then pops complete layouts off a heap in score order. With an exact heuristic the search
+never expands a path that doesn't lead to the next layout, so the k-th layout costs about as much as
+the first. The layouts of a wall are the pairs of base and upper layouts, merged lazily in order of
+their total score.
+
+Typical usage example:
+
+    for score, bases, uppers, objectives in itertools.islice(wall_layouts(120, ("b2", "u2")), 50):
+        ...
+"""
+
+import heapq
+import itertools
+from math import gcd, inf
+
+from . import geometry
+from .catalog import get_catalog
+from .search import check_weights
+from .tokens import CabinetToken
+
+# The objectives of search.score_layout that add up cabinet by cabinet
+OBJECTIVES = ("filler", "cabinets", "small_boxes")
+
+
+class LayerLayouts:
+    """
+    Enumerates the layouts of one layer (the bases or the uppers) of a wall, best first.
+
+    Iterating yields (score, tokens, objectives) tuples, where tokens are the CabinetTokens of the
+    layout (cabinets widest first, then the filler, with the generation method's corner) and
+    objectives has the raw value of each of OBJECTIVES. Layouts already found are kept, so the
+    object can be iterated more than once and indexed with get.
+    """
+
+    def __init__(self, width, generation, catalog=None, weights=None):
+        """
+        Computes the best score reachable from every node of the layer's DAG.
+
+        Args:
+            width (float): The width of the wall (in inches).
+            generation (str): The generation method whose corner and cabinet kind to use (e.g. "b2").
+            catalog (Catalog): The line to lay the wall out from (defaults to the active line).
+            weights (dict): Optional weights overriding search.DEFAULT_WEIGHTS.
+
+        Raises:
+            ValueError: If the width, generation method or weights are not valid.
+        """
+        catalog = catalog or get_catalog()
+        if generation not in catalog.generations:
+            raise ValueError(f"{generation} is not a valid generation method")
+        weights = check_weights(weights)
+        _, reserved, self.kind, self.corner, self.corner_first = catalog.generations[generation]
+        self.remaining = max(geometry.to_units(width) - geometry.to_units(reserved), 0)
+
+        # Sizes (in quanta, widest first) that fit, and what placing one costs
+        self.sizes = tuple(size for size in catalog.units(self.kind) if size <= self.remaining)
+        largest = max(catalog.units(CabinetToken.BASE) + catalog.units(CabinetToken.UPPER), default=1)
+        self._filler_weight = weights["filler"]
+        self._largest = largest
+        self._edges = tuple(
+            weights["cabinets"] + weights["small_boxes"] * (largest - size) / largest for size in self.sizes
+        )
+        self._corner_cost = weights["cabinets"] if self.corner is not None else 0.0
+
+        # Every fill is a multiple of the sizes' greatest common divisor, so nodes count in steps of it
+        self._step = gcd(*self.sizes) if self.sizes else 1
+        self._limit = self.remaining // self._step
+        self._steps = steps = tuple(size // self._step for size in self.sizes)
+
+        # best[f][i] is the lowest score that can still be added once f steps are filled and only
+        # sizes i and narrower may be placed next (best[f][len(sizes)] is stopping with a filler)
+        n = len(steps)
+        best = [None] * (self._limit + 1)
+        for filled in range(self._limit, -1, -1):
+            row = [0.0] * (n + 1)
+            row[n] = self._stop_cost(filled)
+            for i in range(n - 1, -1, -1):
+                after = filled + steps[i]
+                placed = self._edges[i] + best[after][i] if after <= self._limit else inf
+                row[i] = min(placed, row[i + 1])
+            best[filled] = row
+        self._best = best
+
+        # A* frontier of (estimated total, order, score so far, steps filled, smallest size index,
+        # placed sizes as a linked list, whether the path is complete)
+        self._heap = [(best[0][0], 0, 0.0, 0, 0, None, False)]
+        self._counter = itertools.count(1)
+        self._found = []
+
+    def _stop_cost(self, filled):
+        """Returns the score of covering what is left after *filled* steps with a filler."""
+        return self._filler_weight * (self.remaining - filled * self._step) / geometry.QUANTUM
+
+    def _next(self):
+        """Runs the search until the next layout is complete, returning it (or None if there are no more)."""
+        heap = self._heap
+        while heap:
+            estimate, _, score, filled, smallest, placed, complete = heapq.heappop(heap)
+            if complete:
+                return self._layout(score, filled, placed)
+
+            # Stop here with a filler, or place one more cabinet no wider than the last one
+            stop = score + self._stop_cost(filled)
+            heapq.heappush(heap, (stop, next(self._counter), stop, filled, smallest, placed, True))
+            for i in range(smallest, len(self._steps)):
+                after = filled + self._steps[i]
+                if after > self._limit:
+                    continue
+                reached = score + self._edges[i]
+                heapq.heappush(heap, (
+                    reached + self._best[after][i], next(self._counter), reached, after, i, (i, placed), False
+                ))
+        return None
+
+    def _layout(self, score, filled, placed):
+        """Builds the (score, tokens, objectives) of a complete path."""
+        units = []
+        while placed is not None:
+            index, placed = placed
+            units.append(self.sizes[index])
+        units.reverse()  # Widest first
+        tokens = [CabinetToken.from_units(self.kind, size) for size in units]
+        filler = self.remaining - filled * self._step
+        if filler > 0:
+            tokens.append(CabinetToken.from_units(CabinetToken.FILLER, filler))
+        if self.corner is not None:
+            tokens.insert(0 if self.corner_first else len(tokens), self.corner)
+
+        objectives = {
+            "filler": geometry.to_inches(filler),
+            "cabinets": len(units) + (self.corner is not None),
+            "small_boxes": sum((self._largest - size) / self._largest for size in units),
+        }
+        return score + self._corner_cost, tokens, objectives
+
+    def get(self, index):
+        """
+        Returns the layout at a rank (0 being the best), running the search as far as needed.
+
+        Args:
+            index (int): The rank.
+
+        Returns:
+            tuple: The (score, tokens, objectives) of the layout, or None if the layer has fewer layouts.
+        """
+        while len(self._found) <= index:
+            layout = self._next()
+            if layout is None:
+                return None
+            self._found.append(layout)
+        return self._found[index]
+
+    def __iter__(self):
+        for index in itertools.count():
+            layout = self.get(index)
+            if layout is None:
+                return
+            yield layout
+
+
+def wall_layouts(width, generations, catalog=None, weights=None):
+    """
+    Enumerates the layouts of a wall (its bases and uppers together) in score order.
+
+    The bases and uppers are enumerated separately, and pairs of them are merged lazily: the best
+    pair is (0, 0), and once a pair is listed the pairs right after it in either layer become
+    candidates, so only the layouts that can still come next are ever computed.
+
+    Args:
+        width (float): The width of the wall (in inches).
+        generations (tuple): The (base, upper) generation methods whose corners to use, like ("b2", "u2").
+        catalog (Catalog): The line to lay the wall out from (defaults to the active line).
+        weights (dict): Optional weights overriding search.DEFAULT_WEIGHTS (symmetry doesn't apply).
+
+    Returns:
+        generator: (score, bases, uppers, objectives) tuples, best first, where objectives sums the
+        raw objectives of both layers. Every layout is different from the others.
+
+    Raises:
+        ValueError: If the width, generation methods or weights are not valid.
+    """
+    base_generation, upper_generation = generations
+    bases = LayerLayouts(width, base_generation, catalog, weights)
+    uppers = LayerLayouts(width, upper_generation, catalog, weights)
+    return _merge(bases, uppers)
+
+
+def _merge(bases, uppers):
+    """Yields the pairs of base and upper layouts in order of their total score (see wall_layouts)."""
+    first = (bases.get(0), uppers.get(0))
+    if None in first:
+        return
+    heap = [(first[0][0] + first[1][0], 0, 0)]
+    while heap:
+        score, i, j = heapq.heappop(heap)
+        base, upper = bases.get(i), uppers.get(j)
+        yield score, base[1], upper[1], {name: base[2][name] + upper[2][name] for name in OBJECTIVES}
+
+        # (i, j + 1) always follows (i, j); (i + 1, 0) follows (i, 0), so each pair is pushed once
+        following = [(i, j + 1)] + ([(i + 1, 0)] if j == 0 else [])
+        for a, b in following:
+            base, upper = bases.get(a), uppers.get(b)
+            if base is not None and upper is not None:
+                heapq.heappush(heap, (base[0] + upper[0], a, b))
@@ -0,0 +1,224 @@
+"""
+Precomputed layout table for generate_wall.
+
+The table holds the result of every generation_b*/generation_u* method for every wall width in a
+range (min_width, min_width + step, ..., max_width). It is written once by the build_layout_table
+management command and memory-mapped read-only by the object app at startup, so every worker process
+shares the same pages instead of keeping its own copy.
+
+Every length in the file is a whole number of quanta (see object/geometry.py), so rows are found
+with integer arithmetic and the stored widths read back exactly. A table built with a different
+quantum or by other layout algorithms (Wall.ALGORITHM_VERSION) than the running process can't be
+read, and has to be rebuilt. The table is built for one catalog line (see object/catalog.py) and
+records its key, so layouts of any other line are never read from it.
+
+File layout (all integers little-endian):
+    header:  magic (4s), version (H), generation count (H), quantum (H), algorithm version (H),
+             min width (q), step (q), width count (I), catalog key (I)
+    index:   one (offset (I), token count (H)) entry per width per generation, widths outer
+    data:    each layout as its CabinetTokens, packed as (kind (B), width (I)) records
+"""
+
+import logging
+import mmap
+import os
+import struct
+
+from . import geometry
+from .catalog import get_catalog
+from .models.wall import Wall
+from .tokens import CabinetToken
+
+MAGIC = b"CBLT"
+VERSION = 5
+
+# Generation methods stored for every width, in file order
+GENERATIONS = ("b1", "b2", "b3", "u1", "u2", "u3")
+
+HEADER = struct.Struct("<4sHHHHqqII")
+ENTRY = struct.Struct("<IH")
+TOKEN = struct.Struct("<BI")
+
+logger = logging.getLogger(__name__)
+
+_table = None  # The table loaded by load(), shared by every request in this process
+
+
+class LayoutTable:
+    """
+    A read-only view of a layout table file.
+
+    Typical usage example:
+
+        table = LayoutTable("layout_table.bin")
+        bases = table.lookup(120, "b1")
+    """
+
+    def __init__(self, path):
+        """
+        Opens and memory-maps a layout table file.
+
+        Args:
+            path (str): The path of the table file.
+
+        Raises:
+            ValueError: If the file is not a layout table this version can read, or was built with
+                another quantum or other layout algorithms.
+        """
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            (
+                magic, version, generations, quantum, algorithm_version,
+                self.min_units, self.step_units, self.count, self.catalog_key
+            ) = HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            self._map.close()
+            raise ValueError(f"{path} is too short to be a layout table") from None
+        if magic != MAGIC or version != VERSION or generations != len(GENERATIONS):
+            self._map.close()
+            raise ValueError(f"{path} is not a version {VERSION} layout table")
+        if quantum != geometry.QUANTUM:
+            self._map.close()
+            raise ValueError(f"{path} was built with {quantum} quanta per inch, not {geometry.QUANTUM}")
+        if algorithm_version != Wall.ALGORITHM_VERSION:
+            self._map.close()
+            raise ValueError(
+                f"{path} was built with version {algorithm_version} of the layout algorithms, not "
+                f"{Wall.ALGORITHM_VERSION}; rebuild it with build_layout_table"
+            )
+
+        self.min_width = geometry.to_inches(self.min_units)
+        self.step = geometry.to_inches(self.step_units)
+        self.max_width = geometry.to_inches(self.min_units + (self.count - 1) * self.step_units)
+        self._data_start = HEADER.size + self.count * len(GENERATIONS) * ENTRY.size
+
+    def index_of(self, width):
+        """
+        Finds the row of the table that holds a width.
+
+        Args:
+            width (float): The width of the wall (in inches).
+
+        Returns:
+            int: The row index, or None if the width is outside the range or between two rows.
+        """
+        try:
+            index, offset = divmod(geometry.to_units(width) - self.min_units, self.step_units)
+        except (TypeError, ValueError):
+            return None
+
+        if index < 0 or index >= self.count or offset:
+            return None
+        return index
+
+    def lookup(self, width, generation, catalog=None):
+        """
+        Returns the stored layout for a width and generation method.
+
+        Args:
+            width (float): The width of the wall (in inches).
+            generation (str): The generation method, one of GENERATIONS (e.g. "b1").
+            catalog (Catalog): The line the layout is for (defaults to the active line).
+
+        Returns:
+            list: The CabinetTokens, or None if the width is not in the table or the table was built
+            for another line.
+        """
+        if (catalog or get_catalog()).key != self.catalog_key:
+            return None
+        index = self.index_of(width)
+        if index is None:
+            return None
+
+        entry = index * len(GENERATIONS) + GENERATIONS.index(generation)
+        offset, length = ENTRY.unpack_from(self._map, HEADER.size + entry * ENTRY.size)
+        start = self._data_start + offset
+        return [
+            CabinetToken.from_units(kind, units)
+            for kind, units in TOKEN.iter_unpack(self._map[start:start + length * TOKEN.size])
+        ]
+
+    def close(self):
+        """Unmaps the table file."""
+        self._map.close()
+
+
+def build(path, min_width, max_width, step=1, catalog=None):
+    """
+    Runs every generation method for every width in a range and writes the results to a table file.
+
+    The file is written next to *path* and then renamed over it, so processes that already have the
+    old table mapped keep reading a complete file.
+
+    Args:
+        path (str): The path of the table file to write.
+        min_width (float): The first wall width in the table (in inches).
+        max_width (float): The last wall width in the table (in inches).
+        step (float): The distance between two widths in the table (in inches).
+        catalog (Catalog): The line to lay the walls out from (defaults to the active line).
+
+    Returns:
+        int: The number of widths written.
+    """
+    catalog = catalog or get_catalog()
+    min_units, max_units, step_units = (geometry.to_units(width) for width in (min_width, max_width, step))
+    if step_units <= 0 or max_units < min_units:
+        raise ValueError("The table needs a positive step and max_width >= min_width")
+
+    count = (max_units - min_units) // step_units + 1
+    index = bytearray()
+    data = bytearray()
+
+    for i in range(count):
+        wall = Wall(width=geometry.to_inches(min_units + i * step_units), catalog=catalog)
+        for generation in GENERATIONS:
+            getattr(wall, f"generation_{generation}")()
+            layout = wall.bases if generation.startswith("b") else wall.uppers
+            index += ENTRY.pack(len(data), len(layout))
+            for token in layout:
+                data += TOKEN.pack(token.kind, token.units)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, len(GENERATIONS), geometry.QUANTUM, Wall.ALGORITHM_VERSION,
+            min_units, step_units, count, catalog.key
+        ))
+        f.write(index)
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    return count
+
+
+def load(path):
+    """
+    Memory-maps the table at *path* for this process, if the file exists.
+
+    A table this process can't read (an older format, another quantum or other layout algorithms) is
+    skipped with a warning rather than raising, since load runs when the app starts and every
+    management command, build_layout_table included, would fail with it.
+
+    Args:
+        path (str): The path of the table file.
+
+    Returns:
+        LayoutTable: The loaded table, or None if there is no readable table at *path*.
+    """
+    global _table
+    if _table is not None:
+        _table.close()
+        _table = None
+    if path and os.path.exists(path):
+        try:
+            _table = LayoutTable(path)
+        except ValueError as e:
+            logger.warning("Not using the layout table: %s", e)
+    return _table
+
+
+def get_table():
+    """Returns the table loaded in this process, or None if no table is loaded."""
+    return _table
@@ -0,0 +1,196 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from object.cache import layout_cache
+from object.models.wall import Wall
+from object.tokens import CabinetToken
+
+# Fill methods timed on their own, called with the whole wall width as the remaining width
+FILL_METHODS = ("greedy_fill", "fixed_pattern_fill", "rotating1_fill", "optimal_fill")
+
+# Generation methods timed on their own
+GENERATIONS = ("b1", "b2", "b3", "u1", "u2", "u3")
+
+# Orientations posted to generate_wall for the end-to-end timings
+ORIENTATIONS = ("left", "top", "right")
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the wall layout engines and the generate_wall endpoint over a sweep of wall widths.
+
+    For every fill method, every generation method and generate_wall (driven through the Django test
+    client), the command reports throughput, p50/p99 latency, total filler inches and total cabinet
+    count as JSON. With --baseline it compares the results against a previous run and fails if any
+    strategy got slower (beyond --tolerance) or produced more filler or cabinets.
+
+    Typical usage example:
+
+        python manage.py benchmark_layout --output bench.json
+        python manage.py benchmark_layout --baseline bench.json
+    """
+
+    help = 'Benchmarks the Wall fill strategies and the generate_wall endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-width', type=float, default=24, help='First wall width (inches)')
+        parser.add_argument('--max-width', type=float, default=400, help='Last wall width (inches)')
+        parser.add_argument('--step', type=float, default=1, help='Inches between two wall widths')
+        parser.add_argument('--repeat', type=int, default=3, help='Times each width is laid out')
+        parser.add_argument('--skip-endpoint', action='store_true', help="Don't time generate_wall")
+        parser.add_argument('--use-cache', action='store_true',
+                            help='Leave the generate_wall result cache on for the endpoint timings')
+        parser.add_argument('--output', help='Write the results to this file instead of stdout')
+        parser.add_argument('--baseline', help='Compare against the results saved in this file')
+        parser.add_argument('--tolerance', type=float, default=0.10,
+                            help='Allowed slowdown against the baseline (0.10 = 10%%)')
+
+    def handle(self, *args, **options):
+        if options['step'] <= 0 or options['repeat'] <= 0:
+            raise CommandError('--step and --repeat must be positive')
+
+        count = int(round((options['max_width'] - options['min_width']) / options['step'])) + 1
+        widths = [options['min_width'] + i * options['step'] for i in range(count)]
+        widths = [int(width) if float(width).is_integer() else width for width in widths]
+
+        results = {}
+        for method in FILL_METHODS:
+            results[method] = self.bench_fill(method, widths, options['repeat'])
+        for generation in GENERATIONS:
+            results[f"generation_{generation}"] = self.bench_generation(generation, widths, options['repeat'])
+        if not options['skip_endpoint']:
+            results["generate_wall"] = self.bench_endpoint(widths, options['repeat'], options['use_cache'])
+
+        report = {
+            "widths": {"min": options['min_width'], "max": options['max_width'], "step": options['step'], "count": count},
+            "repeat": options['repeat'],
+            "algorithm_version": Wall.ALGORITHM_VERSION,
+            "results": results,
+        }
+
+        regressions = []
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            if baseline["widths"] != report["widths"] or baseline["repeat"] != report["repeat"]:
+                raise CommandError(f"{options['baseline']} was run over a different sweep of widths")
+            regressions = compare(baseline["results"], results, options['tolerance'])
+            report["regressions"] = regressions
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+
+    def bench_fill(self, method, widths, repeat):
+        """Times one fill method for every width."""
+        wall = Wall(width=0)
+        fill = getattr(wall, method)
+        timings = []
+        layouts = []
+        for width in widths:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                layout = fill(width, CabinetToken.BASE)
+                timings.append(time.perf_counter() - start)
+            layouts.append(layout)
+        return summarize(timings, layouts)
+
+    def bench_generation(self, generation, widths, repeat):
+        """Times one generation method for every width (including creating the Wall)."""
+        attribute = "bases" if generation.startswith("b") else "uppers"
+        timings = []
+        layouts = []
+        for width in widths:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                wall = Wall(width=width)
+                getattr(wall, f"generation_{generation}")()
+                timings.append(time.perf_counter() - start)
+            layouts.append(getattr(wall, attribute))
+        return summarize(timings, layouts)
+
+    def bench_endpoint(self, widths, repeat, use_cache):
+        """Times POST requests to generate_wall for every width and orientation."""
+        setup_test_environment()  # Lets the test client's host through ALLOWED_HOSTS
+        max_size = layout_cache.max_size
+        if not use_cache:
+            layout_cache.max_size = 0
+        try:
+            client = Client()
+            timings = []
+            layouts = []
+            for width in widths:
+                for orientation in ORIENTATIONS:
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        response = client.post('/api/generate_wall/', {'width': width, 'orientation': orientation},
+                                               content_type='application/json')
+                        timings.append(time.perf_counter() - start)
+                    if response.status_code != 200:
+                        raise CommandError(f"generate_wall failed for {width} ({orientation}): {response.content}")
+                    cabinets = response.json()["cabinets"]
+                    layouts.append([CabinetToken.from_name(c["name"]) for c in cabinets["bases"] + cabinets["uppers"]])
+        finally:
+            layout_cache.max_size = max_size
+            teardown_test_environment()
+        return summarize(timings, layouts)
+
+
+def percentile(sorted_values, fraction):
+    """Returns the nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(timings, layouts):
+    """
+    Summarizes the timings (in seconds) and layouts of one strategy.
+
+    Returns:
+        dict: The call count, throughput (calls per second), p50/p99/mean latency (milliseconds),
+        total filler inches and total cabinet count (fillers not included).
+    """
+    ordered = sorted(timings)
+    total = sum(timings)
+    return {
+        "calls": len(timings),
+        "throughput": len(timings) / total if total else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "mean_ms": total / len(timings) * 1000,
+        "filler_inches": sum(t.width for layout in layouts for t in layout if t.kind == CabinetToken.FILLER),
+        "cabinets": sum(1 for layout in layouts for t in layout if t.kind != CabinetToken.FILLER),
+    }
+
+
+def compare(baseline, results, tolerance):
+    """
+    Lists the strategies that regressed against a baseline.
+
+    A strategy regresses if its p50 latency grew by more than *tolerance*, or if it produced more
+    filler inches or more cabinets over the same sweep.
+
+    Returns:
+        list: One dictionary per regression with the strategy, metric, baseline value and new value.
+    """
+    regressions = []
+    for name, old in baseline.items():
+        new = results.get(name)
+        if new is None:
+            continue
+        if new["p50_ms"] > old["p50_ms"] * (1 + tolerance):
+            regressions.append({"strategy": name, "metric": "p50_ms", "baseline": old["p50_ms"], "value": new["p50_ms"]})
+        for metric in ("filler_inches", "cabinets"):
+            if new[metric] > old[metric] + 1e-9:
+                regressions.append({"strategy": name, "metric": metric, "baseline": old[metric], "value": new[metric]})
+    return regressions
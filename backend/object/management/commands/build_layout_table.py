@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from object import catalog, layout_table
+
+
+class Command(BaseCommand):
+    """
+    Precomputes every generation_b*/generation_u* layout for a range of wall widths.
+
+    Typical usage example:
+
+        python manage.py build_layout_table --min-width 24 --max-width 400 --step 0.125
+
+    The table is built for the active catalog line unless --line names another one. Only requests for
+    that line read from it.
+    """
+
+    help = 'Precomputes wall layouts into the memory-mapped table used by generate_wall'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-width', type=float, default=settings.LAYOUT_TABLE_MIN_WIDTH,
+                            help='First wall width in the table (inches)')
+        parser.add_argument('--max-width', type=float, default=settings.LAYOUT_TABLE_MAX_WIDTH,
+                            help='Last wall width in the table (inches)')
+        parser.add_argument('--step', type=float, default=settings.LAYOUT_TABLE_STEP,
+                            help='Resolution of the table (inches between two widths)')
+        parser.add_argument('--output', default=str(settings.LAYOUT_TABLE_PATH),
+                            help='Path of the table file to write')
+        parser.add_argument('--line', default=None,
+                            help='Catalog line to lay the walls out from (defaults to the active line)')
+
+    def handle(self, *args, **options):
+        try:
+            line = catalog.get_catalog(options['line'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        count = layout_table.build(
+            options['output'], options['min_width'], options['max_width'], options['step'], line
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} widths ({options['min_width']} to {options['max_width']} by {options['step']}) "
+            f"for the {line.name} line to {options['output']}"
+        ))
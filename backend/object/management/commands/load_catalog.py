@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from object import catalog
+
+
+class Command(BaseCommand):
+    """
+    Loads catalog lines (SKUs with their dimensions and prices) from JSON or CSV files.
+
+    Lines that are already saved have their SKUs replaced. Servers read the catalog once at startup,
+    so they pick up the new lines when they restart. See object/catalog.py for the file formats.
+
+    Typical usage example:
+
+        python manage.py load_catalog catalogs/shaker.json
+        python manage.py load_catalog skus.csv --line Shaker
+    """
+
+    help = 'Loads cabinet catalog lines from JSON or CSV files into the catalog tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Catalog files to load')
+        parser.add_argument('--format', choices=catalog.FORMATS, default=None,
+                            help='Format of the files (defaults to their extension)')
+        parser.add_argument('--line', action='append', dest='lines',
+                            help='Only load this line from the files (can be repeated)')
+
+    def handle(self, *args, **options):
+        lines = []
+        for path in options['paths']:
+            try:
+                lines += catalog.read_catalogs(path, options['format'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f"{path}: {e}")
+        if options['lines']:
+            missing = set(options['lines']) - {line.name for line in lines}
+            if missing:
+                raise CommandError(f"The files have no {sorted(missing)} lines")
+            lines = [line for line in lines if line.name in options['lines']]
+
+        try:
+            catalog.save_catalogs(lines)
+        except ValueError as e:
+            raise CommandError(str(e))
+        for line in lines:
+            self.stdout.write(f"{line.name}: {len(line.entries)} SKUs")
+        active = getattr(settings, 'CATALOG_LINE', None) or catalog.BUILTIN_LINE
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {len(lines)} catalog lines (the active line is {active}; restart the server to use them)"
+        ))
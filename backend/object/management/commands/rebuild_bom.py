@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from object import bom
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the bill-of-materials summary table from the cabinet table.
+
+    The table is kept up to date as cabinets are saved, so this is only needed after writes that
+    bypass the signals and record_cabinets (raw SQL, QuerySet.update, restoring a backup).
+
+    Typical usage example:
+
+        python manage.py rebuild_bom
+        python manage.py rebuild_bom --wall-run 12 --wall-run 13
+    """
+
+    help = 'Recomputes the bill-of-materials summary table from the saved cabinets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wall-run', type=int, action='append', dest='wall_runs',
+                            help='Only rebuild the lines of this wall run (can be repeated)')
+
+    def handle(self, *args, **options):
+        count = bom.rebuild_summary(options['wall_runs'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} bill-of-materials lines"))
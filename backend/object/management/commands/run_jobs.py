@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from object import jobs
+
+
+class Command(BaseCommand):
+    """
+    Runs background jobs from the job queue table (see object/jobs.py).
+
+    Start as many workers as there are cores to spare; they share the queue without stepping on
+    each other. Without --once a worker waits for new jobs until it is stopped.
+
+    Typical usage example:
+
+        python manage.py run_jobs
+        python manage.py run_jobs --once
+    """
+
+    help = 'Runs queued background jobs (layouts, searches, quotes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll', type=float, help='Seconds between checks of an empty queue (default JOB_POLL_INTERVAL)')
+        parser.add_argument('--max-jobs', type=int, help='Exit after running this many jobs')
+        parser.add_argument('--name', help='The name of the worker (default host:pid)')
+
+    def handle(self, *args, **options):
+        worker = options['name'] or jobs.worker_name()
+        self.stdout.write(f"Worker {worker} waiting for jobs")
+        try:
+            count = jobs.work(worker, options['once'], options['poll'], options['max_jobs'])
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f"Ran {count} jobs"))
@@ -0,0 +1,158 @@
+# Generated by Django 5.1.6 on 2026-10-17 20:02
+
+from django.db import migrations, models
+
+# CabinetToken kind codes, as they were when this migration was written
+BASE, UPPER, FILLER, BASE_CORNER, UPPER_CORNER = range(5)
+PREFIXES = ("B", "U", "F", "BC", "UC")
+
+# Child table of each kind under multi-table inheritance, with its link to the parent row.
+# Plain bases and uppers come first so their corner rows are marked after them.
+CHILD_TABLES = [
+    (BASE, 'object_base', 'cabinet_ptr_id'),
+    (UPPER, 'object_upper', 'cabinet_ptr_id'),
+    (FILLER, 'object_filler', 'cabinet_ptr_id'),
+    (BASE_CORNER, 'object_basecorner', 'base_ptr_id'),
+    (UPPER_CORNER, 'object_uppercorner', 'upper_ptr_id'),
+]
+
+
+def copy_kinds(apps, schema_editor):
+    """Sets the kind of every cabinet from the child table it has a row in, or else from its name."""
+    quote = schema_editor.quote_name
+    for kind, table, link in CHILD_TABLES:
+        schema_editor.execute(
+            f"UPDATE {quote('object_cabinet')} SET {quote('kind')} = %s "
+            f"WHERE {quote('id')} IN (SELECT {quote(link)} FROM {quote(table)})",
+            [kind],
+        )
+
+    Cabinet = apps.get_model('object', 'Cabinet')
+    for pk, name in Cabinet.objects.filter(kind__isnull=True).values_list('pk', 'name').iterator():
+        prefix = name.rstrip("0123456789.")
+        if prefix in PREFIXES:
+            Cabinet.objects.filter(pk=pk).update(kind=PREFIXES.index(prefix))
+
+
+def restore_child_rows(apps, schema_editor):
+    """Recreates the child table rows of every cabinet with a kind (the reverse of copy_kinds)."""
+    quote = schema_editor.quote_name
+    parents = {
+        BASE: (BASE, BASE_CORNER),
+        UPPER: (UPPER, UPPER_CORNER),
+        FILLER: (FILLER,),
+        BASE_CORNER: (BASE_CORNER,),
+        UPPER_CORNER: (UPPER_CORNER,),
+    }
+    for kind, table, link in CHILD_TABLES:
+        kinds = parents[kind]
+        schema_editor.execute(
+            f"INSERT INTO {quote(table)} ({quote(link)}) SELECT {quote('id')} FROM {quote('object_cabinet')} "
+            f"WHERE {quote('kind')} IN ({', '.join(['%s'] * len(kinds))})",
+            list(kinds),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('object', '0002_base_filler_upper_rename__height_cabinet_depth_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Wall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('width', models.FloatField(default=0.0)),
+                ('height', models.FloatField(default=0.0)),
+                ('depth', models.FloatField(default=0.0)),
+                ('position_x', models.FloatField(default=0.0)),
+                ('position_y', models.FloatField(default=0.0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='cabinet',
+            name='kind',
+            field=models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Base'), (1, 'Upper'), (2, 'Filler'), (3, 'Base corner'), (4, 'Upper corner')], null=True),
+        ),
+        migrations.AddIndex(
+            model_name='cabinet',
+            index=models.Index(fields=['kind', 'width'], name='cabinet_kind_width_idx'),
+        ),
+        migrations.RunPython(copy_kinds, restore_child_rows),
+        migrations.DeleteModel(
+            name='BaseCorner',
+        ),
+        migrations.DeleteModel(
+            name='UpperCorner',
+        ),
+        migrations.DeleteModel(
+            name='Base',
+        ),
+        migrations.DeleteModel(
+            name='Upper',
+        ),
+        migrations.DeleteModel(
+            name='Filler',
+        ),
+        migrations.CreateModel(
+            name='Base',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('object.cabinet',),
+        ),
+        migrations.CreateModel(
+            name='Filler',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('object.cabinet',),
+        ),
+        migrations.CreateModel(
+            name='Upper',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('object.cabinet',),
+        ),
+        migrations.CreateModel(
+            name='BaseCorner',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('object.base',),
+        ),
+        migrations.CreateModel(
+            name='UpperCorner',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('object.upper',),
+        ),
+    ]
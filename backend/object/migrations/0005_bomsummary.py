@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-17 21:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_cabinets(apps, schema_editor):
+    """Fills the summary table from the cabinets already on wall runs."""
+    Cabinet = apps.get_model('object', 'Cabinet')
+    BomSummary = apps.get_model('object', 'BomSummary')
+    rows = (
+        Cabinet.objects.filter(wall_run__isnull=False, kind__isnull=False)
+        .values('wall_run_id', 'kind', 'width')
+        .annotate(quantity=Count('id'))
+        .order_by()
+    )
+    BomSummary.objects.bulk_create((BomSummary(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('object', '0004_project_room_wallrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BomSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField()),
+                ('width', models.FloatField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('wall_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bom_lines', to='object.wallrun')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('wall_run', 'kind', 'width'), name='bom_summary_line_unique')],
+            },
+        ),
+        migrations.RunPython(count_cabinets, migrations.RunPython.noop),
+    ]
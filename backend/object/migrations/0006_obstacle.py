@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-17 20:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('object', '0005_bomsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Obstacle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('width', models.FloatField(default=0.0)),
+                ('height', models.FloatField(default=0.0)),
+                ('depth', models.FloatField(default=0.0)),
+                ('position_x', models.FloatField(default=0.0)),
+                ('position_y', models.FloatField(default=0.0)),
+                ('kind', models.CharField(choices=[('window', 'Window'), ('door', 'Door'), ('opening', 'Opening'), ('range', 'Range'), ('dishwasher', 'Dishwasher'), ('fridge', 'Refrigerator')], max_length=10)),
+                ('wall_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='obstacles', to='object.wallrun')),
+            ],
+            options={
+                'ordering': ['position_x', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-17 20:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('object', '0006_obstacle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('manufacturer', models.CharField(blank=True, max_length=100)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CatalogItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(0, 'Base'), (1, 'Upper'), (2, 'Filler'), (3, 'Base corner'), (4, 'Upper corner')])),
+                ('width', models.FloatField()),
+                ('height', models.FloatField()),
+                ('depth', models.FloatField()),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('line', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='object.catalogline')),
+            ],
+            options={
+                'ordering': ['line', 'kind', '-width'],
+                'constraints': [models.UniqueConstraint(fields=('line', 'kind', 'width'), name='catalog_item_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 20:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('object', '0008_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='snapshot_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
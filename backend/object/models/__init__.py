@@ -1,2 +1,7 @@
 from .base_object import Object
-from .cabinet import Cabinet
\ No newline at end of file
+from .cabinet import Cabinet
+from .project import Project, Room, WallRun
+from .bom import BomSummary
+from .obstacle import Obstacle
+from .catalog import CatalogItem, CatalogLine
+from .job import Job
@@ -1,9 +1,12 @@
 from django.db import models
 
+from .. import geometry
+
 class Object(models.Model):
     """
     **Abstract** base class for all objects in the system.\n
-    NOTE: All dimensions (position, dimensions, etc) are in *inches* not *pixels*.
+    NOTE: All dimensions (position, dimensions, etc) are in *inches* not *pixels*. The helpers below
+    round them to the nearest quantum (see object/geometry.py), so they come out exact.
 
     Attributes:
         Public:
@@ -34,7 +37,7 @@ class Object(models.Model):
         Returns:
             dict: A dictionary containing the width, height, and depth of the object.
         """
-        return {'width': self.width, 'height': self.height, 'depth': self.depth}
+        return {'width': geometry.snap(self.width), 'height': geometry.snap(self.height), 'depth': geometry.snap(self.depth)}
 
     def get_position(self):
         """
@@ -43,7 +46,7 @@ class Object(models.Model):
         Returns:
             dict: A dictionary containing the x and y coordinates of the object's position.
         """
-        return {'x': self.position_x, 'y': self.position_y}
+        return {'x': geometry.snap(self.position_x), 'y': geometry.snap(self.position_y)}
     
     def move_to(self, x, y):
         """
@@ -56,8 +59,8 @@ class Object(models.Model):
         Returns:
             tuple: A tuple containing the new x and y coordinates of the object.
         """
-        self.position_x = x
-        self.position_y = y
+        self.position_x = geometry.snap(x)
+        self.position_y = geometry.snap(y)
         return (self.position_x, self.position_y)
 
     def __str__(self):
@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class BomSummary(models.Model):
+    """
+    The number of cabinets of one kind and width on a wall run (one line of its bill of materials).
+
+    The rows are kept up to date as cabinets are saved and deleted (see object/bom.py), so bills of
+    materials for a room, a project or every project are a GROUP BY over this table instead of the
+    cabinet table. Cabinets that aren't on a wall run, or whose kind isn't known, aren't counted.
+
+    Attributes:
+        wall_run - WallRun: The wall run the cabinets are on.\n
+        kind - int: The CabinetToken kind code of the cabinets.\n
+        width - float: The width of the cabinets (in inches).\n
+        quantity - int: The number of cabinets.
+    """
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["wall_run", "kind", "width"], name="bom_summary_line_unique"),
+        ]
+
+    wall_run = models.ForeignKey("object.WallRun", on_delete=models.CASCADE, related_name="bom_lines")
+    kind = models.PositiveSmallIntegerField()  # CabinetToken kind code
+    width = models.FloatField()  # Width in inches
+    quantity = models.IntegerField(default=0)  # Number of cabinets
+
+    def __str__(self):
+        """Returns the quantity, kind and width of the line as a string."""
+        return f"{self.quantity} x kind {self.kind} ({self.width} in) on wall run {self.wall_run_id}"
@@ -1,4 +1,9 @@
+from django.db import models
+from django.db.models import DEFERRED
+
 from .base_object import Object
+from .. import geometry, standard
+from ..tokens import CabinetToken
 
 class Cabinet(Object):
     """
@@ -6,15 +11,39 @@ class Cabinet(Object):
 
     This class uses all attributes defined in *Object* and adds one method - place_on_canvas.
 
+    Every kind of cabinet is stored in this model's table. The kind column holds the CabinetToken
+    kind code of the cabinet (or null if the name doesn't start with a known prefix), and Base, Upper,
+    BaseCorner, UpperCorner and Filler are proxy models whose managers only return their kind. Rows
+    read through Cabinet.objects come back as the proxy class for their kind.
+
     Typical usage example:
 
         cabinet = Cabinet
     """
 
-    # List of valid cabinet sizes (in inches)
-    VALID_SIZES = [36, 33, 30, 27, 24, 21, 18, 15, 12, 9]  # Standard cabinet sizes
+    class Meta:
+        indexes = [
+            models.Index(fields=["kind", "width"], name="cabinet_kind_width_idx"),
+        ]
+
+    # Kind codes stored in the kind column, with their display names
+    KIND_CHOICES = [
+        (CabinetToken.BASE, "Base"),
+        (CabinetToken.UPPER, "Upper"),
+        (CabinetToken.FILLER, "Filler"),
+        (CabinetToken.BASE_CORNER, "Base corner"),
+        (CabinetToken.UPPER_CORNER, "Upper corner"),
+    ]
+
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES, null=True, blank=True)  # CabinetToken kind code
+    wall_run = models.ForeignKey(  # Wall run of a saved project the cabinet is placed on (optional)
+        "object.WallRun", on_delete=models.CASCADE, null=True, blank=True, related_name="cabinets"
+    )
+
+    # List of valid cabinet sizes (in inches), the sizes of the built-in catalog (see object/catalog.py)
+    VALID_SIZES = standard.CABINET_SIZES  # Standard cabinet sizes (shared with CabineXt, see object/standard.py)
     
-    # Default values for cabinet height and depth
+    # Default values for cabinet height and depth (also those of the built-in catalog)
     STANDARD_HEIGHT = 36  # Standard height for a cabinet (inches)
     STANDARD_BASE_DEPTH = 24.5  # Depth for base cabinets (inches)
     STANDARD_UPPER_DEPTH = 12  # Depth for upper cabinets (inches)
@@ -31,10 +60,14 @@ class Cabinet(Object):
             place_x (float): The x-coordinate position (optional).
             place_y (float): The y-coordinate position (optional).
 
+        The width is rounded to the nearest quantum (see object/geometry.py), the precision it is
+        checked to, so widths that only differ past it are saved (and counted in BOMs) as one size.
+
         Raises:
-            ValueError: If the width is not in the list of valid sizes.
+            ValueError: If the active catalog line doesn't sell any cabinet in that width.
         """
         self._validate_width(width)  # Validate width against predefined valid sizes
+        width = geometry.snap(width)  # Store the width the check matched (36.01 is saved as 36)
         
         # Assign ORM fields if all required values are provided
         if name is not None and width is not None and height is not None and depth is not None:
@@ -43,6 +76,10 @@ class Cabinet(Object):
             kwargs["height"] = height
             kwargs["depth"] = depth
 
+        # Work out the kind from the name's prefix unless it was given
+        if name is not None and "kind" not in kwargs:
+            kwargs["kind"] = Cabinet.kind_from_name(name)
+
         # Handle optional positional fields
         if place_x is not None:
             kwargs["position_x"] = place_x
@@ -54,7 +91,7 @@ class Cabinet(Object):
     
     def _validate_width(self, width):
         """
-        Ensure that the width is one of the predefined valid sizes.
+        Ensure that the width is one the active catalog line sells a cabinet in.
         
         Args:
             width (int): The width of the cabinet.
@@ -62,8 +99,53 @@ class Cabinet(Object):
         Raises:
             ValueError: If the width is not one of the valid sizes.
         """
-        if width not in Cabinet.VALID_SIZES:
-            raise ValueError(f"Invalid width: {width}. Must be one of {Cabinet.VALID_SIZES}.")
+        from ..catalog import LAYER_KINDS, get_catalog  # Imported here since the catalog module imports this one
+        catalog = get_catalog()
+        if isinstance(width, bool) or not isinstance(width, (int, float)) or not catalog.accepts(width):
+            sizes = sorted({size for kind in LAYER_KINDS for size in catalog.widths(kind)}, reverse=True)
+            raise ValueError(f"Invalid width: {width}. Must be one of {sizes}.")
+
+    @staticmethod
+    def kind_from_name(name):
+        """
+        Finds the kind code of a cabinet from its name (e.g. "B36" or just "B").
+
+        Args:
+            name (str): The name of the cabinet.
+
+        Returns:
+            int: The CabinetToken kind code, or None if the name has no known prefix.
+        """
+        prefix = name.rstrip("0123456789.")
+        if prefix in CabinetToken.PREFIXES:
+            return CabinetToken.PREFIXES.index(prefix)
+        return None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Creates a cabinet from a database row.
+
+        Saved rows were validated when they were created, so this skips __init__ (whose width
+        validation and signature don't fit loading rows) and calls Model.__init__ directly. Rows
+        loaded through Cabinet come back as the proxy class for their kind. The loaded values are
+        kept in _loaded_values so a later save can tell what changed.
+        """
+        if "kind" in field_names and cls is Cabinet:
+            cls = PROXY_CLASSES.get(values[field_names.index("kind")], Cabinet)
+        loaded_values = dict(zip(field_names, values))
+        if len(values) != len(cls._meta.concrete_fields):
+            values_iter = iter(values)
+            values = [
+                next(values_iter) if f.attname in field_names else DEFERRED
+                for f in cls._meta.concrete_fields
+            ]
+        instance = cls.__new__(cls)
+        models.Model.__init__(instance, *values)
+        instance._state.adding = False
+        instance._state.db = db
+        instance._loaded_values = loaded_values  # What the row held, for the BOM summary (see object/bom.py)
+        return instance
 
     def place_on_canvas(self, x, y):
         """
@@ -75,11 +157,35 @@ class Cabinet(Object):
         """
         self.move_to(x, y)
 
+class KindManager(models.Manager):
+    """
+    Manager of a proxy cabinet model that only returns the cabinets of its kinds.
+    """
+    def __init__(self, *kinds):
+        """
+        Initializes the manager.
+
+        Args:
+            kinds (int): The CabinetToken kind codes the model's queries are limited to.
+        """
+        super().__init__()
+        self.kinds = kinds
+
+    def get_queryset(self):
+        return super().get_queryset().filter(kind__in=self.kinds)
+
+
 class Base(Cabinet):
     """
     Represents a base cabinet. Inherits from the Cabinet class.
     Sets standard dimensions for a base cabinet (height, depth).
+    Base.objects includes base corner cabinets.
     """
+    objects = KindManager(CabinetToken.BASE, CabinetToken.BASE_CORNER)
+
+    class Meta:
+        proxy = True
+
     DEPTH = 24  # inches (depth for base cabinets)
     HEIGHT = 36  # inches (height for base cabinets)
 
@@ -99,6 +205,13 @@ class BaseCorner(Base):
     Represents a corner base cabinet. Inherits from the Base class.
     Only allows width values of 33 or 36 inches.
     """
+    objects = KindManager(CabinetToken.BASE_CORNER)
+
+    class Meta:
+        proxy = True
+
+    SIZES = standard.BASE_CORNER_SIZES  # inches (widths a corner base cabinet comes in)
+
     def __init__(self, width):
         """
         Initializes a BaseCorner cabinet with the specified width.
@@ -109,17 +222,24 @@ class BaseCorner(Base):
         Raises:
             ValueError: If the width is not 33 or 36 inches.
         """
-        if width not in [33, 36]:  # Width must be 33 or 36 inches
+        if width not in BaseCorner.SIZES:  # Width must be 33 or 36 inches
             raise ValueError("Width must be either 33 or 36 inches.")
         super().__init__(width)
         self.name = f"BC{width}"
+        self.kind = CabinetToken.BASE_CORNER
 
 
 class Upper(Cabinet):
     """
     Represents an upper cabinet. Inherits from the Cabinet class.
     Sets a standard depth for upper cabinets.
+    Upper.objects includes upper corner cabinets.
     """
+    objects = KindManager(CabinetToken.UPPER, CabinetToken.UPPER_CORNER)
+
+    class Meta:
+        proxy = True
+
     DEPTH = 12  # inches (depth for upper cabinets)
 
     def __init__(self, width, height):
@@ -138,7 +258,12 @@ class UpperCorner(Upper):
     Represents a corner upper cabinet. Inherits from the Upper class.
     Standardizes the width to 24 inches.
     """
-    WIDTH = 24  # inches (width for corner upper cabinets)
+    objects = KindManager(CabinetToken.UPPER_CORNER)
+
+    class Meta:
+        proxy = True
+
+    WIDTH = standard.UPPER_CORNER_WIDTH  # inches (width for corner upper cabinets)
 
     def __init__(self, height):
         """
@@ -149,6 +274,7 @@ class UpperCorner(Upper):
         """
         super().__init__(width=UpperCorner.WIDTH, height=height)
         self.name = "UC24"
+        self.kind = CabinetToken.UPPER_CORNER
 
 
 class Filler(Cabinet):
@@ -156,6 +282,11 @@ class Filler(Cabinet):
     Represents a filler cabinet. Used to fill space in between other cabinets.
     Inherits from the Cabinet class.
     """
+    objects = KindManager(CabinetToken.FILLER)
+
+    class Meta:
+        proxy = True
+
     def __init__(self, width):
         """
         Initializes a Filler cabinet with the specified width.
@@ -166,3 +297,13 @@ class Filler(Cabinet):
         """
         # Provide default values for height and depth if needed; adjust as appropriate.
         super().__init__(name="F", width=width, height=0, depth=0)
+
+
+# Proxy class that rows of each kind are loaded as (see Cabinet.from_db)
+PROXY_CLASSES = {
+    CabinetToken.BASE: Base,
+    CabinetToken.UPPER: Upper,
+    CabinetToken.FILLER: Filler,
+    CabinetToken.BASE_CORNER: BaseCorner,
+    CabinetToken.UPPER_CORNER: UpperCorner,
+}
@@ -0,0 +1,61 @@
+from django.db import models
+
+from .cabinet import Cabinet
+
+
+class CatalogLine(models.Model):
+    """
+    A manufacturer's line of cabinets (one catalog). Its SKUs are the CatalogItems pointing at it.
+
+    Lines are read once per process into immutable Catalog objects (see object/catalog.py), so changes
+    to these tables are picked up when the server restarts.
+
+    Attributes:
+        name - str: The name of the line, which requests use to pick it (unique).\n
+        manufacturer - str: Who makes the line (optional).
+    """
+
+    class Meta:
+        ordering = ["name"]
+
+    name = models.CharField(max_length=100, unique=True)
+    manufacturer = models.CharField(max_length=100, blank=True)
+
+    def __str__(self):
+        """Returns the name of the line as a string."""
+        return self.name
+
+
+class CatalogItem(models.Model):
+    """
+    One SKU of a catalog line: a kind of cabinet in one width, with its height, depth and price.
+
+    A filler item stands for the filler strips of the line: its width is the widest strip sold (fills
+    are cut from it), its height is the height of the strips and its price is per inch of filler. The
+    depth of a filler is always that of the cabinets it sits between.
+
+    Attributes:
+        line - CatalogLine: The line the SKU belongs to.\n
+        kind - int: The CabinetToken kind code of the SKU.\n
+        width - float: The width (in inches).\n
+        height - float: The height (in inches).\n
+        depth - float: The depth (in inches).\n
+        price - Decimal: The price of one cabinet, or of one inch of filler (optional).
+    """
+
+    class Meta:
+        ordering = ["line", "kind", "-width"]
+        constraints = [
+            models.UniqueConstraint(fields=["line", "kind", "width"], name="catalog_item_unique"),
+        ]
+
+    line = models.ForeignKey(CatalogLine, on_delete=models.CASCADE, related_name="items")
+    kind = models.PositiveSmallIntegerField(choices=Cabinet.KIND_CHOICES)  # CabinetToken kind code
+    width = models.FloatField()  # Width in inches
+    height = models.FloatField()  # Height in inches
+    depth = models.FloatField()  # Depth in inches
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    def __str__(self):
+        """Returns the line and width of the SKU as a string."""
+        return f"{self.line_id}: kind {self.kind} ({self.width} in)"
@@ -0,0 +1,63 @@
+from django.db import models
+
+
+class Job(models.Model):
+    """
+    A long-running request (such as a whole-project layout or an exhaustive search) queued for the
+    background workers. The table is the queue: workers started with `python manage.py run_jobs`
+    claim the oldest queued job, run it and write back its result (see object/jobs.py).
+
+    Attributes:
+        kind - str: What the job does (one of the kinds registered in object/jobs.py).\n
+        params - dict: The job's parameters, as sent to the submit endpoint.\n
+        status - str: Where the job is (one of STATUS_CHOICES).\n
+        progress - float: How much of the job is done, from 0 to 1.\n
+        message - str: What the job is doing (e.g. "3 of 12 wall runs").\n
+        result - dict: What the job returned, once it is done.\n
+        error - str: Why the job failed, if it did.\n
+        cancel_requested - bool: Whether the job was cancelled while running (the worker stops it at
+        its next progress update).\n
+        worker - str: The worker running (or that last ran) the job.\n
+        attempts - int: How many times a worker has started the job.\n
+        created_at / started_at / finished_at - datetime: When the job was submitted, last started and finished.\n
+        heartbeat_at - datetime: When the worker running the job last reported on it.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+        (CANCELLED, "Cancelled"),
+    ]
+    FINISHED = (DONE, FAILED, CANCELLED)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "id"], name="job_queue_idx"),
+        ]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.FloatField(default=0)  # From 0 to 1
+    message = models.CharField(max_length=200, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    cancel_requested = models.BooleanField(default=False)
+    worker = models.CharField(max_length=100, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        """Returns the id, kind and status of the job as a string."""
+        return f"Job {self.pk} ({self.kind}, {self.status})"
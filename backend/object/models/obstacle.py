@@ -0,0 +1,91 @@
+from django.db import models
+
+from .base_object import Object
+
+
+class Obstacle(Object):
+    """
+    Something on a wall run that cabinets have to go around: a window, a door or opening, or an
+    appliance that sits in a fixed-width slot. Inherits from *Object* class.
+
+    position_x is the distance (in inches) from the start of the wall run to the obstacle's left edge
+    and width is how much of the run it takes up. position_y and height place it vertically (a
+    window's sill height, for example) but don't affect the layout; which layers of cabinets an
+    obstacle blocks only depends on its kind (see BLOCKS).
+
+    Attributes:
+        kind - str: What the obstacle is (one of KIND_CHOICES).\n
+        wall_run - WallRun: The wall run the obstacle is on.
+
+    Typical usage example:
+
+        Obstacle(wall_run=wall_run, kind="dishwasher", position_x=48).save()  # Width defaults to 24
+    """
+
+    class Meta:
+        ordering = ["position_x", "id"]
+
+    KIND_CHOICES = [
+        ("window", "Window"),
+        ("door", "Door"),
+        ("opening", "Opening"),
+        ("range", "Range"),
+        ("dishwasher", "Dishwasher"),
+        ("fridge", "Refrigerator"),
+    ]
+
+    # The layers of cabinets each kind of obstacle blocks (windows sit above the counter, a range or
+    # dishwasher under it, and doors, openings and fridges take the full height)
+    BLOCKS = {
+        "window": ("uppers",),
+        "door": ("bases", "uppers"),
+        "opening": ("bases", "uppers"),
+        "range": ("bases",),
+        "dishwasher": ("bases",),
+        "fridge": ("bases", "uppers"),
+    }
+
+    # Standard slot widths (in inches) of the appliances, used when no width is given
+    APPLIANCE_WIDTHS = {
+        "range": 30,
+        "dishwasher": 24,
+        "fridge": 36,
+    }
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    wall_run = models.ForeignKey("object.WallRun", on_delete=models.CASCADE, related_name="obstacles")
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes an obstacle, giving appliances their standard width and a name when not set.
+
+        Rows loaded from the database (which pass their values positionally) are not checked again.
+
+        Raises:
+            ValueError: If the kind is not one of KIND_CHOICES, or the width is not positive.
+        """
+        super().__init__(*args, **kwargs)
+        if not args:
+            if self.kind not in Obstacle.BLOCKS:
+                raise ValueError(f"{self.kind} is not a valid obstacle. Must be one of {list(Obstacle.BLOCKS)}.")
+            if not self.width:
+                self.width = Obstacle.APPLIANCE_WIDTHS.get(self.kind, 0.0)
+            if self.width <= 0:
+                raise ValueError(f"A {self.kind} needs a positive width")
+            if not self.name:
+                self.name = self.kind
+
+    @property
+    def start(self):
+        """The distance from the start of the wall run to the obstacle's left edge (in inches)."""
+        return self.position_x
+
+    @property
+    def end(self):
+        """The distance from the start of the wall run to the obstacle's right edge (in inches)."""
+        return self.position_x + self.width
+
+    @property
+    def is_appliance(self):
+        """Whether the obstacle is an appliance in a fixed-width slot."""
+        return self.kind in Obstacle.APPLIANCE_WIDTHS
@@ -0,0 +1,84 @@
+from django.db import models
+
+
+class Project(models.Model):
+    """
+    A saved kitchen design: a name and the rooms that make it up.
+
+    Attributes:
+        name - str: The name of the project.\n
+        snapshot - dict: The last serialized copy of the whole project (see object/projects.py), or null
+        once anything in the project has changed since it was taken.\n
+        snapshot_version - int: Counts the invalidations of the snapshot, so a snapshot built from the
+        tables is only stored if nothing changed while it was being built.\n
+        created_at / updated_at - datetime: When the project was created and last saved.
+
+    Typical usage example:
+
+        project = Project.objects.create(name="Smith kitchen")
+        room = project.rooms.create(name="Kitchen")
+    """
+
+    name = models.CharField(max_length=100)  # Name of the project
+    snapshot = models.JSONField(null=True, blank=True)  # Serialized project, null when stale
+    snapshot_version = models.PositiveIntegerField(default=0)  # Bumped by every invalidation
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Returns the name of the project as a string."""
+        return self.name
+
+
+class Room(models.Model):
+    """
+    A room of a project, made of wall runs.
+
+    Attributes:
+        project - Project: The project the room belongs to.\n
+        name - str: The name of the room.\n
+        position - int: The order of the room within its project.
+    """
+
+    class Meta:
+        ordering = ["position", "id"]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="rooms")
+    name = models.CharField(max_length=100)  # Name of the room
+    position = models.PositiveIntegerField(default=0)  # Order of the room in the project
+
+    def __str__(self):
+        """Returns the name of the room as a string."""
+        return self.name
+
+
+class WallRun(models.Model):
+    """
+    A straight run of cabinets along one wall of a room (the saved counterpart of a Wall).
+
+    Attributes:
+        room - Room: The room the wall run belongs to.\n
+        orientation - str: Where the wall is in the room (one of "left", "top", or "right").\n
+        width - float: The width of the wall (in inches).\n
+        position - int: The order of the wall run within its room.
+
+    The cabinets placed on the run are available through wall_run.cabinets.
+    """
+
+    class Meta:
+        ordering = ["position", "id"]
+
+    ORIENTATION_CHOICES = [
+        ("left", "Left"),
+        ("top", "Top"),
+        ("right", "Right"),
+    ]
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="walls")
+    orientation = models.CharField(max_length=5, choices=ORIENTATION_CHOICES)
+    width = models.FloatField(default=0.0)  # Width in inches
+    position = models.PositiveIntegerField(default=0)  # Order of the wall run in the room
+
+    def __str__(self):
+        """Returns the orientation and width of the wall run as a string."""
+        return f"{self.orientation} wall ({self.width} in)"
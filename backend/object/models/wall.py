@@ -1,5 +1,8 @@
+from math import gcd
+
 from .base_object import Object
-from .cabinet import Cabinet
+from .. import geometry, standard
+from ..tokens import CabinetToken
 
 class Wall(Object):
     """
@@ -7,16 +10,45 @@ class Wall(Object):
     It handles the wall's width and the process of filling it with cabinets.
 
     Attributes:
-        bases (list): A list to store the base cabinets placed on the wall.
-        uppers (list): A list to store the upper cabinets placed on the wall.
+        bases (list): A list of CabinetTokens for the base cabinets placed on the wall.
+        uppers (list): A list of CabinetTokens for the upper cabinets placed on the wall.
+        FILL_STRATEGIES (dict): Maps the strategy names accepted by the API to fill methods.
+        ALGORITHM_VERSION (int): Identifies the current layout algorithms in cached results.
+        FIXED_PATTERN (list): The cabinet sizes tried (in order) by fixed_pattern_fill.
+        ROTATING_PATTERN (list): The default cabinet sizes rotated through by rotating1_fill.
+        SHRINK (tuple): The leftover widths (exclusive) for which the fills take the last cabinet down,
+            and by how much (all in inches).
+        catalog (Catalog): The line the wall is filled from (see object/catalog.py).
+
+    The wall's width is rounded to the nearest quantum (see object/geometry.py) and the fill methods
+    do all of their arithmetic in quanta, so the widths they place add up exactly. The fills only place
+    the sizes the wall's catalog line sells (the patterns below are limited to them), and the corner
+    space of the generation methods follows the line's corner cabinets.
     """
 
-    def __init__(self, *args, width=None, **kwargs):
+    # Bump this whenever a fill or generation method changes the layouts it produces
+    ALGORITHM_VERSION = 3
+
+    # Shared with the CabineXt command-line tool (see object/standard.py)
+    FIXED_PATTERN = standard.FIXED_PATTERN  # Predefined pattern of cabinet sizes.
+    ROTATING_PATTERN = standard.ROTATING_PATTERN  # Default pattern for rotating1_fill.
+    SHRINK = standard.SHRINK  # Leftover of 3-9 inches: take the last cabinet down 6 inches if that is a valid size.
+
+    # Strategy names that can be passed to get_fill (and to the generate_wall endpoint)
+    FILL_STRATEGIES = {
+        "greedy": "greedy_fill",
+        "fixed_pattern": "fixed_pattern_fill",
+        "rotating1": "rotating1_fill",
+        "optimal": "optimal_fill",
+    }
+
+    def __init__(self, *args, width=None, catalog=None, **kwargs):
         """
         Initializes a Wall object with a specified width.
 
         Args:
             width (float): The width of the wall (in inches).
+            catalog (Catalog): The line to fill the wall from (defaults to the active line).
         
         Raises:
             ValueError: If the width is not provided.
@@ -27,115 +59,151 @@ class Wall(Object):
         if(width is None):  # Ensure that the width is provided.
             raise ValueError(f"Error: Width ({width}) should be nonnull")
         
-        kwargs["width"] = width  # Store the wall's width in the kwargs.
+        kwargs["width"] = geometry.snap(width)  # Store the wall's width (to the nearest quantum) in the kwargs.
 
         super().__init__(*args, **kwargs)  # Call the parent constructor to initialize the object.
 
-    def greedy_fill(self, remaining_width, cabinet_prefix):
+        if catalog is None:
+            from ..catalog import get_catalog  # Imported here since the catalog module imports this one
+            catalog = get_catalog()
+        self.catalog = catalog
+
+    def get_fill(self, strategy):
+        """
+        Looks up the fill method for a strategy name.
+
+        Args:
+            strategy (str): One of the keys of FILL_STRATEGIES, or None for the default fills.
+
+        Returns:
+            callable: The bound fill method, or None to let each generation method use its default.
+
+        Raises:
+            ValueError: If the strategy is not a known fill strategy.
+        """
+        if strategy is None:
+            return None
+        if strategy not in Wall.FILL_STRATEGIES:
+            raise ValueError(f"{strategy} is not a valid fill strategy. Must be one of {list(Wall.FILL_STRATEGIES)}.")
+        return getattr(self, Wall.FILL_STRATEGIES[strategy])
+
+    def greedy_fill(self, remaining_width, cabinet_kind):
         """
         Fills the wall greedily with cabinets and uses filler if needed to completely fill the width.
         
         Args:
             remaining_width (float): The remaining width to be filled on the wall.
-            cabinet_prefix (str): The prefix for cabinet types, like 'B' for base cabinets.
+            cabinet_kind (int): The CabinetToken kind to fill with, like CabinetToken.BASE for base cabinets.
 
         Returns:
-            list: A list of cabinet identifiers (including filler cabinets if needed).
+            list: A list of CabinetTokens (including filler cabinets if needed).
         """
         cabinets = []  # List to store the cabinet sizes placed.
+        remaining = geometry.to_units(remaining_width)  # Work in quanta so nothing drifts.
+        sizes = self.catalog.pattern("greedy", cabinet_kind)  # The sizes the line sells, largest first.
+        shrink_low, shrink_high, shrink = geometry.units_of(Wall.SHRINK)
 
-        while remaining_width > 0:  # While there's still remaining space to fill.
+        while remaining > 0:  # While there's still remaining space to fill.
             placed = False  # Track whether a cabinet was successfully placed.
 
             # Attempt to place a cabinet of any valid size that fits the remaining space.
-            for size in Cabinet.VALID_SIZES:
-                if size <= remaining_width:
-                    cabinets.append(f"{cabinet_prefix}{size}")
-                    remaining_width -= size
+            for size in sizes:
+                if size <= remaining:
+                    cabinets.append(CabinetToken.from_units(cabinet_kind, size))
+                    remaining -= size
                     placed = True
                     break  # Exit the loop once a cabinet is placed.
 
             # If the remaining width is between 3 and 9 inches, and we have placed at least one cabinet,
             # try to reduce the last cabinet size by 6 inches to fit.
-            if 3 < remaining_width < 9 and len(cabinets) > 0:
+            if shrink_low < remaining < shrink_high and len(cabinets) > 0:
                 last_cabinet = cabinets.pop()
-                last_size = int(last_cabinet[1:])  # Extract the size from the cabinet name.
-                if last_size - 6 in Cabinet.VALID_SIZES:  # Check if reducing by 6 inches is valid.
-                    new_size = last_size - 6
-                    cabinets.append(f"{cabinet_prefix}{new_size}")
-                    remaining_width += 6  # Add back the reduced size to the remaining width.
+                last_size = last_cabinet.units
+                if last_size - shrink in sizes:  # Check if reducing by 6 inches is valid.
+                    new_size = last_size - shrink
+                    cabinets.append(CabinetToken.from_units(cabinet_kind, new_size))
+                    remaining += shrink  # Add back the reduced size to the remaining width.
                 else:
                     cabinets.append(last_cabinet)
 
             if not placed:  # If no cabinet was placed, add a filler for the remaining space.
-                cabinets.append(f"F{remaining_width}")
-                remaining_width = 0  # No remaining space after adding filler.
+                cabinets.append(CabinetToken.from_units(CabinetToken.FILLER, remaining))
+                remaining = 0  # No remaining space after adding filler.
 
         return cabinets  # Return the list of placed cabinets (including fillers).
 
-    def fixed_pattern_fill(self, remaining_width, cabinet_prefix):
+    def fixed_pattern_fill(self, remaining_width, cabinet_kind):
         """
         Fills the wall with cabinets using a fixed pattern and includes filler as needed.
         
         Args:
             remaining_width (float): The remaining width to be filled on the wall.
-            cabinet_prefix (str): The prefix for cabinet types, like 'B' for base cabinets.
+            cabinet_kind (int): The CabinetToken kind to fill with, like CabinetToken.BASE for base cabinets.
         
         Returns:
-            list: A list of cabinet identifiers (including filler cabinets if needed).
+            list: A list of CabinetTokens (including filler cabinets if needed).
         """
-        pattern = [33, 27, 24, 21, 18, 12, 9]  # Predefined pattern of cabinet sizes.
+        pattern = self.catalog.pattern("fixed_pattern", cabinet_kind)  # Predefined pattern of cabinet sizes.
         cabinets = []  # List to store the cabinet sizes placed.
+        remaining = geometry.to_units(remaining_width)  # Work in quanta so nothing drifts.
+        sizes = self.catalog.pattern("greedy", cabinet_kind)
+        shrink_low, shrink_high, shrink = geometry.units_of(Wall.SHRINK)
 
-        while remaining_width > 0:
+        while remaining > 0:
             placed = False  # Track whether a cabinet was successfully placed.
 
             # Attempt to place cabinets according to the fixed pattern.
             for size in pattern:
-                if size <= remaining_width:
-                    cabinets.append(f"{cabinet_prefix}{size}")
-                    remaining_width -= size
+                if size <= remaining:
+                    cabinets.append(CabinetToken.from_units(cabinet_kind, size))
+                    remaining -= size
                     placed = True
                     break  # Exit the loop once a cabinet is placed.
 
             # Same logic as in greedy_fill for handling the space between 3 and 9 inches.
-            if 3 < remaining_width < 9 and len(cabinets) > 0:
+            if shrink_low < remaining < shrink_high and len(cabinets) > 0:
                 last_cabinet = cabinets.pop()
-                last_size = int(last_cabinet[1:])
-                if last_size - 6 in Cabinet.VALID_SIZES:
-                    new_size = last_size - 6
-                    cabinets.append(f"{cabinet_prefix}{new_size}")
-                    remaining_width += 6
+                last_size = last_cabinet.units
+                if last_size - shrink in sizes:
+                    new_size = last_size - shrink
+                    cabinets.append(CabinetToken.from_units(cabinet_kind, new_size))
+                    remaining += shrink
                 else:
                     cabinets.append(last_cabinet)
 
             if not placed:  # If no cabinet was placed, add a filler.
-                cabinets.append(f"F{remaining_width}")
-                remaining_width = 0
+                cabinets.append(CabinetToken.from_units(CabinetToken.FILLER, remaining))
+                remaining = 0
 
         return cabinets  # Return the list of placed cabinets (including fillers).
 
-    def rotating1_fill(self, remaining_width, cabinet_prefix, pattern=None):
+    def rotating1_fill(self, remaining_width, cabinet_kind, pattern=None):
         """
         Fills the wall by rotating through a given pattern of cabinet sizes, 
         without repeating the same size consecutively.
         
         Args:
             remaining_width (float): The remaining width to be filled on the wall.
-            cabinet_prefix (str): The prefix for cabinet types, like 'B' for base cabinets.
-            pattern (list, optional): A custom pattern to use for filling (defaults to None).
+            cabinet_kind (int): The CabinetToken kind to fill with, like CabinetToken.BASE for base cabinets.
+            pattern (list, optional): A custom pattern to use for filling (defaults to None). Sizes the
+                wall's catalog line doesn't sell are skipped.
         
         Returns:
-            list: A list of cabinet identifiers (including filler cabinets if needed).
+            list: A list of CabinetTokens (including filler cabinets if needed).
         """
+        sizes = self.catalog.pattern("greedy", cabinet_kind)
         if pattern is None:
-            pattern = [18, 36, 30, 21, 18, 15, 12, 9]  # Default pattern if none is provided.
+            pattern = self.catalog.pattern("rotating1", cabinet_kind)  # Default pattern if none is provided.
+        else:
+            pattern = tuple(size for size in geometry.units_of(tuple(pattern)) if size in sizes)
 
         cabinets = []  # List to store the cabinet sizes placed.
         pattern_index = 0  # Index to track the current position in the pattern.
         pattern_len = len(pattern)  # Length of the pattern.
+        remaining = geometry.to_units(remaining_width)  # Work in quanta so nothing drifts.
+        shrink_low, shrink_high, shrink = geometry.units_of(Wall.SHRINK)
 
-        while remaining_width > 0:
+        while remaining > 0:
             attempted = 0  # Counter for how many attempts have been made to place a cabinet.
             placed = False  # Track whether a cabinet was successfully placed.
 
@@ -145,61 +213,131 @@ class Wall(Object):
                 pattern_index += 1  # Move to the next index in the pattern.
                 attempted += 1
 
-                if size <= remaining_width:
-                    cabinets.append(f"{cabinet_prefix}{size}")
-                    remaining_width -= size
+                if size <= remaining:
+                    cabinets.append(CabinetToken.from_units(cabinet_kind, size))
+                    remaining -= size
                     placed = True
                     break  # Exit the loop once a cabinet is placed.
 
             # Same filler logic as in previous methods for handling small remaining widths.
-            if 3 < remaining_width < 9 and len(cabinets) > 0:
+            if shrink_low < remaining < shrink_high and len(cabinets) > 0:
                 last_cabinet = cabinets.pop()
-                last_size = int(last_cabinet[1:])
-                if last_size - 6 in Cabinet.VALID_SIZES:
-                    new_size = last_size - 6
-                    cabinets.append(f"{cabinet_prefix}{new_size}")
-                    remaining_width += 6
+                last_size = last_cabinet.units
+                if last_size - shrink in sizes:
+                    new_size = last_size - shrink
+                    cabinets.append(CabinetToken.from_units(cabinet_kind, new_size))
+                    remaining += shrink
                 else:
                     cabinets.append(last_cabinet)
 
             if not placed:  # If no cabinet was placed, add a filler.
-                cabinets.append(f"F{remaining_width}")
-                remaining_width = 0
+                cabinets.append(CabinetToken.from_units(CabinetToken.FILLER, remaining))
+                remaining = 0
+
+        return cabinets  # Return the list of placed cabinets (including fillers).
+
+    def optimal_fill(self, remaining_width, cabinet_kind):
+        """
+        Fills the wall with the layout that leaves the least filler, breaking ties by using the
+        fewest cabinets (and then by preferring larger cabinets).
+
+        Unlike the other fill methods this does not make a single pass; it runs a dynamic program
+        over every width up to *remaining_width* that the cabinet sizes could add up to (the multiples
+        of their greatest common divisor), so it runs in time linear in the width.
+
+        Args:
+            remaining_width (float): The remaining width to be filled on the wall.
+            cabinet_kind (int): The CabinetToken kind to fill with, like CabinetToken.BASE for base cabinets.
+
+        Returns:
+            list: A list of CabinetTokens (including filler cabinets if needed).
+        """
+        remaining = geometry.to_units(remaining_width)  # Work in quanta so nothing drifts.
+        if remaining <= 0:
+            return []
+        valid_sizes = self.catalog.pattern("optimal", cabinet_kind)
+        if not valid_sizes:  # The line sells no cabinets of this kind, so it is all filler.
+            return [CabinetToken.from_units(CabinetToken.FILLER, remaining)]
+
+        # Every fill is a multiple of the sizes' greatest common divisor, so count in steps of it.
+        step = gcd(*valid_sizes)
+        limit = remaining // step
+        sizes = sorted((size // step for size in valid_sizes), reverse=True)  # Try larger cabinets first on ties.
+
+        # counts[w] is the fewest cabinets that exactly fill w steps (None if w can't be filled),
+        # and choice[w] is the size (in steps) of the first cabinet in that fill.
+        counts = [None] * (limit + 1)
+        choice = [0] * (limit + 1)
+        counts[0] = 0
+        for w in range(1, limit + 1):
+            for size in sizes:
+                if size <= w and counts[w - size] is not None:
+                    if counts[w] is None or counts[w - size] + 1 < counts[w]:
+                        counts[w] = counts[w - size] + 1
+                        choice[w] = size
+
+        # The widest width that can be filled exactly leaves the least filler.
+        filled = limit
+        while counts[filled] is None:
+            filled -= 1
+
+        cabinets = []  # List to store the cabinet sizes placed.
+        w = filled
+        while w > 0:
+            cabinets.append(CabinetToken.from_units(cabinet_kind, choice[w] * step))
+            w -= choice[w]
+
+        if remaining - filled * step > 0:  # Cover whatever is left with a filler.
+            cabinets.append(CabinetToken.from_units(CabinetToken.FILLER, remaining - filled * step))
 
         return cabinets  # Return the list of placed cabinets (including fillers).
 
     # Methods for generating cabinets on the wall using different patterns.
+    # Each one accepts an optional fill method (such as optimal_fill) to use in place of its default,
+    # and reserves the corner space given by the wall's catalog (see Catalog.generations).
+
+    def generate(self, generation, fill=None):
+        """
+        Fills the bases or uppers of the wall with one of the generation methods.
 
-    def generation_b1(self):
-        """Generates base cabinets using the rotating1_fill method."""
-        remaining_width = self.width - 36
-        self.bases = self.rotating1_fill(remaining_width, "B")
-        self.bases.append("BC36")
-
-    def generation_b2(self):
-        """Generates base cabinets using the greedy_fill method."""
-        remaining_width = self.width - 72
-        self.bases = self.greedy_fill(remaining_width, "B")
-
-    def generation_b3(self):
-        """Generates base cabinets using the fixed_pattern_fill method."""
-        remaining_width = self.width - 36
-        self.bases = self.fixed_pattern_fill(remaining_width, "B")
-        self.bases.insert(0, "BC36")
-
-    def generation_u1(self):
-        """Generates upper cabinets using the greedy_fill method."""
-        remaining_width = self.width - 24
-        self.uppers = self.greedy_fill(remaining_width, "U")
-        self.uppers.append("UC24")
-
-    def generation_u2(self):
-        """Generates upper cabinets using the greedy_fill method."""
-        remaining_width = self.width - 48
-        self.uppers = self.greedy_fill(remaining_width, "U")
-
-    def generation_u3(self):
-        """Generates upper cabinets using the greedy_fill method."""
-        remaining_width = self.width - 24
-        self.uppers = self.greedy_fill(remaining_width, "U")
-        self.uppers.insert(0, "UC24")
+        Args:
+            generation (str): The generation method (one of "b1", "b2", "b3", "u1", "u2" or "u3").
+            fill (callable): An optional fill method replacing the generation method's default.
+
+        Returns:
+            list: The CabinetTokens of the layout (also stored in bases or uppers).
+        """
+        default_strategy, reserved, kind, corner, corner_first = self.catalog.generations[generation]
+        fill = fill or self.get_fill(default_strategy)
+        cabinets = fill(self.width - reserved, kind)
+        if corner is not None:
+            cabinets.insert(0 if corner_first else len(cabinets), corner)
+        if kind == CabinetToken.BASE:
+            self.bases = cabinets
+        else:
+            self.uppers = cabinets
+        return cabinets
+
+    def generation_b1(self, fill=None):
+        """Generates base cabinets using the rotating1_fill method, with a corner cabinet at the end."""
+        self.generate("b1", fill)
+
+    def generation_b2(self, fill=None):
+        """Generates base cabinets using the greedy_fill method, leaving room for a corner at each end."""
+        self.generate("b2", fill)
+
+    def generation_b3(self, fill=None):
+        """Generates base cabinets using the fixed_pattern_fill method, with a corner cabinet at the start."""
+        self.generate("b3", fill)
+
+    def generation_u1(self, fill=None):
+        """Generates upper cabinets using the greedy_fill method, with a corner cabinet at the end."""
+        self.generate("u1", fill)
+
+    def generation_u2(self, fill=None):
+        """Generates upper cabinets using the greedy_fill method, leaving room for a corner at each end."""
+        self.generate("u2", fill)
+
+    def generation_u3(self, fill=None):
+        """Generates upper cabinets using the greedy_fill method, with a corner cabinet at the start."""
+        self.generate("u3", fill)
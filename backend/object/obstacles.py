@@ -0,0 +1,177 @@
+"""
+Obstacle-aware wall layout.
+
+A wall's obstacles (windows, doors, openings and appliances, see models/obstacle.py) are kept in one
+interval tree per layer of cabinets, holding only the obstacles that block that layer. The free
+segments of a layer are the gaps the tree leaves between the wall's corner space (reserved as by the
+wall's generation method), and each segment is filled on its own. Appliances keep their fixed-width
+slot, and a query such as "what blocks 60-96 in" takes O(log n + k) time however many openings the
+wall has.
+
+Typical usage example:
+
+    index = ObstacleIndex([Obstacle(kind="window", position_x=36, width=30)])
+    plan = plan_wall(120, ("b2", "u2"), index)
+    plan["uppers"]  # Pieces: reserved corner, cabinets, the window, cabinets, reserved corner
+"""
+
+from .catalog import get_catalog
+from .incremental import GENERATIONS
+from .intervals import IntervalTree
+from .models.obstacle import Obstacle
+from .models.wall import Wall
+
+LAYERS = ("bases", "uppers")
+
+
+class ObstacleIndex:
+    """
+    The obstacles of one wall, indexed by position.
+
+    Attributes:
+        obstacles (list): The obstacles, ordered by position.
+        trees (dict): An IntervalTree of the obstacles that block each layer ("bases" and "uppers").
+        tree (IntervalTree): Every obstacle, whatever it blocks.
+    """
+
+    def __init__(self, obstacles=()):
+        """
+        Builds the index.
+
+        Args:
+            obstacles (iterable): The Obstacles of the wall.
+        """
+        self.obstacles = sorted(obstacles, key=lambda obstacle: obstacle.start)
+        self.tree = IntervalTree((obstacle.start, obstacle.end, obstacle) for obstacle in self.obstacles)
+        self.trees = {
+            layer: IntervalTree(
+                (obstacle.start, obstacle.end, obstacle)
+                for obstacle in self.obstacles if layer in Obstacle.BLOCKS[obstacle.kind]
+            )
+            for layer in LAYERS
+        }
+
+    @classmethod
+    def for_wall_run(cls, wall_run_id):
+        """Builds the index of a saved wall run's obstacles (with one query)."""
+        return cls(Obstacle.objects.filter(wall_run_id=wall_run_id))
+
+    def blocking(self, start, end, layer=None):
+        """
+        Finds the obstacles in part of the wall.
+
+        Args:
+            start (float): The start of the part (in inches from the start of the wall).
+            end (float): The end of the part.
+            layer (str): Only return the obstacles that block this layer ("bases" or "uppers").
+
+        Returns:
+            list: The obstacles that overlap [start, end), ordered by position.
+
+        Raises:
+            ValueError: If the layer is not valid.
+        """
+        if layer is None:
+            return self.tree.overlapping(start, end)
+        if layer not in self.trees:
+            raise ValueError(f"{layer} is not a valid layer. Must be one of {list(LAYERS)}.")
+        return self.trees[layer].overlapping(start, end)
+
+
+def validate_obstacles(width, obstacles):
+    """
+    Checks that obstacles fit on a wall.
+
+    Args:
+        width (float): The width of the wall (in inches).
+        obstacles (list): The Obstacles.
+
+    Raises:
+        ValueError: If an obstacle starts before the wall or ends after it.
+    """
+    for obstacle in obstacles:
+        if obstacle.start < 0 or obstacle.end > width:
+            raise ValueError(
+                f"The {obstacle.kind} at {obstacle.start}-{obstacle.end} in doesn't fit on a {width} in wall"
+            )
+
+
+def corner_pieces(generation, width, catalog=None):
+    """
+    Returns the corner space a generation method reserves at the ends of a wall.
+
+    Args:
+        generation (str): The generation method (see incremental.GENERATIONS).
+        width (float): The width of the wall (in inches).
+        catalog (Catalog): The line whose corner cabinets are used (defaults to the active line).
+
+    Returns:
+        tuple: The pieces at the start and at the end of the wall (see plan_wall), either of which may
+        be None. A corner owned by the wall holds its corner cabinet; space kept for a neighbouring
+        wall's corner holds nothing.
+    """
+    _, reserved, _, corner, corner_first = (catalog or get_catalog()).generations[generation]
+    if corner is None:  # Half of the reserved space at each end, for the neighbours' corners
+        half = reserved / 2
+        return {"start": 0, "end": half, "cabinets": []}, {"start": width - half, "end": width, "cabinets": []}
+    piece = {"start": 0 if corner_first else width - reserved, "cabinets": [corner]}
+    piece["end"] = piece["start"] + reserved
+    return (piece, None) if corner_first else (None, piece)
+
+
+def plan_wall(width, generations, index, strategy=None, catalog=None):
+    """
+    Lays out a wall around its obstacles.
+
+    Args:
+        width (float): The width of the wall (in inches).
+        generations (tuple): The base and upper generation methods of the wall (e.g. ("b1", "u1")),
+            which decide its corner space and default fill strategies.
+        index (ObstacleIndex): The wall's obstacles.
+        strategy (str): An optional fill strategy (see Wall.FILL_STRATEGIES) replacing the defaults.
+        catalog (Catalog): The line to lay the wall out from (defaults to the active line).
+
+    Returns:
+        dict: For "bases" and "uppers", the pieces of the wall in order. Each piece has a "start" and
+        an "end" (in inches from the start of the wall) and either the "cabinets" (CabinetTokens)
+        filling it or the "obstacle" in it.
+
+    Raises:
+        ValueError: If a generation method or the strategy is not valid, or an obstacle is in the
+        corner space of a layer it blocks.
+    """
+    catalog = catalog or get_catalog()
+    wall = Wall(width=width, catalog=catalog)
+    plan = {}
+    for layer, generation in zip(LAYERS, generations):
+        if generation not in GENERATIONS:
+            raise ValueError(f"{generation} is not a valid generation method. Must be one of {list(GENERATIONS)}.")
+        default_strategy, _, kind, _, _ = catalog.generations[generation]
+        fill = wall.get_fill(strategy or default_strategy)
+        first, last = corner_pieces(generation, width, catalog)
+        low = first["end"] if first else 0
+        high = last["start"] if last else width
+
+        tree = index.trees[layer]
+        in_corners = tree.overlapping(0, low) + tree.overlapping(high, width)
+        if in_corners:
+            obstacle = in_corners[0]
+            raise ValueError(
+                f"The {obstacle.kind} at {obstacle.start}-{obstacle.end} in overlaps the corner space of the {layer}"
+            )
+        pieces = [
+            {"start": start, "end": end, "cabinets": fill(end - start, kind)}
+            for start, end in tree.gaps(low, high)
+        ]
+        pieces += [
+            {"start": obstacle.start, "end": obstacle.end, "obstacle": obstacle}
+            for obstacle in tree.overlapping(low, high)
+        ]
+        pieces.sort(key=lambda piece: piece["start"])
+        plan[layer] = [first] * (first is not None) + pieces + [last] * (last is not None)
+    return plan
+
+
+def plan_tokens(pieces):
+    """Returns the CabinetTokens of a planned layer, in order, without the obstacles."""
+    return [token for piece in pieces for token in piece.get("cabinets", ())]
@@ -0,0 +1,263 @@
+"""
+Quotes: what a layout costs in cabinets, filler and install labor, for many layouts at once.
+
+A catalog line is turned once into a PriceMatrix, a NumPy table of cabinet prices indexed by SKU
+code (the CabinetToken kind and the width in quanta, see object/geometry.py), plus a filler price per
+inch and an install labor cost per cabinet of each kind. Layouts are passed in as the flat code and
+offsets arrays of object/batch.py, so pricing a batch is a handful of array operations over every
+cabinet of every layout, however many layouts there are.
+
+Catalog lines don't have to price every SKU (the built-in line prices none), so a cabinet without a
+catalog price is priced at PRICING_PRICE_PER_INCH of its width, and the quote counts how many of its
+pieces were estimated that way.
+
+Typical usage example:
+
+    quotes = quote_layouts([wall.bases + wall.uppers for wall in walls], catalog)
+    cheapest = int(quotes["total"].argmin())
+"""
+
+import functools
+import itertools
+
+import numpy as np
+from django.conf import settings
+
+from . import geometry
+from .batch import CODE_DTYPE, batch_generation
+from .batch import GENERATIONS as BATCH_GENERATIONS
+from .catalog import get_catalog
+from .models.wall import Wall
+from .tokens import CabinetToken
+
+# One row per layout: the cost of the cabinets, of the filler and of installing them, the total (all
+# rounded to the cent), how many cabinets there are (fillers not included), the total filler width
+# (in inches) and how many pieces were priced from PRICING_PRICE_PER_INCH rather than the catalog
+QUOTE_DTYPE = np.dtype([
+    ("cabinets", "f8"),
+    ("filler", "f8"),
+    ("labor", "f8"),
+    ("total", "f8"),
+    ("count", "i4"),
+    ("filler_inches", "f8"),
+    ("estimated", "i4"),
+])
+
+COSTS = ("cabinets", "filler", "labor")  # The QUOTE_DTYPE fields that add up to the total
+
+
+class PriceMatrix:
+    """
+    The prices of one catalog line, as arrays indexed by SKU code.
+
+    Attributes:
+        prices (numpy.ndarray): The catalog price of each cabinet, indexed by [kind, width in quanta]
+            (NaN for the SKUs the line doesn't price or doesn't sell).
+        per_inch (numpy.ndarray): The price per inch of width of each kind, used for the cabinets
+            without a catalog price and for filler.
+        labor (numpy.ndarray): The cost of installing one piece of each kind.
+        filler_estimated (bool): Whether the filler price comes from the settings rather than the line.
+    """
+
+    __slots__ = ("prices", "per_inch", "labor", "filler_estimated")
+
+    def __init__(self, catalog, price_per_inch=None, labor_hours=None, labor_rate=None):
+        """
+        Builds the price arrays of a line.
+
+        Args:
+            catalog (Catalog): The line to price.
+            price_per_inch (dict): Prices per inch of width by SKU prefix (defaults to PRICING_PRICE_PER_INCH).
+            labor_hours (dict): Install hours per piece by SKU prefix (defaults to PRICING_LABOR_HOURS).
+            labor_rate (float): The install labor cost per hour (defaults to PRICING_LABOR_RATE).
+        """
+        price_per_inch = price_per_inch if price_per_inch is not None else settings.PRICING_PRICE_PER_INCH
+        labor_hours = labor_hours if labor_hours is not None else settings.PRICING_LABOR_HOURS
+        labor_rate = labor_rate if labor_rate is not None else settings.PRICING_LABOR_RATE
+
+        max_units = max((entry.units for entry in catalog.entries), default=0)
+        self.prices = np.full((len(CabinetToken.PREFIXES), max_units + 1), np.nan)
+        filler_price = None
+        for entry in catalog.entries:  # Once per SKU of the line, not per cabinet priced
+            if entry.price is None:
+                continue
+            if entry.kind == CabinetToken.FILLER:
+                filler_price = entry.price if filler_price is None else filler_price  # Widest strip first
+            else:
+                self.prices[entry.kind, entry.units] = entry.price
+
+        self.per_inch = np.array([float(price_per_inch.get(prefix, 0)) for prefix in CabinetToken.PREFIXES])
+        self.filler_estimated = filler_price is None
+        if filler_price is not None:
+            self.per_inch[CabinetToken.FILLER] = filler_price
+        self.labor = np.array([float(labor_hours.get(prefix, 0)) for prefix in CabinetToken.PREFIXES]) * float(labor_rate)
+
+
+@functools.lru_cache(maxsize=16)
+def price_matrix(catalog):
+    """Returns the PriceMatrix of a catalog line with the prices and rates from the settings (built once per line)."""
+    return PriceMatrix(catalog)
+
+
+def encode(layouts):
+    """
+    Converts layouts of CabinetTokens into the flat code and offsets arrays of object/batch.py.
+
+    Args:
+        layouts (iterable): The layouts, each a list of CabinetTokens.
+
+    Returns:
+        tuple: A CODE_DTYPE array with the cabinets of every layout and an offsets array, so the
+        cabinets of layout i are codes[offsets[i]:offsets[i + 1]].
+    """
+    layouts = list(layouts)
+    offsets = np.zeros(len(layouts) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, layouts), np.int64, len(layouts)), out=offsets[1:])
+    tokens = itertools.chain.from_iterable(layouts)
+    codes = np.fromiter(((token.kind, token.width) for token in tokens), CODE_DTYPE, offsets[-1])
+    return codes, offsets
+
+
+def quote_codes(codes, offsets, catalog=None, matrix=None, round=True):
+    """
+    Prices many layouts at once.
+
+    Args:
+        codes (numpy.ndarray): A CODE_DTYPE array with the cabinets of every layout, as returned by
+            encode, batch_fill or batch_generation.
+        offsets (numpy.ndarray): The offsets array returned with it.
+        catalog (Catalog): The line to price from (defaults to the active line).
+        matrix (PriceMatrix): The prices to use instead of the catalog's (e.g. with other labor rates).
+        round (bool): Whether to round the costs and total to the cent. Quotes that are added up
+            later (like the parts of a wall) should be rounded once, after they are added.
+
+    Returns:
+        numpy.ndarray: A QUOTE_DTYPE row per layout.
+    """
+    matrix = matrix or price_matrix(catalog or get_catalog())
+    offsets = np.asarray(offsets, dtype=np.int64)
+    n = offsets.size - 1
+    layout = np.repeat(np.arange(n), np.diff(offsets))  # The layout each cabinet belongs to
+    kinds = codes["kind"].astype(np.intp)
+    units = np.rint(codes["width"] * geometry.QUANTUM).astype(np.int64)
+    inches = units / geometry.QUANTUM
+    is_filler = kinds == CabinetToken.FILLER
+
+    # Catalog prices where the line has one, the per-inch price of the kind everywhere else
+    listed = np.full(kinds.size, np.nan)
+    in_table = ~is_filler & (units >= 0) & (units < matrix.prices.shape[1])
+    listed[in_table] = matrix.prices[kinds[in_table], units[in_table]]
+    unlisted = np.isnan(listed)
+    price = np.where(unlisted, matrix.per_inch[kinds] * inches, listed)
+    estimated = (unlisted & ~is_filler) | (is_filler & matrix.filler_estimated)
+
+    def total(weights):
+        return np.bincount(layout, weights=weights, minlength=n)
+
+    quotes = np.zeros(n, dtype=QUOTE_DTYPE)
+    quotes["cabinets"] = total(np.where(is_filler, 0, price))
+    quotes["filler"] = total(np.where(is_filler, price, 0))
+    quotes["labor"] = total(matrix.labor[kinds])
+    if round:
+        round_costs(quotes)
+    quotes["count"] = np.bincount(layout[~is_filler], minlength=n)
+    quotes["filler_inches"] = total(np.where(is_filler, inches, 0))
+    quotes["estimated"] = np.bincount(layout[estimated], minlength=n)
+    return quotes
+
+
+def round_costs(quotes):
+    """
+    Rounds the costs of quotes to the cent and sets their totals to the sum of the rounded costs.
+
+    Args:
+        quotes (numpy.ndarray): QUOTE_DTYPE rows, rounded in place.
+
+    Returns:
+        numpy.ndarray: The same rows.
+    """
+    for cost in COSTS:
+        quotes[cost] = np.round(quotes[cost], 2)
+    quotes["total"] = np.round(quotes["cabinets"] + quotes["filler"] + quotes["labor"], 2)
+    return quotes
+
+
+def quote_layouts(layouts, catalog=None, matrix=None):
+    """
+    Prices layouts of CabinetTokens (e.g. the bases and uppers of several Walls).
+
+    Args:
+        layouts (iterable): The layouts, each a list of CabinetTokens.
+        catalog (Catalog): The line to price from (defaults to the active line).
+        matrix (PriceMatrix): The prices to use instead of the catalog's.
+
+    Returns:
+        numpy.ndarray: A QUOTE_DTYPE row per layout.
+    """
+    codes, offsets = encode(layouts)
+    return quote_codes(codes, offsets, catalog, matrix)
+
+
+def quote_walls(widths, generations=("b2", "u2"), strategies=(None,), catalog=None, matrix=None):
+    """
+    Prices the layouts of many walls with several fill strategies, for what-if analysis.
+
+    Each wall is laid out with each strategy by the given generation methods (the bases and uppers
+    are priced together). The generation methods' default strategies are run for every wall at once
+    with batch_generation where they can be; the rest are laid out one Wall at a time.
+
+    Args:
+        widths (array_like): The wall widths (in inches).
+        generations (tuple): The generation methods that lay out each wall, like ("b2", "u2").
+        strategies (iterable): The fill strategies to price (see Wall.FILL_STRATEGIES), None being
+            the default strategy of each generation method.
+        catalog (Catalog): The line to lay the walls out from and price from (defaults to the active line).
+        matrix (PriceMatrix): The prices to use instead of the catalog's.
+
+    Returns:
+        dict: A QUOTE_DTYPE array (one row per width) for each strategy.
+
+    Raises:
+        ValueError: If a width, generation method or strategy is not valid.
+    """
+    catalog = catalog or get_catalog()
+    matrix = matrix or price_matrix(catalog)
+    widths = np.asarray(widths, dtype=np.float64).ravel()
+    walls = None
+    results = {}
+    for strategy in strategies:
+        quotes = np.zeros(widths.size, dtype=QUOTE_DTYPE)
+        for generation in generations:
+            if generation not in catalog.generations:
+                raise ValueError(f"{generation} is not a valid generation method")
+            if generation in BATCH_GENERATIONS and strategy in (None, catalog.generations[generation][0]):
+                _, codes, offsets = batch_generation(widths, generation, True, catalog)
+            else:
+                walls = walls or [Wall(width=float(width), catalog=catalog) for width in widths]
+                codes, offsets = encode(wall.generate(generation, wall.get_fill(strategy)) for wall in walls)
+            part = quote_codes(codes, offsets, matrix=matrix, round=False)
+            for name in QUOTE_DTYPE.names:
+                quotes[name] += part[name]
+        results[strategy] = round_costs(quotes)
+    return results
+
+
+def quote_details(quote):
+    """
+    Converts one QUOTE_DTYPE row to a dictionary for the API.
+
+    Args:
+        quote (numpy.void): The row.
+
+    Returns:
+        dict: The costs, total, cabinet count, filler width and number of estimated prices of the layout.
+    """
+    return {
+        "cabinet_cost": float(quote["cabinets"]),
+        "filler_cost": float(quote["filler"]),
+        "labor_cost": float(quote["labor"]),
+        "total": float(quote["total"]),
+        "cabinets": int(quote["count"]),
+        "filler": geometry.to_inches(geometry.to_units(float(quote["filler_inches"]))),
+        "estimated": int(quote["estimated"]),
+    }
@@ -0,0 +1,108 @@
+"""
+Loading and serializing saved projects.
+
+A whole project (its rooms, their wall runs and every cabinet on them) is read either from the
+project's snapshot column in a single query, or, when the snapshot is stale, from the tables in a
+fixed five queries (one per level, and one for the obstacles) no matter how many rooms, walls,
+cabinets or obstacles it has. The result of
+a table read is written back as the new snapshot, unless the project was invalidated while it was
+being read (every invalidation bumps the project's snapshot_version, which the write checks).
+
+Anything that changes a project must clear its snapshot with invalidate_snapshots. The signal
+handlers in signals.py do it for saves and deletes; bulk writes have to call it themselves.
+"""
+
+from django.db.models import F, Prefetch
+
+from .models.cabinet import Cabinet
+from .models.project import Project, Room, WallRun
+
+
+def project_queryset():
+    """Returns a queryset of projects with their rooms, wall runs, cabinets and obstacles prefetched in order."""
+    cabinets = Cabinet.objects.order_by("position_x", "position_y", "id")
+    walls = WallRun.objects.prefetch_related(Prefetch("cabinets", queryset=cabinets), "obstacles")
+    rooms = Room.objects.prefetch_related(Prefetch("walls", queryset=walls))
+    return Project.objects.prefetch_related(Prefetch("rooms", queryset=rooms))
+
+
+def project_payload(project):
+    """
+    Serializes a project loaded through project_queryset.
+
+    Args:
+        project (Project): The project, with its rooms, wall runs, cabinets and obstacles prefetched.
+
+    Returns:
+        dict: The project's id and name, and its rooms, each with its wall runs and their cabinets and
+        obstacles.
+    """
+    from .views import cabinet_details, obstacle_details  # views imports this module
+
+    return {
+        "id": project.pk,
+        "name": project.name,
+        "rooms": [
+            {
+                "id": room.pk,
+                "name": room.name,
+                "walls": [
+                    {
+                        "id": wall.pk,
+                        "orientation": wall.orientation,
+                        "width": wall.width,
+                        "cabinets": [cabinet_details(cabinet) for cabinet in wall.cabinets.all()],
+                        "obstacles": [obstacle_details(obstacle) for obstacle in wall.obstacles.all()],
+                    }
+                    for wall in room.walls.all()
+                ],
+            }
+            for room in project.rooms.all()
+        ],
+    }
+
+
+def load_project(project_id, use_snapshot=True):
+    """
+    Loads a whole project as a response payload.
+
+    Args:
+        project_id (int): The id of the project.
+        use_snapshot (bool): Whether a stored snapshot may be returned instead of reading the tables.
+
+    Returns:
+        dict: The payload (see project_payload).
+
+    Raises:
+        Project.DoesNotExist: If there is no project with that id.
+    """
+    snapshot, version = Project.objects.filter(pk=project_id).values_list("snapshot", "snapshot_version").get()
+    if use_snapshot and snapshot is not None:
+        return snapshot
+
+    payload = project_payload(project_queryset().get(pk=project_id))
+    # update() so the refreshed snapshot doesn't touch updated_at or fire the save signals. It only
+    # matches if no invalidation happened since the version was read, so a stale payload isn't stored.
+    Project.objects.filter(pk=project_id, snapshot_version=version).update(snapshot=payload)
+    return payload
+
+
+def invalidate_snapshots(project_ids=(), room_ids=(), wall_run_ids=()):
+    """
+    Clears the snapshots of projects that changed.
+
+    Args:
+        project_ids (iterable): Ids of the projects that changed.
+        room_ids (iterable): Ids of rooms that changed (their projects are cleared).
+        wall_run_ids (iterable): Ids of wall runs whose cabinets or obstacles changed (their projects are cleared).
+    """
+    project_ids = {pk for pk in project_ids if pk is not None}
+    room_ids = {pk for pk in room_ids if pk is not None}
+    wall_run_ids = {pk for pk in wall_run_ids if pk is not None}
+    if room_ids:
+        project_ids.update(Room.objects.filter(pk__in=room_ids).values_list("project_id", flat=True))
+    if wall_run_ids:
+        project_ids.update(WallRun.objects.filter(pk__in=wall_run_ids).values_list("room__project_id", flat=True))
+    if project_ids:
+        # Bump the version even if there is no snapshot, so a load in progress doesn't store one
+        Project.objects.filter(pk__in=project_ids).update(snapshot=None, snapshot_version=F("snapshot_version") + 1)
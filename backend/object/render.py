@@ -0,0 +1,405 @@
+"""
+Server-side shop drawings of wall layouts, as vector SVG or PDF.
+
+Every wall becomes one page (a sheet) with an elevation (the cabinets seen from the front, bases
+standing on the floor and uppers hung above the counter) and a plan view (the cabinets seen from
+above against the wall line). Sheets are built from generate_wall payloads or from saved projects.
+
+Both formats are written by hand with the standard library only, and are produced as generators of
+byte chunks so a drawing can be streamed page by page with StreamingHttpResponse: only the pages in
+flight are ever held in memory. The PDF writer records the offset of every object as it goes and
+writes the page tree and cross-reference table at the end. Pages can also be drawn in parallel on a
+process pool (see render_pages); they still come out in order.
+"""
+
+import collections
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+
+from .catalog import get_catalog
+from .models.cabinet import Cabinet
+from .tokens import CabinetToken
+
+# Page size and margin, in points (1/72 inch) for PDF and user units for SVG (US letter, landscape)
+PAGE_WIDTH = 792
+PAGE_HEIGHT = 612
+MARGIN = 36
+
+# Vertical bands of the page used by the elevation and the plan view (in points from the top)
+ELEVATION_TOP = 80
+ELEVATION_BOTTOM = 360
+PLAN_TOP = 410
+PLAN_BOTTOM = PAGE_HEIGHT - MARGIN
+
+WALL_HEIGHT = 96  # Height of the wall drawn in the elevation (inches)
+UPPER_MOUNT_HEIGHT = 54  # Height of the bottom of the upper cabinets above the floor (inches)
+
+# Stroke colors, matching the canvas in the frontend (utils/globalVars.js)
+BASE_COLOR = (1, 0, 0)  # red
+UPPER_COLOR = (0, 0, 0)  # black
+WALL_COLOR = (0.6, 0.6, 0.6)  # grey
+
+# Content type of each drawing format
+CONTENT_TYPES = {
+    "svg": "image/svg+xml",
+    "pdf": "application/pdf",
+}
+
+RENDER_WINDOW = 8  # Pages that may be in flight on the pool at once
+
+_pool = None  # Created on first use
+
+
+class SvgCanvas:
+    """Collects the drawing operations of one page as SVG elements."""
+
+    def __init__(self):
+        self.parts = []
+
+    def rect(self, x, y, width, height, color, dashed=False):
+        """Strokes a rectangle whose top left corner is at (x, y)."""
+        dash = ' stroke-dasharray="4 2"' if dashed else ""
+        self.parts.append(
+            f'<rect x="{num(x)}" y="{num(y)}" width="{num(width)}" height="{num(height)}" '
+            f'fill="none" stroke="{svg_color(color)}" stroke-width="0.75"{dash}/>'
+        )
+
+    def line(self, x1, y1, x2, y2, color):
+        """Strokes a line."""
+        self.parts.append(
+            f'<line x1="{num(x1)}" y1="{num(y1)}" x2="{num(x2)}" y2="{num(y2)}" '
+            f'stroke="{svg_color(color)}" stroke-width="0.75"/>'
+        )
+
+    def text(self, x, y, string, size, centered=False):
+        """Writes text with its baseline starting (or centered, if *centered*) at (x, y)."""
+        anchor = ' text-anchor="middle"' if centered else ""
+        self.parts.append(
+            f'<text x="{num(x)}" y="{num(y)}" font-family="Helvetica, Arial, sans-serif" '
+            f'font-size="{num(size)}"{anchor}>{escape(string)}</text>'
+        )
+
+    def getvalue(self):
+        """Returns the page's SVG elements as UTF-8 bytes."""
+        return "".join(self.parts).encode("utf-8")
+
+
+class PdfCanvas:
+    """Collects the drawing operations of one page as a PDF content stream."""
+
+    def __init__(self):
+        self.ops = []
+
+    def rect(self, x, y, width, height, color, dashed=False):
+        """Strokes a rectangle whose top left corner is at (x, y)."""
+        self.ops.append(f"{pdf_color(color)} RG {'[4 2] 0 d' if dashed else '[] 0 d'}")
+        self.ops.append(f"{num(x)} {num(PAGE_HEIGHT - y - height)} {num(width)} {num(height)} re S")
+
+    def line(self, x1, y1, x2, y2, color):
+        """Strokes a line."""
+        self.ops.append(f"{pdf_color(color)} RG [] 0 d")
+        self.ops.append(f"{num(x1)} {num(PAGE_HEIGHT - y1)} m {num(x2)} {num(PAGE_HEIGHT - y2)} l S")
+
+    def text(self, x, y, string, size, centered=False):
+        """Writes text with its baseline starting (or centered, if *centered*) at (x, y)."""
+        if centered:
+            x -= text_width(string, size) / 2
+        self.ops.append(f"BT /F1 {num(size)} Tf {num(x)} {num(PAGE_HEIGHT - y)} Td ({pdf_string(string)}) Tj ET")
+
+    def getvalue(self):
+        """Returns the page's content stream, compressed with Flate."""
+        return zlib.compress(("0.75 w\n" + "\n".join(self.ops)).encode("latin-1", "replace"))
+
+
+def num(value):
+    """Formats a coordinate with at most two decimals."""
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def svg_color(color):
+    """Formats an (r, g, b) color with components from 0 to 1 for SVG."""
+    return "#" + "".join(f"{round(c * 255):02x}" for c in color)
+
+
+def pdf_color(color):
+    """Formats an (r, g, b) color with components from 0 to 1 for a PDF color operator."""
+    return " ".join(num(c) for c in color)
+
+
+def pdf_string(string):
+    """Escapes text for a PDF literal string."""
+    return string.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_width(string, size):
+    """Estimates the width of Helvetica text (in points), for centering it in a PDF."""
+    return len(string) * size * 0.5
+
+
+def wall_sheet(title, cabinets):
+    """
+    Creates a sheet from the "cabinets" of a generate_wall payload.
+
+    Args:
+        title (str): The title printed at the top of the page.
+        cabinets (dict): The "bases" and "uppers" details (name, width, height, depth) of the wall.
+
+    Returns:
+        dict: The sheet, with its title, bases and uppers.
+    """
+    return {"title": title, "bases": cabinets["bases"], "uppers": cabinets["uppers"]}
+
+
+def saved_wall_sheet(title, cabinets):
+    """
+    Creates a sheet from the cabinets saved on a wall run (in the format of cabinet_details).
+
+    The cabinets are split into bases and uppers by their name's prefix; fillers go with the uppers
+    when they are no deeper than an upper cabinet (of the active catalog line). They are drawn in the
+    order given.
+    """
+    _, upper_depth = get_catalog().standard(CabinetToken.UPPER)
+    bases, uppers = [], []
+    for cabinet in cabinets:
+        kind = Cabinet.kind_from_name(cabinet["name"])
+        if kind in (CabinetToken.UPPER, CabinetToken.UPPER_CORNER) or (
+            kind == CabinetToken.FILLER and cabinet["depth"] <= upper_depth
+        ):
+            uppers.append(cabinet)
+        else:
+            bases.append(cabinet)
+    return {"title": title, "bases": bases, "uppers": uppers}
+
+
+def project_sheets(payload):
+    """
+    Lists the sheets of a saved project, one per wall run.
+
+    Args:
+        payload (dict): The project, as returned by projects.load_project.
+
+    Returns:
+        tuple: The number of sheets and a generator of the sheets.
+    """
+    walls = [(room, wall) for room in payload["rooms"] for wall in room["walls"]]
+    sheets = (
+        saved_wall_sheet(
+            f"{payload['name']} / {room['name']} / {wall['orientation']} wall ({num(wall['width'])} in)",
+            wall["cabinets"],
+        )
+        for room, wall in walls
+    )
+    return len(walls), sheets
+
+
+def draw_sheet(canvas, sheet):
+    """
+    Draws a sheet (title, elevation and plan view) on a canvas.
+
+    Args:
+        canvas (SvgCanvas or PdfCanvas): The canvas to draw on.
+        sheet (dict): The sheet (see wall_sheet).
+    """
+    bases, uppers = sheet["bases"], sheet["uppers"]
+    run = max(sum(c["width"] for c in bases), sum(c["width"] for c in uppers), 1)
+
+    # One scale for both views, so the plan lines up under the elevation
+    scale = min(
+        (PAGE_WIDTH - 2 * MARGIN) / run,
+        (ELEVATION_BOTTOM - ELEVATION_TOP) / WALL_HEIGHT,
+        (PLAN_BOTTOM - PLAN_TOP) / max([c["depth"] for c in bases + uppers] + [1]),
+    )
+    left = MARGIN
+    floor = ELEVATION_BOTTOM
+
+    canvas.text(MARGIN, MARGIN + 14, sheet["title"], 14)
+    canvas.rect(MARGIN / 2, MARGIN / 2, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - MARGIN, WALL_COLOR)
+
+    # Elevation: the wall, the bases on the floor and the uppers above the counter
+    canvas.text(left, ELEVATION_TOP - 8, "ELEVATION", 9)
+    canvas.rect(left, floor - WALL_HEIGHT * scale, run * scale, WALL_HEIGHT * scale, WALL_COLOR)
+    for cabinets, color, bottom in ((bases, BASE_COLOR, 0), (uppers, UPPER_COLOR, UPPER_MOUNT_HEIGHT)):
+        x = left
+        for cabinet in cabinets:
+            width, height = cabinet["width"] * scale, cabinet["height"] * scale
+            top = floor - bottom * scale - height
+            canvas.rect(x, top, width, height, color)
+            canvas.text(x + width / 2, top + height / 2 + 3, cabinet["name"], label_size(cabinet["name"], width), centered=True)
+            x += width
+
+    # Overall dimension under the floor line
+    canvas.line(left, floor + 12, left + run * scale, floor + 12, UPPER_COLOR)
+    canvas.text(left + run * scale / 2, floor + 24, f'{num(run)}"', 9, centered=True)
+
+    # Plan view: the wall line with the bases and (dashed) the uppers against it
+    canvas.text(left, PLAN_TOP - 8, "PLAN", 9)
+    canvas.line(left, PLAN_TOP, left + run * scale, PLAN_TOP, WALL_COLOR)
+    for cabinets, color, dashed in ((bases, BASE_COLOR, False), (uppers, UPPER_COLOR, True)):
+        x = left
+        for cabinet in cabinets:
+            width = cabinet["width"] * scale
+            canvas.rect(x, PLAN_TOP, width, cabinet["depth"] * scale, color, dashed)
+            x += width
+
+
+def label_size(name, width):
+    """Picks a font size (in points) that fits a cabinet's name inside its drawn width."""
+    return max(3, min(8, width / max(len(name), 1) / 0.6))
+
+
+def render_page(sheet, fmt):
+    """
+    Draws one sheet as the body of a page (runs in the pool's worker processes in parallel mode).
+
+    Args:
+        sheet (dict): The sheet (see wall_sheet).
+        fmt (str): "svg" or "pdf".
+
+    Returns:
+        bytes: The page's SVG elements, or its compressed PDF content stream.
+    """
+    canvas = SvgCanvas() if fmt == "svg" else PdfCanvas()
+    draw_sheet(canvas, sheet)
+    return canvas.getvalue()
+
+
+def get_pool():
+    """Returns the process pool used to draw pages in parallel, creating it on first use."""
+    global _pool
+    if _pool is None:
+        from .search import init_worker
+        _pool = ProcessPoolExecutor(max_workers=getattr(settings, "RENDER_WORKERS", None), initializer=init_worker)
+    return _pool
+
+
+def render_pages(sheets, fmt, parallel=False):
+    """
+    Draws sheets into page bodies, in order.
+
+    Args:
+        sheets (iterable): The sheets (see wall_sheet). Consumed lazily.
+        fmt (str): "svg" or "pdf".
+        parallel (bool): Whether to draw the pages on the process pool. At most RENDER_WINDOW pages
+            are in flight, so a big project is never drawn entirely ahead of the response.
+
+    Yields:
+        bytes: The body of each page (see render_page).
+    """
+    if not parallel:
+        for sheet in sheets:
+            yield render_page(sheet, fmt)
+        return
+
+    pool = get_pool()
+    window = collections.deque()
+    for sheet in sheets:
+        window.append(pool.submit(render_page, sheet, fmt))
+        if len(window) >= RENDER_WINDOW:
+            yield window.popleft().result()
+    while window:
+        yield window.popleft().result()
+
+
+def stream_svg(pages, count):
+    """
+    Writes page bodies as one SVG document with the pages stacked top to bottom.
+
+    Args:
+        pages (iterable): The SVG page bodies (see render_pages).
+        count (int): The number of pages (the document's height depends on it).
+
+    Yields:
+        bytes: The document, in chunks of about one page.
+    """
+    height = PAGE_HEIGHT * max(count, 1)
+    yield (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{PAGE_WIDTH}" height="{height}" '
+        f'viewBox="0 0 {PAGE_WIDTH} {height}">\n'
+    ).encode("utf-8")
+    for index, page in enumerate(pages):
+        yield (
+            f'<g transform="translate(0 {index * PAGE_HEIGHT})">'
+            f'<rect width="{PAGE_WIDTH}" height="{PAGE_HEIGHT}" fill="white"/>'
+        ).encode("utf-8") + page + b"</g>\n"
+    yield b"</svg>\n"
+
+
+def stream_pdf(pages):
+    """
+    Writes page content streams as a PDF document.
+
+    Object 1 is the catalog, 2 the page tree (written last, once every page is known) and 3 the
+    Helvetica font; each page then adds its content stream and page object.
+
+    Args:
+        pages (iterable): The compressed PDF content streams (see render_pages).
+
+    Yields:
+        bytes: The document, in chunks of about one page.
+    """
+    offsets = {}  # Byte offset of each object, for the cross-reference table
+    written = 0
+
+    def chunk(*objects):
+        nonlocal written
+        data = b""
+        for number, body in objects:
+            offsets[number] = written + len(data)
+            data += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        written += len(data)
+        return data
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    written = len(header)
+    yield header + chunk(
+        (1, b"<< /Type /Catalog /Pages 2 0 R >>"),
+        (3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"),
+    )
+
+    kids = []
+    number = 4
+    for content in pages:
+        kids.append(number + 1)
+        yield chunk(
+            (number, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream"),
+            (number + 1, (
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (PAGE_WIDTH, PAGE_HEIGHT, number)
+            )),
+        )
+        number += 2
+
+    pages_tree = chunk((2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids)
+    )))
+    xref_offset = written
+    xref = [b"xref\n0 %d\n" % number, b"0000000000 65535 f \n"]
+    xref.extend(b"%010d 00000 n \n" % offsets[i] for i in range(1, number))
+    trailer = b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (number, xref_offset)
+    yield pages_tree + b"".join(xref) + trailer
+
+
+def render(sheets, count, fmt, parallel=False):
+    """
+    Renders sheets as a streamed SVG or PDF document.
+
+    Args:
+        sheets (iterable): The sheets (see wall_sheet).
+        count (int): The number of sheets.
+        fmt (str): "svg" or "pdf".
+        parallel (bool): Whether to draw the pages on the process pool.
+
+    Returns:
+        generator: The document's bytes, in chunks.
+
+    Raises:
+        ValueError: If the format is not "svg" or "pdf".
+    """
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"{fmt} is not a valid drawing format. Must be one of {list(CONTENT_TYPES)}.")
+    pages = render_pages(sheets, fmt, parallel)
+    return stream_svg(pages, count) if fmt == "svg" else stream_pdf(pages)
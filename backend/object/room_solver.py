@@ -0,0 +1,345 @@
+"""
+Room-level corner solver.
+
+The generation methods lay out each wall on its own with a fixed corner: generation_b1 owns a BC36 at
+its end, generation_b2 gives up 36 inches at each end for the corners of its neighbours, and so on.
+This module instead treats the walls of an L- or U-shaped room (or any set of walls joined at corners)
+as one problem. At every corner one of the two walls owns the corner cabinet, which takes up its width
+on that wall, while the other wall only loses the corner cabinet's depth. The solver picks the owner of
+every corner and the size of every corner cabinet (any of the corner widths the catalog line sells) so
+that the whole room has the least filler, breaking ties by using the fewest cabinets.
+
+Each wall only depends on the choices at its own (at most two) corners, so a wall's cost is tabulated
+for every combination of them up front. A depth-first branch and bound then decides one corner at a
+time, trying the most promising options first and cutting off the ones whose bound (the exact cost of
+the walls whose corners are all decided plus the cheapest cost each other wall can still reach) can't
+beat the best found. The best completion of each search state (which walls are half decided, and how)
+is memoized, so a chain of walls only has a handful of states per corner and rooms with many walls
+solve in milliseconds.
+
+Typical usage example:
+
+    solution = solve_room([120, 180, 96])  # A U-shaped room: left, top and right walls
+    solution.walls[0]["bases"]  # CabinetTokens of the first wall, corner cabinet included
+"""
+
+import itertools
+
+from . import geometry
+from .catalog import get_catalog
+from .models.wall import Wall
+from .tokens import CabinetToken
+
+# For each layer of cabinets: (cabinet kind, corner kind). The corner sizes tried are the ones the
+# catalog line sells (largest first), and the wall that doesn't own a corner loses the depth of the
+# corner cabinet to it.
+LAYERS = {
+    "bases": (CabinetToken.BASE, CabinetToken.BASE_CORNER),
+    "uppers": (CabinetToken.UPPER, CabinetToken.UPPER_CORNER),
+}
+
+DEFAULT_STRATEGY = "optimal"
+
+MAX_WALLS = 500  # The search recurses once per corner
+
+# Costs are whole numbers so they add up exactly: filler in quanta (see object/geometry.py) times
+# CABINET_SCALE, plus the number of cabinets (so less filler always wins, then fewer cabinets)
+CABINET_SCALE = 1 << 20
+INFEASIBLE = 1 << 100  # Cost of a wall too short for its corners
+
+
+class RoomSolution:
+    """
+    The best corner assignment found for a room.
+
+    Attributes:
+        walls (list): One dictionary per wall with its "bases" and "uppers" CabinetTokens.
+        corners (list): One dictionary per corner with its "walls" and, for "bases" and "uppers", the
+            index of the wall that owns the corner cabinet ("owner") and its width ("size").
+        filler (dict): The total filler (in inches) of the "bases" and of the "uppers".
+        cabinets (dict): The total number of cabinets (corners included) of each layer.
+        nodes (int): The number of search nodes the branch and bound visited.
+    """
+
+    def __init__(self, walls, corners, filler, cabinets, nodes):
+        self.walls = walls
+        self.corners = corners
+        self.filler = filler
+        self.cabinets = cabinets
+        self.nodes = nodes
+
+
+def chain_corners(count):
+    """Returns the corners of walls that follow each other around a room (the end of each meets the next)."""
+    return [(index, index + 1) for index in range(count - 1)]
+
+
+def validate_corners(count, corners):
+    """
+    Checks the corners of a room.
+
+    Args:
+        count (int): The number of walls.
+        corners (list): (wall, next wall) pairs, where the end of the first wall meets the start of the
+            second.
+
+    Raises:
+        ValueError: If a corner names a missing wall, joins a wall to itself or uses a wall end twice.
+    """
+    ends, starts = set(), set()
+    for corner in corners:
+        if len(corner) != 2 or not all(isinstance(wall, int) and 0 <= wall < count for wall in corner):
+            raise ValueError(f"Invalid corner {corner}: must be a pair of wall indexes below {count}")
+        first, second = corner
+        if first == second:
+            raise ValueError(f"Invalid corner {corner}: a wall can't meet itself")
+        if first in ends or second in starts:
+            raise ValueError(f"Invalid corner {corner}: each end of a wall can only have one corner")
+        ends.add(first)
+        starts.add(second)
+
+
+def fill_cost(tokens):
+    """Returns the cost of a fill (see CABINET_SCALE)."""
+    filler = sum(token.units for token in tokens if token.kind == CabinetToken.FILLER)
+    cabinets = sum(1 for token in tokens if token.kind != CabinetToken.FILLER)
+    return filler * CABINET_SCALE + cabinets
+
+
+def split_cost(cost):
+    """Splits a cost into its filler (in inches) and its number of cabinets."""
+    filler, cabinets = divmod(cost, CABINET_SCALE)
+    return geometry.to_inches(filler), cabinets
+
+
+class _LayerProblem:
+    """
+    One layer (bases or uppers) of a room, tabulated for the branch and bound.
+
+    A corner option is (owner, size), where owner 0 is the corner's first wall and 1 its second.
+    """
+
+    def __init__(self, widths, corners, layer, fill, catalog):
+        self.kind, self.corner_kind = LAYERS[layer]
+        self.widths = [geometry.to_units(width) for width in widths]  # Lengths are in quanta from here on
+        self.corners = corners
+        self.fill = fill
+        sizes = catalog.units(self.corner_kind)
+        if corners and not sizes:
+            raise ValueError(f"The {catalog.name} catalog line has no corner cabinets for the {layer}")
+        # What a corner cabinet of each size takes from the wall that doesn't own it: its own depth
+        self.clearance = {
+            size: geometry.to_units(catalog.item(self.corner_kind, geometry.to_inches(size)).depth) for size in sizes
+        }
+        self.options = [(owner, size) for size in sizes for owner in (0, 1)]
+        self._fills = {}
+
+        # The corners at each wall, as (corner index, the wall's role in the corner) pairs
+        self.wall_corners = [[] for _ in widths]
+        for index, (first, second) in enumerate(corners):
+            self.wall_corners[first].append((index, 0))
+            self.wall_corners[second].append((index, 1))
+
+        # Cost of each wall for every combination of options at its corners, and the cheapest cost it
+        # can reach for every partial combination (None for a corner that isn't decided yet)
+        self.tables = []
+        self.bounds = []
+        for wall in range(len(widths)):
+            table = {
+                choice: self.wall_fill(wall, choice)[1]
+                for choice in itertools.product(range(len(self.options)), repeat=len(self.wall_corners[wall]))
+            }
+            bounds = {}
+            for choice, cost in table.items():
+                for mask in itertools.product((False, True), repeat=len(choice)):
+                    partial = tuple(option if known else None for option, known in zip(choice, mask))
+                    bounds[partial] = min(bounds.get(partial, INFEASIBLE), cost)
+            self.tables.append(table)
+            self.bounds.append(bounds)
+
+    def wall_fill(self, wall, choice):
+        """
+        Fills a wall for a combination of options at its corners.
+
+        Returns:
+            tuple: The fill's CabinetTokens (None if the wall is too short) and its cost.
+        """
+        width = self.widths[wall]
+        for (corner, role), option in zip(self.wall_corners[wall], choice):
+            owner, size = self.options[option]
+            width -= size if owner == role else self.clearance[size]
+        if width < 0:
+            return None, INFEASIBLE
+
+        if width not in self._fills:
+            tokens = self.fill(geometry.to_inches(width), self.kind)
+            self._fills[width] = (tokens, fill_cost(tokens))
+        tokens, cost = self._fills[width]
+        # The corner cabinets the wall owns count as cabinets too
+        owned = sum(1 for (corner, role), option in zip(self.wall_corners[wall], choice)
+                    if self.options[option][0] == role)
+        return tokens, cost + owned
+
+    def best_cost(self, wall, decided):
+        """Returns the cheapest cost of a wall given the options decided so far (by corner index)."""
+        return self.bounds[wall][tuple(decided.get(corner) for corner, _ in self.wall_corners[wall])]
+
+    def solve(self):
+        """
+        Runs the branch and bound.
+
+        search(index) returns the cheapest cost of the walls that aren't closed yet (not all of their
+        corners decided) over every choice of the corners from *index* on. That only depends on the
+        open walls and the options decided at their corners, so it is memoized by them. Within a
+        node, the options are tried cheapest bound first and the rest are cut off once their bound
+        can't beat the best option found, which keeps the memoized results exact.
+
+        Returns:
+            tuple: The option chosen at every corner, the total cost and the number of nodes visited.
+
+        Raises:
+            ValueError: If no assignment fits every wall.
+        """
+        corner_count = len(self.corners)
+        decided = {}
+        # The cheapest cost each wall can still reach; exact once all of its corners are decided
+        bounds = [self.best_cost(wall, decided) for wall in range(len(self.widths))]
+        remaining = [len(corners) for corners in self.wall_corners]  # Undecided corners per wall
+        open_walls = set()  # Walls with some but not all of their corners decided
+        totals = {"bound": sum(bounds), "closed": sum(b for b, r in zip(bounds, remaining) if r == 0)}
+        memo = {}
+        nodes = 0
+
+        def decide(wall, step):
+            """Updates the bookkeeping of a wall after one of its corners was decided (step -1) or undone (1)."""
+            if remaining[wall] == 0:
+                totals["closed"] -= bounds[wall]
+            remaining[wall] += step
+            bound = self.best_cost(wall, decided)
+            totals["bound"] += bound - bounds[wall]
+            bounds[wall] = bound
+            if remaining[wall] == 0:
+                totals["closed"] += bound
+            if 0 < remaining[wall] < len(self.wall_corners[wall]):
+                open_walls.add(wall)
+            else:
+                open_walls.discard(wall)
+
+        def choose(index, option):
+            first, second = self.corners[index]
+            decided[index] = option
+            decide(first, -1)
+            decide(second, -1)
+
+        def undo(index):
+            first, second = self.corners[index]
+            del decided[index]
+            decide(first, 1)
+            decide(second, 1)
+
+        def search(index):
+            nonlocal nodes
+            if index == corner_count:
+                return 0, None
+            state = (index, tuple(sorted(
+                (wall, tuple(decided.get(corner) for corner, _ in self.wall_corners[wall])) for wall in open_walls
+            )))
+            if state in memo:
+                return memo[state]
+            nodes += 1
+
+            closed = totals["closed"]
+            children = []
+            for option in range(len(self.options)):
+                choose(index, option)
+                children.append((totals["bound"] - closed, option))
+                undo(index)
+
+            best = (INFEASIBLE, None)
+            for bound, option in sorted(children):  # Most promising option first
+                if bound >= best[0]:
+                    break  # Neither this option nor the ones after it can do better
+                choose(index, option)
+                cost, rest = search(index + 1)
+                cost += totals["closed"] - closed
+                undo(index)
+                if cost < best[0]:
+                    best = (cost, (option, rest))  # Choices kept as a linked list, not copied per node
+            memo[state] = best
+            return best
+
+        cost, choices = search(0)
+        cost += totals["closed"]
+        if cost >= INFEASIBLE:
+            raise ValueError("The walls are too short for their corner cabinets")
+        chosen = []
+        while choices is not None:
+            option, choices = choices
+            chosen.append(option)
+        return chosen, cost, nodes
+
+    def layout(self, wall, chosen):
+        """
+        Lays out a wall for the chosen options, with the corner cabinets it owns at its ends.
+
+        Args:
+            wall (int): The index of the wall.
+            chosen (list): The option chosen at every corner.
+
+        Returns:
+            list: The CabinetTokens of the wall.
+        """
+        choice = tuple(chosen[corner] for corner, _ in self.wall_corners[wall])
+        tokens, _ = self.wall_fill(wall, choice)
+        tokens = list(tokens)
+        for corner, role in self.wall_corners[wall]:
+            owner, size = self.options[chosen[corner]]
+            if owner == role:
+                if role == 1:  # The corner is at the start of this wall
+                    tokens.insert(0, CabinetToken.from_units(self.corner_kind, size))
+                else:
+                    tokens.append(CabinetToken.from_units(self.corner_kind, size))
+        return tokens
+
+
+def solve_room(widths, corners=None, strategy=DEFAULT_STRATEGY, catalog=None):
+    """
+    Lays out a room, choosing the owner of every corner and the size of every corner cabinet.
+
+    Args:
+        widths (list): The width of each wall (in inches).
+        corners (list): (wall, next wall) index pairs where the end of the first wall meets the start
+            of the second. Defaults to each wall meeting the next (see chain_corners).
+        strategy (str): The fill strategy for the space between corners (see Wall.FILL_STRATEGIES).
+        catalog (Catalog): The line to lay the room out from (defaults to the active line).
+
+    Returns:
+        RoomSolution: The layout with the least filler (and then the fewest cabinets).
+
+    Raises:
+        ValueError: If the corners or strategy are not valid, the line has no corner cabinets, or the
+        walls are too short for their corners.
+    """
+    if len(widths) > MAX_WALLS:
+        raise ValueError(f"A room can have at most {MAX_WALLS} walls")
+    corners = chain_corners(len(widths)) if corners is None else [tuple(corner) for corner in corners]
+    validate_corners(len(widths), corners)
+    catalog = catalog or get_catalog()
+    fill = Wall(width=0, catalog=catalog).get_fill(strategy)
+    if fill is None:
+        raise ValueError("A fill strategy is required")
+
+    walls = [{} for _ in widths]
+    corner_results = [{"walls": list(corner)} for corner in corners]
+    filler, cabinets, nodes = {}, {}, 0
+    for layer in LAYERS:
+        problem = _LayerProblem(widths, corners, layer, fill, catalog)
+        chosen, cost, layer_nodes = problem.solve()
+        nodes += layer_nodes
+        filler[layer], cabinets[layer] = split_cost(cost)
+        for wall in range(len(widths)):
+            walls[wall][layer] = problem.layout(wall, chosen)
+        for corner, option in enumerate(chosen):
+            owner, size = problem.options[option]
+            corner_results[corner][layer] = {"owner": corners[corner][owner], "size": geometry.to_inches(size)}
+    return RoomSolution(walls, corner_results, filler, cabinets, nodes)
@@ -0,0 +1,281 @@
+"""
+Multi-objective layout search.
+
+generate_wall always uses the same generation methods for an orientation. The search instead lays
+out a wall with every generation method that fits the orientation, every fill strategy and every
+distinct ordering of Wall.ROTATING_PATTERN (limited to the sizes the catalog line sells) for
+rotating1_fill, scores each layout and keeps the best. The line is sent to the pool's workers by name,
+since every process loads the same lines at startup (see object/catalog.py).
+
+Candidates are scored by score_layout (lower is better) on four objectives: filler inches, cabinet
+count, asymmetry and how small the boxes are. The candidates are split into chunks that run on a
+process pool, and the search returns the best layout found when all chunks are done or the time
+budget runs out, whichever is first.
+"""
+
+import functools
+import itertools
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+
+from . import geometry
+from .catalog import get_catalog
+from .models.wall import Wall
+from .tokens import CabinetToken
+
+# Default weight of each objective in score_layout
+DEFAULT_WEIGHTS = {
+    "filler": 10.0,  # per inch of filler
+    "cabinets": 1.0,  # per cabinet (corners included)
+    "symmetry": 0.1,  # per inch of difference between the layout and its mirror image
+    "small_boxes": 1.0,  # per cabinet, scaled by how much narrower than the largest size it is
+}
+
+# Generation methods that can lay out each orientation, as (base methods, upper methods).
+# Left and right walls own a corner, which b1/u1 place at the end and b3/u3 at the start.
+ORIENTATION_GENERATIONS = {
+    "left": (("b1", "b3"), ("u1", "u3")),
+    "top": (("b2",), ("u2",)),
+    "right": (("b1", "b3"), ("u1", "u3")),
+}
+
+CHUNK_SIZE = 500  # Candidates evaluated by each task sent to the pool
+
+_pool = None  # Created on first use
+
+
+def check_weights(weights):
+    """
+    Merges weights with DEFAULT_WEIGHTS.
+
+    Args:
+        weights (dict): Optional weights overriding the defaults.
+
+    Returns:
+        dict: The weight of every objective.
+
+    Raises:
+        ValueError: If a weight is for an unknown objective or is not a non-negative number.
+    """
+    weights = weights or {}
+    if not isinstance(weights, dict):
+        raise ValueError("weights must be an object")
+    unknown = set(weights) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown objectives: {sorted(unknown)}. Must be among {list(DEFAULT_WEIGHTS)}.")
+    weights = {**DEFAULT_WEIGHTS, **weights}
+    for name, weight in weights.items():
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not weight >= 0:
+            raise ValueError(f"The weight of {name} must be a non-negative number")
+    return weights
+
+
+def score_layout(tokens, weights=None, catalog=None):
+    """
+    Scores a layout on every objective (lower is better).
+
+    Args:
+        tokens (list): The CabinetTokens of the layout.
+        weights (dict): Optional weights overriding DEFAULT_WEIGHTS.
+        catalog (Catalog): The line whose largest cabinet the small boxes are measured against
+            (defaults to the active line).
+
+    Returns:
+        tuple: The weighted total score and a dictionary with the raw value of each objective.
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    catalog = catalog or get_catalog()
+    largest = max(catalog.widths(CabinetToken.BASE) + catalog.widths(CabinetToken.UPPER), default=1)
+
+    boxes = [t.width for t in tokens if t.kind in (CabinetToken.BASE, CabinetToken.UPPER)]
+    objectives = {
+        "filler": geometry.to_inches(sum(t.units for t in tokens if t.kind == CabinetToken.FILLER)),
+        "cabinets": sum(1 for t in tokens if t.kind != CabinetToken.FILLER),
+        "symmetry": sum(abs(a - b) for a, b in zip(boxes, reversed(boxes))) / 2,
+        "small_boxes": sum((largest - width) / largest for width in boxes),
+    }
+    total = sum(weights[name] * value for name, value in objectives.items())
+    return total, objectives
+
+
+def candidates(generations, catalog=None):
+    """
+    Lists every (generation, strategy, pattern) candidate for a set of generation methods.
+
+    The fill strategies come first, with pattern None; then rotating1_fill with every distinct
+    ordering of Wall.ROTATING_PATTERN (the sizes of it the catalog line, by default the active one, sells).
+    """
+    for generation in generations:
+        for strategy in Wall.FILL_STRATEGIES:
+            yield (generation, strategy, None)
+    kind = CabinetToken.BASE if generations[0].startswith("b") else CabinetToken.UPPER
+    pattern = [geometry.to_inches(size) for size in (catalog or get_catalog()).pattern("rotating1", kind)]
+    orderings = dict.fromkeys(itertools.permutations(pattern))
+    for pattern in orderings:
+        for generation in generations:
+            yield (generation, "rotating1", pattern)
+
+
+def run_candidate(wall, candidate):
+    """
+    Lays out a wall with one candidate.
+
+    Args:
+        wall (Wall): The wall to lay out (its bases or uppers are replaced).
+        candidate (tuple): The (generation, strategy, pattern) to use.
+
+    Returns:
+        list: The CabinetTokens of the layout.
+    """
+    generation, strategy, pattern = candidate
+    if pattern is None:
+        fill = wall.get_fill(strategy)
+    else:
+        fill = functools.partial(wall.rotating1_fill, pattern=list(pattern))
+    getattr(wall, f"generation_{generation}")(fill)
+    return wall.bases if generation.startswith("b") else wall.uppers
+
+
+def evaluate_chunk(width, chunk, weights, start=0, line=None):
+    """
+    Scores a chunk of candidates for one wall (runs in the pool's worker processes).
+
+    Args:
+        width (float): The width of the wall (in inches).
+        chunk (list): The candidates to score.
+        weights (dict): Optional weights overriding DEFAULT_WEIGHTS.
+        start (int): The position of the chunk's first candidate among all candidates.
+        line (str): The name of the catalog line to lay the wall out from (defaults to the active line).
+
+    Returns:
+        tuple: The best (score, position, candidate) of the chunk. Ties go to the earliest candidate,
+        so the result doesn't depend on which chunk finishes first.
+    """
+    catalog = get_catalog(line)
+    wall = Wall(width=width, catalog=catalog)
+    best = None
+    for position, candidate in enumerate(chunk, start):
+        score, _ = score_layout(run_candidate(wall, candidate), weights, catalog)
+        if best is None or score < best[0]:
+            best = (score, position, candidate)
+    return best
+
+
+def init_worker():
+    """Sets Django up in worker processes that were spawned rather than forked."""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+        django.setup()
+
+
+def get_pool():
+    """Returns the process pool used by the search, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=getattr(settings, "LAYOUT_SEARCH_WORKERS", None),
+            initializer=init_worker,
+        )
+    return _pool
+
+
+def search_part(width, generations, weights, deadline, catalog=None):
+    """
+    Finds the best candidate for the bases or for the uppers of a wall.
+
+    The plain fill strategies are evaluated in this process first so there is always an answer;
+    the rotating pattern orderings are then spread over the pool until the deadline. The candidates
+    are laid out from *catalog* (defaults to the active line).
+
+    Returns:
+        tuple: The best (score, position, candidate), how many candidates were evaluated, and whether
+        every candidate was evaluated before the deadline.
+    """
+    line = (catalog or get_catalog()).name
+    all_candidates = candidates(generations, catalog)
+    first = list(itertools.islice(all_candidates, len(generations) * len(Wall.FILL_STRATEGIES)))
+    best = evaluate_chunk(width, first, weights, line=line)
+    evaluated = len(first)
+
+    pool = get_pool()
+    pending = {}
+    while True:
+        chunk = list(itertools.islice(all_candidates, CHUNK_SIZE))
+        if not chunk:
+            break
+        start = evaluated + CHUNK_SIZE * len(pending)
+        pending[pool.submit(evaluate_chunk, width, chunk, weights, start, line)] = len(chunk)
+
+    while pending:
+        done, _ = wait(pending, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break  # Out of time
+        for future in done:
+            evaluated += pending.pop(future)
+            result = future.result()
+            if result[:2] < best[:2]:
+                best = result
+
+    complete = not pending
+    for future in pending:
+        future.cancel()  # Chunks that already started finish in the background and are ignored
+
+    return best, evaluated, complete
+
+
+def search_wall(width, orientation, weights=None, time_budget=None, progress=None, catalog=None):
+    """
+    Searches every candidate layout of a wall and returns the best one.
+
+    Args:
+        width (float): The width of the wall (in inches).
+        orientation (str): The orientation of the wall (one of "left", "top", or "right").
+        weights (dict): Optional weights overriding DEFAULT_WEIGHTS.
+        time_budget (float): Seconds to search for (defaults to LAYOUT_SEARCH_TIME_BUDGET).
+        progress (callable): Optionally called with (parts searched, 2) after the bases and the uppers.
+        catalog (Catalog): The line to lay the wall out from (defaults to the active line).
+
+    Returns:
+        dict: The best "bases" and "uppers" (CabinetTokens), the candidate used for each, their scores
+        and objectives, how many candidates were evaluated, and whether the search finished in time.
+
+    Raises:
+        ValueError: If the orientation or a weight is not valid.
+    """
+    if orientation not in ORIENTATION_GENERATIONS:
+        raise ValueError(f"{orientation} is not a valid entry for orientation type")
+    weights = check_weights(weights)
+
+    if time_budget is None:
+        time_budget = getattr(settings, "LAYOUT_SEARCH_TIME_BUDGET", 2.0)
+    deadline = time.monotonic() + time_budget
+
+    catalog = catalog or get_catalog()
+    result = {"evaluated": 0, "complete": True}
+    wall = Wall(width=width, catalog=catalog)
+    for parts_left, (part, generations) in zip((2, 1), zip(("bases", "uppers"), ORIENTATION_GENERATIONS[orientation])):
+        # Split whatever is left of the budget between the parts still to search
+        part_deadline = time.monotonic() + max(0, deadline - time.monotonic()) / parts_left
+        (score, _, candidate), evaluated, complete = search_part(width, generations, weights, part_deadline, catalog)
+        tokens = run_candidate(wall, candidate)
+        _, objectives = score_layout(tokens, weights, catalog)
+        generation, strategy, pattern = candidate
+        result[part] = tokens
+        result[f"{part}_candidate"] = {
+            "generation": generation,
+            "strategy": strategy,
+            "pattern": list(pattern) if pattern else None,
+            "score": score,
+            "objectives": objectives,
+        }
+        result["evaluated"] += evaluated
+        result["complete"] = result["complete"] and complete
+        if progress is not None:
+            progress(3 - parts_left, 2)
+
+    return result
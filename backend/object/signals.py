@@ -0,0 +1,91 @@
+"""
+Signal handlers of the object app (connected in CabinetsConfig.ready).
+"""
+
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import bom
+from .models.cabinet import Cabinet
+from .models.obstacle import Obstacle
+from .models.project import Project, Room, WallRun
+from .projects import invalidate_snapshots
+from .spatial import cabinet_index
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def clear_project_snapshot(sender, instance, **kwargs):
+    """
+    Clears the snapshot of the project a saved or deleted object belongs to.
+
+    Connected for every sender because the cabinet proxy models (Base, Upper, ...) send their
+    signals under their own class.
+    """
+    if isinstance(instance, (Cabinet, Obstacle)):
+        invalidate_snapshots(wall_run_ids=[instance.wall_run_id])
+    elif isinstance(instance, WallRun):
+        invalidate_snapshots(room_ids=[instance.room_id])
+    elif isinstance(instance, Room):
+        invalidate_snapshots(project_ids=[instance.project_id])
+    elif isinstance(instance, Project) and kwargs.get("created") is False:
+        invalidate_snapshots(project_ids=[instance.pk])
+
+
+@receiver(pre_save)
+def remember_summary_line(sender, instance, **kwargs):
+    """Notes which BOM summary line a cabinet counted towards before it is saved."""
+    if isinstance(instance, Cabinet):
+        instance._previous_summary_key = bom.stored_key(instance)
+
+
+@receiver(post_save)
+def count_saved_cabinet(sender, instance, **kwargs):
+    """Moves a saved cabinet to its BOM summary line (see object/bom.py)."""
+    if not isinstance(instance, Cabinet):
+        return
+    previous = getattr(instance, "_previous_summary_key", None)
+    current = bom.summary_key(instance)
+    if previous != current:
+        counts = {current: 1}
+        if previous is not None:
+            counts[previous] = counts.get(previous, 0) - 1
+        bom.apply_counts(counts)
+    instance._summary_key = current
+
+
+@receiver(post_delete)
+def uncount_deleted_cabinet(sender, instance, origin=None, **kwargs):
+    """
+    Removes a deleted cabinet from its BOM summary line.
+
+    Skipped when the cabinet goes because its wall run, room or project was deleted, since the
+    wall run's summary lines are deleted with it.
+    """
+    if not isinstance(instance, Cabinet):
+        return
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin is not None and not issubclass(origin_model, Cabinet):
+        return
+    bom.apply_counts({bom.stored_key(instance, read_row=False): -1})
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def update_spatial_index(sender, instance, signal, **kwargs):
+    """
+    Keeps the in-memory cabinet footprints (see object/spatial.py) in step with the tables.
+
+    A saved cabinet is moved in the index and a deleted one removed. A changed wall run or a deleted
+    room makes the index forget the room, which is read again when it is next used.
+    """
+    if isinstance(instance, Cabinet):
+        if signal is post_save:
+            cabinet_index.record_cabinets([instance])
+        else:
+            cabinet_index.remove_cabinets([instance.pk])
+    elif isinstance(instance, WallRun):
+        cabinet_index.forget_room(instance.room_id)
+    elif isinstance(instance, Room) and signal is post_delete:
+        cabinet_index.forget_room(instance.pk)
@@ -0,0 +1,390 @@
+"""
+A spatial index of placed cabinets, for overlap checks and "what is in this rectangle" queries.
+
+A cabinet's footprint is the rectangle it covers on the plan, from (position_x, position_y) to
+(position_x + width, position_y + depth). Upper cabinets hang above the base cabinets, so each room
+keeps one uniform grid per layer ("bases" and "uppers") and only cabinets of the same layer can
+overlap. A grid hashes every footprint into each square cell (SPATIAL_INDEX_CELL_SIZE inches a side)
+it touches, so a query only looks at the few cells under its rectangle however many cabinets the
+room holds.
+
+The grids live in memory. A room's grids are read from the database (with one query) the first time
+the room is used, and again once they are older than SPATIAL_INDEX_MAX_AGE seconds so writes made by
+other processes show up. In between they are kept up to date by the signal handlers in signals.py;
+bulk writes have to call record_cabinets themselves (as they call bom.record_cabinets), and reset
+drops everything so the next query reads the tables again.
+
+Cabinets that aren't on a wall run share one canvas, which is indexed as the room None.
+
+Typical usage example:
+
+    cabinet_index.query(room_id, 0, 0, 120, 24, layer="bases")  # Base footprints in the first 10 ft
+    cabinet_index.conflicts([cabinet])  # [[Footprints the new cabinet would overlap]]
+"""
+
+import math
+import time
+from collections import namedtuple
+from threading import RLock
+
+from django.conf import settings
+
+from .models.cabinet import Cabinet
+from .models.project import WallRun
+from .tokens import CabinetToken
+
+LAYERS = ("bases", "uppers")
+
+UPPER_KINDS = (CabinetToken.UPPER, CabinetToken.UPPER_CORNER)
+
+
+def cabinet_layer(kind):
+    """Returns the layer ("bases" or "uppers") of a cabinet kind code (None counts as a base)."""
+    return "uppers" if kind in UPPER_KINDS else "bases"
+
+
+def overlaps(first, second):
+    """Returns whether two (x0, y0, x1, y1) rectangles overlap (touching edges don't count)."""
+    return first[0] < second[2] and second[0] < first[2] and first[1] < second[3] and second[1] < first[3]
+
+
+class Footprint(namedtuple("Footprint", "id name kind wall_run_id x y width depth")):
+    """
+    The footprint of a placed cabinet, as kept in the index.
+
+    Attributes:
+        id (int): The cabinet's id.
+        name (str): The cabinet's name.
+        kind (int): The CabinetToken kind code (or None).
+        wall_run_id (int): The id of the cabinet's wall run (or None).
+        x, y (float): The cabinet's position (in inches).
+        width, depth (float): The size of the footprint (in inches).
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def of(cls, cabinet):
+        """Returns the footprint of a Cabinet."""
+        return cls(
+            cabinet.pk, cabinet.name, cabinet.kind, cabinet.wall_run_id,
+            cabinet.position_x, cabinet.position_y, cabinet.width, cabinet.depth,
+        )
+
+    @property
+    def layer(self):
+        return cabinet_layer(self.kind)
+
+    @property
+    def bounds(self):
+        """The footprint as an (x0, y0, x1, y1) rectangle."""
+        return (self.x, self.y, self.x + self.width, self.y + self.depth)
+
+
+class GridIndex:
+    """
+    A uniform grid hash of rectangles.
+
+    Rectangles are half-open, so two cabinets that only touch don't overlap. Empty rectangles are not
+    stored.
+
+    Attributes:
+        cell_size (float): The side of a cell (in inches).
+        cells (dict): The keys of the rectangles touching each (column, row) cell.
+        entries (dict): The (bounds, item) of each key.
+    """
+
+    __slots__ = ("cell_size", "cells", "entries")
+
+    def __init__(self, cell_size=24):
+        """
+        Initializes an empty grid.
+
+        Args:
+            cell_size (float): The side of a cell (in inches). About the size of the stored rectangles
+                works best.
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def _span(self, bounds):
+        """Returns the column and row ranges of the cells a rectangle touches."""
+        x0, y0, x1, y1 = bounds
+        size = self.cell_size
+        return (
+            range(math.floor(x0 / size), math.ceil(x1 / size)),
+            range(math.floor(y0 / size), math.ceil(y1 / size)),
+        )
+
+    def insert(self, key, bounds, item):
+        """
+        Stores a rectangle, replacing the one stored under the same key.
+
+        Args:
+            key: The key of the rectangle (e.g. a cabinet id).
+            bounds (tuple): The (x0, y0, x1, y1) rectangle.
+            item: What to return for the rectangle in queries.
+        """
+        self.remove(key)
+        if bounds[2] <= bounds[0] or bounds[3] <= bounds[1]:
+            return
+        self.entries[key] = (bounds, item)
+        columns, rows = self._span(bounds)
+        for column in columns:
+            for row in rows:
+                self.cells.setdefault((column, row), set()).add(key)
+
+    def remove(self, key):
+        """Removes the rectangle stored under a key, if there is one."""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        columns, rows = self._span(entry[0])
+        for column in columns:
+            for row in rows:
+                cell = self.cells[(column, row)]
+                cell.discard(key)
+                if not cell:
+                    del self.cells[(column, row)]
+
+    def query(self, x0, y0, x1, y1, exclude=None):
+        """
+        Finds the rectangles that overlap a rectangle.
+
+        Args:
+            x0, y0, x1, y1 (float): The rectangle.
+            exclude: A key to leave out (e.g. the cabinet being moved).
+
+        Returns:
+            list: The items of the overlapping rectangles, ordered by position (x, then y).
+        """
+        bounds = (x0, y0, x1, y1)
+        if x1 <= x0 or y1 <= y0 or not self.entries:
+            return []
+        columns, rows = self._span(bounds)
+        if len(columns) * len(rows) > len(self.cells):
+            keys = self.entries  # A query larger than the occupied grid checks every rectangle once
+        else:
+            keys = set()
+            for column in columns:
+                for row in rows:
+                    keys.update(self.cells.get((column, row), ()))
+        found = [
+            self.entries[key] for key in keys
+            if key != exclude and overlaps(self.entries[key][0], bounds)
+        ]
+        found.sort(key=lambda entry: (entry[0][0], entry[0][1]))
+        return [item for _, item in found]
+
+
+class SpatialIndex:
+    """
+    The footprints of placed cabinets, one pair of grids (bases and uppers) per room.
+
+    Thread-safe. Callers that check for overlaps and then save should hold *lock* across both so two
+    requests can't claim the same space.
+
+    Attributes:
+        cell_size (float): The side of a grid cell (in inches).
+        max_age (float): Seconds after which a room's grids are read from the database again (None
+            keeps them until reset).
+        lock (RLock): Held while the index is read or changed.
+    """
+
+    def __init__(self, cell_size=24, max_age=None):
+        """
+        Initializes an empty index.
+
+        Args:
+            cell_size (float): The side of a grid cell (in inches).
+            max_age (float): Seconds a room's grids are trusted for (None for ever).
+        """
+        self.cell_size = cell_size
+        self.max_age = max_age
+        self.lock = RLock()
+        self._rooms = {}  # Room id -> (grids by layer, when they were read)
+        self._locations = {}  # Cabinet id -> room id it is indexed under
+        self._wall_rooms = {}  # Wall run id -> room id
+
+    def reset(self):
+        """Forgets every room, so each is read from the database again when it is next used."""
+        with self.lock:
+            self._rooms.clear()
+            self._locations.clear()
+            self._wall_rooms.clear()
+
+    def forget_room(self, room_id):
+        """Forgets one room (e.g. after its wall runs changed)."""
+        with self.lock:
+            if self._rooms.pop(room_id, None) is not None:
+                self._locations = {
+                    cabinet_id: room for cabinet_id, room in self._locations.items() if room != room_id
+                }
+            self._wall_rooms = {
+                wall_run_id: room for wall_run_id, room in self._wall_rooms.items() if room != room_id
+            }
+
+    def rebuild(self, room_id):
+        """
+        Reads a room's footprints from the database (with one query) and replaces its grids.
+
+        Args:
+            room_id (int): The room's id (None for the cabinets that aren't on a wall run).
+
+        Returns:
+            dict: The room's GridIndex for each layer.
+        """
+        if room_id is None:
+            cabinets = Cabinet.objects.filter(wall_run__isnull=True)
+        else:
+            cabinets = Cabinet.objects.filter(wall_run__room_id=room_id)
+        rows = cabinets.values_list("id", "name", "kind", "wall_run_id", "position_x", "position_y", "width", "depth")
+
+        grids = {layer: GridIndex(self.cell_size) for layer in LAYERS}
+        with self.lock:
+            self.forget_room(room_id)
+            if room_id is not None:
+                for wall_run_id in WallRun.objects.filter(room_id=room_id).values_list("id", flat=True):
+                    self._wall_rooms[wall_run_id] = room_id
+            for row in rows.iterator(chunk_size=2000):
+                footprint = Footprint(*row)
+                grids[footprint.layer].insert(footprint.id, footprint.bounds, footprint)
+                self._locations[footprint.id] = room_id
+            self._rooms[room_id] = (grids, time.monotonic())
+        return grids
+
+    def _grids(self, room_id):
+        """Returns a room's grids, reading them from the database if they are missing or too old."""
+        entry = self._rooms.get(room_id)
+        if entry is None or (self.max_age is not None and time.monotonic() - entry[1] > self.max_age):
+            return self.rebuild(room_id)
+        return entry[0]
+
+    def rooms_of(self, wall_run_ids):
+        """
+        Finds the rooms of wall runs, reading the ones not seen yet with one query.
+
+        Args:
+            wall_run_ids (iterable): The wall run ids (None for no wall run).
+
+        Returns:
+            dict: The room id of each wall run id (None maps to None; unknown wall runs are left out).
+        """
+        with self.lock:
+            missing = {wall_run_id for wall_run_id in wall_run_ids if wall_run_id is not None} - set(self._wall_rooms)
+            if missing:
+                self._wall_rooms.update(WallRun.objects.filter(pk__in=missing).values_list("id", "room_id"))
+            rooms = {None: None}
+            rooms.update(self._wall_rooms)
+            return rooms
+
+    def query(self, room_id, x0, y0, x1, y1, layer=None):
+        """
+        Finds the cabinets of a room whose footprints overlap a rectangle.
+
+        Args:
+            room_id (int): The room's id (None for the cabinets that aren't on a wall run).
+            x0, y0, x1, y1 (float): The rectangle (in inches).
+            layer (str): Only return the cabinets of this layer ("bases" or "uppers").
+
+        Returns:
+            list: The Footprints, ordered by position (the bases before the uppers).
+
+        Raises:
+            ValueError: If the layer is not valid.
+        """
+        if layer is not None and layer not in LAYERS:
+            raise ValueError(f"{layer} is not a valid layer. Must be one of {list(LAYERS)}.")
+        with self.lock:
+            grids = self._grids(room_id)
+            return [
+                footprint
+                for name in ((layer,) if layer else LAYERS)
+                for footprint in grids[name].query(x0, y0, x1, y1)
+            ]
+
+    def conflicts(self, cabinets, keep_conflicting=True, placed=True):
+        """
+        Finds what each of a batch of new (or moved) cabinets would overlap.
+
+        A cabinet conflicts with the placed cabinets of its room and layer that it overlaps, and with
+        the cabinets before it in the batch.
+
+        Args:
+            cabinets (list): The Cabinets, saved or not.
+            keep_conflicting (bool): Whether a cabinet that overlaps something still takes up its space
+                for the cabinets after it (False when overlapping cabinets are going to be rejected).
+            placed (bool): Whether to check against the placed cabinets (False for new rooms).
+
+        Returns:
+            list: For each cabinet, the Footprints of the placed cabinets it overlaps followed by the
+            indexes (ints) of the earlier cabinets of the batch it overlaps. Cabinets on a wall run
+            that doesn't exist get an empty list.
+        """
+        with self.lock:
+            rooms = self.rooms_of(
+                cabinet.wall_run_id for cabinet in cabinets if not Cabinet.wall_run.is_cached(cabinet)
+            )
+            batch = {}  # (room id, layer) -> GridIndex of the batch so far
+            found = []
+            for index, cabinet in enumerate(cabinets):
+                if Cabinet.wall_run.is_cached(cabinet) and cabinet.wall_run is not None:
+                    room_id = cabinet.wall_run.room_id  # Saves a query for wall runs that aren't saved yet
+                elif cabinet.wall_run_id in rooms:
+                    room_id = rooms[cabinet.wall_run_id]
+                else:
+                    found.append([])
+                    continue
+                footprint = Footprint.of(cabinet)
+                grid = batch.setdefault((room_id, footprint.layer), GridIndex(self.cell_size))
+                overlapping = grid.query(*footprint.bounds)
+                if placed:
+                    overlapping = self._grids(room_id)[footprint.layer].query(*footprint.bounds, exclude=cabinet.pk) + overlapping
+                found.append(overlapping)
+                if keep_conflicting or not overlapping:
+                    grid.insert(index, footprint.bounds, index)
+            return found
+
+    def record_cabinets(self, cabinets):
+        """
+        Adds saved cabinets to the index (or moves them), for writes that send no signals.
+
+        Rooms that haven't been read yet are left alone, since reading them will include the cabinets.
+
+        Args:
+            cabinets (iterable): The saved Cabinets.
+        """
+        with self.lock:
+            cabinets = list(cabinets)
+            rooms = self.rooms_of(cabinet.wall_run_id for cabinet in cabinets)
+            for cabinet in cabinets:
+                self.remove_cabinets([cabinet.pk])
+                room_id = rooms.get(cabinet.wall_run_id)
+                if cabinet.wall_run_id in rooms and room_id in self._rooms:
+                    footprint = Footprint.of(cabinet)
+                    self._rooms[room_id][0][footprint.layer].insert(cabinet.pk, footprint.bounds, footprint)
+                    self._locations[cabinet.pk] = room_id
+
+    def remove_cabinets(self, cabinet_ids):
+        """Removes deleted cabinets from the index."""
+        with self.lock:
+            for cabinet_id in cabinet_ids:
+                if cabinet_id not in self._locations:
+                    continue
+                grids = self._rooms[self._locations.pop(cabinet_id)][0]
+                for grid in grids.values():
+                    grid.remove(cabinet_id)
+
+
+# The index shared by every request handled by this process
+cabinet_index = SpatialIndex(
+    getattr(settings, "SPATIAL_INDEX_CELL_SIZE", 24),
+    getattr(settings, "SPATIAL_INDEX_MAX_AGE", 300),
+)
@@ -0,0 +1,15 @@
+"""
+The standard cabinet sizes (the built-in catalog line) and the fill patterns, with no Django imports.
+
+The models (Cabinet, BaseCorner, UpperCorner and Wall) take their constants from here, and so does the
+CabineXt command-line tool, which runs without Django. That way the CLI lays walls out from the same
+sizes and patterns as the backend's built-in line (see object/catalog.py). All lengths are in inches.
+"""
+
+CABINET_SIZES = [36, 33, 30, 27, 24, 21, 18, 15, 12, 9]  # Widths of the base and upper cabinets
+BASE_CORNER_SIZES = [33, 36]  # Widths (and depths: they are square) of the corner base cabinets
+UPPER_CORNER_WIDTH = 24  # Width (and depth and height: it is a cube) of the corner upper cabinet
+
+FIXED_PATTERN = [33, 27, 24, 21, 18, 12, 9]  # Sizes tried (in order) by fixed_pattern_fill
+ROTATING_PATTERN = [18, 36, 30, 21, 18, 15, 12, 9]  # Default sizes rotated through by rotating1_fill
+SHRINK = (3, 9, 6)  # Leftover of 3-9 inches: take the last cabinet down 6 inches if that is a valid size
@@ -0,0 +1,73 @@
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+
+from ..models.cabinet import Cabinet
+from ..spatial import cabinet_index
+from .test_place_cabinets import placement
+
+
+class AsyncViewTests(TestCase):
+    """The async views give the same responses as their DRF counterparts."""
+
+    def setUp(self):
+        cabinet_index.reset()  # Rooms are read from the (rolled back) test database again
+        self.addCleanup(cabinet_index.reset)
+
+    async def post_both(self, endpoint, data):
+        """Posts the same JSON to the sync and async versions of an endpoint and returns both responses."""
+        sync = await sync_to_async(self.client.post)(f"/api/{endpoint}/", data, content_type="application/json")
+        asynchronous = await self.async_client.post(f"/api/async/{endpoint}/", data, content_type="application/json")
+        return sync, asynchronous
+
+    async def test_generate_wall(self):
+        """Walls, with a strategy or obstacles, and bad requests get the same responses."""
+        for data, status in (
+            ({"width": 147.375, "orientation": "top"}, 200),
+            ({"width": 120, "orientation": "left", "strategy": "optimal"}, 200),
+            ({"width": 180, "orientation": "left", "obstacles": [{"kind": "window", "start": 80, "width": 30}]}, 200),
+            ({"orientation": "top"}, 400),
+            ({"width": 120, "orientation": "top", "line": "nope"}, 400),
+        ):
+            with self.subTest(data=data):
+                sync, asynchronous = await self.post_both("generate_wall", data)
+                self.assertEqual((sync.status_code, asynchronous.status_code), (status, status))
+                self.assertEqual(asynchronous.json(), sync.json())
+
+    async def test_generate_room(self):
+        """Rooms, laid out wall by wall or with the corner solver, get the same responses."""
+        walls = [{"width": 120, "orientation": "left"}, {"width": 150, "orientation": "top"}, {"width": 120, "orientation": "right"}]
+        for data, status in (
+            ({"walls": walls}, 200),
+            ({"walls": walls, "solver": "corners"}, 200),
+            ({"walls": walls, "solver": "magic"}, 400),
+            ({"walls": []}, 400),
+        ):
+            with self.subTest(data=data):
+                sync, asynchronous = await self.post_both("generate_room", data)
+                self.assertEqual((sync.status_code, asynchronous.status_code), (status, status))
+                self.assertEqual(asynchronous.json(), sync.json())
+
+    async def test_place_cabinets(self):
+        """The async view saves the batch, and refuses overlaps with what is already placed."""
+        response = await self.async_client.post(
+            "/api/async/place_cabinets/", {"cabinets": [placement(36, 0), placement(30, 36)]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([cabinet["name"] for cabinet in response.json()["placed_cabinets"]], ["B36", "B30"])
+        self.assertEqual(await Cabinet.objects.acount(), 2)
+
+        response = await self.async_client.post(
+            "/api/async/place_cabinet/", placement(24, 10), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(await Cabinet.objects.acount(), 2)
+
+    async def test_rejects_non_json_bodies(self):
+        """A body that isn't a JSON object is a bad request."""
+        for body in (b"not json", b"[1, 2]"):
+            with self.subTest(body=body):
+                response = await self.async_client.post(
+                    "/api/async/generate_wall/", body, content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,58 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from .. import batch, geometry
+from ..models.wall import Wall
+from ..tokens import CabinetToken
+from .utils import layout
+
+# Every quarter inch from 0 to 300 inches, plus widths off the quarter inch
+WIDTHS = np.concatenate([np.arange(0, 300.25, 0.25), [100.3, 147.375, 55.55]])
+
+
+class BatchLayoutTests(SimpleTestCase):
+    """The vectorized fills give exactly the layouts of the scalar Wall methods."""
+
+    def test_fill_matches_wall(self):
+        """batch_fill's codes and summary rows match greedy_fill and fixed_pattern_fill for every width."""
+        wall = Wall(width=0)
+        for strategy in batch.STRATEGIES:
+            for kind in (CabinetToken.BASE, CabinetToken.UPPER):
+                with self.subTest(strategy=strategy, kind=kind):
+                    layouts, codes, offsets = batch.batch_fill(WIDTHS, strategy, kind, return_codes=True)
+                    fill = getattr(wall, Wall.FILL_STRATEGIES[strategy])
+                    for i, width in enumerate(WIDTHS.tolist()):
+                        tokens = fill(width, kind)
+                        self.assertEqual(batch.to_tokens(codes, offsets, i), tokens)
+                        self.assertEqual(layouts["cabinets"][i], sum(1 for t in tokens if t.kind != CabinetToken.FILLER))
+                        self.assertEqual(layouts["filler"][i], sum(t.width for t in tokens if t.kind == CabinetToken.FILLER))
+
+    def test_generation_matches_wall(self):
+        """batch_generation matches the generation methods, corner cabinets included."""
+        widths = WIDTHS[WIDTHS >= 72]
+        for generation in batch.GENERATIONS:
+            with self.subTest(generation=generation):
+                layouts, codes, offsets = batch.batch_generation(widths, generation, return_codes=True)
+                np.testing.assert_array_equal(layouts["width"], batch.to_units(widths) / geometry.QUANTUM)
+                for i, width in enumerate(widths.tolist()):
+                    tokens = layout(width, generation)
+                    self.assertEqual(batch.to_tokens(codes, offsets, i), tokens)
+                    self.assertEqual(layouts["cabinets"][i], sum(1 for t in tokens if t.kind != CabinetToken.FILLER))
+                    self.assertEqual(
+                        layouts["cabinet_width"][i], sum(t.width for t in tokens if t.kind != CabinetToken.FILLER)
+                    )
+
+    def test_summary_without_codes(self):
+        """Without return_codes only the summary rows are returned."""
+        layouts = batch.batch_generation([120, 240], "u2")
+        self.assertEqual(layouts.dtype, batch.LAYOUT_DTYPE)
+        self.assertEqual(layouts["width"].tolist(), [120, 240])
+
+    def test_rejects_bad_input(self):
+        """Strategies and generation methods that can't be vectorized, and non-finite widths, are refused."""
+        with self.assertRaises(ValueError):
+            batch.batch_fill([100], "rotating1")
+        with self.assertRaises(ValueError):
+            batch.batch_generation([100], "b1")
+        with self.assertRaises(ValueError):
+            batch.batch_fill([100, float("nan")])
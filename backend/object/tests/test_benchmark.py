@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from ..management.commands.benchmark_layout import compare, summarize
+from ..tokens import CabinetToken
+from .utils import layout
+
+# A short sweep, without the endpoint (the test runner has already set up the test environment it uses)
+SWEEP = ["--min-width", "60", "--max-width", "80", "--step", "5", "--repeat", "1", "--skip-endpoint"]
+
+
+class BenchmarkLayoutTests(SimpleTestCase):
+    """The benchmark_layout command reports every strategy and catches regressions."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "bench.json")
+
+    def run_benchmark(self, *args):
+        """Runs the command over SWEEP and returns its report."""
+        call_command("benchmark_layout", *SWEEP, "--output", self.path, *args)
+        with open(self.path) as f:
+            return json.load(f)
+
+    def test_report(self):
+        """Every fill and generation method is reported with the filler and cabinets of its layouts."""
+        report = self.run_benchmark()
+        self.assertEqual(report["widths"]["count"], 5)
+        self.assertEqual(
+            set(report["results"]),
+            {"greedy_fill", "fixed_pattern_fill", "rotating1_fill", "optimal_fill"}
+            | {f"generation_{generation}" for generation in ("b1", "b2", "b3", "u1", "u2", "u3")},
+        )
+        layouts = [layout(width, "b2") for width in range(60, 81, 5)]
+        result = report["results"]["generation_b2"]
+        self.assertEqual(result["calls"], 5)
+        self.assertEqual(result["cabinets"], sum(1 for tokens in layouts for t in tokens if t.kind != CabinetToken.FILLER))
+        self.assertEqual(result["filler_inches"], sum(t.width for tokens in layouts for t in tokens if t.kind == CabinetToken.FILLER))
+
+    def test_baseline(self):
+        """A run matches its own baseline, and fails against one with less filler or another sweep."""
+        report = self.run_benchmark()
+        baseline = os.path.join(os.path.dirname(self.path), "baseline.json")
+        with open(baseline, "w") as f:
+            json.dump(report, f)
+        self.assertEqual(self.run_benchmark("--baseline", baseline, "--tolerance", "1000")["regressions"], [])
+
+        report["results"]["greedy_fill"]["filler_inches"] -= 1
+        with open(baseline, "w") as f:
+            json.dump(report, f)
+        with self.assertRaises(CommandError):
+            self.run_benchmark("--baseline", baseline, "--tolerance", "1000")
+
+        report["repeat"] = 2
+        with open(baseline, "w") as f:
+            json.dump(report, f)
+        with self.assertRaisesMessage(CommandError, "different sweep"):
+            self.run_benchmark("--baseline", baseline)
+
+    def test_compare(self):
+        """Slower p50s beyond the tolerance, more filler and more cabinets are regressions."""
+        old = summarize([0.001], [[CabinetToken(CabinetToken.BASE, 36)]])
+        slower = dict(old, p50_ms=old["p50_ms"] * 1.5)
+        worse = dict(old, filler_inches=2, cabinets=2)
+        self.assertEqual(compare({"a": old}, {"a": dict(old, p50_ms=old["p50_ms"] * 1.05)}, 0.10), [])
+        self.assertEqual([r["metric"] for r in compare({"a": old}, {"a": slower}, 0.10)], ["p50_ms"])
+        self.assertEqual([r["metric"] for r in compare({"a": old}, {"a": worse}, 0.10)], ["filler_inches", "cabinets"])
+        self.assertEqual(compare({"a": old}, {}, 0.10), [])
+
+    def test_rejects_bad_sweeps(self):
+        """The step and repeat count must be positive."""
+        for args in (["--step", "0"], ["--repeat", "0"]):
+            with self.subTest(args=args), self.assertRaises(CommandError):
+                call_command("benchmark_layout", *args, "--skip-endpoint")
@@ -0,0 +1,99 @@
+import csv
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import bom
+from ..models.bom import BomSummary
+from ..models.cabinet import Cabinet, Upper
+from ..models.project import WallRun
+from ..spatial import cabinet_index
+from .test_place_cabinets import placement
+from .utils import layout
+
+
+class BillOfMaterialsTests(TestCase):
+    """Saved cabinets are counted by SKU, from the summary table or the cabinet table alike."""
+
+    def setUp(self):
+        cabinet_index.reset()  # Rooms are read from the (rolled back) test database again
+        self.addCleanup(cabinet_index.reset)
+        project = {"name": "Kitchen", "rooms": [
+            {"name": "Main", "walls": [
+                {"orientation": "left", "width": 120, "cabinets": [placement(36, 0), placement(36, 36), placement(30, 72)]},
+                {"orientation": "top", "width": 150, "cabinets": [placement(36, 0, 100), placement(36.01, 36, 100)]},
+            ]},
+            {"name": "Pantry", "walls": [{"orientation": "top", "width": 96, "cabinets": [placement(24, 0, 300)]}]},
+        ]}
+        self.project_id = self.client.post("/api/projects/", project, content_type="application/json").json()["id"]
+
+    def lines(self, group="total", source="summary", **filters):
+        """Returns the lines of a bill of materials as a list."""
+        return list(bom.bom_lines(group, source=source, **filters))
+
+    def assert_summary_is_current(self):
+        """Checks that every grouping reads the same from the summary as from the cabinets."""
+        for group in bom.GROUPS:
+            with self.subTest(group=group):
+                self.assertEqual(self.lines(group), self.lines(group, "cabinets"))
+
+    def test_counts(self):
+        """Cabinets are counted per SKU, widths that round to the same quantum on one line."""
+        self.assertEqual(
+            [(line["sku"], line["quantity"], line["linear_feet"]) for line in self.lines()],
+            [("B24", 1, 2), ("B30", 1, 2.5), ("B36", 4, 12)],
+        )
+        self.assertEqual([line["room_name"] for line in self.lines("room")], ["Main", "Main", "Pantry"])
+        self.assertEqual(len(self.lines("wall")), 4)
+        self.assert_summary_is_current()
+
+    def test_summary_follows_changes(self):
+        """Saving, resizing and deleting cabinets keeps the summary in step."""
+        wall_run = WallRun.objects.filter(orientation="top", room__name="Main").get()
+        cabinet = Upper(30, 30)
+        cabinet.wall_run = wall_run
+        cabinet.save()
+        self.assert_summary_is_current()
+
+        cabinet = Cabinet.objects.filter(name="B30").get()
+        cabinet.width = 24
+        cabinet.save()
+        self.assert_summary_is_current()
+
+        Cabinet.objects.filter(name="B24").first().delete()
+        self.assert_summary_is_current()
+        wall_run.delete()
+        self.assert_summary_is_current()
+
+    def test_rebuild(self):
+        """rebuild_bom recomputes lines that drifted through writes the signals don't see."""
+        Cabinet.objects.filter(name="B30").update(width=33)
+        self.assertNotEqual(self.lines(), self.lines(source="cabinets"))
+        call_command("rebuild_bom", stdout=io.StringIO())
+        self.assert_summary_is_current()
+        self.assertEqual(BomSummary.objects.count(), 4)
+
+    def test_endpoint(self):
+        """The endpoint filters, totals and streams CSV, and refuses bad parameters."""
+        response = self.client.get(f"/api/bom/?project={self.project_id}&group=project")
+        self.assertEqual(response.json()["totals"], {
+            "cabinets": 6, "cabinet_linear_feet": 16.5, "filler_pieces": 0, "filler_linear_feet": 0.0,
+        })
+
+        response = self.client.get("/api/bom/?group=room&output=csv")
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual([row["sku"] for row in rows], ["B30", "B36", "B24"])
+        self.assertEqual(list(rows[0]), bom.bom_columns("room"))
+
+        for query in ("group=shelf", "source=guess", "output=xml", "project=abc"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"/api/bom/?{query}").status_code, 400)
+
+    def test_layout_bill_of_materials(self):
+        """Generated walls are counted without being saved."""
+        walls = [{"width": 120, "orientation": "left"}, {"width": 120, "orientation": "right"}]
+        response = self.client.post("/api/bom/layout/", {"walls": walls}, content_type="application/json")
+        tokens = (layout(120, "b1") + layout(120, "u1")) * 2
+        self.assertEqual(response.json()["lines"], bom.layout_lines([tokens]))
+        self.assertEqual(sum(line["quantity"] for line in response.json()["lines"]), len(tokens))
@@ -0,0 +1,89 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from ..catalog import read_catalogs
+from .utils import layout, names
+
+CLI = os.path.join(settings.BASE_DIR.parent, "CabineXt", "CabineXt.py")
+
+SHAKER = {"lines": [{"name": "Shaker", "items": [
+    {"sku": "B36", "height": 34.5, "depth": 24}, {"sku": "B30", "height": 34.5, "depth": 24},
+    {"sku": "B24", "height": 34.5, "depth": 24}, {"sku": "B15", "height": 34.5, "depth": 24},
+    {"sku": "U30", "height": 30, "depth": 12}, {"sku": "U18", "height": 30, "depth": 12},
+    {"sku": "BC39", "height": 34.5, "depth": 39}, {"sku": "UC27", "height": 30, "depth": 27},
+]}]}
+
+# Walls with their generation methods, covering every method, fractional widths and a wall too narrow for its corners
+WALLS = [
+    {"width": width, "base": base, "upper": upper}
+    for width in (30, 72, 100.3, 120, 147.375, 200.01, 255.5)
+    for base, upper in (("b1", "u1"), ("b2", "u2"), ("b3", "u3"))
+]
+
+
+class CabineXtTests(SimpleTestCase):
+    """The CabineXt CLI lays walls out exactly like the backend."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def run_cli(self, text, *args, check=True):
+        """Runs the CLI on some input and returns its process (with the output lines parsed under .results)."""
+        process = subprocess.run(
+            [sys.executable, CLI, *args], input=text, capture_output=True, text=True, timeout=120, check=check
+        )
+        process.results = [json.loads(line) for line in process.stdout.splitlines()]
+        return process
+
+    def assert_matches_backend(self, results, catalog=None):
+        """Checks every result against the backend's layout of the same wall."""
+        self.assertEqual(len(results), len(WALLS))
+        for wall, result in zip(WALLS, results):
+            with self.subTest(wall=wall):
+                self.assertNotIn("error", result)
+                self.assertEqual(result["bases"], names(layout(wall["width"], wall["base"], catalog=catalog)))
+                self.assertEqual(result["uppers"], names(layout(wall["width"], wall["upper"], catalog=catalog)))
+
+    def test_matches_backend(self):
+        """In this process or on a pool (with results kept in input order), the layouts are the backend's."""
+        text = "".join(json.dumps(wall) + "\n" for wall in WALLS)
+        for args in (["--workers", "0"], ["--workers", "2", "--batch-size", "4", "--window", "2"]):
+            with self.subTest(args=args):
+                results = self.run_cli(text, *args).results
+                self.assertEqual([result["line"] for result in results], list(range(1, len(WALLS) + 1)))
+                self.assert_matches_backend(results)
+        self.assertEqual(results[WALLS.index({"width": 100.3, "base": "b1", "upper": "u1"})]["width"], 100.3125)
+
+    def test_catalog_file(self):
+        """With --catalog, the layouts are the backend's for that line."""
+        path = os.path.join(self.directory, "shaker.json")
+        with open(path, "w") as f:
+            json.dump(SHAKER, f)
+        text = "".join(json.dumps(wall) + "\n" for wall in WALLS)
+        results = self.run_cli(text, "--workers", "0", "--catalog", path).results
+        self.assert_matches_backend(results, read_catalogs(path)[0])
+
+        process = self.run_cli("", "--catalog", os.path.join(self.directory, "missing.json"), check=False)
+        self.assertEqual(process.returncode, 2)
+
+    def test_csv_and_errors(self):
+        """CSV rows keep their id; bad rows get an error line without stopping the rest, and exit with 1."""
+        text = "id,width,orientation\nk1,120,left\nk2,inf,top\nk3,-3,top\nk4,96,sideways\nk5,,top\nk6,150,top\n"
+        process = self.run_cli(text, "--format", "csv", "--workers", "0", check=False)
+        self.assertEqual(process.returncode, 1)
+        results = process.results
+        self.assertEqual(results[0]["id"], "k1")
+        self.assertEqual(results[0]["bases"], names(layout(120, "b1")))
+        self.assertEqual([("error" in result) for result in results], [False, True, True, True, True, False])
+        self.assertEqual([result["line"] for result in results], [2, 3, 4, 5, 6, 7])
+
+        results = self.run_cli('{"width": 120}\nnot json\n[1]\n', "--workers", "0", check=False).results
+        self.assertEqual([("error" in result) for result in results], [False, True, True])
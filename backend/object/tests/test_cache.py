@@ -0,0 +1,71 @@
+from django.test import SimpleTestCase, TestCase
+
+from ..cache import LayoutCache, layout_cache
+
+
+class LayoutCacheTests(SimpleTestCase):
+    """The LRU cache keeps the most recently used payloads and counts its lookups."""
+
+    def test_evicts_least_recently_used(self):
+        """A full cache drops the entry used longest ago, and a hit counts as a use."""
+        cache = LayoutCache(2)
+        cache.put("a", {"a": 1})
+        cache.put("b", {"b": 2})
+        self.assertEqual(cache.get("a"), {"a": 1})  # "b" is now the oldest
+        cache.put("c", {"c": 3})
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"a": 1})
+        self.assertEqual(cache.get("c"), {"c": 3})
+        self.assertEqual(
+            cache.stats(),
+            {"hits": 3, "misses": 1, "evictions": 1, "size": 2, "max_size": 2, "hit_rate": 0.75},
+        )
+
+    def test_zero_size_disables_caching(self):
+        """A cache of size 0 stores nothing."""
+        cache = LayoutCache(0)
+        cache.put("a", {"a": 1})
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_clear(self):
+        """clear drops every entry and resets the counters."""
+        cache = LayoutCache(2)
+        cache.put("a", {"a": 1})
+        cache.get("a")
+        cache.clear()
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["hits"], 0)
+
+
+class GenerateWallCacheTests(TestCase):
+    """generate_wall serves repeated walls from the cache."""
+
+    def setUp(self):
+        layout_cache.clear()
+        self.addCleanup(layout_cache.clear)
+
+    def generate(self, width, orientation):
+        """Posts a wall to generate_wall and returns the response."""
+        return self.client.post(
+            "/api/generate_wall/", {"width": width, "orientation": orientation}, content_type="application/json"
+        )
+
+    def test_repeated_walls_hit(self):
+        """The same width (however it is written) and generation methods share one entry."""
+        first = self.generate(130, "left")
+        for width, orientation in ((130, "left"), (130.0, "right"), ("130", "left")):
+            with self.subTest(width=width, orientation=orientation):
+                response = self.generate(width, orientation)
+                self.assertEqual(response.json(), first.json())
+
+        stats = self.client.get("/api/layout_cache_stats/").json()["layout_cache"]
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (3, 1, 1))
+
+    def test_different_walls_miss(self):
+        """Another width or other generation methods are laid out on their own."""
+        self.generate(130, "left")
+        self.generate(131, "left")
+        self.generate(130, "top")
+        stats = layout_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (0, 3, 3))
@@ -0,0 +1,201 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from .. import catalog, geometry, standard
+from ..models.catalog import CatalogLine
+from ..tokens import CabinetToken
+from .utils import GENERATIONS, layout, names
+
+SHAKER = {"name": "Shaker", "manufacturer": "Acme", "items": [
+    {"sku": "B36", "height": 34.5, "depth": 24, "price": 310},
+    {"sku": "B30", "height": 34.5, "depth": 24, "price": 280},
+    {"sku": "B24", "height": 34.5, "depth": 24, "price": 240},
+    {"sku": "B15", "height": 34.5, "depth": 24, "price": 180},
+    {"sku": "U30", "height": 30, "depth": 12, "price": 200},
+    {"sku": "U18", "height": 30, "depth": 12, "price": 150},
+    {"sku": "U12", "height": 30, "depth": 12},
+    {"sku": "BC39", "height": 34.5, "depth": 39, "price": 420},
+    {"sku": "UC27", "height": 30, "depth": 27, "price": 300},
+    {"sku": "F6", "height": 34.5, "depth": 0.75, "price": 4.5},
+]}
+
+
+class CatalogFileMixin:
+    """Writes catalog files to a temporary directory."""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, text):
+        """Writes a file and returns its path."""
+        path = os.path.join(self.directory, name)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def write_json(self, *lines):
+        """Writes lines to a JSON catalog file and returns its path."""
+        return self.write("catalog.json", json.dumps({"lines": list(lines)}))
+
+
+class ReadCatalogTests(CatalogFileMixin, SimpleTestCase):
+    """read_catalogs reads JSON and CSV files into Catalogs."""
+
+    def test_json_and_csv_agree(self):
+        """The same line read from JSON and from CSV has the same SKUs."""
+        rows = ["line,manufacturer,sku,height,depth,price"] + [
+            f"Shaker,Acme,{item['sku']},{item['height']},{item['depth']},{item.get('price', '')}"
+            for item in SHAKER["items"]
+        ]
+        from_json, = catalog.read_catalogs(self.write_json(SHAKER))
+        from_csv, = catalog.read_catalogs(self.write("skus.csv", "\n".join(rows) + "\n"))
+        self.assertEqual(from_json.entries, from_csv.entries)
+        self.assertEqual((from_csv.name, from_csv.manufacturer), ("Shaker", "Acme"))
+        self.assertEqual(from_json.key, from_csv.key)
+        self.assertIsNone(from_json.item(CabinetToken.UPPER, 12).price)
+
+    def test_several_lines(self):
+        """A file can hold several lines, in order, and the format can be given explicitly."""
+        other = {"name": "Slab", "items": [{"sku": "B24", "height": 34.5, "depth": 24}]}
+        path = self.write("catalog.txt", json.dumps({"lines": [SHAKER, other]}))
+        self.assertEqual([line.name for line in catalog.read_catalogs(path, "json")], ["Shaker", "Slab"])
+        with self.assertRaises(ValueError):
+            catalog.read_catalogs(path)
+
+    def test_rejects_invalid(self):
+        """Bad SKUs, repeated SKUs and missing columns or fields are errors."""
+        for items in (
+            [{"sku": "X36", "height": 34.5, "depth": 24}],
+            [{"sku": "B36", "height": 34.5}],
+            [{"sku": "B36", "height": 0, "depth": 24}],
+            [{"sku": "B36", "height": 34.5, "depth": 24, "price": -1}],
+            [{"sku": "B36", "height": 34.5, "depth": 24}, {"sku": "B36", "height": 30, "depth": 24}],
+        ):
+            with self.subTest(items=items):
+                with self.assertRaises(ValueError):
+                    catalog.read_catalogs(self.write_json({"name": "Bad", "items": items}))
+        with self.assertRaises(ValueError):
+            catalog.read_catalogs(self.write_json({"items": []}))
+        with self.assertRaises(ValueError):
+            catalog.read_catalogs(self.write("skus.csv", "line,sku,height\nBad,B36,34.5\n"))
+
+
+class CatalogTests(CatalogFileMixin, SimpleTestCase):
+    """A Catalog indexes a line's SKUs for the layout engines."""
+
+    def setUp(self):
+        super().setUp()
+        self.shaker, = catalog.read_catalogs(self.write_json(SHAKER))
+
+    def test_builtin_line(self):
+        """The built-in line sells the standard sizes with the standard corners."""
+        builtin = catalog.BUILTIN
+        self.assertEqual(builtin.widths(CabinetToken.BASE), tuple(standard.CABINET_SIZES))
+        self.assertEqual(builtin.widths(CabinetToken.BASE_CORNER), tuple(sorted(standard.BASE_CORNER_SIZES, reverse=True)))
+        self.assertEqual(builtin.widths(CabinetToken.UPPER_CORNER), (standard.UPPER_CORNER_WIDTH,))
+        self.assertEqual(builtin.generations["b2"][1], 2 * max(standard.BASE_CORNER_SIZES))
+
+    def test_widths_and_patterns(self):
+        """Widths are widest first and the fill patterns keep only the sizes the line sells."""
+        self.assertEqual(self.shaker.widths(CabinetToken.BASE), (36, 30, 24, 15))
+        units = geometry.units_of
+        self.assertEqual(self.shaker.pattern("fixed_pattern", CabinetToken.BASE), units((24,)))
+        self.assertEqual(self.shaker.pattern("rotating1", CabinetToken.UPPER), units((18, 30, 18, 12)))
+        self.assertEqual(self.shaker.pattern("greedy", CabinetToken.UPPER), units((30, 18, 12)))
+        self.assertEqual(self.shaker.pattern("bogus", CabinetToken.BASE), ())
+        self.assertTrue(self.shaker.accepts(15))
+        self.assertFalse(self.shaker.accepts(33))
+
+    def test_generations_follow_corners(self):
+        """The corner space of the generation methods comes from the line's corner cabinets."""
+        self.assertEqual(self.shaker.generations["b1"][1], 39)
+        self.assertEqual(self.shaker.generations["b2"][1], 78)
+        self.assertEqual(self.shaker.generations["u3"][3].name, "UC27")
+        self.assertEqual(self.shaker.generations["u2"][1], 54)
+
+    def test_dimensions(self):
+        """Listed SKUs use their own dimensions and fillers those of the widest cabinet of their layer."""
+        self.assertEqual(self.shaker.dimensions(CabinetToken.from_name("BC39")), (34.5, 39))
+        self.assertEqual(self.shaker.dimensions(CabinetToken.from_name("F1.5"), is_base=False), (30, 12))
+        self.assertEqual(self.shaker.dimensions(CabinetToken.from_name("UC33"), is_base=False), (33, 33))
+
+    def test_layouts_use_line_sizes(self):
+        """Every generation method only lays out cabinets the line sells (or fillers)."""
+        for generation in GENERATIONS:
+            for width in (96, 120.5, 147.375, 180):
+                with self.subTest(generation=generation, width=width):
+                    for token in layout(width, generation, catalog=self.shaker):
+                        self.assertTrue(token.kind == CabinetToken.FILLER or self.shaker.item(token.kind, token.width))
+
+
+class LoadCatalogTests(CatalogFileMixin, TestCase):
+    """load_catalog saves lines, which the endpoints use once they are loaded."""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(catalog.load)  # Runs after the lines below are deleted
+        self.addCleanup(lambda: CatalogLine.objects.all().delete())
+
+    def load(self, *args):
+        """Runs load_catalog, reads the saved lines and returns the command's output."""
+        out = io.StringIO()
+        call_command("load_catalog", *args, stdout=out)
+        catalog.load()
+        return out.getvalue()
+
+    def test_load_and_use(self):
+        """A loaded line is listed by the catalog endpoint and used when a request names it."""
+        output = self.load(self.write_json(SHAKER))
+        self.assertIn("Shaker: 10 SKUs", output)
+        shaker = catalog.get_catalog("Shaker")
+        self.assertEqual(shaker.entries, catalog.read_catalogs(self.write_json(SHAKER))[0].entries)
+
+        lines = self.client.get("/api/catalog/").json()
+        self.assertEqual(lines["active"], catalog.BUILTIN_LINE)
+        self.assertEqual({line["name"]: line["items"] for line in lines["lines"]}, {"builtin": len(catalog.BUILTIN.entries), "Shaker": 10})
+        items = self.client.get("/api/catalog/", {"line": "Shaker"}).json()["items"]
+        self.assertIn({"sku": "BC39", "kind": CabinetToken.BASE_CORNER, "width": 39, "height": 34.5, "depth": 39, "price": 420},
+                      items)
+        self.assertEqual(self.client.get("/api/catalog/", {"line": "nope"}).status_code, 404)
+
+        for line, expected in (("Shaker", shaker), (None, catalog.BUILTIN)):
+            data = {"width": 147.375, "orientation": "top", **({"line": line} if line else {})}
+            response = self.client.post("/api/generate_wall/", data, content_type="application/json")
+            self.assertEqual([cabinet["name"] for cabinet in response.json()["cabinets"]["bases"]],
+                             names(layout(147.375, "b2", catalog=expected)))
+
+    def test_reload_replaces_skus(self):
+        """Loading a line again replaces its SKUs, and --line picks lines from a file."""
+        self.load(self.write_json(SHAKER))
+        slab = {"name": "Slab", "items": [{"sku": "B24", "height": 34.5, "depth": 24}]}
+        self.load(self.write_json({**SHAKER, "items": SHAKER["items"][:3]}, slab), "--line", "Shaker")
+        self.assertEqual(len(catalog.get_catalog("Shaker").entries), 3)
+        with self.assertRaises(ValueError):
+            catalog.get_catalog("Slab")
+
+    def test_active_line(self):
+        """load makes the named line active, falling back to the built-in line."""
+        self.load(self.write_json(SHAKER))
+        self.assertEqual(catalog.load("Shaker").name, "Shaker")
+        self.assertEqual(catalog.get_catalog().name, "Shaker")
+        self.assertEqual(catalog.load("nope").name, catalog.BUILTIN_LINE)
+
+    def test_rejects_bad_files(self):
+        """Invalid files, missing lines and the built-in line's name are command errors."""
+        for args in (
+            (os.path.join(self.directory, "missing.json"),),
+            (self.write_json(SHAKER), "--line", "Slab"),
+            (self.write_json({**SHAKER, "name": catalog.BUILTIN_LINE}),),
+        ):
+            with self.subTest(args=args):
+                with self.assertRaises(CommandError):
+                    call_command("load_catalog", *args, stdout=io.StringIO())
+        self.assertFalse(CatalogLine.objects.exists())
@@ -0,0 +1,100 @@
+import hashlib
+
+from django.test import SimpleTestCase, TestCase
+
+from .. import geometry
+from ..models.wall import Wall
+from ..tokens import CabinetToken
+from .utils import GENERATIONS, STRATEGIES, layout, names
+
+
+class QuarterInchLayoutTests(TestCase):
+    """
+    Layouts at quarter-inch widths must be the same as before lengths were measured in quanta.
+
+    The expected values were produced by the float-based fill loops (the tree before integer quanta).
+    """
+
+    # sha256 of every layout of every generation method and strategy, for every width from 24 to 400
+    # inches by quarter inches (see test_every_layout_is_unchanged for the format)
+    DIGEST = "c3b4435d22bc3f6c159cc215514b0c33319bf9f6088dfa23aa39917c2960332d"
+
+    EXAMPLES = [
+        (120.25, "b1", None, ["B18", "B36", "B30", "F0.25", "BC36"]),
+        (147.75, "b2", None, ["B36", "B30", "B9", "F0.75"]),
+        (96.5, "u1", None, ["U36", "U36", "F0.5", "UC24"]),
+        (200.75, "b3", "optimal", ["BC36", "B36", "B36", "B36", "B36", "B18", "F2.75"]),
+        (61.25, "u3", "rotating1", ["UC24", "U18", "U18", "F1.25"]),
+    ]
+
+    def test_examples(self):
+        """A few layouts, spelled out."""
+        for width, generation, strategy, expected in self.EXAMPLES:
+            with self.subTest(width=width, generation=generation, strategy=strategy):
+                self.assertEqual(names(layout(width, generation, strategy)), expected)
+
+    def test_every_layout_is_unchanged(self):
+        """Every layout from 24 to 400 inches by quarter inches matches the float-based fills."""
+        digest = hashlib.sha256()
+        for quarters in range(24 * 4, 400 * 4 + 1):
+            width = quarters / 4
+            for generation in GENERATIONS:
+                for strategy in STRATEGIES:
+                    line = " ".join(names(layout(width, generation, strategy)))
+                    digest.update(f"{width}|{generation}|{strategy}:{line}\n".encode())
+        self.assertEqual(digest.hexdigest(), self.DIGEST)
+
+
+class FractionalWidthTests(TestCase):
+    """A 147.375 inch wall used to get fillers like F3.375000000001, reported with a width of 0."""
+
+    WIDTH = 147.375
+
+    def test_fillers_are_exact(self):
+        """Every layout covers the wall exactly, with fillers named and sized to the sixteenth."""
+        for generation in GENERATIONS:
+            for strategy in STRATEGIES:
+                with self.subTest(generation=generation, strategy=strategy):
+                    tokens = layout(self.WIDTH, generation, strategy)
+                    _, reserved, _, corner, _ = Wall(width=0).catalog.generations[generation]
+                    filled = sum(token.units for token in tokens) - (corner.units if corner else 0)
+                    self.assertEqual(filled, geometry.to_units(self.WIDTH) - geometry.to_units(reserved))
+                    for token in tokens:
+                        if token.kind == CabinetToken.FILLER:
+                            self.assertEqual(token.name, f"F{token.width:g}")
+                            self.assertEqual(token.width, 0.375)
+
+    def test_generate_wall_reports_filler_width(self):
+        """generate_wall reports the filler's real width, not 0."""
+        response = self.client.post(
+            "/api/generate_wall/", {"width": self.WIDTH, "orientation": "top"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        cabinets = response.json()["cabinets"]
+        fillers = [cabinet for part in ("bases", "uppers") for cabinet in cabinets[part] if cabinet["name"].startswith("F")]
+        self.assertTrue(fillers)
+        for filler in fillers:
+            self.assertEqual(filler["width"], 0.375)
+            self.assertEqual(filler["name"], "F0.375")
+
+
+class GeometryTests(SimpleTestCase):
+    """Converting between inches and quanta."""
+
+    def test_round_trip(self):
+        """Lengths on the quantum convert to quanta and back unchanged, whole inches as ints."""
+        self.assertEqual(geometry.to_units(36), 36 * geometry.QUANTUM)
+        self.assertEqual(geometry.to_inches(36 * geometry.QUANTUM), 36)
+        self.assertIsInstance(geometry.to_inches(36 * geometry.QUANTUM), int)
+        self.assertEqual(geometry.to_inches(geometry.to_units(0.375)), 0.375)
+
+    def test_snap(self):
+        """Lengths are rounded to the nearest quantum."""
+        self.assertEqual(geometry.snap(36.01), 36)
+        self.assertEqual(geometry.snap(100.3), 100.3125)
+
+    def test_rejects_non_finite_lengths(self):
+        """Infinite and NaN lengths can't be measured."""
+        for length in (float("inf"), float("nan")):
+            with self.subTest(length=length), self.assertRaises(ValueError):
+                geometry.to_units(length)
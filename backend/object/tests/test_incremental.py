@@ -0,0 +1,57 @@
+from django.test import TestCase
+
+from .. import incremental
+from .utils import GENERATIONS, STRATEGIES, layout, names
+
+
+class RelayoutTests(TestCase):
+    """relayout must give the same cabinets as laying the resized wall out from scratch."""
+
+    RESIZES = [(100, 250), (250, 100), (240, 246), (400.5, 96.25), (147.375, 147.5), (36, 500), (72, 73)]
+
+    def test_matches_full_layout(self):
+        """Both the new layout and the splice applied to the old one equal a full re-layout."""
+        for generation in GENERATIONS:
+            for strategy in STRATEGIES:
+                for previous_width, width in self.RESIZES:
+                    with self.subTest(generation=generation, strategy=strategy, previous=previous_width, width=width):
+                        previous = layout(previous_width, generation, strategy)
+                        expected = layout(width, generation, strategy)
+                        new, diff = incremental.relayout(generation, previous_width, width, strategy)
+                        self.assertEqual(new.tokens(), expected)
+                        self.assertEqual(incremental.apply_diff(previous, diff), expected)
+
+    def test_small_steps(self):
+        """Dragging a wall an eighth of an inch at a time matches a full re-layout at every step."""
+        for generation in ("b1", "b3", "u1"):
+            previous_width = 180
+            for eighths in range(180 * 8 + 1, 200 * 8, 3):
+                width = eighths / 8
+                with self.subTest(generation=generation, previous=previous_width, width=width):
+                    new, _ = incremental.relayout(generation, previous_width, width)
+                    self.assertEqual(new.tokens(), layout(width, generation))
+                previous_width = width
+
+    def test_unchanged_width_has_empty_diff(self):
+        """Re-laying out a wall at the same width changes nothing."""
+        _, diff = incremental.relayout("b1", 300, 300)
+        self.assertEqual(diff["delete"], 0)
+        self.assertEqual(diff["insert"], [])
+
+    def test_endpoint(self):
+        """relayout_wall returns the splices, or the whole layout without diff, and refuses bad requests."""
+        data = {"width": 250, "previous_width": 240, "orientation": "left"}
+        response = self.client.post("/api/relayout_wall/", data, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        for part, generation in (("bases", "b1"), ("uppers", "u1")):
+            _, diff = incremental.relayout(generation, 240, 250)
+            splice = response.json()["diff"][part]
+            self.assertEqual((splice["start"], splice["delete"]), (diff["start"], diff["delete"]))
+            self.assertEqual([cabinet["name"] for cabinet in splice["insert"]], names(diff["insert"]))
+
+        response = self.client.post("/api/relayout_wall/", {**data, "diff": False}, content_type="application/json")
+        self.assertEqual([cabinet["name"] for cabinet in response.json()["cabinets"]["bases"]], names(layout(250, "b1")))
+
+        for bad in ({"width": 250, "orientation": "left"}, {**data, "orientation": "up"}, {**data, "width": "wide"}):
+            with self.subTest(data=bad):
+                self.assertEqual(self.client.post("/api/relayout_wall/", bad, content_type="application/json").status_code, 400)
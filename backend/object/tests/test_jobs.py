@@ -0,0 +1,235 @@
+import io
+import time
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import jobs, pricing
+from ..models.job import Job
+from ..models.project import Project
+from ..spatial import cabinet_index
+from .test_place_cabinets import placement
+
+
+class JobQueueTests(TestCase):
+    """Claiming, cancelling and requeueing jobs."""
+
+    PARAMS = {"widths": [120], "strategies": [None]}
+
+    def submit(self):
+        """Queues a small quote_walls job."""
+        return jobs.submit("quote_walls", dict(self.PARAMS))
+
+    def test_claim_takes_oldest_queued_job_once(self):
+        """Jobs are claimed oldest first, each by one worker, and an empty queue gives None."""
+        first, second = self.submit(), self.submit()
+        claimed = jobs.claim("worker-1")
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual(claimed.status, Job.RUNNING)
+        self.assertEqual(claimed.worker, "worker-1")
+        self.assertEqual(claimed.attempts, 1)
+        self.assertEqual(jobs.claim("worker-2").pk, second.pk)
+        self.assertIsNone(jobs.claim("worker-3"))
+
+    def test_run_job_stores_result(self):
+        """A claimed job runs to done with its result."""
+        job = self.submit()
+        self.assertEqual(jobs.run_job(jobs.claim("worker-1")), Job.DONE)
+        job.refresh_from_db()
+        self.assertEqual(job.progress, 1)
+        self.assertEqual(job.result["widths"], [120])
+
+    def test_cancel_queued_job(self):
+        """A queued job is cancelled at once and never claimed."""
+        job = self.submit()
+        self.assertEqual(jobs.cancel(job.pk).status, Job.CANCELLED)
+        self.assertIsNone(jobs.claim("worker-1"))
+
+    def test_cancel_running_job(self):
+        """A running job is flagged and stops as cancelled when it next checks."""
+        job = self.submit()
+        claimed = jobs.claim("worker-1")
+        cancelled = jobs.cancel(job.pk)
+        self.assertEqual(cancelled.status, Job.RUNNING)
+        self.assertTrue(cancelled.cancel_requested)
+        self.assertEqual(jobs.run_job(claimed), Job.CANCELLED)
+        job.refresh_from_db()
+        self.assertIsNone(job.result)
+
+    def test_cancel_finished_job(self):
+        """A finished job can't be cancelled."""
+        job = self.submit()
+        jobs.run_job(jobs.claim("worker-1"))
+        with self.assertRaises(ValueError):
+            jobs.cancel(job.pk)
+
+    @override_settings(JOB_STALE_AFTER=60, JOB_MAX_ATTEMPTS=2)
+    def test_requeue_stale(self):
+        """A job whose worker stopped reporting is queued again, and failed once it runs out of attempts."""
+        job = self.submit()
+        jobs.claim("worker-1")
+        self.assertEqual(jobs.requeue_stale(), 0)  # Its heartbeat is fresh
+
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+        claimed = jobs.claim("worker-2")
+        self.assertEqual(claimed.attempts, 2)
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_stale_worker_cannot_record(self):
+        """A worker whose job was taken over doesn't overwrite the new worker's outcome."""
+        job = self.submit()
+        stale = jobs.claim("worker-1")
+        Job.objects.filter(pk=job.pk).update(status=Job.QUEUED)
+        jobs.claim("worker-2")
+        jobs.run_job(stale)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (Job.RUNNING, "worker-2"))
+
+    def test_submit_rejects_invalid_params(self):
+        """Bad params are refused when the job is submitted."""
+        with self.assertRaises(ValueError):
+            jobs.submit("quote_walls", {"widths": []})
+        with self.assertRaises(ValueError):
+            jobs.submit("search_wall", {"width": "wide", "orientation": "top"})
+        with self.assertRaises(ValueError):
+            jobs.submit("paint_walls", {})
+        self.assertFalse(Job.objects.exists())
+
+
+class JobKindTests(TestCase):
+    """Each kind of job returns what the matching endpoint does."""
+
+    def setUp(self):
+        cabinet_index.reset()
+        self.addCleanup(cabinet_index.reset)
+
+    def run_job(self, kind, params):
+        """Submits a job, runs it and returns it once finished."""
+        job = jobs.submit(kind, params)
+        self.assertEqual(jobs.work("worker-1", once=True), 1)
+        job.refresh_from_db()
+        return job
+
+    def post(self, url, data):
+        """Posts JSON to an endpoint and returns the response."""
+        return self.client.post(url, data, content_type="application/json")
+
+    def test_generate_room(self):
+        """A generate_room job has the endpoint's response, with either solver."""
+        walls = [{"width": 120, "orientation": "left"}, {"width": 147.375, "orientation": "top"}]
+        for params in ({"walls": walls}, {"walls": walls, "solver": "corners"}):
+            with self.subTest(params=params):
+                job = self.run_job("generate_room", params)
+                self.assertEqual(job.status, Job.DONE)
+                self.assertEqual(job.result, self.post("/api/generate_room/", params).json())
+
+    def test_project_layout(self):
+        """A project_layout job lays out every wall run of the project like wall_run_layout."""
+        project = {"name": "Kitchen", "rooms": [{"name": "Main", "walls": [
+            {"orientation": "left", "width": 120, "cabinets": [placement(36, 0)]},
+            {"orientation": "top", "width": 150, "obstacles": [{"kind": "window", "start": 40, "width": 30}]},
+        ]}]}
+        project_id = self.post("/api/projects/", project).json()["id"]
+        job = self.run_job("project_layout", {"project": project_id})
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result["project"], project_id)
+        self.assertEqual(len(job.result["wall_runs"]), 2)
+        for wall_run in job.result["wall_runs"]:
+            expected = self.client.get(f"/api/wall_runs/{wall_run['id']}/layout/").json()
+            self.assertEqual(wall_run["cabinets"], expected["cabinets"])
+            self.assertEqual(wall_run["segments"], expected["segments"])
+
+        with self.assertRaises(ValueError):
+            jobs.submit("project_layout", {"project": project_id + 1})
+        job = jobs.submit("project_layout", {"project": project_id})
+        Project.objects.filter(pk=project_id).delete()  # Deleted while the job was queued
+        jobs.work("worker-1", once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn("does not exist", job.error)
+
+    def test_quote_walls(self):
+        """A quote_walls job has a quote per width for each strategy."""
+        widths = [96, 120.5, 147.375]
+        job = self.run_job("quote_walls", {"widths": widths, "orientation": "left", "strategies": [None, "optimal"]})
+        self.assertEqual(set(job.result["quotes"]), {"default", "optimal"})
+        rows = pricing.quote_walls(widths, ("b1", "u1"), ("optimal",))["optimal"]
+        self.assertEqual(job.result["quotes"]["optimal"], [pricing.quote_details(row) for row in rows])
+
+    @override_settings(JOB_SEARCH_TIME_BUDGET=0.2)
+    def test_search_wall(self):
+        """A search_wall job has the search_wall response, with its time budget capped by the settings."""
+        started = time.monotonic()
+        job = self.run_job("search_wall", {"width": 120, "orientation": "top", "time_budget": 600})
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertEqual(job.status, Job.DONE)
+        expected = self.post("/api/search_wall/", {"width": 120, "orientation": "top", "time_budget": 0.2}).json()
+        self.assertEqual(set(job.result), set(expected))
+        self.assertGreater(job.result["evaluated"], 0)
+        self.assertEqual([len(job.result["cabinets"][layer]) > 0 for layer in ("bases", "uppers")], [True, True])
+
+
+class JobEndpointTests(TestCase):
+    """Jobs are submitted, followed, cancelled and read through the API and run by run_jobs."""
+
+    def submit(self, data):
+        """Posts a job to submit_job and returns the response."""
+        return self.client.post("/api/jobs/", data, content_type="application/json")
+
+    def test_lifecycle(self):
+        """A submitted job is queued, runs with run_jobs and then has its result."""
+        response = self.submit({"kind": "quote_walls", "params": {"widths": [120, 150], "strategies": [None]}})
+        self.assertEqual(response.status_code, 202)
+        job = response.json()["job"]
+        self.assertEqual((job["status"], job["progress"]), (Job.QUEUED, 0))
+
+        response = self.client.get(f"/api/jobs/{job['id']}/result/")
+        self.assertEqual(response.status_code, 409)
+
+        out = io.StringIO()
+        call_command("run_jobs", "--once", "--name", "test-worker", stdout=out)
+        self.assertIn("Ran 1 jobs", out.getvalue())
+
+        status = self.client.get(f"/api/jobs/{job['id']}/").json()["job"]
+        self.assertEqual((status["status"], status["progress"], status["attempts"]), (Job.DONE, 1, 1))
+        response = self.client.get(f"/api/jobs/{job['id']}/result/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["result"]["widths"], [120, 150])
+        self.assertEqual(self.client.post(f"/api/jobs/{job['id']}/cancel/").status_code, 409)
+
+    def test_cancel(self):
+        """A queued job is cancelled at once and run_jobs leaves it alone."""
+        job_id = self.submit({"kind": "quote_walls", "params": {"widths": [120]}}).json()["job"]["id"]
+        response = self.client.post(f"/api/jobs/{job_id}/cancel/")
+        self.assertEqual(response.json()["job"]["status"], Job.CANCELLED)
+        call_command("run_jobs", "--once", stdout=io.StringIO())
+        response = self.client.get(f"/api/jobs/{job_id}/result/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["result"])
+
+    def test_max_jobs(self):
+        """run_jobs --max-jobs stops after that many jobs."""
+        for _ in range(3):
+            self.submit({"kind": "quote_walls", "params": {"widths": [120], "strategies": [None]}})
+        call_command("run_jobs", "--max-jobs", "2", stdout=io.StringIO())
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 2)
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+
+    def test_errors(self):
+        """Bad submissions are 400s and unknown jobs are 404s."""
+        for data in ({}, {"kind": "paint_walls"}, {"kind": "quote_walls", "params": {"widths": "wide"}},
+                     {"kind": "generate_room", "params": {"walls": []}}):
+            with self.subTest(data=data):
+                self.assertEqual(self.submit(data).status_code, 400)
+        self.assertEqual(self.client.get("/api/jobs/999/").status_code, 404)
+        self.assertEqual(self.client.get("/api/jobs/999/result/").status_code, 404)
+        self.assertEqual(self.client.post("/api/jobs/999/cancel/").status_code, 404)
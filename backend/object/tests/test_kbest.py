@@ -0,0 +1,140 @@
+import itertools
+import json
+
+from django.test import SimpleTestCase, TestCase
+
+from .. import geometry, kbest, search
+from ..catalog import get_catalog
+from ..tokens import CabinetToken
+from .utils import layout
+
+WEIGHTS = {**search.DEFAULT_WEIGHTS, "symmetry": 0}  # Symmetry isn't one of kbest's objectives
+
+
+def multisets(remaining, sizes):
+    """Yields every multiset (widest first) of sizes that fits in a width (in quanta)."""
+    yield ()
+    for index, size in enumerate(sizes):
+        if size <= remaining:
+            for rest in multisets(remaining - size, sizes[index:]):
+                yield (size,) + rest
+
+
+def brute_force(width, generation):
+    """Returns the sorted scores of every layout of one layer, scored with search.score_layout."""
+    catalog = get_catalog()
+    _, reserved, kind, corner, _ = catalog.generations[generation]
+    remaining = geometry.to_units(width) - geometry.to_units(reserved)
+    scores = []
+    for units in multisets(remaining, catalog.units(kind)):
+        tokens = [CabinetToken.from_units(kind, size) for size in units]
+        filler = remaining - sum(units)
+        if filler:
+            tokens.append(CabinetToken.from_units(CabinetToken.FILLER, filler))
+        if corner is not None:
+            tokens.append(corner)
+        scores.append(search.score_layout(tokens, WEIGHTS)[0])
+    return sorted(scores)
+
+
+class LayerLayoutsTests(SimpleTestCase):
+    """LayerLayouts lists every distinct layout of a layer, in score order."""
+
+    def test_matches_brute_force(self):
+        """The scores come out in the same order as scoring every multiset of sizes."""
+        for width, generation in ((120, "b1"), (150, "b2"), (100.5, "u3"), (130, "u2")):
+            with self.subTest(width=width, generation=generation):
+                expected = brute_force(width, generation)
+                found = list(kbest.LayerLayouts(width, generation))
+                self.assertEqual(len(found), len(expected))
+                for (score, tokens, objectives), reference in zip(found, expected):
+                    self.assertAlmostEqual(score, reference)
+                    self.assertAlmostEqual(score, search.score_layout(tokens, WEIGHTS)[0])
+                    self.assertEqual(objectives["cabinets"], sum(1 for token in tokens if token.kind != CabinetToken.FILLER))
+                layouts = [tuple(sorted(token.name for token in tokens)) for _, tokens, _ in found]
+                self.assertEqual(len(set(layouts)), len(layouts))
+
+    def test_layout_fills_width(self):
+        """Every layout covers the wall, with its corner where the generation method puts it."""
+        width = 120.25
+        for generation in ("b1", "b3", "u2"):
+            _, reserved, _, corner, corner_first = get_catalog().generations[generation]
+            for _, tokens, _ in itertools.islice(kbest.LayerLayouts(width, generation), 30):
+                self.assertAlmostEqual(sum(token.width for token in tokens) + (0 if corner else reserved), width)
+                if corner is not None:
+                    self.assertEqual(tokens[0 if corner_first else -1], corner)
+
+    def test_get(self):
+        """Layouts can be read by rank, and past the last one get returns None."""
+        layer = kbest.LayerLayouts(30, "b2")  # Only the filler: the corners take 72 in
+        self.assertEqual(layer.remaining, 0)
+        score, tokens, _ = layer.get(0)
+        self.assertEqual((score, tokens), (0, []))
+        self.assertIsNone(layer.get(1))
+
+    def test_rejects_invalid(self):
+        """Unknown generation methods and bad weights are errors."""
+        with self.assertRaises(ValueError):
+            kbest.LayerLayouts(120, "b9")
+        with self.assertRaises(ValueError):
+            kbest.LayerLayouts(120, "b2", weights={"filler": -1})
+
+
+class WallLayoutsTests(SimpleTestCase):
+    """wall_layouts merges the base and upper layouts in order of their total score."""
+
+    def test_matches_all_pairs(self):
+        """The merged scores are the sums of every pair of layer scores, in order."""
+        bases, uppers = brute_force(120, "b2"), brute_force(120, "u2")
+        expected = sorted(base + upper for base in bases for upper in uppers)
+        found = list(kbest.wall_layouts(120, ("b2", "u2")))
+        self.assertEqual(len(found), len(expected))
+        for (score, _, _, _), reference in zip(found, expected):
+            self.assertAlmostEqual(score, reference)
+
+    def test_first_is_best(self):
+        """The best layout has no more filler than the optimal fill's."""
+        def filler(tokens):
+            return sum(token.width for token in tokens if token.kind == CabinetToken.FILLER)
+
+        _, bases, uppers, objectives = next(kbest.wall_layouts(147.375, ("b1", "u1")))
+        self.assertEqual(objectives["filler"], filler(bases + uppers))
+        optimal = layout(147.375, "b1", "optimal") + layout(147.375, "u1", "optimal")
+        self.assertLessEqual(objectives["filler"], filler(optimal))
+
+
+class KBestEndpointTests(TestCase):
+    """kbest_wall streams the best layouts as newline-delimited JSON."""
+
+    def post(self, data):
+        """Posts JSON to kbest_wall and returns the response."""
+        return self.client.post("/api/kbest_wall/", data, content_type="application/json")
+
+    def test_streams_ranked_layouts(self):
+        """k layouts come back one per line, ranked, with the layouts of wall_layouts."""
+        response = self.post({"width": 147.375, "orientation": "left", "k": 25})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([line["rank"] for line in lines], list(range(1, 26)))
+        expected = itertools.islice(kbest.wall_layouts(147.375, ("b1", "u1")), 25)
+        for line, (score, bases, uppers, _) in zip(lines, expected):
+            self.assertAlmostEqual(line["score"], score, places=6)
+            self.assertEqual([cabinet["name"] for cabinet in line["cabinets"]["bases"]], [token.name for token in bases])
+            self.assertEqual([cabinet["name"] for cabinet in line["cabinets"]["uppers"]], [token.name for token in uppers])
+        scores = [line["score"] for line in lines]
+        self.assertEqual(scores, sorted(scores))
+
+    def test_rejects_bad_requests(self):
+        """Missing widths, bad orientations, k, weights or lines are bad requests."""
+        for data in (
+            {"orientation": "top"},
+            {"width": 120, "orientation": "sideways"},
+            {"width": 120, "orientation": "top", "k": 0},
+            {"width": 120, "orientation": "top", "k": 10 ** 6},
+            {"width": 120, "orientation": "top", "k": "many"},
+            {"width": 120, "orientation": "top", "weights": {"color": 1}},
+            {"width": 120, "orientation": "top", "line": "nope"},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.post(data).status_code, 400)
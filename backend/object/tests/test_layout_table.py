@@ -0,0 +1,84 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+from django.test import TestCase
+
+from .. import layout_table
+from ..models.wall import Wall
+from ..views import layout_wall
+from .utils import GENERATIONS, layout
+
+
+class LayoutTableTests(TestCase):
+    """Building, reading and refusing layout table files."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "layout_table.bin")
+        self.addCleanup(layout_table.load, None)  # Unmaps any table a test loaded
+
+    def build(self, min_width=24, max_width=120, step=0.5):
+        """Builds a table file and returns it opened."""
+        layout_table.build(self.path, min_width, max_width, step)
+        table = layout_table.LayoutTable(self.path)
+        self.addCleanup(table.close)
+        return table
+
+    def rewrite_header(self, **changes):
+        """Rewrites fields of the table file's header (by position, see layout_table.HEADER)."""
+        fields = ["magic", "version", "generations", "quantum", "algorithm_version", "min", "step", "count", "key"]
+        with open(self.path, "r+b") as f:
+            values = dict(zip(fields, layout_table.HEADER.unpack(f.read(layout_table.HEADER.size))))
+            values.update(changes)
+            f.seek(0)
+            f.write(layout_table.HEADER.pack(*(values[field] for field in fields)))
+
+    def test_lookup_matches_wall(self):
+        """Every stored layout is the one the Wall generation methods give."""
+        table = self.build()
+        self.assertEqual((table.min_width, table.max_width, table.step), (24, 120, 0.5))
+        for halves in range(48, 241):
+            for generation in GENERATIONS:
+                with self.subTest(width=halves / 2, generation=generation):
+                    self.assertEqual(table.lookup(halves / 2, generation), layout(halves / 2, generation))
+
+    def test_lookup_misses(self):
+        """Widths outside the range or between rows, and other catalog lines, aren't in the table."""
+        table = self.build()
+        for width in (23.5, 120.5, 100.25, "wide"):
+            with self.subTest(width=width):
+                self.assertIsNone(table.lookup(width, "b1"))
+        self.assertIsNone(table.lookup(100, "b1", SimpleNamespace(key=table.catalog_key + 1)))
+
+    def test_refuses_other_algorithms_and_quanta(self):
+        """A table built by other layout algorithms or with another quantum can't be opened."""
+        for field, value in (("algorithm_version", Wall.ALGORITHM_VERSION + 1), ("quantum", 8), ("version", 1)):
+            with self.subTest(field=field):
+                layout_table.build(self.path, 24, 48)
+                self.rewrite_header(**{field: value})
+                with self.assertRaises(ValueError):
+                    layout_table.LayoutTable(self.path)
+
+    def test_load_skips_unreadable_tables(self):
+        """load warns and runs without a table instead of raising (it runs when the app starts)."""
+        layout_table.build(self.path, 24, 48)
+        self.rewrite_header(algorithm_version=Wall.ALGORITHM_VERSION + 1)
+        with self.assertLogs("object.layout_table", "WARNING"):
+            self.assertIsNone(layout_table.load(self.path))
+        self.assertIsNone(layout_table.get_table())
+
+        with open(self.path, "wb") as f:
+            f.write(b"CBLT")  # Too short for a header
+        with self.assertLogs("object.layout_table", "WARNING"):
+            self.assertIsNone(layout_table.load(self.path))
+
+    def test_views_read_from_loaded_table(self):
+        """With a table loaded, layouts of the default strategy come from it and match a full layout."""
+        layout_table.build(self.path, 24, 120)
+        table = layout_table.load(self.path)
+        self.assertIsNotNone(table)
+        for width in (24, 73, 120, 121):  # 121 is past the table, so it is laid out
+            with self.subTest(width=width):
+                self.assertEqual(layout_wall(width, "left"), (layout(width, "b1"), layout(width, "u1")))
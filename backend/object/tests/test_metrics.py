@@ -0,0 +1,76 @@
+import json
+import logging
+
+from django.test import SimpleTestCase, TestCase
+
+from backend import metrics
+from backend.log_format import JsonFormatter
+from ..cache import layout_cache
+
+
+class HistogramTests(SimpleTestCase):
+    """Histograms count observations into buckets and render in the Prometheus text format."""
+
+    def test_render(self):
+        """Buckets are cumulative, with +Inf, the sum and the count of every series."""
+        histogram = metrics.Histogram("test_seconds", "Test.", ("view",), (0.1, 1.0))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value, view='a"b')
+        self.assertEqual(histogram.render(), [
+            "# HELP test_seconds Test.",
+            "# TYPE test_seconds histogram",
+            'test_seconds_bucket{view="a\\"b",le="0.1"} 1',
+            'test_seconds_bucket{view="a\\"b",le="1.0"} 2',
+            'test_seconds_bucket{view="a\\"b",le="+Inf"} 3',
+            'test_seconds_sum{view="a\\"b"} 5.55',
+            'test_seconds_count{view="a\\"b"} 3',
+        ])
+        histogram.clear()
+        self.assertEqual(len(histogram.render()), 2)
+
+    def test_timed_outside_a_request(self):
+        """Sections timed outside of a request are recorded right away under the view "-"."""
+        metrics.clear()
+        with metrics.timed("layout"):
+            pass
+        self.assertIn('cabinet_request_section_seconds_count{view="-",section="layout"} 1', metrics.render())
+
+    def test_json_formatter(self):
+        """Log records become one JSON object with the extra fields."""
+        record = logging.LogRecord("object.views", logging.INFO, __file__, 1, "generate_wall %s", ("request",), None)
+        record.width = 120
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual((entry["level"], entry["logger"], entry["message"], entry["width"]),
+                         ("INFO", "object.views", "generate_wall request", 120))
+
+
+class RequestMetricsTests(TestCase):
+    """The middleware records every request by view, with the time of each section."""
+
+    def setUp(self):
+        metrics.clear()
+        layout_cache.clear()  # So generate_wall runs the layout engines
+        self.addCleanup(metrics.clear)
+
+    def test_records_requests_and_sections(self):
+        """Latency, sizes and section times are recorded under the view's name."""
+        self.client.post("/api/generate_wall/", {"width": 120, "orientation": "top"}, content_type="application/json")
+        self.client.post("/api/quote/", {"width": 120, "orientation": "top"}, content_type="application/json")
+        self.client.get("/nowhere")
+        text = self.client.get("/metrics").content.decode()
+        for line in (
+            'cabinet_http_request_duration_seconds_count{view="generate_wall",method="POST",status="200"} 1',
+            'cabinet_http_request_duration_seconds_count{view="unmatched",method="GET",status="404"} 1',
+            'cabinet_http_request_size_bytes_count{view="generate_wall"} 1',
+            'cabinet_http_response_size_bytes_count{view="generate_wall"} 1',
+            'cabinet_request_section_seconds_count{view="generate_wall",section="layout"} 1',
+            'cabinet_request_section_seconds_count{view="generate_wall",section="serialization"} 1',
+            'cabinet_request_section_seconds_count{view="quote",section="pricing"} 1',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, text)
+
+    def test_metrics_are_only_served_locally(self):
+        """Clients outside METRICS_ALLOWED_IPS get a 403."""
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.0.0.5").status_code, 403)
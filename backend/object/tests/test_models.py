@@ -0,0 +1,101 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from ..models.cabinet import Base, BaseCorner, Cabinet, Filler, Upper, UpperCorner
+from ..tokens import CabinetToken
+
+
+class CabinetKindTests(TestCase):
+    """Every kind of cabinet is stored in one table, told apart by its kind column."""
+
+    def test_kind_from_name(self):
+        """The kind comes from the name's prefix, two-letter prefixes included."""
+        self.assertEqual(Cabinet.kind_from_name("B36"), CabinetToken.BASE)
+        self.assertEqual(Cabinet.kind_from_name("BC36"), CabinetToken.BASE_CORNER)
+        self.assertEqual(Cabinet.kind_from_name("UC24"), CabinetToken.UPPER_CORNER)
+        self.assertEqual(Cabinet.kind_from_name("F1.5"), CabinetToken.FILLER)
+        self.assertIsNone(Cabinet.kind_from_name("X36"))
+
+    def test_rows_load_as_their_proxy_class(self):
+        """Cabinets come back from Cabinet.objects as the class of their kind."""
+        Base(36).save()
+        BaseCorner(36).save()
+        Upper(30, 30).save()
+        UpperCorner(30).save()
+        cabinets = {cabinet.name: type(cabinet) for cabinet in Cabinet.objects.all()}
+        self.assertEqual(cabinets, {"B36": Base, "BC36": BaseCorner, "U30": Upper, "UC24": UpperCorner})
+
+    def test_proxy_managers_filter_by_kind(self):
+        """Base and Upper include their corners; the corner and filler managers only their own kind."""
+        Base(36).save()
+        BaseCorner(33).save()
+        Upper(30, 30).save()
+        UpperCorner(30).save()
+        Filler(9).save()
+        self.assertEqual(sorted(Base.objects.values_list("name", flat=True)), ["B36", "BC33"])
+        self.assertEqual(list(BaseCorner.objects.values_list("name", flat=True)), ["BC33"])
+        self.assertEqual(sorted(Upper.objects.values_list("name", flat=True)), ["U30", "UC24"])
+        self.assertEqual(list(UpperCorner.objects.values_list("name", flat=True)), ["UC24"])
+        self.assertEqual(list(Filler.objects.values_list("name", flat=True)), ["F9"])
+
+    def test_rejects_invalid_widths(self):
+        """Cabinets must come in a width the line sells."""
+        for width in (35, "36", None, True):
+            with self.subTest(width=width), self.assertRaises(ValueError):
+                Base(width)
+
+
+class CabinetKindMigrationTests(TransactionTestCase):
+    """Migration 0003 moves cabinets from one table per kind to a kind column, and back."""
+
+    before = [("object", "0002_base_filler_upper_rename__height_cabinet_depth_and_more")]
+    after = [("object", "0003_cabinet_kind")]
+
+    def migrate(self, targets):
+        """Migrates the test database to *targets* and returns the models as they are there."""
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        self.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_forward(self):
+        """Each cabinet gets the kind of its child table, or of its name if it has none."""
+        apps = self.migrate(self.before)
+        ids = {}
+        for model, name in [("Base", "B36"), ("Upper", "U30"), ("Filler", "F1.5"), ("BaseCorner", "BC36"), ("UpperCorner", "UC24")]:
+            ids[name] = apps.get_model("object", model).objects.create(name=name).pk
+        ids["B12"] = apps.get_model("object", "Cabinet").objects.create(name="B12").pk  # No child row
+
+        apps = self.migrate(self.after)
+        kinds = dict(apps.get_model("object", "Cabinet").objects.values_list("pk", "kind"))
+        self.assertEqual(kinds[ids["B36"]], CabinetToken.BASE)
+        self.assertEqual(kinds[ids["U30"]], CabinetToken.UPPER)
+        self.assertEqual(kinds[ids["F1.5"]], CabinetToken.FILLER)
+        self.assertEqual(kinds[ids["BC36"]], CabinetToken.BASE_CORNER)
+        self.assertEqual(kinds[ids["UC24"]], CabinetToken.UPPER_CORNER)
+        self.assertEqual(kinds[ids["B12"]], CabinetToken.BASE)
+
+    def test_backward(self):
+        """Reversing the migration puts every cabinet back in the tables of its kind."""
+        apps = self.migrate(self.after)
+        Cabinet = apps.get_model("object", "Cabinet")
+        ids = {
+            kind: Cabinet.objects.create(name=f"{prefix}30", kind=kind).pk
+            for kind, prefix in enumerate(CabinetToken.PREFIXES)
+        }
+
+        apps = self.migrate(self.before)
+
+        def pks(model):
+            return set(apps.get_model("object", model).objects.values_list("pk", flat=True))
+
+        self.assertEqual(pks("Base"), {ids[CabinetToken.BASE], ids[CabinetToken.BASE_CORNER]})
+        self.assertEqual(pks("Upper"), {ids[CabinetToken.UPPER], ids[CabinetToken.UPPER_CORNER]})
+        self.assertEqual(pks("Filler"), {ids[CabinetToken.FILLER]})
+        self.assertEqual(pks("BaseCorner"), {ids[CabinetToken.BASE_CORNER]})
+        self.assertEqual(pks("UpperCorner"), {ids[CabinetToken.UPPER_CORNER]})
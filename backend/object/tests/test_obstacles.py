@@ -0,0 +1,204 @@
+import random
+
+from django.test import SimpleTestCase, TestCase
+
+from .. import obstacles
+from ..intervals import IntervalTree
+from ..models.obstacle import Obstacle
+from ..models.project import WallRun
+from ..spatial import cabinet_index
+from .utils import layout, names
+
+
+class IntervalTreeTests(SimpleTestCase):
+    """IntervalTree finds the same overlaps and gaps as a scan over every interval."""
+
+    def setUp(self):
+        generator = random.Random(19)
+        self.intervals = []
+        for item in range(200):
+            start = generator.randrange(0, 1000)
+            self.intervals.append((start, start + generator.randrange(0, 60), item))
+        self.tree = IntervalTree(self.intervals)
+        self.queries = [(start, start + generator.randrange(1, 120)) for start in
+                        (generator.randrange(-50, 1050) for _ in range(300))]
+
+    def test_overlapping_matches_scan(self):
+        """Every interval that overlaps a range is found, ordered by start."""
+        for start, end in self.queries:
+            expected = [item for s, e, item in self.intervals if e > s and s < end and e > start]
+            self.assertEqual(sorted(self.tree.overlapping(start, end)), expected)
+            starts = [self.intervals[item][0] for item in self.tree.overlapping(start, end)]
+            self.assertEqual(starts, sorted(starts))
+
+    def test_gaps_and_covers_match_scan(self):
+        """The gaps of a range are exactly its points no interval covers."""
+        for start, end in self.queries[:50]:
+            gaps = self.tree.gaps(start, end)
+            for point in range(start, end):
+                covered = any(s <= point < e for s, e, _ in self.intervals)
+                self.assertEqual(self.tree.covers(point), covered)
+                self.assertEqual(any(low <= point < high for low, high in gaps), not covered)
+
+    def test_half_open(self):
+        """Intervals that only touch don't overlap, and empty intervals are ignored."""
+        tree = IntervalTree([(30, 66, "window"), (66, 96, "door"), (100, 100, "empty")])
+        self.assertEqual(len(tree), 2)
+        self.assertEqual(tree.overlapping(60, 96), ["window", "door"])
+        self.assertEqual(tree.overlapping(66, 70), ["door"])
+        self.assertEqual(tree.overlapping(96, 144), [])
+        self.assertEqual(tree.gaps(0, 144), [(0, 30), (96, 144)])
+        self.assertFalse(tree.covers(96))
+
+    def test_empty(self):
+        """An empty tree leaves the whole range free."""
+        tree = IntervalTree()
+        self.assertEqual(tree.overlapping(0, 10), [])
+        self.assertEqual(tree.gaps(0, 10), [(0, 10)])
+
+
+class ObstacleTests(SimpleTestCase):
+    """Obstacles get their standard widths and block the layers of their kind."""
+
+    def test_appliance_widths(self):
+        """Appliances default to their standard slot width and are named after their kind."""
+        for kind, width in Obstacle.APPLIANCE_WIDTHS.items():
+            obstacle = Obstacle(kind=kind, position_x=12)
+            self.assertEqual((obstacle.width, obstacle.name, obstacle.end), (width, kind, 12 + width))
+            self.assertTrue(obstacle.is_appliance)
+        self.assertFalse(Obstacle(kind="window", position_x=0, width=30).is_appliance)
+
+    def test_rejects_invalid(self):
+        """Unknown kinds and windows, doors and openings without a width are rejected."""
+        for kwargs in ({"kind": "sink", "width": 30}, {"kind": "window"}, {"kind": "door", "width": -3}):
+            with self.subTest(**kwargs):
+                with self.assertRaises(ValueError):
+                    Obstacle(position_x=0, **kwargs)
+
+    def test_index_blocking(self):
+        """Each layer's tree only has the obstacles that block it."""
+        window = Obstacle(kind="window", position_x=36, width=30)
+        dishwasher = Obstacle(kind="dishwasher", position_x=48)
+        door = Obstacle(kind="door", position_x=90, width=32)
+        index = obstacles.ObstacleIndex([door, window, dishwasher])
+        self.assertEqual(index.obstacles, [window, dishwasher, door])
+        self.assertEqual(index.blocking(40, 100), [window, dishwasher, door])
+        self.assertEqual(index.blocking(40, 100, "bases"), [dishwasher, door])
+        self.assertEqual(index.blocking(40, 100, "uppers"), [window, door])
+        self.assertEqual(index.blocking(66, 72, "uppers"), [])
+        with self.assertRaises(ValueError):
+            index.blocking(0, 10, "tops")
+
+    def test_validate_obstacles(self):
+        """Obstacles must lie on the wall."""
+        obstacles.validate_obstacles(120, [Obstacle(kind="fridge", position_x=84)])
+        for position in (-1, 85):
+            with self.assertRaises(ValueError):
+                obstacles.validate_obstacles(120, [Obstacle(kind="fridge", position_x=position)])
+
+
+class PlanWallTests(SimpleTestCase):
+    """plan_wall fills the gaps between the corner space and the obstacles of each layer."""
+
+    def test_pieces_cover_wall(self):
+        """The pieces of each layer are contiguous, cover the wall and fill each gap to its width."""
+        index = obstacles.ObstacleIndex([
+            Obstacle(kind="window", position_x=50, width=30),
+            Obstacle(kind="range", position_x=70),
+        ])
+        for generations in (("b1", "u1"), ("b2", "u2"), ("b3", "u3")):
+            plan = obstacles.plan_wall(180, generations, index)
+            for layer in obstacles.LAYERS:
+                with self.subTest(generations=generations, layer=layer):
+                    pieces = plan[layer]
+                    self.assertEqual(pieces[0]["start"], 0)
+                    self.assertEqual(pieces[-1]["end"], 180)
+                    for previous, piece in zip(pieces, pieces[1:]):
+                        self.assertEqual(previous["end"], piece["start"])
+                    blocked = [piece["obstacle"].kind for piece in pieces if "obstacle" in piece]
+                    self.assertEqual(blocked, ["range"] if layer == "bases" else ["window"])
+                    for piece in pieces[1:-1]:
+                        if "cabinets" in piece:
+                            used = sum(token.width for token in piece["cabinets"])
+                            self.assertAlmostEqual(used, piece["end"] - piece["start"])
+
+    def test_no_obstacles_matches_wall(self):
+        """Without obstacles, the tokens are the wall's usual layout."""
+        plan = obstacles.plan_wall(147.375, ("b2", "u2"), obstacles.ObstacleIndex())
+        self.assertEqual(names(obstacles.plan_tokens(plan["bases"])), names(layout(147.375, "b2")))
+        self.assertEqual(names(obstacles.plan_tokens(plan["uppers"])), names(layout(147.375, "u2")))
+
+    def test_rejects_obstacle_in_corner(self):
+        """An obstacle in the corner space of a layer it blocks is an error."""
+        index = obstacles.ObstacleIndex([Obstacle(kind="door", position_x=90, width=30)])  # In b1's corner
+        with self.assertRaises(ValueError):
+            obstacles.plan_wall(120, ("b1", "u1"), index)
+        with self.assertRaises(ValueError):
+            obstacles.plan_wall(120, ("b9", "u1"), obstacles.ObstacleIndex())
+
+
+class ObstacleEndpointTests(TestCase):
+    """generate_wall lays walls out around obstacles, and saved wall runs can be queried for theirs."""
+
+    def setUp(self):
+        cabinet_index.reset()
+        self.addCleanup(cabinet_index.reset)
+
+    def post(self, url, data):
+        """Posts JSON to an endpoint and returns the response."""
+        return self.client.post(url, data, content_type="application/json")
+
+    def test_generate_wall_segments(self):
+        """The segments are the planned pieces and the cabinets are their tokens in order."""
+        specs = [{"kind": "window", "start": 50, "width": 30}, {"kind": "dishwasher", "start": 60}]
+        response = self.post("/api/generate_wall/", {"width": 180, "orientation": "top", "obstacles": specs})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        index = obstacles.ObstacleIndex([
+            Obstacle(kind="window", position_x=50, width=30),
+            Obstacle(kind="dishwasher", position_x=60),
+        ])
+        plan = obstacles.plan_wall(180, ("b2", "u2"), index)
+        for layer in obstacles.LAYERS:
+            self.assertEqual([(piece["start"], piece["end"]) for piece in data["segments"][layer]],
+                             [(piece["start"], piece["end"]) for piece in plan[layer]])
+            self.assertEqual([cabinet["name"] for cabinet in data["cabinets"][layer]],
+                             [token.name for token in obstacles.plan_tokens(plan[layer])])
+        self.assertEqual(data["segments"]["bases"][2]["obstacle"]["kind"], "dishwasher")
+
+    def test_generate_wall_rejects_bad_obstacles(self):
+        """Obstacles off the wall, of unknown kinds or in the corner space are bad requests."""
+        for specs in (
+            [{"kind": "window", "start": 170, "width": 30}],
+            [{"kind": "sink", "start": 50, "width": 30}],
+            [{"kind": "door", "start": 150, "width": 30}],
+            [{"kind": "window"}],
+            "window",
+        ):
+            with self.subTest(specs=specs):
+                response = self.post("/api/generate_wall/", {"width": 180, "orientation": "left", "obstacles": specs})
+                self.assertEqual(response.status_code, 400)
+
+    def test_saved_wall_run(self):
+        """A saved wall run's obstacles can be queried by part and layer, and its layout goes around them."""
+        wall = {"orientation": "top", "width": 180, "obstacles": [
+            {"kind": "window", "start": 40, "width": 30},
+            {"kind": "range", "start": 100},
+        ]}
+        project = {"name": "Kitchen", "rooms": [{"name": "Main", "walls": [wall]}]}
+        self.assertEqual(self.post("/api/projects/", project).status_code, 201)
+        wall_run = WallRun.objects.get()
+
+        url = f"/api/wall_runs/{wall_run.pk}/obstacles/"
+        self.assertEqual([o["kind"] for o in self.client.get(url).json()["obstacles"]], ["window", "range"])
+        self.assertEqual([o["kind"] for o in self.client.get(url, {"start": 70, "end": 120}).json()["obstacles"]],
+                         ["range"])
+        self.assertEqual(self.client.get(url, {"layer": "uppers"}).json()["obstacles"][0]["end"], 70)
+        self.assertEqual(self.client.get(url, {"layer": "tops"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"start": "x"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/wall_runs/999/obstacles/").status_code, 404)
+
+        layout = self.client.get(f"/api/wall_runs/{wall_run.pk}/layout/").json()
+        expected = self.post("/api/generate_wall/", wall).json()
+        self.assertEqual(layout["cabinets"], expected["cabinets"])
+        self.assertEqual(self.client.get("/api/wall_runs/999/layout/").status_code, 404)
@@ -0,0 +1,70 @@
+from itertools import combinations_with_replacement
+
+from django.test import TestCase
+
+from .. import geometry
+from ..catalog import get_catalog
+from ..models.wall import Wall
+from ..tokens import CabinetToken
+from .utils import names
+
+
+def brute_force(remaining, sizes):
+    """Returns the (filler, cabinet count) of the best fill of *remaining* quanta, trying every multiset of sizes."""
+    best = (remaining, 0)
+    for count in range(1, remaining // min(sizes) + 1):
+        for combination in combinations_with_replacement(sizes, count):
+            filled = sum(combination)
+            if filled <= remaining:
+                best = min(best, (remaining - filled, count))
+    return best
+
+
+class OptimalFillTests(TestCase):
+    """optimal_fill leaves the least filler, then uses the fewest cabinets."""
+
+    def test_matches_brute_force(self):
+        """Every width up to 80 inches (by quarter inches) gets the filler and count of an exhaustive search."""
+        wall = Wall(width=0)
+        sizes = get_catalog().pattern("optimal", CabinetToken.BASE)
+        for quarters in range(0, 80 * 4 + 1):
+            width = quarters / 4
+            with self.subTest(width=width):
+                tokens = wall.optimal_fill(width, CabinetToken.BASE)
+                cabinets = [token for token in tokens if token.kind == CabinetToken.BASE]
+                filler = sum(token.units for token in tokens if token.kind == CabinetToken.FILLER)
+                self.assertEqual(sum(token.units for token in tokens), geometry.to_units(width))
+                self.assertEqual((filler, len(cabinets)), brute_force(geometry.to_units(width), sizes))
+
+    def test_prefers_larger_cabinets(self):
+        """Ties on filler and count go to the larger cabinets, widest first."""
+        wall = Wall(width=0)
+        self.assertEqual(names(wall.optimal_fill(72, CabinetToken.BASE)), ["B36", "B36"])
+        self.assertEqual(names(wall.optimal_fill(45, CabinetToken.UPPER)), ["U36", "U9"])
+
+    def test_never_more_filler_than_other_strategies(self):
+        """No other strategy leaves less filler on any generation method."""
+        for width in range(60, 400, 7):
+            for generation in ("b1", "b2", "b3", "u1", "u2", "u3"):
+                wall = Wall(width=width)
+                optimal = wall.generate(generation, wall.get_fill("optimal"))
+                for strategy in ("greedy", "fixed_pattern", "rotating1"):
+                    with self.subTest(width=width, generation=generation, strategy=strategy):
+                        other = wall.generate(generation, wall.get_fill(strategy))
+                        self.assertLessEqual(self.filler(optimal), self.filler(other))
+
+    def test_generate_wall_accepts_optimal(self):
+        """generate_wall lays the wall out with the optimal strategy when asked to."""
+        response = self.client.post(
+            "/api/generate_wall/", {"width": 100, "orientation": "top", "strategy": "optimal"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        wall = Wall(width=100)
+        expected = wall.generate("b2", wall.get_fill("optimal"))
+        self.assertEqual([cabinet["name"] for cabinet in response.json()["cabinets"]["bases"]], names(expected))
+
+    @staticmethod
+    def filler(tokens):
+        """Returns the quanta of filler in a layout."""
+        return sum(token.units for token in tokens if token.kind == CabinetToken.FILLER)
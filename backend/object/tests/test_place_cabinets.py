@@ -0,0 +1,58 @@
+from django.test import TestCase
+
+from ..models.cabinet import Cabinet
+from ..spatial import cabinet_index
+
+
+def placement(width, x, y=0, name="B"):
+    """Returns one placement of a place_cabinets request."""
+    return {"cabinet": {"name": name, "width": width, "height": 36, "depth": 24}, "x": x, "y": y}
+
+
+class PlaceCabinetsTests(TestCase):
+    """place_cabinets saves a batch of cabinets in one transaction."""
+
+    def setUp(self):
+        cabinet_index.reset()  # Rooms are read from the (rolled back) test database again
+        self.addCleanup(cabinet_index.reset)
+
+    def place(self, cabinets, **options):
+        """Posts placements to place_cabinets and returns the response."""
+        return self.client.post(
+            "/api/place_cabinets/", {"cabinets": cabinets, **options}, content_type="application/json"
+        )
+
+    def test_saves_every_cabinet(self):
+        """Every placement is saved, in order, with its id in the response."""
+        response = self.place([placement(36, 0), placement(30, 36), placement(24, 66)])
+        self.assertEqual(response.status_code, 200)
+        placed = response.json()["placed_cabinets"]
+        self.assertEqual([cabinet["name"] for cabinet in placed], ["B36", "B30", "B24"])
+        self.assertEqual(response.json()["errors"], [])
+        self.assertEqual(
+            list(Cabinet.objects.order_by("pk").values_list("pk", "name", "position_x")),
+            [(cabinet["id"], cabinet["name"], cabinet["position_x"]) for cabinet in placed],
+        )
+
+    def test_one_invalid_placement_saves_nothing(self):
+        """By default a single invalid placement rejects the whole batch."""
+        response = self.place([placement(36, 0), placement(35, 36), {"cabinet": {"name": "B"}, "x": 80, "y": 0}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["index"] for error in response.json()["errors"]], [1, 2])
+        self.assertFalse(Cabinet.objects.exists())
+
+    def test_partial_saves_valid_placements(self):
+        """With partial, the valid placements are saved and the invalid ones reported."""
+        response = self.place([placement(36, 0), placement(35, 36), placement(24, 66)], partial=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([cabinet["name"] for cabinet in response.json()["placed_cabinets"]], ["B36", "B24"])
+        self.assertEqual([error["index"] for error in response.json()["errors"]], [1])
+        self.assertEqual(Cabinet.objects.count(), 2)
+
+    def test_rejects_bad_requests(self):
+        """The placements must be a non-empty list and partial a JSON boolean."""
+        for data in ({"cabinets": []}, {"cabinets": "B36"}, {"cabinets": [placement(36, 0)], "partial": "false"}):
+            with self.subTest(data=data):
+                response = self.client.post("/api/place_cabinets/", data, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Cabinet.objects.exists())
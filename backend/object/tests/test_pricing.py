@@ -0,0 +1,162 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import pricing
+from ..catalog import BUILTIN, read_catalogs
+from ..models.wall import Wall
+from ..tokens import CabinetToken
+from .test_catalog import SHAKER
+from .utils import GENERATIONS, STRATEGIES, layout
+
+PER_INCH = {"B": 9.0, "U": 7.0, "F": 2.5, "BC": 11.0, "UC": 8.5}
+HOURS = {"B": 1.0, "U": 0.75, "F": 0.25, "BC": 1.5, "UC": 1.0}
+RATE = 80.0
+
+
+def reference_quote(tokens, catalog):
+    """Prices one layout a piece at a time, with the rates above."""
+    filler_price = next((entry.price for entry in catalog.entries
+                         if entry.kind == CabinetToken.FILLER and entry.price is not None), None)
+    quote = {"cabinets": 0.0, "filler": 0.0, "labor": 0.0, "count": 0, "filler_inches": 0.0, "estimated": 0}
+    for token in tokens:
+        prefix = CabinetToken.PREFIXES[token.kind]
+        quote["labor"] += HOURS[prefix] * RATE
+        if token.kind == CabinetToken.FILLER:
+            quote["filler_inches"] += token.width
+            if filler_price is None:
+                quote["estimated"] += 1
+            quote["filler"] += (PER_INCH[prefix] if filler_price is None else filler_price) * token.width
+            continue
+        quote["count"] += 1
+        entry = catalog.item(token.kind, token.width)
+        if entry is None or entry.price is None:
+            quote["estimated"] += 1
+            quote["cabinets"] += PER_INCH[prefix] * token.width
+        else:
+            quote["cabinets"] += entry.price
+    for cost in pricing.COSTS:
+        quote[cost] = round(quote[cost], 2)
+    quote["total"] = round(quote["cabinets"] + quote["filler"] + quote["labor"], 2)
+    return quote
+
+
+class QuoteTests(SimpleTestCase):
+    """The vectorized quotes match pricing each layout a piece at a time."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "shaker.json")
+        with open(path, "w") as f:
+            json.dump({"lines": [SHAKER]}, f)
+        self.shaker, = read_catalogs(path)
+
+    def assert_quotes(self, quotes, expected):
+        """Checks QUOTE_DTYPE rows against reference quotes."""
+        self.assertEqual(len(quotes), len(expected))
+        for row, quote in zip(quotes, expected):
+            for name, value in quote.items():
+                self.assertAlmostEqual(float(row[name]), value, places=6, msg=name)
+
+    def test_quote_layouts_matches_reference(self):
+        """Every generation method and strategy on both lines is priced like the reference."""
+        for catalog in (BUILTIN, self.shaker):
+            matrix = pricing.PriceMatrix(catalog, PER_INCH, HOURS, RATE)
+            layouts = [
+                layout(width, generation, strategy, catalog)
+                for width in (0, 60.25, 96, 147.375, 300.5)
+                for generation in GENERATIONS
+                for strategy in STRATEGIES
+            ]
+            with self.subTest(line=catalog.name):
+                self.assert_quotes(pricing.quote_layouts(layouts, catalog, matrix),
+                                   [reference_quote(tokens, catalog) for tokens in layouts])
+
+    def test_quote_walls_matches_layouts(self):
+        """quote_walls prices each wall's bases and uppers together, for every strategy."""
+        widths = [72, 96.5, 120, 147.375, 210]
+        matrix = pricing.PriceMatrix(self.shaker, PER_INCH, HOURS, RATE)
+        results = pricing.quote_walls(widths, ("b1", "u1"), STRATEGIES, self.shaker, matrix)
+        self.assertEqual(set(results), set(STRATEGIES))
+        for strategy, quotes in results.items():
+            with self.subTest(strategy=strategy):
+                self.assert_quotes(quotes, [
+                    reference_quote(layout(width, "b1", strategy, self.shaker) + layout(width, "u1", strategy, self.shaker),
+                                    self.shaker)
+                    for width in widths
+                ])
+        with self.assertRaises(ValueError):
+            pricing.quote_walls(widths, ("b9",))
+
+    def test_empty(self):
+        """An empty layout costs nothing, and no layouts give no rows."""
+        quotes = pricing.quote_layouts([[]], BUILTIN)
+        self.assertEqual(float(quotes["total"][0]), 0)
+        self.assertEqual(len(pricing.quote_layouts([], BUILTIN)), 0)
+
+    @override_settings(PRICING_PRICE_PER_INCH=PER_INCH, PRICING_LABOR_HOURS=HOURS, PRICING_LABOR_RATE=RATE)
+    def test_settings_rates(self):
+        """Without a matrix, the rates come from the settings."""
+        tokens = layout(147.375, "b1", catalog=self.shaker)
+        row, = pricing.quote_layouts([tokens], matrix=pricing.PriceMatrix(self.shaker))
+        self.assertEqual(pricing.quote_details(row)["total"], reference_quote(tokens, self.shaker)["total"])
+
+
+class QuoteEndpointTests(TestCase):
+    """The quote endpoint prices a wall's strategies or given layouts."""
+
+    def post(self, data):
+        """Posts JSON to the quote endpoint and returns the response."""
+        return self.client.post("/api/quote/", data, content_type="application/json")
+
+    def test_wall_strategies(self):
+        """A wall is quoted once per strategy, each with the layout generate_wall gives it."""
+        response = self.post({"width": 147.375, "orientation": "left"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([quote["strategy"] for quote in data["quotes"]], [None, *Wall.FILL_STRATEGIES])
+        totals = [quote["total"] for quote in data["quotes"]]
+        self.assertEqual(data["cheapest"], totals.index(min(totals)))
+        for quote in data["quotes"]:
+            wall = {"width": 147.375, "orientation": "left", **({"strategy": quote["strategy"]} if quote["strategy"] else {})}
+            expected = self.client.post("/api/generate_wall/", wall, content_type="application/json").json()["cabinets"]
+            self.assertEqual(quote["bases"], [cabinet["name"] for cabinet in expected["bases"]])
+            self.assertEqual(quote["uppers"], [cabinet["name"] for cabinet in expected["uppers"]])
+
+    def test_layouts(self):
+        """Given layouts are priced as they are."""
+        layouts = [{"bases": ["B36", "F1.5"], "uppers": ["U36"]}, {"bases": ["B30"]}]
+        response = self.post({"layouts": layouts})
+        self.assertEqual(response.status_code, 200)
+        quotes = response.json()["quotes"]
+        self.assertEqual([quote["cabinets"] for quote in quotes], [2, 1])
+        self.assertEqual([quote["filler"] for quote in quotes], [1.5, 0])
+        self.assertEqual(quotes[1]["uppers"], [])
+        self.assertEqual(quotes[0]["total"], pricing.quote_details(pricing.quote_layouts(
+            [[CabinetToken.from_name(name) for name in ("B36", "F1.5", "U36")]], BUILTIN)[0])["total"])
+        self.assertEqual(response.json()["cheapest"], 1)
+
+    def test_rejects_bad_requests(self):
+        """Missing widths, bad layouts or strategies and unknown lines are bad requests."""
+        for data in (
+            {},
+            {"layouts": []},
+            {"layouts": "B36"},
+            {"layouts": [{"bases": ["X36"]}]},
+            {"width": 120, "orientation": "top", "strategies": "greedy"},
+            {"width": 120, "orientation": "top", "strategies": ["bogus"]},
+            {"width": 120, "orientation": "sideways"},
+            {"width": 120, "orientation": "top", "line": "nope"},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.post(data).status_code, 400)
+
+    def test_estimated_prices(self):
+        """The built-in line has no prices, so its cabinets are priced per inch and counted as estimated."""
+        quote, = self.post({"layouts": [{"bases": ["B36"]}]}).json()["quotes"]
+        self.assertEqual(quote["estimated"], 1)
+        self.assertTrue(np.isclose(quote["cabinet_cost"], 36 * pricing.price_matrix(BUILTIN).per_inch[CabinetToken.BASE]))
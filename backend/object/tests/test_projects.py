@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from .. import projects
+from ..models.cabinet import Base
+from ..models.project import Project, WallRun
+from ..spatial import cabinet_index
+from .test_place_cabinets import placement
+
+PROJECT = {
+    "name": "Kitchen",
+    "rooms": [
+        {"name": "Main", "walls": [
+            {"orientation": "left", "width": 120, "cabinets": [placement(36, 0), placement(30, 36)]},
+            {"orientation": "top", "width": 150, "obstacles": [{"kind": "window", "start": 40, "width": 30}]},
+        ]},
+        {"name": "Pantry", "walls": [{"orientation": "top", "width": 96, "cabinets": [placement(24, 0, 200)]}]},
+    ],
+}
+
+
+class ProjectTests(TestCase):
+    """Projects are saved in one request and loaded whole, from their snapshot when it is current."""
+
+    def setUp(self):
+        cabinet_index.reset()  # Rooms are read from the (rolled back) test database again
+        self.addCleanup(cabinet_index.reset)
+
+    def create(self, data=PROJECT):
+        """Posts a project to create_project and returns the response."""
+        return self.client.post("/api/projects/", data, content_type="application/json")
+
+    def test_create_and_load(self):
+        """The saved project comes back with its rooms, walls, cabinets and obstacles in order."""
+        response = self.create()
+        self.assertEqual(response.status_code, 201)
+        payload = response.json()
+        self.assertEqual(payload["name"], "Kitchen")
+        self.assertEqual([room["name"] for room in payload["rooms"]], ["Main", "Pantry"])
+        walls = payload["rooms"][0]["walls"]
+        self.assertEqual([wall["orientation"] for wall in walls], ["left", "top"])
+        self.assertEqual([cabinet["name"] for cabinet in walls[0]["cabinets"]], ["B36", "B30"])
+        self.assertEqual([obstacle["kind"] for obstacle in walls[1]["obstacles"]], ["window"])
+
+        self.assertEqual(self.client.get(f"/api/projects/{payload['id']}/").json(), payload)
+        self.assertEqual(self.client.get(f"/api/projects/{payload['id']}/?fresh=1").json(), payload)
+
+    def test_query_counts(self):
+        """A current snapshot is one query; a fresh read is a fixed number of queries however big the project is."""
+        project_id = self.create().json()["id"]
+        with self.assertNumQueries(1):
+            projects.load_project(project_id)
+        with self.assertNumQueries(7):  # The snapshot, five table reads and the snapshot write
+            projects.load_project(project_id, use_snapshot=False)
+
+    def test_changes_clear_the_snapshot(self):
+        """Saving a cabinet on a wall run of the project clears its snapshot, so the next load sees it."""
+        project_id = self.create().json()["id"]
+        self.client.get(f"/api/projects/{project_id}/")
+        self.assertIsNotNone(Project.objects.get(pk=project_id).snapshot)
+
+        cabinet = Base(24)
+        cabinet.wall_run = WallRun.objects.filter(room__project_id=project_id, orientation="top").first()
+        cabinet.save()
+        self.assertIsNone(Project.objects.get(pk=project_id).snapshot)
+        names = [c["name"] for room in projects.load_project(project_id)["rooms"] for wall in room["walls"] for c in wall["cabinets"]]
+        self.assertEqual(sorted(names), ["B24", "B24", "B30", "B36"])
+
+    def test_stale_loads_are_not_stored(self):
+        """A load the project changed during doesn't store its (stale) payload as the snapshot."""
+        project_id = self.create().json()["id"]
+        projects.invalidate_snapshots(project_ids=[project_id])
+        project_payload = projects.project_payload
+
+        def changed_while_reading(project):
+            projects.invalidate_snapshots(project_ids=[project_id])
+            return project_payload(project)
+
+        with mock.patch.object(projects, "project_payload", changed_while_reading):
+            projects.load_project(project_id)
+        self.assertIsNone(Project.objects.get(pk=project_id).snapshot)
+        projects.load_project(project_id)
+        self.assertIsNotNone(Project.objects.get(pk=project_id).snapshot)
+
+    def test_rejects_bad_projects(self):
+        """Projects without a name, with bad walls or with invalid cabinets are not saved."""
+        for data in (
+            {"rooms": []},
+            {"name": "x", "rooms": [{"walls": [{"orientation": "up", "width": 100}]}]},
+            {"name": "x", "rooms": [{"walls": [{"orientation": "top", "width": 100, "cabinets": [placement(35, 0)]}]}]},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.create(data).status_code, 400)
+        self.assertFalse(Project.objects.exists())
+        self.assertEqual(self.client.get("/api/projects/999/").status_code, 404)
@@ -0,0 +1,109 @@
+import re
+import xml.etree.ElementTree as ElementTree
+import zlib
+
+from django.test import TestCase
+
+from .. import render
+from ..spatial import cabinet_index
+from .test_place_cabinets import placement
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def content(response):
+    """Joins the chunks of a streamed response."""
+    return b"".join(response.streaming_content)
+
+
+class RenderWallTests(TestCase):
+    """render_wall draws a wall's layout as an SVG or PDF shop drawing."""
+
+    WALL = {"width": 120, "orientation": "left"}
+
+    def post(self, **data):
+        """Posts the wall to render_wall and returns the response."""
+        return self.client.post("/api/render_wall/", {**self.WALL, **data}, content_type="application/json")
+
+    def layout_names(self):
+        """Returns the names of the wall's cabinets, as generate_wall lays them out."""
+        cabinets = self.client.post("/api/generate_wall/", self.WALL, content_type="application/json").json()["cabinets"]
+        return [cabinet["name"] for cabinet in cabinets["bases"] + cabinets["uppers"]]
+
+    def test_svg(self):
+        """The SVG is well-formed, with a label for every cabinet."""
+        response = self.post(output="svg")
+        self.assertEqual(response["Content-Type"], "image/svg+xml")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="left-wall-120.svg"')
+        document = ElementTree.fromstring(content(response))
+        self.assertEqual(document.get("height"), str(render.PAGE_HEIGHT))
+        labels = [text.text for text in document.iter(f"{SVG}text")]
+        self.assertEqual(labels[0], "left wall (120 in)")
+        for name in self.layout_names():
+            self.assertIn(name, labels)
+
+    def test_pdf(self):
+        """The PDF's cross-reference table points at every object, and its page draws every cabinet."""
+        data = content(self.post())
+        self.assertTrue(data.startswith(b"%PDF-1.4"))
+        self.assertTrue(data.endswith(b"%%EOF\n"))
+        xref = int(re.search(rb"startxref\n(\d+)", data).group(1))
+        self.assertTrue(data[xref:].startswith(b"xref"))
+        offsets = re.findall(rb"(\d{10}) 00000 n", data[xref:])
+        for number, offset in enumerate(offsets, 1):
+            self.assertTrue(data[int(offset):].startswith(b"%d 0 obj" % number))
+        self.assertIn(b"/Count 1", data)
+
+        stream = re.search(rb"stream\n(.*?)\nendstream", data, re.S).group(1)
+        text = zlib.decompress(stream)
+        for name in self.layout_names():
+            self.assertIn(f"({name}) Tj".encode(), text)
+
+    def test_rejects_bad_requests(self):
+        """A missing width, an unknown format or an invalid orientation is a bad request."""
+        self.assertEqual(self.client.post("/api/render_wall/", {"orientation": "top"}, content_type="application/json").status_code, 400)
+        self.assertEqual(self.post(output="png").status_code, 400)
+        self.assertEqual(self.post(orientation="up").status_code, 400)
+
+
+class RenderProjectTests(TestCase):
+    """render_project draws one page per wall run of a saved project."""
+
+    def setUp(self):
+        cabinet_index.reset()  # Rooms are read from the (rolled back) test database again
+        self.addCleanup(cabinet_index.reset)
+        project = {"name": "Kitchen", "rooms": [
+            {"name": "Main", "walls": [
+                {"orientation": "left", "width": 120, "cabinets": [placement(36, 0), placement(30, 36, name="U")]},
+                {"orientation": "top", "width": 150},
+            ]},
+            {"name": "Pantry", "walls": [{"orientation": "top", "width": 96}]},
+        ]}
+        self.project_id = self.client.post("/api/projects/", project, content_type="application/json").json()["id"]
+
+    def test_pages(self):
+        """Each wall run gets a page, in order, drawn the same serially and in parallel."""
+        svg = content(self.client.get(f"/api/projects/{self.project_id}/render/?output=svg"))
+        pages = ElementTree.fromstring(svg).findall(f"{SVG}g")
+        titles = [page.find(f"{SVG}text").text for page in pages]
+        self.assertEqual(titles, [
+            "Kitchen / Main / left wall (120 in)", "Kitchen / Main / top wall (150 in)", "Kitchen / Pantry / top wall (96 in)",
+        ])
+        self.assertEqual(content(self.client.get(f"/api/projects/{self.project_id}/render/?output=svg&parallel=1")), svg)
+
+        pdf = content(self.client.get(f"/api/projects/{self.project_id}/render/"))
+        self.assertIn(b"/Count 3", pdf)
+
+    def test_saved_wall_sheet(self):
+        """Saved cabinets are split into bases and uppers by kind."""
+        sheet = render.saved_wall_sheet("wall", [
+            {"name": "B36", "width": 36, "height": 36, "depth": 24},
+            {"name": "U30", "width": 30, "height": 30, "depth": 12},
+            {"name": "F3", "width": 3, "height": 30, "depth": 12},
+        ])
+        self.assertEqual([c["name"] for c in sheet["bases"]], ["B36"])
+        self.assertEqual([c["name"] for c in sheet["uppers"]], ["U30", "F3"])
+
+    def test_missing_project(self):
+        """An unknown project is a 404."""
+        self.assertEqual(self.client.get("/api/projects/999/render/").status_code, 404)
@@ -0,0 +1,44 @@
+from django.test import TestCase
+
+
+class GenerateRoomTests(TestCase):
+    """generate_room lays out every wall of a room like generate_wall does."""
+
+    WALLS = [
+        {"width": 120, "orientation": "left"},
+        {"width": 147.375, "orientation": "top"},
+        {"width": 120, "orientation": "right"},
+        {"width": 96.5, "orientation": "top"},
+    ]
+
+    def post(self, url, data):
+        """Posts JSON to an endpoint and returns the response."""
+        return self.client.post(url, data, content_type="application/json")
+
+    def test_matches_generate_wall(self):
+        """Each wall, in request order, gets the layout generate_wall gives it."""
+        for strategy in (None, "greedy", "optimal"):
+            with self.subTest(strategy=strategy):
+                data = {"walls": self.WALLS}
+                if strategy:
+                    data["strategy"] = strategy
+                response = self.post("/api/generate_room/", data)
+                self.assertEqual(response.status_code, 200)
+                walls = response.json()["walls"]
+                self.assertEqual(len(walls), len(self.WALLS))
+                for wall, room_wall in zip(self.WALLS, walls):
+                    expected = self.post("/api/generate_wall/", {**wall, **({"strategy": strategy} if strategy else {})})
+                    self.assertEqual(room_wall["width"], wall["width"])
+                    self.assertEqual(room_wall["orientation"], wall["orientation"])
+                    self.assertEqual(room_wall["cabinets"], expected.json()["cabinets"])
+
+    def test_rejects_missing_walls(self):
+        """A room needs a non-empty list of walls, each with a width."""
+        for walls in (None, [], "walls", [{"orientation": "top"}], [5]):
+            with self.subTest(walls=walls):
+                self.assertEqual(self.post("/api/generate_room/", {"walls": walls}).status_code, 400)
+
+    def test_rejects_unknown_line(self):
+        """An unknown catalog line is a bad request."""
+        response = self.post("/api/generate_room/", {"walls": self.WALLS, "line": "nope"})
+        self.assertEqual(response.status_code, 400)
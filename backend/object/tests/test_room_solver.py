@@ -0,0 +1,167 @@
+import itertools
+
+from django.test import SimpleTestCase, TestCase
+
+from .. import geometry, room_solver
+from ..catalog import get_catalog
+from ..models.wall import Wall
+from ..tokens import CabinetToken
+
+
+def brute_force(widths, corners, layer, strategy="optimal"):
+    """Returns the cheapest cost of a room layer over every owner and size of every corner."""
+    catalog = get_catalog()
+    kind, corner_kind = room_solver.LAYERS[layer]
+    fill = Wall(width=0, catalog=catalog).get_fill(strategy)
+    sizes = catalog.widths(corner_kind)
+    options = [(owner, size) for size in sizes for owner in (0, 1)]
+    best = room_solver.INFEASIBLE
+    for choice in itertools.product(options, repeat=len(corners)):
+        spaces = list(widths)
+        owned = 0
+        for (first, second), (owner, size) in zip(corners, choice):
+            depth = catalog.item(corner_kind, size).depth
+            spaces[first] -= size if owner == 0 else depth
+            spaces[second] -= size if owner == 1 else depth
+            owned += 1
+        if min(spaces) < 0:
+            continue
+        cost = owned + sum(room_solver.fill_cost(fill(space, kind)) for space in spaces)
+        best = min(best, cost)
+    return best
+
+
+class SolveRoomTests(SimpleTestCase):
+    """solve_room picks the owner and size of every corner with the least filler."""
+
+    ROOMS = [
+        ([120, 96], None),
+        ([100.5, 147.375, 88], None),
+        ([72, 120, 72], [(0, 1), (1, 2), (2, 0)]),
+        ([60, 90, 75, 110], None),
+    ]
+
+    def test_matches_brute_force(self):
+        """The branch and bound finds the same cost as trying every corner option."""
+        for widths, corners in self.ROOMS:
+            with self.subTest(widths=widths, corners=corners):
+                solution = room_solver.solve_room(widths, corners)
+                chained = corners or room_solver.chain_corners(len(widths))
+                for layer in room_solver.LAYERS:
+                    cost = brute_force(widths, chained, layer)
+                    self.assertEqual((solution.filler[layer], solution.cabinets[layer]), room_solver.split_cost(cost))
+
+    def test_walls_add_up(self):
+        """Each wall's cabinets, plus the clearance of the corners it doesn't own, fill its width."""
+        catalog = get_catalog()
+        widths = [100.5, 147.375, 88]
+        solution = room_solver.solve_room(widths)
+        for layer, (_, corner_kind) in room_solver.LAYERS.items():
+            for index, width in enumerate(widths):
+                with self.subTest(layer=layer, wall=index):
+                    used = sum(token.width for token in solution.walls[index][layer])
+                    for corner in solution.corners:
+                        if index in corner["walls"] and corner[layer]["owner"] != index:
+                            used += catalog.item(corner_kind, corner[layer]["size"]).depth
+                    self.assertAlmostEqual(used, width)
+
+    def test_clearance_follows_corner_size(self):
+        """A wall that doesn't own a corner loses the depth of the size chosen there, not the widest one."""
+        catalog = get_catalog()
+        solution = room_solver.solve_room([96, 96])
+        corner = solution.corners[0]["bases"]
+        other = 1 - corner["owner"]
+        bases = [token for token in solution.walls[other]["bases"] if token.kind != CabinetToken.BASE_CORNER]
+        clearance = catalog.item(CabinetToken.BASE_CORNER, corner["size"]).depth
+        self.assertAlmostEqual(sum(token.width for token in bases), 96 - clearance)
+        self.assertEqual(solution.filler["bases"], 0)
+
+    def test_default_corners_chain_the_walls(self):
+        """Without corners, each wall meets the next one."""
+        self.assertEqual(room_solver.chain_corners(4), [(0, 1), (1, 2), (2, 3)])
+        solution = room_solver.solve_room([120, 96, 120])
+        self.assertEqual([corner["walls"] for corner in solution.corners], [[0, 1], [1, 2]])
+
+    def test_single_wall(self):
+        """A room of one wall has no corners and is filled like the wall on its own."""
+        fill = Wall(width=0).get_fill("optimal")
+        solution = room_solver.solve_room([147.375])
+        self.assertEqual(solution.corners, [])
+        for layer, (kind, _) in room_solver.LAYERS.items():
+            self.assertEqual([token.name for token in solution.walls[0][layer]],
+                             [token.name for token in fill(147.375, kind)])
+
+    def test_split_cost(self):
+        """A cost splits back into the filler and cabinets of the fill it came from."""
+        tokens = Wall(width=0).get_fill("optimal")(100.5, CabinetToken.BASE)
+        filler = sum(token.width for token in tokens if token.kind == CabinetToken.FILLER)
+        cabinets = sum(1 for token in tokens if token.kind != CabinetToken.FILLER)
+        self.assertEqual(room_solver.split_cost(room_solver.fill_cost(tokens)), (filler, cabinets))
+
+    def test_rejects_bad_corners(self):
+        """Corners must join two different existing walls, each end at most once."""
+        for corners in ([(0, 3)], [(0, 0)], [(0, 1), (0, 2)], [(0, 2), (1, 2)], [(0,)], [(0, "1")]):
+            with self.subTest(corners=corners):
+                with self.assertRaises(ValueError):
+                    room_solver.validate_corners(3, corners)
+        room_solver.validate_corners(3, [(0, 1), (1, 2), (2, 0)])
+
+    def test_rejects_short_walls(self):
+        """Walls too short for any corner cabinet can't be solved."""
+        with self.assertRaises(ValueError):
+            room_solver.solve_room([20, 20])
+
+    def test_rejects_too_many_walls(self):
+        """Rooms are capped at MAX_WALLS walls."""
+        with self.assertRaises(ValueError):
+            room_solver.solve_room([120] * (room_solver.MAX_WALLS + 1))
+
+    def test_rejects_missing_strategy(self):
+        """The space between corners needs a fill strategy."""
+        with self.assertRaises(ValueError):
+            room_solver.solve_room([120, 96], strategy=None)
+
+
+class GenerateRoomSolverTests(TestCase):
+    """generate_room with solver "corners" returns the solver's layout."""
+
+    WALLS = [
+        {"width": 100.5, "orientation": "left"},
+        {"width": 147.375, "orientation": "top"},
+        {"width": 88, "orientation": "right"},
+    ]
+
+    def post(self, data):
+        """Posts JSON to generate_room and returns the response."""
+        return self.client.post("/api/generate_room/", data, content_type="application/json")
+
+    def test_returns_solution(self):
+        """The response has the solver's corners and filler and a layout per wall."""
+        response = self.post({"walls": self.WALLS, "solver": "corners"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        solution = room_solver.solve_room([wall["width"] for wall in self.WALLS])
+        self.assertEqual(data["corners"], solution.corners)
+        self.assertEqual(data["filler"], solution.filler)
+        self.assertEqual(len(data["walls"]), len(self.WALLS))
+        for wall, room_wall, layout in zip(self.WALLS, data["walls"], solution.walls):
+            self.assertEqual(room_wall["orientation"], wall["orientation"])
+            self.assertEqual([cabinet["name"] for cabinet in room_wall["cabinets"]["bases"]],
+                             [token.name for token in layout["bases"]])
+
+    def test_custom_corners(self):
+        """Listed corners replace the default chain."""
+        response = self.post({"walls": self.WALLS, "solver": "corners", "corners": [[2, 0]]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([corner["walls"] for corner in response.json()["corners"]], [[2, 0]])
+
+    def test_rejects_bad_requests(self):
+        """Unknown solvers, invalid corners and walls too short for their corners are bad requests."""
+        for data in (
+            {"walls": self.WALLS, "solver": "bogus"},
+            {"walls": self.WALLS, "solver": "corners", "corners": [[0, 5]]},
+            {"walls": self.WALLS, "solver": "corners", "corners": [[1, 1]]},
+            {"walls": [{"width": 20}, {"width": 20}], "solver": "corners"},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.post(data).status_code, 400)
@@ -0,0 +1,67 @@
+from django.test import SimpleTestCase, TestCase
+
+from .. import search
+from ..tokens import CabinetToken
+
+
+class ScoreLayoutTests(SimpleTestCase):
+    """score_layout weighs each objective of a layout."""
+
+    def test_objectives(self):
+        """Filler inches, cabinets, asymmetry and small boxes are measured and weighted."""
+        tokens = [CabinetToken(CabinetToken.BASE, 36), CabinetToken(CabinetToken.BASE, 18), CabinetToken(CabinetToken.FILLER, 1.5)]
+        total, objectives = search.score_layout(tokens)
+        self.assertEqual(objectives, {"filler": 1.5, "cabinets": 2, "symmetry": 18, "small_boxes": 0.5})
+        self.assertAlmostEqual(total, 10 * 1.5 + 2 + 0.1 * 18 + 0.5)
+        total, _ = search.score_layout(tokens, {"filler": 0, "cabinets": 0, "symmetry": 0, "small_boxes": 1})
+        self.assertEqual(total, 0.5)
+
+    def test_check_weights(self):
+        """Weights are merged with the defaults; unknown objectives and bad values are refused."""
+        self.assertEqual(search.check_weights(None), search.DEFAULT_WEIGHTS)
+        self.assertEqual(search.check_weights({"filler": 2})["filler"], 2)
+        for weights in ({"beauty": 1}, {"filler": "high"}, {"filler": -1}, {"filler": True}, [1]):
+            with self.subTest(weights=weights), self.assertRaises(ValueError):
+                search.check_weights(weights)
+
+
+class SearchWallTests(TestCase):
+    """search_wall finds the best-scoring candidate, and the endpoint checks its requests."""
+
+    def test_finds_best_candidate(self):
+        """With time to finish, the search returns the candidate an exhaustive serial scan picks."""
+        result = search.search_wall(100, "top", time_budget=60)
+        self.assertTrue(result["complete"])
+        expected_evaluated = 0
+        for part, generations in zip(("bases", "uppers"), search.ORIENTATION_GENERATIONS["top"]):
+            with self.subTest(part=part):
+                every = list(search.candidates(generations))
+                expected_evaluated += len(every)
+                score, _, candidate = search.evaluate_chunk(100, every, None)
+                chosen = result[f"{part}_candidate"]
+                self.assertEqual(chosen["score"], score)
+                self.assertEqual(
+                    (chosen["generation"], chosen["strategy"], chosen["pattern"]),
+                    (candidate[0], candidate[1], list(candidate[2]) if candidate[2] else None),
+                )
+        self.assertEqual(result["evaluated"], expected_evaluated)
+
+    def test_endpoint(self):
+        """The endpoint returns the layout and candidates, and refuses bad requests with a 400."""
+        response = self.client.post(
+            "/api/search_wall/", {"width": 100, "orientation": "top", "time_budget": 0}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()["cabinets"]), {"bases", "uppers"})
+
+        for data in (
+            {"orientation": "top"},
+            {"width": 100, "orientation": "sideways"},
+            {"width": "wide", "orientation": "top"},
+            {"width": 100, "orientation": "top", "weights": {"beauty": 1}},
+            {"width": 100, "orientation": "top", "weights": {"filler": "high"}},
+            {"width": 100, "orientation": "top", "time_budget": "soon"},
+        ):
+            with self.subTest(data=data):
+                response = self.client.post("/api/search_wall/", data, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,170 @@
+import random
+
+from django.test import SimpleTestCase, TestCase
+
+from ..models.cabinet import Cabinet
+from ..models.project import WallRun
+from ..spatial import GridIndex, SpatialIndex, cabinet_index, overlaps
+from .test_place_cabinets import placement
+
+
+class GridIndexTests(SimpleTestCase):
+    """GridIndex finds the same rectangles as a scan over every stored one."""
+
+    def test_query_matches_scan(self):
+        """Queries of every size return the overlapping rectangles, ordered by position."""
+        generator = random.Random(20)
+        grid = GridIndex(cell_size=24)
+        rectangles = {}
+        for key in range(300):
+            x, y = generator.uniform(0, 600), generator.uniform(0, 300)
+            rectangles[key] = (x, y, x + generator.choice((9, 18, 24, 36)), y + generator.choice((12, 24)))
+            grid.insert(key, rectangles[key], key)
+        for key in range(0, 300, 3):  # Removed and moved rectangles are no longer found where they were
+            grid.remove(key)
+            del rectangles[key]
+        for key in range(1, 300, 3):
+            x, y = generator.uniform(0, 600), generator.uniform(0, 300)
+            rectangles[key] = (x, y, x + 30, y + 24)
+            grid.insert(key, rectangles[key], key)
+        self.assertEqual(len(grid), len(rectangles))
+
+        for _ in range(200):
+            x, y = generator.uniform(-50, 650), generator.uniform(-50, 350)
+            query = (x, y, x + generator.uniform(1, 400), y + generator.uniform(1, 200))
+            expected = sorted((bounds[0], bounds[1], key) for key, bounds in rectangles.items() if overlaps(bounds, query))
+            self.assertEqual(grid.query(*query), [key for _, _, key in expected])
+
+    def test_edges(self):
+        """Touching rectangles don't overlap, empty ones aren't stored and excluded keys are skipped."""
+        grid = GridIndex()
+        grid.insert("a", (0, 0, 36, 24), "a")
+        grid.insert("b", (36, 0, 66, 24), "b")
+        grid.insert("empty", (70, 0, 70, 24), "empty")
+        self.assertNotIn("empty", grid)
+        self.assertEqual(grid.query(30, 0, 40, 24), ["a", "b"])
+        self.assertEqual(grid.query(36, 0, 40, 24), ["b"])
+        self.assertEqual(grid.query(30, 0, 40, 24, exclude="a"), ["b"])
+        self.assertEqual(grid.query(0, 24, 66, 48), [])
+        self.assertEqual(grid.query(10, 10, 10, 20), [])
+        grid.remove("a")
+        grid.remove("missing")
+        self.assertEqual(grid.query(0, 0, 36, 24), [])
+        self.assertEqual(grid.cells.keys(), {(1, 0), (2, 0)})
+
+
+class SpatialIndexTests(TestCase):
+    """SpatialIndex keeps each room's footprints per layer, in step with the saved cabinets."""
+
+    def setUp(self):
+        cabinet_index.reset()
+        self.addCleanup(cabinet_index.reset)
+
+    def test_follows_saves_and_deletes(self):
+        """Cabinets saved, moved and deleted one at a time are indexed by the signal handlers."""
+        base = Cabinet(name="B", width=36, height=34.5, depth=24, position_x=0, position_y=0)
+        base.save()
+        self.assertEqual([footprint.id for footprint in cabinet_index.query(None, 0, 0, 120, 24)], [base.pk])
+        base.position_x = 60
+        base.save()
+        self.assertEqual(cabinet_index.query(None, 0, 0, 50, 24), [])
+        self.assertEqual(len(cabinet_index.query(None, 60, 0, 70, 24)), 1)
+        base.delete()
+        self.assertEqual(cabinet_index.query(None, 0, 0, 120, 24), [])
+
+    def test_layers(self):
+        """A base and an upper over the same spot are on different layers and don't conflict."""
+        Cabinet(name="B", width=36, height=34.5, depth=24, position_x=0, position_y=0).save()
+        upper = Cabinet(name="U", width=36, height=30, depth=12, position_x=0, position_y=0)
+        self.assertEqual(cabinet_index.conflicts([upper]), [[]])
+        upper.save()
+        self.assertEqual([footprint.name for footprint in cabinet_index.query(None, 0, 0, 36, 24)], ["B36", "U36"])
+        self.assertEqual([footprint.name for footprint in cabinet_index.query(None, 0, 0, 36, 24, "uppers")], ["U36"])
+        with self.assertRaises(ValueError):
+            cabinet_index.query(None, 0, 0, 36, 24, "tops")
+
+    def test_batch_conflicts(self):
+        """Cabinets of a batch conflict with earlier ones, unless those were left out."""
+        cabinets = [
+            Cabinet(name="B", width=36, height=34.5, depth=24, position_x=x, position_y=0)
+            for x in (0, 30, 60)
+        ]
+        self.assertEqual(cabinet_index.conflicts(cabinets), [[], [0], [1]])
+        self.assertEqual(cabinet_index.conflicts(cabinets, keep_conflicting=False), [[], [0], []])
+
+    def test_rooms_are_separate(self):
+        """Cabinets on wall runs of different rooms never overlap, and stale grids are read again."""
+        project = {"name": "Kitchen", "rooms": [
+            {"name": name, "walls": [{"orientation": "top", "width": 120, "cabinets": [placement(36, 0)]}]}
+            for name in ("Main", "Pantry")
+        ]}
+        self.client.post("/api/projects/", project, content_type="application/json")
+        first, second = WallRun.objects.order_by("id")
+        self.assertEqual(len(cabinet_index.query(first.room_id, 0, 0, 36, 24)), 1)
+        self.assertEqual(cabinet_index.query(None, 0, 0, 36, 24), [])
+
+        moved = Cabinet(name="B", width=30, height=36, depth=24, position_x=0, position_y=0, wall_run=second)
+        self.assertEqual(len(cabinet_index.conflicts([moved])[0]), 1)
+        moved.wall_run = None
+        self.assertEqual(cabinet_index.conflicts([moved]), [[]])
+
+        index = SpatialIndex(max_age=0)
+        self.assertEqual(len(index.query(first.room_id, 0, 0, 36, 24)), 1)
+        Cabinet.objects.filter(wall_run=first).update(position_x=60)  # No signals
+        self.assertEqual(index.query(first.room_id, 0, 0, 36, 24), [])
+
+
+class OverlapEndpointTests(TestCase):
+    """place_cabinet, place_cabinets and cabinets_in_rect use the spatial index."""
+
+    def setUp(self):
+        cabinet_index.reset()
+        self.addCleanup(cabinet_index.reset)
+
+    def post(self, url, data):
+        """Posts JSON to an endpoint and returns the response."""
+        return self.client.post(url, data, content_type="application/json")
+
+    def test_place_cabinet_modes(self):
+        """An overlapping cabinet is refused with 409 by default and saved with on_overlap "report"."""
+        self.assertEqual(self.post("/api/place_cabinet/", placement(36, 1, 1)).status_code, 200)
+        response = self.post("/api/place_cabinet/", placement(30, 20, 1))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([found["name"] for found in response.json()["overlaps"]], ["B36"])
+        self.assertEqual(Cabinet.objects.count(), 1)
+
+        response = self.post("/api/place_cabinet/", {**placement(30, 20, 1), "on_overlap": "report"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([found["position_x"] for found in response.json()["overlaps"]], [1])
+        self.assertEqual(Cabinet.objects.count(), 2)
+        self.assertEqual(self.post("/api/place_cabinet/", {**placement(30, 200, 1), "on_overlap": "no"}).status_code, 400)
+
+    def test_place_cabinets_modes(self):
+        """Overlapping placements are errors by default, or saved and listed under "overlaps"."""
+        batch = [placement(36, 0), placement(36, 30), placement(36, 100)]
+        response = self.post("/api/place_cabinets/", {"cabinets": batch, "partial": True})
+        self.assertEqual([cabinet["position_x"] for cabinet in response.json()["placed_cabinets"]], [0, 100])
+        self.assertEqual(response.json()["errors"][0]["index"], 1)
+        self.assertEqual(response.json()["errors"][0]["overlaps"], [{"index": 0}])
+
+        response = self.post("/api/place_cabinets/", {"cabinets": [placement(36, 90)]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Cabinet.objects.count(), 2)
+
+        response = self.post("/api/place_cabinets/", {"cabinets": [placement(36, 90)], "on_overlap": "report"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([found["position_x"] for found in response.json()["overlaps"][0]["overlaps"]], [100])
+
+    def test_cabinets_in_rect(self):
+        """The endpoint lists the footprints in a rectangle and rejects bad parameters."""
+        self.post("/api/place_cabinets/", {"cabinets": [placement(36, 0), placement(30, 36), placement(24, 200)]})
+        url = "/api/cabinets/in_rect/"
+        response = self.client.get(url, {"x": 30, "y": 0, "width": 20, "depth": 24})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([found["name"] for found in response.json()["cabinets"]], ["B36", "B30"])
+        response = self.client.get(url, {"x": 0, "y": 0, "width": 300, "depth": 24, "layer": "uppers"})
+        self.assertEqual(response.json()["cabinets"], [])
+        for params in ({"x": 0, "y": 0, "width": 10}, {"x": "a", "y": 0, "width": 10, "depth": 10},
+                       {"x": 0, "y": 0, "width": 10, "depth": 10, "layer": "tops"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
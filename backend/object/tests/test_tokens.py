@@ -0,0 +1,47 @@
+from django.test import SimpleTestCase
+
+from .. import geometry
+from ..tokens import CabinetToken
+from ..views import extract_cabinet_details
+
+
+class CabinetTokenTests(SimpleTestCase):
+    """CabinetTokens carry a kind code and a width in quanta, and only format names at the edge."""
+
+    def test_names(self):
+        """Each kind formats with its prefix, whole widths without a decimal point."""
+        self.assertEqual(CabinetToken(CabinetToken.BASE, 36).name, "B36")
+        self.assertEqual(CabinetToken(CabinetToken.UPPER, 30.0).name, "U30")
+        self.assertEqual(CabinetToken(CabinetToken.FILLER, 4.5).name, "F4.5")
+        self.assertEqual(CabinetToken(CabinetToken.BASE_CORNER, 36).name, "BC36")
+        self.assertEqual(str(CabinetToken(CabinetToken.UPPER_CORNER, 24)), "UC24")
+
+    def test_from_name_round_trips(self):
+        """Parsing a name gives back the token, two-letter prefixes included."""
+        for kind, width in ((CabinetToken.BASE, 36), (CabinetToken.BASE_CORNER, 33), (CabinetToken.UPPER_CORNER, 24),
+                            (CabinetToken.FILLER, 0.375), (CabinetToken.UPPER, 9)):
+            token = CabinetToken(kind, width)
+            with self.subTest(name=token.name):
+                self.assertEqual(CabinetToken.from_name(token.name), token)
+
+    def test_from_name_rejects_unknown_names(self):
+        """Names without a known prefix and a width are refused."""
+        for name in ("X36", "B", "Bwide", ""):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                CabinetToken.from_name(name)
+
+    def test_equality_and_hashing(self):
+        """Tokens are equal (and hash alike) when their kind and width in quanta match."""
+        units = geometry.to_units(36)
+        self.assertEqual(CabinetToken(CabinetToken.BASE, 36), CabinetToken.from_units(CabinetToken.BASE, units))
+        self.assertNotEqual(CabinetToken(CabinetToken.BASE, 36), CabinetToken(CabinetToken.UPPER, 36))
+        self.assertEqual(len({CabinetToken(CabinetToken.BASE, 36), CabinetToken(CabinetToken.BASE, 36.0)}), 1)
+        self.assertTrue(CabinetToken(CabinetToken.BASE_CORNER, 36).is_corner)
+        self.assertFalse(CabinetToken(CabinetToken.FILLER, 3).is_corner)
+
+    def test_extract_cabinet_details(self):
+        """The API edge turns tokens into names and dimensions."""
+        tokens = [CabinetToken(CabinetToken.BASE, 36), CabinetToken(CabinetToken.FILLER, 1.5)]
+        details = extract_cabinet_details(tokens, is_base=True)
+        self.assertEqual([cabinet["name"] for cabinet in details], ["B36", "F1.5"])
+        self.assertEqual([cabinet["width"] for cabinet in details], [36, 1.5])
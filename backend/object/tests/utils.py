@@ -0,0 +1,17 @@
+"""Helpers shared by the test modules."""
+
+from ..models.wall import Wall
+
+GENERATIONS = ("b1", "b2", "b3", "u1", "u2", "u3")
+STRATEGIES = (None,) + tuple(Wall.FILL_STRATEGIES)
+
+
+def layout(width, generation, strategy=None, catalog=None):
+    """Returns the CabinetTokens a generation method lays out for a wall width (with an optional fill strategy)."""
+    wall = Wall(width=width, catalog=catalog)
+    return wall.generate(generation, wall.get_fill(strategy))
+
+
+def names(tokens):
+    """Returns the names of some CabinetTokens (e.g. ["B36", "F1.5"])."""
+    return [token.name for token in tokens]
@@ -0,0 +1,110 @@
+from . import geometry
+
+
+class CabinetToken:
+    """
+    One cabinet (or filler) in a generated layout, as a kind code and a width.
+
+    The layout engines in Wall build lists of tokens and everything downstream (the layout table,
+    the cache, extract_cabinet_details) reads the kind and width directly. The width is kept as a
+    whole number of quanta (see object/geometry.py), so tokens compare and hash exactly, and it is
+    only turned back into inches by the width property. Names such as "B36", "BC36" or "F4.5" are
+    only formatted at the API edge through the name property.
+
+    Typical usage example:
+
+        token = CabinetToken(CabinetToken.BASE, 36)
+        token.name  # "B36"
+        token.units  # 576 (with sixteenths)
+    """
+
+    __slots__ = ("kind", "units")
+
+    # Kind codes (also the values stored in the layout table)
+    BASE = 0
+    UPPER = 1
+    FILLER = 2
+    BASE_CORNER = 3
+    UPPER_CORNER = 4
+
+    # Name prefix for each kind code, indexed by code
+    PREFIXES = ("B", "U", "F", "BC", "UC")
+
+    def __init__(self, kind, width):
+        """
+        Initializes a token.
+
+        Args:
+            kind (int): One of the kind codes (BASE, UPPER, FILLER, BASE_CORNER, UPPER_CORNER).
+            width (float): The width of the cabinet (in inches, rounded to the nearest quantum).
+        """
+        self.kind = kind
+        self.units = geometry.to_units(width)
+
+    @classmethod
+    def from_units(cls, kind, units):
+        """
+        Creates a token from a width that is already in quanta (as the layout engines have it).
+
+        Args:
+            kind (int): One of the kind codes.
+            units (int): The width of the cabinet (in quanta).
+
+        Returns:
+            CabinetToken: The token.
+        """
+        token = cls.__new__(cls)
+        token.kind = kind
+        token.units = units
+        return token
+
+    @property
+    def width(self):
+        """The width of the cabinet in inches (an int when it is a whole number of inches)."""
+        return geometry.to_inches(self.units)
+
+    @property
+    def name(self):
+        """The cabinet's name as shown to users (e.g. "B36" or "F4.5")."""
+        return f"{CabinetToken.PREFIXES[self.kind]}{self.width}"
+
+    @property
+    def is_corner(self):
+        """Whether the token is a base or upper corner cabinet."""
+        return self.kind in (CabinetToken.BASE_CORNER, CabinetToken.UPPER_CORNER)
+
+    @classmethod
+    def from_name(cls, name):
+        """
+        Parses a cabinet name (e.g. "B36", "UC24" or "F4.5") back into a token.
+
+        Args:
+            name (str): The cabinet name.
+
+        Returns:
+            CabinetToken: The parsed token.
+
+        Raises:
+            ValueError: If the name does not start with a known prefix followed by a width.
+        """
+        # Check the two-letter prefixes first so "BC36" isn't read as a base cabinet
+        for kind in sorted(range(len(cls.PREFIXES)), key=lambda k: -len(cls.PREFIXES[k])):
+            prefix = cls.PREFIXES[kind]
+            if name.startswith(prefix):
+                return cls(kind, float(name[len(prefix):]))
+        raise ValueError(f"Invalid cabinet name: {name}")
+
+    def __eq__(self, other):
+        if not isinstance(other, CabinetToken):
+            return NotImplemented
+        return self.kind == other.kind and self.units == other.units
+
+    def __hash__(self):
+        return hash((self.kind, self.units))
+
+    def __repr__(self):
+        return f"CabinetToken({self.name})"
+
+    def __str__(self):
+        """Returns the name of the cabinet as a string."""
+        return self.name
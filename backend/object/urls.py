@@ -1,7 +1,40 @@
 from django.urls import path
-from .views import place_cabinet, generate_wall
+from . import async_views
+from .views import (
+    place_cabinet, place_cabinets, generate_wall, generate_room, search_wall, layout_cache_stats,
+    relayout_wall, render_wall, create_project, get_project, render_project, bill_of_materials,
+    layout_bill_of_materials, wall_run_layout, wall_run_obstacles, cabinets_in_rect, cabinet_catalog,
+    quote, kbest_wall, submit_job, job_status, job_result, cancel_job
+)
 
 urlpatterns = [
     path('place_cabinet/', place_cabinet, name='place_cabinet'),
-    path('generate_wall/', generate_wall, name='generate_wall')
+    path('place_cabinets/', place_cabinets, name='place_cabinets'),
+    path('generate_wall/', generate_wall, name='generate_wall'),
+    path('generate_room/', generate_room, name='generate_room'),
+    path('search_wall/', search_wall, name='search_wall'),
+    path('kbest_wall/', kbest_wall, name='kbest_wall'),
+    path('relayout_wall/', relayout_wall, name='relayout_wall'),
+    path('render_wall/', render_wall, name='render_wall'),
+    path('layout_cache_stats/', layout_cache_stats, name='layout_cache_stats'),
+    path('catalog/', cabinet_catalog, name='cabinet_catalog'),
+    path('quote/', quote, name='quote'),
+    path('projects/', create_project, name='create_project'),
+    path('projects/<int:project_id>/', get_project, name='get_project'),
+    path('projects/<int:project_id>/render/', render_project, name='render_project'),
+    path('wall_runs/<int:wall_run_id>/layout/', wall_run_layout, name='wall_run_layout'),
+    path('wall_runs/<int:wall_run_id>/obstacles/', wall_run_obstacles, name='wall_run_obstacles'),
+    path('cabinets/in_rect/', cabinets_in_rect, name='cabinets_in_rect'),
+    path('bom/', bill_of_materials, name='bill_of_materials'),
+    path('bom/layout/', layout_bill_of_materials, name='layout_bill_of_materials'),
+    path('jobs/', submit_job, name='submit_job'),
+    path('jobs/<int:job_id>/', job_status, name='job_status'),
+    path('jobs/<int:job_id>/result/', job_result, name='job_result'),
+    path('jobs/<int:job_id>/cancel/', cancel_job, name='cancel_job'),
+
+    # Native async versions of the endpoints above (for running under ASGI)
+    path('async/place_cabinet/', async_views.place_cabinet, name='async_place_cabinet'),
+    path('async/place_cabinets/', async_views.place_cabinets, name='async_place_cabinets'),
+    path('async/generate_wall/', async_views.generate_wall, name='async_generate_wall'),
+    path('async/generate_room/', async_views.generate_room, name='async_generate_room')
 ]
\ No newline at end of file
@@ -1,8 +1,24 @@
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from .models.cabinet import Cabinet
+from .models.job import Job
+from .models.obstacle import Obstacle
+from .models.project import Project, Room, WallRun
 from .models.wall import Wall
-import traceback
+from . import bom, geometry, incremental, jobs, kbest, layout_table, obstacles, pricing, projects, render, room_solver, search
+from .cache import layout_cache
+from .catalog import get_catalog, get_lines
+from .spatial import cabinet_index
+from .tokens import CabinetToken
+from backend.metrics import timed
+import itertools
+import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 @api_view(['POST'])
 def place_cabinet(request):
@@ -13,43 +29,51 @@ def place_cabinet(request):
     - cabinet: A dictionary containing the cabinet's attributes (name, width, height, depth).
     - x: The x-coordinate for positioning the cabinet.
     - y: The y-coordinate for positioning the cabinet.
+    - on_overlap (optional): "reject" (the default) to refuse a cabinet whose footprint overlaps a
+      placed cabinet of the same layer (bases or uppers), or "report" to save it anyway.
 
-    If successful, the endpoint will save the cabinet in the database and return its details.
+    If successful, the endpoint will save the cabinet in the database and return its details, with
+    the placed cabinets it overlaps under "overlaps". A rejected cabinet gets status 409 and the same
+    "overlaps" list.
     """
-    
-    print("Request data:", request.data)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("place_cabinet request", extra={"data": request.data})
 
     # Gather the needed data from the request (will be used to call place_cabinet from utils)
     cabinet_data = request.data.get('cabinet')
-    print('cabinet data:', cabinet_data)
     x = request.data.get('x')
     y = request.data.get('y')
 
     # Ensure that all necessary data has been provided
     if not cabinet_data or not x or not y:
         return Response({'error': 'not all parameters entered for place_cabinet'}, status=400)
+    on_overlap = request.data.get('on_overlap', 'reject')
+    if on_overlap not in OVERLAP_MODES:
+        return Response({'error': f'on_overlap must be one of {list(OVERLAP_MODES)}'}, status=400)
     
     try:
-        print('about to place cabinet')
         # Create a new Cabinet object from the provided data
         cabinet = Cabinet(
             name=cabinet_data['name'],
             width=cabinet_data['width'],
             height=cabinet_data['height'],
             depth=cabinet_data['depth'],
-            position_x=float(x),
-            position_y=float(y)
+            position_x=geometry.snap(x),
+            position_y=geometry.snap(y)
         )
-        print('placed cabinet')
-        # Save the newly created cabinet to the database
-        cabinet.save()
-        print('saved cabinet')
+        # Check the cabinet's footprint against the placed cabinets and save it
+        overlapping, saved = save_cabinet(cabinet, on_overlap)
+        if not saved:
+            return Response({
+                'error': 'The cabinet overlaps placed cabinets',
+                'overlaps': overlap_details(overlapping)
+            }, status=409)
     except KeyError as e:
         # Return an error if any key is missing in the cabinet data
         return Response({'error:' f'Missing key in cabinet data: {str(e)}'}, status=400)
     except Exception as e:
         # Return a general error for any exceptions that occur
-        print(f"Exception occurred: {str(e)}")
+        logger.exception("place_cabinet failed")
         return Response({'error:', str(e)}, status=500)
 
     # Prepare the response data containing the cabinet's details
@@ -62,7 +86,65 @@ def place_cabinet(request):
         'position_y': cabinet.get_position()['y']
     }
 
-    return Response({'placed_cabinet': response_data})
+    return Response({'placed_cabinet': response_data, 'overlaps': overlap_details(overlapping)})
+
+@api_view(['POST'])
+def place_cabinets(request):
+    """
+    API endpoint to place many cabinets at once.
+
+    This endpoint accepts a POST request with the following JSON payload:
+    - cabinets: A list of placements, each with the same fields as place_cabinet
+      (cabinet: {name, width, height, depth}, x, y).
+    - wall_run (optional, per placement): The id of the saved wall run the cabinet is placed on.
+    - partial (optional): If true (a JSON boolean), placements that fail validation are reported and
+      the valid ones are still saved. Otherwise (the default) a single invalid placement means nothing
+      is saved.
+    - on_overlap (optional): "reject" (the default) to treat a cabinet that overlaps a placed cabinet
+      or an earlier cabinet of the request as invalid, or "report" to save it anyway.
+
+    Every valid cabinet is written with one bulk insert inside a single transaction. The response lists
+    the saved cabinets (with their ids) under "placed_cabinets", the rejected placements, by their
+    index in the request, under "errors" and, in "report" mode, what each saved cabinet overlaps under
+    "overlaps".
+    """
+    placements = request.data.get('cabinets')
+    partial = request.data.get('partial', False)
+    on_overlap = request.data.get('on_overlap', 'reject')
+
+    # Ensure that a list of placements has been provided
+    if not isinstance(placements, list) or not placements:
+        return Response({'error': 'cabinets must be a non-empty list'}, status=400)
+    if on_overlap not in OVERLAP_MODES:
+        return Response({'error': f'on_overlap must be one of {list(OVERLAP_MODES)}'}, status=400)
+    if not isinstance(partial, bool):
+        return Response({'error': 'partial must be true or false'}, status=400)
+
+    # Validate every placement before touching the database
+    cabinets, errors = build_cabinets(placements)
+    if errors and not partial:
+        return Response({'placed_cabinets': [], 'errors': errors}, status=400)
+
+    try:
+        created, overlap_errors, reported = save_cabinets(
+            cabinets, placement_labels(placements, errors), on_overlap, partial
+        )
+        if overlap_errors:
+            errors = sorted(errors + overlap_errors, key=lambda error: error['index'])
+            if created is None:
+                return Response({'placed_cabinets': [], 'errors': errors}, status=400)
+    except Exception as e:
+        # Return a general error for any exceptions that occur
+        logger.exception("place_cabinets failed", extra={"count": len(cabinets)})
+        return Response({'error': str(e)}, status=500)
+
+    response = {
+        'placed_cabinets': [cabinet_details(cabinet) for cabinet in created],
+        'errors': errors
+    }
+    if on_overlap == 'report':
+        response['overlaps'] = reported
+    return Response(response)
 
 @api_view(['POST'])
 def generate_wall(request):
@@ -72,112 +154,1339 @@ def generate_wall(request):
     This endpoint accepts a POST request with the following JSON payload:
     - width: The width of the wall (in inches).
     - orientation: The orientation of the wall (one of "left", "top", or "right").
+    - strategy (optional): The fill strategy to use instead of the default for each orientation
+      (one of "greedy", "fixed_pattern", "rotating1", or "optimal").
+    - obstacles (optional): Windows, doors, openings and appliances on the wall, each with a kind
+      (see Obstacle.KIND_CHOICES), a start (inches from the start of the wall) and a width (appliances
+      default to their standard slot width).
+    - line (optional): The catalog line to lay the wall out from (see the catalog endpoint); defaults
+      to the active line.
 
     The response will return a layout of base and upper cabinets that fit within the wall's width.
+    With obstacles, each free segment between them is filled on its own, and the response also has
+    the pieces of each layer (cabinets or an obstacle, with their start and end) under "segments".
     """
     
     data = request.data
-    print("RECEIVED generate_wall request data:", data)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("generate_wall request", extra={"data": data})
 
     # Retrieve the width and orientation from the request
     width = data.get("width")
     orientation = data.get("orientation")  # Can be left, right, or top
+    strategy = data.get("strategy")  # Optional, see Wall.FILL_STRATEGIES
 
     # Ensure that the width is provided
     if width is None:
         return Response({"error": "Width is required"}, status=400)
-    
     try:
-        # Create a Wall object with the given width
-        wall = Wall(width=width)
+        line = get_catalog(data.get("line"))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    
+    if data.get("obstacles"):
+        try:
+            wall_obstacles = build_obstacles(data["obstacles"])
+            obstacles.validate_obstacles(float(width), wall_obstacles)
+            index = obstacles.ObstacleIndex(wall_obstacles)
+            return Response(obstacle_wall_payload(float(width), orientation, index, strategy, line))
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=400)
 
+    try:
         # Generate cabinets based on the wall's orientation
-        if orientation == "left":
-            wall.generation_b1()  # Generate base cabinets using method b1
-            wall.generation_u1()  # Generate upper cabinets using method u1
-        elif orientation == "top":
-            wall.generation_b2()  # Generate base cabinets using method b2
-            wall.generation_u2()  # Generate upper cabinets using method u2
-        elif orientation == "right":
-            wall.generation_b1()  # Generate base cabinets using method b1
-            wall.generation_u1()  # Generate upper cabinets using method u1
-        else:
-            # Raise an error if the orientation is not valid
-            raise ValueError(f"{orientation} is not a valid entry for orientation type")
-
-        # Prepare the response data with the generated cabinet layout
-        response_data = {
-            "cabinets": {
-                "bases": extract_cabinet_details(wall.bases, is_base=True),
-                "uppers": extract_cabinet_details(wall.uppers, is_base=False)
-            }
-        }
+        response_data = wall_payload(width, orientation, strategy, line)
 
-        print(f"Generated cabinets: {response_data}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("generate_wall response", extra={"cabinets": response_data["cabinets"]})
         return Response(response_data)
     
     except Exception as e:
         # Handle any exceptions and return the error in the response
-        print("Error in generate_wall:", str(e))
-        print(traceback.format_exc())
+        logger.exception("generate_wall failed", extra={"width": width, "orientation": orientation, "strategy": strategy})
+        return Response({"error": str(e)}, status=500)
+
+@api_view(['POST'])
+def generate_room(request):
+    """
+    Endpoint to generate the cabinet layouts for every wall of a room in one request.
+
+    This endpoint accepts a POST request with the following JSON payload:
+    - walls: A list of walls, each a dictionary with a width (in inches) and an orientation
+      (one of "left", "top", or "right").
+    - strategy (optional): The fill strategy used for every wall (see generate_wall).
+    - solver (optional): "corners" to lay out the room as one problem (see room_solver.py). Each wall
+      meets the next one at a corner unless "corners" lists the [wall, next wall] index pairs that meet;
+      the solver picks which wall owns each corner cabinet and the base corner sizes so the whole room
+      has the least filler. The strategy then defaults to "optimal".
+    - line (optional): The catalog line to lay the walls out from (see generate_wall).
+
+    Walls with the same width that use the same generation methods (such as matching left and right
+    walls) are only laid out once. The response contains one entry per wall, in request order, each with the same
+    "cabinets" layout that generate_wall returns for that wall. With the corner solver it also has the
+    chosen owner and size of each corner under "corners" and the total filler of the room under "filler".
+    """
+    walls = request.data.get("walls")
+    strategy = request.data.get("strategy")  # Optional, see Wall.FILL_STRATEGIES
+    solver = request.data.get("solver")
+
+    # Ensure that a list of walls with widths has been provided
+    error = validate_room(walls)
+    if error:
+        return Response({"error": error}, status=400)
+    if solver not in (None, "corners"):
+        return Response({"error": "solver must be \"corners\" if given"}, status=400)
+    try:
+        line = get_catalog(request.data.get("line"))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    try:
+        if solver == "corners":
+            try:
+                return Response(solved_room_payload(walls, request.data.get("corners"), strategy, line))
+            except (TypeError, ValueError) as e:
+                # Invalid widths, corners or strategy, or corners that don't fit their walls
+                return Response({"error": str(e)}, status=400)
+        return Response(room_payload(walls, strategy, line))
+
+    except Exception as e:
+        # Handle any exceptions and return the error in the response
+        logger.exception("generate_room failed", extra={"walls": len(walls), "strategy": strategy})
+        return Response({"error": str(e)}, status=500)
+
+@api_view(['POST'])
+def search_wall(request):
+    """
+    Endpoint that searches every candidate layout of a wall and returns the best-scoring one.
+
+    This endpoint accepts a POST request with the following JSON payload:
+    - width: The width of the wall (in inches).
+    - orientation: The orientation of the wall (one of "left", "top", or "right").
+    - weights (optional): Weights for the objectives (filler, cabinets, symmetry, small_boxes).
+    - time_budget (optional): Seconds to search for, capped at LAYOUT_SEARCH_TIME_BUDGET.
+    - line (optional): The catalog line to lay the wall out from (defaults to the active line).
+
+    The response contains the best layout (in the same "cabinets" format as generate_wall), the
+    generation method, strategy, pattern and score chosen for the bases and for the uppers, how many
+    candidates were evaluated and whether the search finished before the time budget ran out.
+    """
+    data = request.data
+    width = data.get("width")
+    orientation = data.get("orientation")  # Can be left, right, or top
+
+    # Ensure that the width is provided
+    if width is None:
+        return Response({"error": "Width is required"}, status=400)
+
+    try:
+        catalog = get_catalog(data.get("line"))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    # Check the rest of the request before starting the search
+    if orientation not in ORIENTATION_GENERATIONS:
+        return Response({"error": f"{orientation} is not a valid entry for orientation type"}, status=400)
+    try:
+        width = float(width)
+        search.check_weights(data.get("weights"))
+        max_budget = getattr(settings, "LAYOUT_SEARCH_TIME_BUDGET", 2.0)
+        time_budget = min(float(data.get("time_budget", max_budget)), max_budget)
+    except (TypeError, ValueError) as e:
+        return Response({"error": str(e)}, status=400)
+
+    try:
+        return Response(search_payload(width, orientation, data.get("weights"), time_budget, catalog=catalog))
+
+    except Exception as e:
+        # Handle any exceptions and return the error in the response
+        logger.exception("search_wall failed", extra={"width": width, "orientation": orientation})
+        return Response({"error": str(e)}, status=500)
+
+@api_view(['POST'])
+def kbest_wall(request):
+    """
+    Endpoint that streams the best distinct layouts of a wall, best first (see object/kbest.py).
+
+    This endpoint accepts a POST request with the following JSON payload:
+    - width: The width of the wall (in inches).
+    - orientation: The orientation of the wall (one of "left", "top", or "right").
+    - k (optional): How many layouts to list (default 10, at most KBEST_MAX_LAYOUTS).
+    - weights (optional): Weights for the objectives, as for search_wall (symmetry doesn't apply).
+    - line (optional): The catalog line to lay the wall out from (see generate_wall).
+
+    The response is newline-delimited JSON, one layout per line in score order, each with its rank,
+    score, objectives and cabinets (in the same "cabinets" format as generate_wall). No two layouts
+    are reorderings of the same cabinets. Layouts are found as they are written, so a client can stop
+    reading after the first few.
+    """
+    data = request.data
+    if data.get("width") is None:
+        return Response({"error": "Width is required"}, status=400)
+    orientation = data.get("orientation")
+    if orientation not in ORIENTATION_GENERATIONS:
+        return Response({"error": f"{orientation} is not a valid entry for orientation type"}, status=400)
+
+    try:
+        k = int(data.get("k", 10))
+        max_layouts = getattr(settings, "KBEST_MAX_LAYOUTS", 500)
+        if not 1 <= k <= max_layouts:
+            raise ValueError(f"k must be between 1 and {max_layouts}")
+        line = get_catalog(data.get("line"))
+        with timed("layout"):
+            layouts = kbest.wall_layouts(
+                float(data["width"]), ORIENTATION_GENERATIONS[orientation], line, data.get("weights")
+            )
+    except (TypeError, ValueError) as e:
+        return Response({"error": str(e)}, status=400)
+
+    return StreamingHttpResponse(ndjson_layouts(itertools.islice(layouts, k), line), content_type="application/x-ndjson")
+
+@api_view(['POST'])
+def relayout_wall(request):
+    """
+    Endpoint to update the layout of a wall after its width changed (for example while it is dragged).
+
+    This endpoint accepts a POST request with the following JSON payload:
+    - width: The new width of the wall (in inches).
+    - previous_width: The width the client's current layout was generated for (in inches).
+    - orientation: The orientation of the wall (one of "left", "top", or "right").
+    - strategy (optional): The fill strategy the layout was generated with (see generate_wall).
+    - diff (optional): If true (the default), only the changes are returned.
+    - line (optional): The catalog line the layout was generated from (see generate_wall).
+
+    Only the cabinets at the end of the run are recomputed (see object/incremental.py), so the cost
+    doesn't grow with the length of the wall. With diff, the response has one splice for the bases and
+    one for the uppers: the position of the first changed cabinet ("start"), how many of the current
+    cabinets to remove from there ("delete") and the cabinets to put in their place ("insert", with the
+    same details as generate_wall). Without diff, the response is the same as generate_wall's.
+    """
+    data = request.data
+    width = data.get("width")
+    previous_width = data.get("previous_width")
+    orientation = data.get("orientation")  # Can be left, right, or top
+    strategy = data.get("strategy")  # Optional, see Wall.FILL_STRATEGIES
+
+    # Ensure that both widths are provided
+    if width is None or previous_width is None:
+        return Response({"error": "width and previous_width are required"}, status=400)
+    if orientation not in ORIENTATION_GENERATIONS:
+        return Response({"error": f"{orientation} is not a valid entry for orientation type"}, status=400)
+
+    try:
+        line = get_catalog(data.get("line"))
+        results = {}
+        with timed("layout"):
+            for part, generation in zip(("bases", "uppers"), ORIENTATION_GENERATIONS[orientation]):
+                results[part] = incremental.relayout(generation, float(previous_width), float(width), strategy, line)
+
+        with timed("serialization"):
+            if data.get("diff", True):
+                payload = {"diff": {
+                    part: {
+                        "start": diff["start"],
+                        "delete": diff["delete"],
+                        "insert": extract_cabinet_details(diff["insert"], is_base=(part == "bases"), catalog=line)
+                    }
+                    for part, (_, diff) in results.items()
+                }}
+            else:
+                payload = {"cabinets": {
+                    part: extract_cabinet_details(layout.tokens(), is_base=(part == "bases"), catalog=line)
+                    for part, (layout, _) in results.items()
+                }}
+        return Response(payload)
+
+    except (TypeError, ValueError) as e:
+        return Response({"error": str(e)}, status=400)
+    except Exception as e:
+        # Handle any exceptions and return the error in the response
+        logger.exception("relayout_wall failed", extra={"width": width, "previous_width": previous_width})
         return Response({"error": str(e)}, status=500)
 
+@api_view(['POST'])
+def render_wall(request):
+    """
+    Endpoint that draws the layout of a wall as a vector shop drawing.
+
+    This endpoint accepts a POST request with the same JSON payload as generate_wall, plus:
+    - output (optional): "pdf" (the default) or "svg".
+
+    The response is a one-page drawing with an elevation and a plan view of the wall's cabinets.
+    """
+    data = request.data
+    width = data.get("width")
+    orientation = data.get("orientation")  # Can be left, right, or top
+    fmt = data.get("output", "pdf")
+
+    # Ensure that the width and a valid format are provided
+    if width is None:
+        return Response({"error": "Width is required"}, status=400)
+    if fmt not in render.CONTENT_TYPES:
+        return Response({"error": f"output must be one of {list(render.CONTENT_TYPES)}"}, status=400)
+
+    try:
+        payload = wall_payload(width, orientation, data.get("strategy"), get_catalog(data.get("line")))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    sheet = render.wall_sheet(f"{orientation} wall ({width} in)", payload["cabinets"])
+    return drawing_response(render.render([sheet], 1, fmt), fmt, f"{orientation}-wall-{width}")
+
+@api_view(['GET'])
+def render_project(request, project_id):
+    """
+    Endpoint that draws every wall of a saved project as a vector shop drawing, one page per wall run.
+
+    Query parameters:
+    - output (optional): "pdf" (the default) or "svg". (Not "format", which DRF keeps for itself.)
+    - parallel (optional): If 1, the pages are drawn in parallel on a process pool.
+
+    The drawing is streamed to the client page by page as it is drawn.
+    """
+    fmt = request.query_params.get("output", "pdf")
+    parallel = request.query_params.get("parallel") in ("1", "true")
+    if fmt not in render.CONTENT_TYPES:
+        return Response({"error": f"output must be one of {list(render.CONTENT_TYPES)}"}, status=400)
+
+    try:
+        payload = projects.load_project(project_id)
+    except Project.DoesNotExist:
+        return Response({"error": f"Project {project_id} does not exist"}, status=404)
+
+    count, sheets = render.project_sheets(payload)
+    return drawing_response(render.render(sheets, count, fmt, parallel), fmt, f"project-{project_id}")
+
+@api_view(['POST'])
+def create_project(request):
+    """
+    Endpoint to save a whole design as a project.
+
+    This endpoint accepts a POST request with the following JSON payload:
+    - name: The name of the project.
+    - rooms: A list of rooms, each with a name and a list of walls. Each wall has an orientation
+      (one of "left", "top", or "right"), a width (in inches), an optional list of cabinet
+      placements in the same format as place_cabinets and an optional list of obstacles in the same
+      format as generate_wall.
+    - on_overlap (optional): "reject" (the default) to refuse the project if two cabinets of a room
+      overlap, or "report" to save it anyway.
+
+    Everything is saved in one transaction with one bulk insert per table. The response (status 201)
+    is the saved project in the same format as get_project.
+    """
+    name = request.data.get('name')
+    rooms = request.data.get('rooms', [])
+    on_overlap = request.data.get('on_overlap', 'reject')
+
+    # Ensure that the project has a name and a list of rooms
+    if not name or not isinstance(rooms, list):
+        return Response({'error': 'name and a list of rooms are required'}, status=400)
+    if on_overlap not in OVERLAP_MODES:
+        return Response({'error': f'on_overlap must be one of {list(OVERLAP_MODES)}'}, status=400)
+    error = validate_project_rooms(rooms)
+    if error:
+        return Response({'error': error}, status=400)
+
+    try:
+        with transaction.atomic():
+            project = Project.objects.create(name=name)
+            room_objects = Room.objects.bulk_create([
+                Room(project=project, name=room.get('name', ''), position=position)
+                for position, room in enumerate(rooms)
+            ])
+            wall_objects = WallRun.objects.bulk_create([
+                WallRun(room=room_object, orientation=wall['orientation'], width=float(wall['width']), position=position)
+                for room_object, room in zip(room_objects, rooms)
+                for position, wall in enumerate(room.get('walls', []))
+            ])
+
+            cabinets = []
+            labels = []
+            wall_obstacles = []
+            errors = []
+            walls = [
+                (room_index, wall_index, wall)
+                for room_index, room in enumerate(rooms)
+                for wall_index, wall in enumerate(room.get('walls', []))
+            ]
+            for wall_object, (room_index, wall_index, wall) in zip(wall_objects, walls):
+                try:
+                    built = build_obstacles(wall.get('obstacles', []))
+                    obstacles.validate_obstacles(wall_object.width, built)
+                except (TypeError, ValueError) as e:
+                    errors.append({'room': room_index, 'wall': wall_index, 'error': str(e)})
+                    built = []
+                for obstacle in built:
+                    obstacle.wall_run = wall_object
+                wall_obstacles.extend(built)
+
+                wall_cabinets, wall_errors = build_cabinets(wall.get('cabinets', []))
+                for cabinet in wall_cabinets:
+                    cabinet.wall_run = wall_object
+                cabinets.extend(wall_cabinets)
+                labels.extend(
+                    {'room': room_index, 'wall': wall_index, **label}
+                    for label in placement_labels(wall.get('cabinets', []), wall_errors)
+                )
+                errors.extend({'room': room_index, 'wall': wall_index, **error} for error in wall_errors)
+            if not errors:
+                # The rooms are new, so their cabinets can only overlap each other
+                _, overlap_errors, _ = check_overlaps(cabinets, labels, on_overlap, placed=False)
+                errors.extend(overlap_errors)
+            if errors:
+                transaction.set_rollback(True)
+                return Response({'error': 'Invalid cabinet placements or obstacles', 'errors': errors}, status=400)
+            bom.record_cabinets(Cabinet.objects.bulk_create(cabinets))
+            Obstacle.objects.bulk_create(wall_obstacles)
+
+        return Response(projects.load_project(project.pk), status=201)
+
+    except Exception as e:
+        # Handle any exceptions and return the error in the response
+        logger.exception("create_project failed", extra={"project_name": name})
+        return Response({'error': str(e)}, status=500)
+
+@api_view(['GET'])
+def get_project(request, project_id):
+    """
+    Endpoint to load a whole saved project.
+
+    The response contains the project's id and name and its rooms, each with its wall runs and every
+    cabinet placed on them. It is read from the project's snapshot in one query when the snapshot is
+    up to date, or else in five queries however big the project is. Pass ?fresh=1 to skip the snapshot.
+    """
+    use_snapshot = request.query_params.get('fresh') not in ('1', 'true')
+    try:
+        return Response(projects.load_project(project_id, use_snapshot))
+    except Project.DoesNotExist:
+        return Response({'error': f'Project {project_id} does not exist'}, status=404)
+
+@api_view(['GET'])
+def bill_of_materials(request):
+    """
+    Endpoint that counts saved cabinets by SKU for purchasing.
+
+    Query parameters:
+    - project / room (optional): Only count the cabinets of this project or room (default: every project).
+    - group (optional): What each line is per besides the SKU: "total" (the default), "project", "room"
+      or "wall".
+    - source (optional): "summary" (the default) reads the incrementally maintained summary table,
+      "cabinets" counts the cabinet table itself.
+    - output (optional): "json" (the default) or "csv".
+
+    Each line has the SKU (e.g. "B36" or "F4.5"), kind, width, quantity and linear feet of the cabinets.
+    The JSON response has the lines under "lines" and their totals (cabinets, filler pieces and linear
+    feet of each) under "totals". The CSV is streamed to the client as the rows are read.
+    """
+    params = request.query_params
+    group = params.get('group', 'total')
+    source = params.get('source', 'summary')
+    fmt = params.get('output', 'json')
+    if fmt not in ('json', 'csv'):
+        return Response({'error': 'output must be one of json or csv'}, status=400)
+    try:
+        project_id = int(params['project']) if params.get('project') else None
+        room_id = int(params['room']) if params.get('room') else None
+        lines = bom.bom_lines(group, project_id, room_id, source)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    if fmt == 'csv':
+        response = StreamingHttpResponse(bom.stream_csv(lines, bom.bom_columns(group)), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="bom-{group}.csv"'
+        return response
+
+    lines = list(lines)
+    return Response({'lines': lines, 'totals': bom.bom_totals(lines)})
+
+@api_view(['POST'])
+def layout_bill_of_materials(request):
+    """
+    Endpoint that counts the cabinets of generated (unsaved) walls by SKU.
+
+    This endpoint accepts a POST request with the following JSON payload:
+    - walls: A list of walls, each with a width and an orientation, as for generate_room.
+    - strategy (optional): The fill strategy to lay the walls out with (see Wall.FILL_STRATEGIES).
+    - line (optional): The catalog line to lay the walls out from (see generate_wall).
+
+    The response has the same "lines" and "totals" as bill_of_materials for the whole set of walls.
+    """
+    walls = request.data.get('walls')
+    strategy = request.data.get('strategy')
+    error = validate_room(walls)
+    if error:
+        return Response({'error': error}, status=400)
+
+    try:
+        line = get_catalog(request.data.get('line'))
+        layouts = {}  # Each distinct wall is laid out once
+        tokens = []
+        for wall in walls:
+            key = (str(wall['width']), wall.get('orientation'))
+            if key not in layouts:
+                layouts[key] = layout_wall(float(wall['width']), wall.get('orientation'), strategy, line)
+            tokens.extend(layouts[key])
+    except (TypeError, ValueError) as e:
+        return Response({'error': str(e)}, status=400)
+
+    lines = bom.layout_lines(tokens)
+    return Response({'lines': lines, 'totals': bom.bom_totals(lines)})
+
+@api_view(['POST'])
+def quote(request):
+    """
+    Endpoint that prices layouts in cabinets, filler and install labor (see object/pricing.py).
+
+    This endpoint accepts a POST request with either of the following JSON payloads:
+    - width / orientation: A wall to lay out with each fill strategy and price, as for generate_wall.
+      - strategies (optional): The fill strategies to compare (see Wall.FILL_STRATEGIES), null being
+        the default of each orientation; defaults to the default and every fill strategy.
+    - layouts: Layouts to price, each with "bases" and "uppers" lists of cabinet names (e.g. "B36",
+      as returned by generate_wall).
+    With both, line (optional) is the catalog line to lay the wall out from and price from.
+
+    The response lists one quote per layout under "quotes", with its cabinet, filler and labor
+    costs, total, cabinet count, filler width (in inches), how many pieces were priced per inch
+    because the line has no price for them ("estimated"), and its bases and uppers (and strategy,
+    for a wall). "cheapest" is the position of the quote with the lowest total.
+    """
+    data = request.data
+    try:
+        line = get_catalog(data.get('line'))
+        if data.get('layouts') is not None:
+            if not isinstance(data['layouts'], list) or not all(isinstance(layout, dict) for layout in data['layouts']):
+                return Response({'error': 'layouts must be a list of objects with bases and uppers'}, status=400)
+            candidates = [
+                {part: [CabinetToken.from_name(name) for name in layout.get(part, [])] for part in ('bases', 'uppers')}
+                for layout in data['layouts']
+            ]
+        else:
+            if data.get('width') is None:
+                return Response({'error': 'Width or layouts is required'}, status=400)
+            width = float(data['width'])
+            strategies = data.get('strategies', [None, *Wall.FILL_STRATEGIES])
+            if not isinstance(strategies, list):
+                return Response({'error': 'strategies must be a list'}, status=400)
+            candidates = []
+            for strategy in strategies:
+                with timed("layout"):
+                    bases, uppers = layout_wall(width, data.get('orientation'), strategy, line)
+                candidates.append({'strategy': strategy, 'bases': bases, 'uppers': uppers})
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        return Response({'error': str(e)}, status=400)
+    if not candidates:
+        return Response({'error': 'Nothing to price'}, status=400)
+
+    try:
+        with timed("pricing"):
+            quotes = pricing.quote_layouts(
+                (candidate['bases'] + candidate['uppers'] for candidate in candidates), line
+            )
+    except Exception as e:
+        logger.exception("quote failed", extra={"line": line.name, "layouts": len(candidates)})
+        return Response({'error': str(e)}, status=500)
+
+    with timed("serialization"):
+        results = []
+        for candidate, row in zip(candidates, quotes):
+            result = pricing.quote_details(row)
+            if 'strategy' in candidate:
+                result['strategy'] = candidate['strategy']
+            result['bases'] = [cabinet.name for cabinet in candidate['bases']]
+            result['uppers'] = [cabinet.name for cabinet in candidate['uppers']]
+            results.append(result)
+    return Response({'quotes': results, 'cheapest': int(quotes['total'].argmin())})
+
+@api_view(['GET'])
+def wall_run_layout(request, wall_run_id):
+    """
+    Endpoint that lays out a saved wall run around its obstacles.
+
+    Query parameters:
+    - strategy (optional): The fill strategy to use instead of the defaults (see generate_wall).
+    - line (optional): The catalog line to lay the wall run out from (see generate_wall).
+
+    The response has the same "cabinets" and "segments" as generate_wall with obstacles.
+    """
+    try:
+        wall_run = WallRun.objects.get(pk=wall_run_id)
+    except WallRun.DoesNotExist:
+        return Response({'error': f'Wall run {wall_run_id} does not exist'}, status=404)
+
+    index = obstacles.ObstacleIndex.for_wall_run(wall_run_id)
+    params = request.query_params
+    try:
+        line = get_catalog(params.get('line'))
+        return Response(obstacle_wall_payload(wall_run.width, wall_run.orientation, index, params.get('strategy'), line))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+@api_view(['GET'])
+def wall_run_obstacles(request, wall_run_id):
+    """
+    Endpoint that finds the obstacles in part of a saved wall run.
+
+    Query parameters:
+    - start / end (optional): The part of the wall run to look in, in inches from its start
+      (default: the whole wall run).
+    - layer (optional): Only return the obstacles that block "bases" or "uppers".
+
+    The response lists the obstacles that overlap the part under "obstacles", ordered by position.
+    """
+    try:
+        wall_run = WallRun.objects.get(pk=wall_run_id)
+    except WallRun.DoesNotExist:
+        return Response({'error': f'Wall run {wall_run_id} does not exist'}, status=404)
+
+    try:
+        start = float(request.query_params.get('start', 0))
+        end = float(request.query_params.get('end', wall_run.width))
+        found = obstacles.ObstacleIndex.for_wall_run(wall_run_id).blocking(start, end, request.query_params.get('layer'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    return Response({'obstacles': [obstacle_details(obstacle) for obstacle in found]})
+
+@api_view(['GET'])
+def cabinets_in_rect(request):
+    """
+    Endpoint that finds the placed cabinets whose footprints overlap a rectangle.
+
+    Query parameters:
+    - x / y: The corner of the rectangle (in inches).
+    - width / depth: The size of the rectangle (in inches).
+    - room (optional): The id of the room to look in. Without it, the cabinets that aren't on a
+      wall run are searched.
+    - layer (optional): Only return the "bases" or the "uppers".
+
+    The footprints come from the in-memory spatial index (see object/spatial.py), so the query only
+    looks at the cabinets near the rectangle. The response lists them under "cabinets", ordered by
+    position (the bases before the uppers).
+    """
+    params = request.query_params
+    try:
+        x, y, width, depth = (float(params[name]) for name in ('x', 'y', 'width', 'depth'))
+        room = int(params['room']) if params.get('room') else None
+        with timed("layout"):
+            found = cabinet_index.query(room, x, y, x + width, y + depth, params.get('layer'))
+    except KeyError as e:
+        return Response({'error': f'Missing query parameter: {str(e)}'}, status=400)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    return Response({'cabinets': [footprint_details(footprint) for footprint in found]})
+
+@api_view(['GET'])
+def layout_cache_stats(request):
+    """
+    Endpoint that reports the generate_wall result cache counters.
+
+    The response contains the hits, misses, evictions, current size, max size and hit rate of the cache,
+    which can be used to size LAYOUT_CACHE_SIZE under real load.
+    """
+    return Response({"layout_cache": layout_cache.stats()})
+
+@api_view(['GET'])
+def cabinet_catalog(request):
+    """
+    Endpoint that lists the catalog lines the layout endpoints can use (see object/catalog.py).
+
+    Query parameters:
+    - line (optional): Only return this line, with its SKUs.
+
+    Without a line, the response has the name, manufacturer and number of SKUs of every line under
+    "lines" and the name of the active line under "active". With a line, it has the line's name,
+    manufacturer and SKUs (each with its name, kind, width, height, depth and price).
+    """
+    name = request.query_params.get('line')
+    if name is not None:
+        try:
+            return Response(get_catalog(name).to_dict())
+        except ValueError as e:
+            return Response({'error': str(e)}, status=404)
+
+    return Response({
+        'active': get_catalog().name,
+        'lines': [
+            {'name': line.name, 'manufacturer': line.manufacturer, 'items': len(line.entries)}
+            for line in get_lines().values()
+        ]
+    })
+
+@api_view(['POST'])
+def submit_job(request):
+    """
+    Endpoint that queues a long-running request for the background workers (see object/jobs.py).
+
+    This endpoint accepts a POST request with the following JSON payload:
+    - kind: What to run: "project_layout" (every wall run of a saved project), "generate_room",
+      "search_wall" (with a time budget of up to JOB_SEARCH_TIME_BUDGET) or "quote_walls" (prices
+      many wall widths with several fill strategies).
+    - params: The parameters of the job, as for the matching endpoint (project_layout takes a
+      project id, and an optional strategy and line; quote_walls takes widths, orientation,
+      strategies and line).
+
+    The response has status 202 and the job (with its id) under "job". Its status and progress are
+    at jobs/<id>/ and, once it is done, its result at jobs/<id>/result/.
+    """
+    try:
+        job = jobs.submit(request.data.get('kind'), request.data.get('params'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    return Response({'job': jobs.job_details(job)}, status=202)
+
+@api_view(['GET'])
+def job_status(request, job_id):
+    """
+    Endpoint that reports on a job: its status (queued, running, done, failed or cancelled),
+    progress (from 0 to 1), what it is doing, its error if it failed and when it was submitted,
+    started and finished.
+    """
+    try:
+        return Response({'job': jobs.job_details(Job.objects.get(pk=job_id))})
+    except Job.DoesNotExist:
+        return Response({'error': f'Job {job_id} does not exist'}, status=404)
+
+@api_view(['GET'])
+def job_result(request, job_id):
+    """
+    Endpoint that returns the result of a finished job under "result" (with the job under "job").
+
+    A job that hasn't finished yet gets status 409, and one that failed or was cancelled has no result.
+    """
+    try:
+        job = Job.objects.get(pk=job_id)
+    except Job.DoesNotExist:
+        return Response({'error': f'Job {job_id} does not exist'}, status=404)
+    if job.status not in Job.FINISHED:
+        return Response({'error': f'Job {job_id} is {job.status}', 'job': jobs.job_details(job)}, status=409)
+    return Response({'job': jobs.job_details(job), 'result': job.result})
+
+@api_view(['POST'])
+def cancel_job(request, job_id):
+    """
+    Endpoint that cancels a job. A queued job is cancelled at once and a running one stops at its
+    next progress update; the response has the job under "job". A job that has already finished
+    gets status 409.
+    """
+    try:
+        return Response({'job': jobs.job_details(jobs.cancel(job_id))})
+    except Job.DoesNotExist:
+        return Response({'error': f'Job {job_id} does not exist'}, status=404)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=409)
+
+# Helper function for place_cabinets
+def build_cabinet(placement):
+    """
+    Creates an unsaved Cabinet from one placement of a place_cabinets request.
+
+    Args:
+        placement (dict): The cabinet's attributes under "cabinet" (name, width, height, depth),
+            its position under "x" and "y" and optionally its wall run's id under "wall_run".
+
+    Returns:
+        Cabinet: The cabinet, ready to be saved.
+
+    Raises:
+        KeyError: If the cabinet data is missing a key.
+        TypeError: If the placement is not a dictionary or a position is not a number.
+        ValueError: If the position is missing or the width is not a valid cabinet size.
+    """
+    if not isinstance(placement, dict) or not isinstance(placement.get('cabinet'), dict):
+        raise TypeError('Each placement needs a cabinet dictionary')
+    if placement.get('x') is None or placement.get('y') is None:
+        raise ValueError('Each placement needs an x and y position')
+
+    wall_run = placement.get('wall_run')
+    if wall_run is not None and (isinstance(wall_run, bool) or not isinstance(wall_run, int)):
+        raise TypeError('wall_run must be the id of a wall run')
+
+    cabinet_data = placement['cabinet']
+    return Cabinet(
+        name=cabinet_data['name'],
+        width=cabinet_data['width'],
+        height=cabinet_data['height'],
+        depth=cabinet_data['depth'],
+        position_x=geometry.snap(placement['x']),
+        position_y=geometry.snap(placement['y']),
+        wall_run_id=wall_run
+    )
+
+# Helper function for place_cabinets
+def build_cabinets(placements):
+    """
+    Creates unsaved Cabinets for every valid placement of a place_cabinets request.
+
+    Args:
+        placements (list): The placements (see build_cabinet).
+
+    Returns:
+        tuple: The list of Cabinets for the valid placements, and a list of {index, error}
+        dictionaries for the invalid ones.
+    """
+    cabinets = []
+    errors = []
+    for index, placement in enumerate(placements):
+        try:
+            cabinets.append(build_cabinet(placement))
+        except KeyError as e:
+            errors.append({'index': index, 'error': f'Missing key in cabinet data: {str(e)}'})
+        except (TypeError, ValueError) as e:
+            errors.append({'index': index, 'error': str(e)})
+    return cabinets, errors
+
+# Helper function for place_cabinets
+def cabinet_details(cabinet):
+    """
+    Formats a saved cabinet for an API response.
+
+    Args:
+        cabinet (Cabinet): The saved cabinet.
+
+    Returns:
+        dict: The cabinet's id, name, dimensions and position.
+    """
+    dimensions = cabinet.get_dimensions()
+    position = cabinet.get_position()
+    return {
+        'id': cabinet.pk,
+        'name': str(cabinet),
+        'width': dimensions['width'],
+        'height': dimensions['height'],
+        'depth': dimensions['depth'],
+        'position_x': position['x'],
+        'position_y': position['y']
+    }
+
+# Ways the placement endpoints can handle a cabinet that overlaps another one
+OVERLAP_MODES = ("reject", "report")
+
+# Helper function for place_cabinet (and its async version)
+def save_cabinet(cabinet, on_overlap):
+    """
+    Checks a cabinet's footprint against the placed cabinets and saves it unless it is rejected.
+
+    The spatial index's lock is held from the check until the cabinet is saved (and indexed by the
+    post_save signal), so no other request can claim the same space in between.
+
+    Args:
+        cabinet (Cabinet): The unsaved cabinet.
+        on_overlap (str): "reject" or "report" (see OVERLAP_MODES).
+
+    Returns:
+        tuple: The placed cabinets it overlaps, and whether it was saved.
+    """
+    with cabinet_index.lock:
+        overlapping = cabinet_index.conflicts([cabinet])[0]
+        if overlapping and on_overlap == 'reject':
+            return overlapping, False
+        with transaction.atomic():
+            cabinet.save()
+    return overlapping, True
+
+# Helper function for place_cabinets (and its async version)
+def save_cabinets(cabinets, labels, on_overlap, partial=False):
+    """
+    Checks cabinets for overlaps and saves the valid ones with a single INSERT.
+
+    The spatial index's lock is held from the overlap check until the new cabinets are indexed, and
+    the insert, the snapshot invalidation and the bill-of-materials counts run in one transaction, so
+    either all of them happen or none do.
+
+    Args:
+        cabinets (list): The unsaved cabinets.
+        labels (list): The placement label of each cabinet (see placement_labels).
+        on_overlap (str): "reject" or "report" (see OVERLAP_MODES).
+        partial (bool): Whether to save the valid cabinets when some are rejected.
+
+    Returns:
+        tuple: The saved cabinets (None if nothing was saved because cabinets were rejected and
+        partial is false), the rejected placements and, in "report" mode, the overlaps of each saved
+        cabinet (see check_overlaps).
+    """
+    with cabinet_index.lock:
+        cabinets, overlap_errors, reported = check_overlaps(cabinets, labels, on_overlap)
+        if overlap_errors and not partial:
+            return None, overlap_errors, reported
+
+        # Save all valid cabinets with a single INSERT in one transaction
+        with transaction.atomic():
+            created = Cabinet.objects.bulk_create(cabinets)
+            # bulk_create doesn't send post_save, so clear the snapshots of changed projects and
+            # count the new cabinets in the bill-of-materials summary here
+            projects.invalidate_snapshots(wall_run_ids=[cabinet.wall_run_id for cabinet in created])
+            bom.record_cabinets(created)
+        cabinet_index.record_cabinets(created)
+    return created, overlap_errors, reported
+
+# Helper function for place_cabinets
+def placement_labels(placements, errors):
+    """
+    Returns the {index} label of each valid placement of a request, in order.
+
+    Args:
+        placements (list): The placements of the request.
+        errors (list): The {index, error} dictionaries of the invalid placements (see build_cabinets).
+    """
+    invalid = {error['index'] for error in errors}
+    return [{'index': index} for index in range(len(placements)) if index not in invalid]
+
+# Helper function for place_cabinets and create_project
+def check_overlaps(cabinets, labels, on_overlap, placed=True):
+    """
+    Checks a batch of new cabinets for overlaps (see SpatialIndex.conflicts).
+
+    Args:
+        cabinets (list): The unsaved Cabinets.
+        labels (list): What identifies each cabinet in the request (e.g. {'index': 3}).
+        on_overlap (str): "reject" to leave out the cabinets that overlap something, or "report" to keep them.
+        placed (bool): Whether to check against the placed cabinets (False for the walls of a new project).
+
+    Returns:
+        tuple: The cabinets to save, an error (the cabinet's label with "error" and "overlaps") for
+        each rejected cabinet, and the label with "overlaps" of each kept cabinet that overlaps something.
+    """
+    found = cabinet_index.conflicts(cabinets, keep_conflicting=on_overlap == 'report', placed=placed)
+    kept = []
+    errors = []
+    reported = []
+    for cabinet, label, overlapping in zip(cabinets, labels, found):
+        if not overlapping:
+            kept.append(cabinet)
+        elif on_overlap == 'reject':
+            errors.append({**label, 'error': 'The cabinet overlaps other cabinets', 'overlaps': overlap_details(overlapping, labels)})
+        else:
+            kept.append(cabinet)
+            reported.append({**label, 'overlaps': overlap_details(overlapping, labels)})
+    return kept, errors, reported
+
+def overlap_details(overlapping, labels=None):
+    """
+    Formats what a cabinet overlaps for an API response.
+
+    Args:
+        overlapping (list): Footprints of placed cabinets and indexes of cabinets of the same request
+            (see SpatialIndex.conflicts).
+        labels (list): What identifies each cabinet of the request (default: {index}).
+
+    Returns:
+        list: The details of each placed cabinet (see footprint_details) and the label of each
+        cabinet of the request.
+    """
+    return [
+        (labels[found] if labels else {'index': found}) if isinstance(found, int) else footprint_details(found)
+        for found in overlapping
+    ]
+
+def footprint_details(footprint):
+    """
+    Formats the footprint of a placed cabinet for an API response.
+
+    Args:
+        footprint (Footprint): The footprint (see object/spatial.py).
+
+    Returns:
+        dict: The cabinet's id, name, wall run id, position and footprint width and depth.
+    """
+    return {
+        'id': footprint.id,
+        'name': footprint.name,
+        'wall_run': footprint.wall_run_id,
+        'position_x': footprint.x,
+        'position_y': footprint.y,
+        'width': footprint.width,
+        'depth': footprint.depth
+    }
+
+# Helper function for generate_wall and create_project
+def build_obstacles(specs):
+    """
+    Creates (unsaved) obstacles from their request format.
+
+    Args:
+        specs (list): The obstacles, each a dictionary with a kind, a start and an optional width.
+
+    Returns:
+        list: The Obstacles.
+
+    Raises:
+        ValueError: If an obstacle is not valid.
+    """
+    if not isinstance(specs, list):
+        raise ValueError("obstacles must be a list")
+    built = []
+    for index, spec in enumerate(specs):
+        if not isinstance(spec, dict) or spec.get('start') is None:
+            raise ValueError(f"Obstacle {index} needs a kind and a start")
+        try:
+            built.append(Obstacle(
+                kind=spec.get('kind'),
+                position_x=geometry.snap(spec['start']),
+                width=geometry.snap(spec.get('width') or 0),
+                height=geometry.snap(spec.get('height') or 0),
+            ))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Obstacle {index}: {e}")
+    return built
+
+def obstacle_details(obstacle):
+    """
+    Formats an obstacle for an API response.
+
+    Args:
+        obstacle (Obstacle): The obstacle.
+
+    Returns:
+        dict: The obstacle's id (None if it isn't saved), kind, start, end, width and height.
+    """
+    return {
+        'id': obstacle.pk,
+        'kind': obstacle.kind,
+        'start': obstacle.start,
+        'end': obstacle.end,
+        'width': obstacle.width,
+        'height': obstacle.height
+    }
+
+# Helper function for generate_wall and wall_run_layout
+def obstacle_wall_payload(width, orientation, index, strategy=None, catalog=None):
+    """
+    Builds the response payload for a wall laid out around its obstacles.
+
+    Args:
+        width (float): The width of the wall (in inches).
+        orientation (str): The orientation of the wall (one of "left", "top", or "right").
+        index (ObstacleIndex): The wall's obstacles.
+        strategy (str): An optional fill strategy (see Wall.FILL_STRATEGIES).
+        catalog (Catalog): The line to lay the wall out from (defaults to the active line).
+
+    Returns:
+        dict: The base and upper cabinets in order under "cabinets" (as for generate_wall) and the
+        pieces of each layer under "segments".
+
+    Raises:
+        ValueError: If the orientation or strategy is not valid.
+    """
+    if orientation not in ORIENTATION_GENERATIONS:
+        raise ValueError(f"{orientation} is not a valid entry for orientation type")
+    with timed("layout"):
+        plan = obstacles.plan_wall(width, ORIENTATION_GENERATIONS[orientation], index, strategy, catalog)
+
+    with timed("serialization"):
+        payload = {"cabinets": {}, "segments": {}}
+        for layer, is_base in (("bases", True), ("uppers", False)):
+            payload["cabinets"][layer] = extract_cabinet_details(obstacles.plan_tokens(plan[layer]), is_base, catalog)
+            payload["segments"][layer] = [
+                {"start": piece["start"], "end": piece["end"], "obstacle": obstacle_details(piece["obstacle"])}
+                if "obstacle" in piece else
+                {"start": piece["start"], "end": piece["end"], "cabinets": extract_cabinet_details(piece["cabinets"], is_base, catalog)}
+                for piece in plan[layer]
+            ]
+    return payload
+
+# Helper function for render_wall and render_project
+def drawing_response(chunks, fmt, filename):
+    """
+    Streams a drawing to the client.
+
+    Args:
+        chunks (iterable): The bytes of the drawing (see render.render).
+        fmt (str): The format of the drawing ("svg" or "pdf").
+        filename (str): The name of the downloaded file, without the extension.
+
+    Returns:
+        StreamingHttpResponse: The response.
+    """
+    response = StreamingHttpResponse(chunks, content_type=render.CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+# Helper function for kbest_wall
+def ndjson_layouts(layouts, catalog):
+    """
+    Writes ranked wall layouts as newline-delimited JSON, one layout per line.
+
+    Args:
+        layouts (iterable): (score, bases, uppers, objectives) tuples (see kbest.wall_layouts).
+        catalog (Catalog): The line the heights and depths are read from.
+
+    Yields:
+        bytes: One line of JSON per layout.
+    """
+    for rank, (score, bases, uppers, objectives) in enumerate(layouts, 1):
+        yield json.dumps({
+            "rank": rank,
+            "score": round(score, 6),
+            "objectives": {name: round(value, 6) for name, value in objectives.items()},
+            "cabinets": {
+                "bases": extract_cabinet_details(bases, is_base=True, catalog=catalog),
+                "uppers": extract_cabinet_details(uppers, is_base=False, catalog=catalog)
+            }
+        }).encode() + b"\n"
+
+# Generation methods used for each wall orientation, as (base method, upper method)
+ORIENTATION_GENERATIONS = {
+    "left": ("b1", "u1"),
+    "top": ("b2", "u2"),
+    "right": ("b1", "u1"),
+}
+
 # Helper function for generate_wall
-def extract_cabinet_details(cabinets, is_base=True):
+def layout_wall(width, orientation, strategy=None, catalog=None):
+    """
+    Generates the base and upper cabinet layout for a wall.
+
+    Layouts for the default strategy are read from the precomputed layout table when the width is
+    in its range (and the table was built for the same catalog line); everything else runs the layout
+    algorithms on a new Wall.
+
+    Args:
+        width (float): The width of the wall (in inches).
+        orientation (str): The orientation of the wall (one of "left", "top", or "right").
+        strategy (str): An optional fill strategy (see Wall.FILL_STRATEGIES).
+        catalog (Catalog): The line to lay the wall out from (defaults to the active line).
+
+    Returns:
+        tuple: The CabinetTokens for the base cabinets and for the upper cabinets.
+
+    Raises:
+        ValueError: If the orientation or strategy is not valid.
+    """
+    if orientation not in ORIENTATION_GENERATIONS:
+        # Raise an error if the orientation is not valid
+        raise ValueError(f"{orientation} is not a valid entry for orientation type")
+    base_generation, upper_generation = ORIENTATION_GENERATIONS[orientation]
+
+    table = layout_table.get_table()
+    if strategy is None and table is not None:
+        bases = table.lookup(width, base_generation, catalog)
+        uppers = table.lookup(width, upper_generation, catalog)
+        if bases is not None and uppers is not None:
+            return bases, uppers
+
+    # Create a Wall object with the given width
+    wall = Wall(width=width, catalog=catalog)
+    fill = wall.get_fill(strategy)  # None keeps the default fill for each generation method
+    getattr(wall, f"generation_{base_generation}")(fill)
+    getattr(wall, f"generation_{upper_generation}")(fill)
+    return wall.bases, wall.uppers
+
+# Helper function for create_project
+def validate_project_rooms(rooms):
+    """
+    Checks the rooms of a create_project request.
+
+    Args:
+        rooms (list): The "rooms" value of the request.
+
+    Returns:
+        str: A description of the problem, or None if the rooms are valid.
+    """
+    for room in rooms:
+        if not isinstance(room, dict) or not isinstance(room.get('walls', []), list):
+            return "Every room must be a dictionary with a list of walls"
+        for wall in room.get('walls', []):
+            if not isinstance(wall, dict) or wall.get('orientation') not in ORIENTATION_GENERATIONS:
+                return f"Every wall needs an orientation (one of {list(ORIENTATION_GENERATIONS)})"
+            if not isinstance(wall.get('width'), (int, float)) or isinstance(wall.get('width'), bool):
+                return "Every wall needs a numeric width"
+            if not isinstance(wall.get('cabinets', []), list):
+                return "The cabinets of a wall must be a list"
+            if not isinstance(wall.get('obstacles', []), list):
+                return "The obstacles of a wall must be a list"
+    return None
+
+# Helper function for generate_room
+def validate_room(walls):
+    """
+    Checks the walls of a generate_room request.
+
+    Args:
+        walls: The "walls" value of the request.
+
+    Returns:
+        str: A description of the problem, or None if the walls are valid.
+    """
+    if not isinstance(walls, list) or not walls:
+        return "walls must be a non-empty list"
+    if any(not isinstance(wall, dict) or wall.get("width") is None for wall in walls):
+        return "Every wall needs a width"
+    return None
+
+# Helper function for generate_room
+def room_payload(walls, strategy=None, catalog=None, progress=None):
+    """
+    Builds the generate_room response payload, laying out each distinct wall only once.
+
+    Args:
+        walls (list): The walls of the room, each a dictionary with a width and an orientation.
+        strategy (str): An optional fill strategy (see Wall.FILL_STRATEGIES).
+        catalog (Catalog): The line to lay the walls out from (defaults to the active line).
+        progress (callable): Optionally called with (walls done, number of walls) after each wall.
+
+    Returns:
+        dict: One entry per wall under "walls", in the same order as *walls*.
+
+    Raises:
+        ValueError: If an orientation or the strategy is not valid.
+    """
+    layouts = {}  # Payloads by width and generation methods, so each distinct wall is laid out once
+    room_walls = []
+    for wall in walls:
+        key = (geometry.to_units(wall["width"]), ORIENTATION_GENERATIONS.get(wall.get("orientation"), wall.get("orientation")))
+        if key not in layouts:
+            layouts[key] = wall_payload(wall["width"], wall.get("orientation"), strategy, catalog)
+        room_walls.append({
+            "width": wall["width"],
+            "orientation": wall.get("orientation"),
+            "cabinets": layouts[key]["cabinets"]
+        })
+        if progress is not None:
+            progress(len(room_walls), len(walls))
+    return {"walls": room_walls}
+
+# Helper function for generate_room
+def solved_room_payload(walls, corners=None, strategy=None, catalog=None):
+    """
+    Builds the generate_room response payload with the room-level corner solver.
+
+    Args:
+        walls (list): The walls of the room, each a dictionary with a width (and an optional orientation).
+        corners (list): Optional [wall, next wall] index pairs that meet at a corner (see room_solver.solve_room).
+        strategy (str): An optional fill strategy (see Wall.FILL_STRATEGIES).
+        catalog (Catalog): The line to lay the room out from (defaults to the active line).
+
+    Returns:
+        dict: One entry per wall under "walls", the chosen corners under "corners" and the total
+        filler of the bases and uppers under "filler".
+
+    Raises:
+        ValueError: If a width, the corners or the strategy are not valid.
+    """
+    widths = [float(wall["width"]) for wall in walls]
+    with timed("layout"):
+        solution = room_solver.solve_room(widths, corners, strategy or room_solver.DEFAULT_STRATEGY, catalog)
+    with timed("serialization"):
+        return {
+            "walls": [
+                {
+                    "width": wall["width"],
+                    "orientation": wall.get("orientation"),
+                    "cabinets": {
+                        "bases": extract_cabinet_details(layout["bases"], is_base=True, catalog=catalog),
+                        "uppers": extract_cabinet_details(layout["uppers"], is_base=False, catalog=catalog)
+                    }
+                }
+                for wall, layout in zip(walls, solution.walls)
+            ],
+            "corners": solution.corners,
+            "filler": solution.filler
+        }
+
+# Helper function for search_wall
+def search_payload(width, orientation, weights=None, time_budget=None, progress=None, catalog=None):
+    """
+    Builds the search_wall response payload.
+
+    Args:
+        width (float): The width of the wall (in inches).
+        orientation (str): The orientation of the wall (one of "left", "top", or "right").
+        weights (dict): Optional weights for the objectives (see search.DEFAULT_WEIGHTS).
+        time_budget (float): Seconds to search for.
+        progress (callable): Optionally called as the search goes (see search.search_wall).
+        catalog (Catalog): The line to lay the wall out from (defaults to the active line).
+
+    Returns:
+        dict: The best layout under "cabinets", the candidate chosen for the bases and the uppers,
+        how many candidates were evaluated and whether the search finished in time.
+
+    Raises:
+        ValueError: If the orientation or a weight is not valid.
+    """
+    with timed("layout"):
+        result = search.search_wall(width, orientation, weights, time_budget, progress, catalog)
+
+    with timed("serialization"):
+        cabinets = {
+            "bases": extract_cabinet_details(result["bases"], is_base=True, catalog=catalog),
+            "uppers": extract_cabinet_details(result["uppers"], is_base=False, catalog=catalog)
+        }
+    return {
+        "cabinets": cabinets,
+        "bases": result["bases_candidate"],
+        "uppers": result["uppers_candidate"],
+        "evaluated": result["evaluated"],
+        "complete": result["complete"]
+    }
+
+# Helper function for generate_wall and generate_room
+def wall_payload(width, orientation, strategy=None, catalog=None):
+    """
+    Builds the "cabinets" response payload for a wall, reusing cached payloads when possible.
+
+    Args:
+        width (float): The width of the wall (in inches).
+        orientation (str): The orientation of the wall (one of "left", "top", or "right").
+        strategy (str): An optional fill strategy (see Wall.FILL_STRATEGIES).
+        catalog (Catalog): The line to lay the wall out from (defaults to the active line).
+
+    Returns:
+        dict: The payload, with the details of the base and upper cabinets under "cabinets".
+        It is shared with the cache, so it must not be modified.
+
+    Raises:
+        ValueError: If the orientation or strategy is not valid.
+    """
+    # Reuse the payload if this wall has already been generated. Orientations that use the same
+    # generation methods (left and right) share entries, and widths are keyed by their exact length
+    # in quanta, so 120, 120.0 and "120" are one entry. Lines with the same sizes share entries too.
+    catalog = catalog or get_catalog()
+    cache_key = (
+        geometry.to_units(width), ORIENTATION_GENERATIONS.get(orientation, orientation), strategy,
+        Wall.ALGORITHM_VERSION, catalog.key
+    )
+    payload = layout_cache.get(cache_key)
+    if payload is not None:
+        return payload
+
+    with timed("layout"):
+        bases, uppers = layout_wall(width, orientation, strategy, catalog)
+
+    # Prepare the payload with the generated cabinet layout
+    with timed("serialization"):
+        payload = {
+            "cabinets": {
+                "bases": extract_cabinet_details(bases, is_base=True, catalog=catalog),
+                "uppers": extract_cabinet_details(uppers, is_base=False, catalog=catalog)
+            }
+        }
+    layout_cache.put(cache_key, payload)
+    return payload
+
+# Helper function for generate_wall
+def extract_cabinet_details(cabinets, is_base=True, catalog=None):
     """
     Extracts the details (name, width, height, depth) for each cabinet in the list.
     
     This function is used to format the cabinet data for the response of generate_wall.
 
     Args:
-        cabinets (list): A list of cabinet names.
+        cabinets (list): A list of CabinetTokens.
         is_base (bool): A flag to indicate whether the cabinets are base cabinets or upper cabinets.
+        catalog (Catalog): The line the heights and depths are read from (defaults to the active line).
     
     Returns:
         list: A list of dictionaries containing the cabinet details (name, width, height, depth).
     """
+    dimensions = (catalog or get_catalog()).dimensions
     cabinet_details = []
     for cabinet in cabinets:
-        if cabinet[0] in ["B", "F", "U", "C"]:  # Consider all cabinet types
-            try:
-                # Handle special cases for corner cabinets
-                if cabinet == "BC36":  # Base corner cabinet
-                    cab_width = 36
-                    cab_height = 36
-                    cab_depth = 36
-                    cabinet_details.append({
-                        "name": cabinet,
-                        "width": cab_width,
-                        "height": cab_height,
-                        "depth": cab_depth
-                    })
-                    continue
-                if cabinet == "UC24":  # Upper corner cabinet
-                    cab_width = 24
-                    cab_height = 24
-                    cab_depth = 24
-                    cabinet_details.append({
-                        "name": cabinet,
-                        "width": cab_width,
-                        "height": cab_height,
-                        "depth": cab_depth
-                    })
-                    continue
-
-                # Handle regular cabinets by extracting their dimensions
-                cab_width = int(cabinet[1:]) if cabinet[1:].isdigit() else 0
-                cab_height = Cabinet.STANDARD_HEIGHT
-                cab_depth = (
-                    Cabinet.STANDARD_BASE_DEPTH if is_base else Cabinet.STANDARD_UPPER_DEPTH
-                )
+        # The SKU's own dimensions; fillers take the layer's standard ones (see Catalog.dimensions)
+        cab_height, cab_depth = dimensions(cabinet, is_base)
 
-                cabinet_details.append({
-                    "name": cabinet,
-                    "width": cab_width,
-                    "height": cab_height,
-                    "depth": cab_depth
-                })
-            except ValueError:
-                # Skip invalid cabinet entries
-                print(f"Skipping invalid cabinet entry: {cabinet}")
+        cabinet_details.append({
+            "name": cabinet.name,
+            "width": cabinet.width,
+            "height": cab_height,
+            "depth": cab_depth
+        })
     return cabinet_details
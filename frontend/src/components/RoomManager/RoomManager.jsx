@@ -1,10 +1,11 @@
-import { useState } from "react";  // Importing useState hook for managing component state
+import { useEffect, useState } from "react";  // Importing hooks for managing component state and side effects
 import Wall from "../Wall/Wall.jsx";  // Import the Wall component to render walls in the room
 import { Group, Layer, Stage } from "react-konva";  // Importing Konva components for canvas drawing
 import { defaultGridOffset, defaultInchPx } from "../../../utils/globalVars.js";  // Import global constants for grid offset and inch-to-pixel conversion
 import './RoomManager.css';  // Importing CSS for styling the RoomManager component
 import CabinetKey from '../CabinetKey/CabinetKey.jsx';  // Import CabinetKey component for displaying key information
 import CabinetMenu from "../CabinetMenu/CabinetMenu.jsx";  // Import CabinetMenu component for handling cabinet interactions
+import { generateRoom } from "../../../utils/api.js";  // Import the API call that lays out every wall at once
 
 /**
  * @summary RoomManager component that manages the room layout and cabinet placements.
@@ -20,6 +21,31 @@ const RoomManager = () => {
     const [roomDetails, setRoomDetails] = useState(null);  // Stores the dimensions of the room
     const [isMenuVisible, setMenuVisible] = useState(false);  // Controls visibility of the cabinet menu
     const [selectedCabinet, setSelectedCabinet] = useState(null);  // Stores the selected cabinet for interaction
+    const [roomLayout, setRoomLayout] = useState(undefined);  // Stores the cabinet layouts of the walls, by orientation (undefined while loading)
+
+    // Lay out all walls of the room with a single request whenever the room dimensions change
+    useEffect(() => {
+        if (!roomDetails) return;
+        setRoomLayout(undefined);
+
+        const fetchRoom = async () => {
+            try {
+                const response = await generateRoom([
+                    { width: roomDetails.leftWallFeet, orientation: "left" },
+                    { width: roomDetails.topWallFeet, orientation: "top" },
+                    { width: roomDetails.rightWallFeet, orientation: "right" }
+                ]);
+                const layout = {};
+                response.walls.forEach((wall) => { layout[wall.orientation] = wall.cabinets; });
+                setRoomLayout(layout);
+            } catch (error) {
+                console.error(error);
+                setRoomLayout({});  // Let each wall request its own layout instead
+            }
+        };
+
+        fetchRoom();
+    }, [roomDetails]);
 
     /**
      * @summary Handles the room details input from the user.
@@ -101,25 +127,29 @@ const RoomManager = () => {
                         <h2>Room Layout</h2>
                         <Stage width={(roomDetails.topWallFeet * roomDetails.inchPx) + (defaultGridOffset * 2) + 15} height={getStageHeight()}>
                             <Layer>
-                                <Group x={defaultGridOffset} y={defaultGridOffset}>
+                                {/* Wait for the room layout so the walls don't each request their own */}
+                                {roomLayout !== undefined && <Group x={defaultGridOffset} y={defaultGridOffset}>
                                     {/* Render the walls with respective dimensions and click handlers */}
                                     <Wall 
                                         lengthFeet={roomDetails.leftWallFeet} 
                                         orientation="left" 
+                                        cabinets={roomLayout?.left}  // Layout fetched by generateRoom (if it has loaded)
                                         onCabinetClick={handleCabinetClick} // Pass click info down to Wall
                                     />
                                     <Wall 
                                         lengthFeet={roomDetails.rightWallFeet}
                                         orientation="right" 
+                                        cabinets={roomLayout?.right}  // Layout fetched by generateRoom (if it has loaded)
                                         offset={roomDetails.topWallFeet} 
                                         onCabinetClick={handleCabinetClick} // Pass click info down to Wall
                                     />
                                     <Wall 
                                         lengthFeet={roomDetails.topWallFeet} 
                                         orientation="top" 
+                                        cabinets={roomLayout?.top}  // Layout fetched by generateRoom (if it has loaded)
                                         onCabinetClick={handleCabinetClick} // Pass click info down to Wall
                                     />
-                                </Group>
+                                </Group>}
                             </Layer>
                         </Stage>
                     </div>
@@ -142,14 +142,23 @@ const getWallAndCabinets = (orientation, lengthFeet, inchPx, offset, bases, uppe
  * @param {number} props.footPx - The conversion factor for feet to pixels. Defaults to `defaultInchPx`.
  * @param {number} props.offset - The offset value for right-facing walls (only required for "right" orientation).
  * @param {function} props.onCabinetClick - Callback function triggered when a cabinet is clicked.
+ * @param {Object} props.cabinets - Optional layout ({ bases, uppers }) already fetched for the wall (e.g. by generateRoom).
+ *                                  When provided, the wall does not request its own layout.
  * @returns {JSX.Element|null} The JSX elements to render the wall and cabinets, or `null` if data is unavailable.
  */
-const Wall = ({ lengthFeet, orientation, footPx = defaultInchPx, offset, onCabinetClick }) => {
+const Wall = ({ lengthFeet, orientation, footPx = defaultInchPx, offset, onCabinetClick, cabinets }) => {
     const [error, setError] = useState(null);
     const [bases, setBases] = useState([]);
     const [uppers, setUppers] = useState([]);
 
     useEffect(() => {
+        // Use the layout passed in by the parent if there is one
+        if (cabinets) {
+            setBases(cabinets.bases);
+            setUppers(cabinets.uppers);
+            return;
+        }
+
         const fetchWall = async () => {
             try {
                 const response = await generateWall(lengthFeet, orientation);
@@ -168,7 +177,7 @@ const Wall = ({ lengthFeet, orientation, footPx = defaultInchPx, offset, onCabin
         };
 
         fetchWall();
-    }, [lengthFeet, orientation]);
+    }, [lengthFeet, orientation, cabinets]);
 
     if (error) return <p>{error}</p>;
     if (bases.length === 0 && uppers.length === 0) return null;
@@ -219,6 +228,10 @@ Wall.propTypes = {
         return null;
     },
     onCabinetClick: PropTypes.func.isRequired,
+    cabinets: PropTypes.shape({
+        bases: PropTypes.array.isRequired,
+        uppers: PropTypes.array.isRequired,
+    }),
 };
 
 export default Wall;
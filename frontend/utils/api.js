@@ -36,6 +36,27 @@ export const generateWall = async (width, orientation) => {
     }
 }
 
+// API function for generating the layouts of every wall in a room with one request
+/**
+ * Generates the cabinet layouts for all walls of a room at once.
+ *
+ * @param {Array<{width: number, orientation: string}>} walls - The walls of the room.
+ * @returns {Promise<Object>} - The response data from the API, with one layout per wall under `walls`.
+ */
+export const generateRoom = async (walls) => {
+    try {
+        // Send a POST request to the "/generate_room/" endpoint with every wall of the room
+        const response = await api.post("/generate_room/", {
+            walls
+        });
+        return response.data; // Return the data from the API response
+    } catch (error) {
+        // Log any errors that occur during the API request
+        console.error("API error (generateRoom):", error);
+        throw error; // Rethrow the error to be handled by the caller
+    }
+}
+
 // API function for placing a cabinet at a specified location
 /**
  * Places a cabinet at a specific (x, y) coordinate on the wall.